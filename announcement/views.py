@@ -10,7 +10,7 @@ from django.conf import settings
 import os
 from PIL import Image
 from .models import Announcement, AnnouncementReaction
-from notification.models import Notification
+from notification.inbox import create_broadcast
 from .forms import AnnouncementForm
 
 
@@ -74,13 +74,11 @@ def create_announcement(request):
         announcement.save()
 
         try:
-            Notification.objects.create(
+            create_broadcast(
                 title="New Announcement",
                 message=f"New announcement: {announcement.content[:30]}{'...' if len(announcement.content) > 30 else ''}",
                 notification_type="announcement",
                 sender=request.user,
-                recipient=request.user,
-                for_all=True,
                 module="announcement"
             )
         except Exception as e:
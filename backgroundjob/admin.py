@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import BackgroundJob, BackgroundJobFile
+
+class BackgroundJobFileInline(admin.TabularInline):
+    model = BackgroundJobFile
+    extra = 0
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['job_type', 'status', 'created_by', 'processed', 'total', 'success_count', 'error_count', 'created_at', 'finished_at']
+    list_filter = ['status', 'job_type', 'created_at']
+    search_fields = ['job_type', 'created_by__idnumber', 'created_by__firstname', 'created_by__lastname']
+    readonly_fields = ['id', 'created_at', 'started_at', 'heartbeat_at', 'finished_at']
+    inlines = [BackgroundJobFileInline]
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class BackgroundjobConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'backgroundjob'
+
+    def ready(self):
+        # Each app registers its job handlers in its own jobs.py
+        autodiscover_modules('jobs')
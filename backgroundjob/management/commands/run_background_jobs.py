@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.core.management.base import BaseCommand
+from django.db import connections
+from backgroundjob.runner import claim_next_job, execute_job, fail_stale_jobs, get_worker_count
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (uploads/imports) with a bounded worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of jobs to run concurrently (defaults to BACKGROUND_JOB_WORKERS)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the pending jobs and exit instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or get_worker_count()
+        self.stdout.write(self.style.SUCCESS(f'Background job worker started with {workers} worker(s)'))
+        self._fail_stale_jobs()
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='background-job') as executor:
+            try:
+                while True:
+                    while len(running) < workers:
+                        job_id = claim_next_job()
+                        if job_id is None:
+                            break
+                        self.stdout.write(f'Running job {job_id}')
+                        running.add(executor.submit(self._run, job_id))
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        # Jobs of a web process or another worker that died while running them
+                        self._fail_stale_jobs()
+                        continue
+
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    running = set(running)
+                    for future in done:
+                        job = future.result()
+                        self.stdout.write(f'Job {job.pk} finished: {job.status}')
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping worker, waiting for running jobs to finish...')
+
+        self.stdout.write(self.style.SUCCESS('Background job worker stopped'))
+
+    def _fail_stale_jobs(self):
+        settled = fail_stale_jobs()
+        if settled:
+            self.stdout.write(self.style.WARNING(f'Marked {settled} abandoned job(s) as failed'))
+
+    @staticmethod
+    def _run(job_id):
+        try:
+            return execute_job(job_id)
+        finally:
+            connections.close_all()
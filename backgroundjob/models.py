@@ -0,0 +1,105 @@
+import uuid
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from userlogin.models import EmployeeLogin
+
+class BackgroundJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job_type = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(EmployeeLogin, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    success_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched while a worker runs the job; a processing job without recent heartbeats was abandoned
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type} ({self.status}) - {self.created_at}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    @property
+    def percentage(self):
+        if self.is_finished:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, round(self.processed * 100 / self.total))
+
+    def update_progress(self, processed, total=None, **fields):
+        """
+        Persist progress without touching the rest of the row, so any worker
+        process serving the progress endpoint sees it.
+        """
+        fields['processed'] = processed
+        fields.setdefault('heartbeat_at', timezone.now())
+        if total is not None:
+            fields['total'] = total
+        for name, value in fields.items():
+            setattr(self, name, value)
+        BackgroundJob.objects.filter(pk=self.pk).update(**fields)
+
+    def mark_finished(self, status, result=None, error_message=None):
+        fields = {
+            'status': status,
+            'result': result,
+            'error_message': error_message,
+            'finished_at': timezone.now(),
+        }
+        if isinstance(result, dict):
+            for name in ('success_count', 'error_count'):
+                if isinstance(result.get(name), int):
+                    fields[name] = result[name]
+        processed = self.total if status == 'completed' and self.total else self.processed
+        self.update_progress(processed, **fields)
+
+    def open_files(self):
+        """Yield the uploaded files as Django File objects carrying their original names"""
+        for job_file in self.files.all():
+            yield job_file.open_upload()
+
+    def delete_files(self):
+        for job_file in self.files.all():
+            job_file.file.delete(save=False)
+        self.files.all().delete()
+
+
+class BackgroundJobFile(models.Model):
+    job = models.ForeignKey(BackgroundJob, on_delete=models.CASCADE, related_name='files')
+    file = models.FileField(upload_to='background_jobs/')
+    original_name = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.original_name
+
+    def open_upload(self):
+        return File(self.file.open('rb'), name=self.original_name)
@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import threading
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from .models import BackgroundJob, BackgroundJobFile
+import logging
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+STALE_JOB_MESSAGE = 'The worker running this job stopped before it finished. Please upload the file again.'
+
+
+def register_job(job_type):
+    """
+    Register a job handler. Handlers receive the BackgroundJob, may call
+    ``job.update_progress`` while they work, and return a JSON-serializable dict
+    that becomes ``job.result`` (what the endpoint used to return inline).
+    """
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+def get_worker_count():
+    return getattr(settings, 'BACKGROUND_JOB_WORKERS', 2)
+
+
+def get_lease():
+    """Seconds a processing job may go without a heartbeat before it is taken for abandoned"""
+    return getattr(settings, 'BACKGROUND_JOB_LEASE', 300)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_worker_count(), thread_name_prefix='background-job')
+            # First job since this process started: settle the jobs a previous process left behind
+            _executor.submit(_fail_stale_in_thread)
+        return _executor
+
+
+def enqueue_job(job_type, user, files=None, params=None, total=0):
+    """Persist a job (and its uploads) and hand it to a worker once the transaction commits"""
+    if job_type not in _handlers:
+        raise ValueError(f"Unknown background job type: {job_type}")
+
+    with transaction.atomic():
+        job = BackgroundJob.objects.create(
+            job_type=job_type,
+            created_by=user,
+            params=params or {},
+            total=total,
+        )
+        for uploaded_file in files or []:
+            BackgroundJobFile.objects.create(job=job, file=uploaded_file, original_name=uploaded_file.name)
+        transaction.on_commit(lambda: _dispatch(job.pk))
+
+    logger.info(f"Queued background job {job.pk} ({job_type})")
+    return job
+
+
+def _dispatch(job_id):
+    if getattr(settings, 'BACKGROUND_JOB_EAGER', False):
+        run_job(job_id)
+    elif getattr(settings, 'BACKGROUND_JOB_RUN_IN_PROCESS', True):
+        _get_executor().submit(_run_in_thread, job_id)
+    # Otherwise the run_background_jobs worker picks it up
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def _fail_stale_in_thread():
+    try:
+        fail_stale_jobs()
+    except Exception:
+        logger.exception('Could not settle abandoned background jobs')
+    finally:
+        connections.close_all()
+
+
+def _stale(now):
+    cutoff = now - timedelta(seconds=get_lease())
+    return Q(status='processing') & (Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff))
+
+
+def fail_stale_jobs():
+    """
+    Mark processing jobs whose worker died (no heartbeat within the lease) as
+    failed and remove their uploads. They are not run again: a handler may
+    have written part of its file already. Returns how many jobs were settled.
+    """
+    now = timezone.now()
+    settled = 0
+    for job in BackgroundJob.objects.filter(_stale(now)):
+        if not BackgroundJob.objects.filter(_stale(now), pk=job.pk).update(
+            status='failed',
+            finished_at=now,
+            error_message=STALE_JOB_MESSAGE,
+            result={'success': False, 'message': STALE_JOB_MESSAGE},
+        ):
+            continue
+        settled += 1
+        logger.warning(f"Background job {job.pk} ({job.job_type}) was abandoned by its worker and marked failed")
+        try:
+            job.delete_files()
+        except Exception as cleanup_error:
+            logger.error(f"Failed to remove uploads for job {job.pk}: {str(cleanup_error)}")
+    return settled
+
+
+def _keep_alive(job_id, stop):
+    """Touch the job's heartbeat until ``stop`` is set"""
+    try:
+        while not stop.wait(get_lease() / 3):
+            BackgroundJob.objects.filter(pk=job_id, status='processing').update(heartbeat_at=timezone.now())
+    except Exception:
+        logger.exception(f"Heartbeat of background job {job_id} stopped")
+    finally:
+        connections.close_all()
+
+
+def claim_job(job_id):
+    """Move a pending job to processing; only one worker can win the claim"""
+    now = timezone.now()
+    return BackgroundJob.objects.filter(pk=job_id, status='pending').update(
+        status='processing',
+        started_at=now,
+        heartbeat_at=now,
+    ) == 1
+
+
+def claim_next_job():
+    pending = BackgroundJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)[:20]
+    for job_id in pending:
+        if claim_job(job_id):
+            return job_id
+    return None
+
+
+def run_job(job_id):
+    if not claim_job(job_id):
+        return None
+    return execute_job(job_id)
+
+
+def execute_job(job_id):
+    """Run the handler of an already-claimed job and record its outcome"""
+    job = BackgroundJob.objects.select_related('created_by').get(pk=job_id)
+    handler = _handlers.get(job.job_type)
+    stop_heartbeat = threading.Event()
+    threading.Thread(
+        target=_keep_alive, args=(job.pk, stop_heartbeat), name=f'background-job-heartbeat-{job.pk}', daemon=True
+    ).start()
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job type {job.job_type}")
+        result = handler(job) or {}
+        job.mark_finished('completed', result=result)
+        logger.info(f"Background job {job.pk} ({job.job_type}) completed")
+    except Exception as e:
+        logger.exception(f"Background job {job.pk} ({job.job_type}) failed")
+        job.mark_finished('failed', result={'success': False, 'message': str(e)}, error_message=str(e))
+    finally:
+        stop_heartbeat.set()
+        try:
+            job.delete_files()
+        except Exception as cleanup_error:
+            logger.error(f"Failed to remove uploads for job {job.pk}: {str(cleanup_error)}")
+    return job
+
+
+def job_queued_response(job, message='File uploaded successfully. Processing started.', **extra):
+    """Response returned by upload endpoints once their work has been queued"""
+    return JsonResponse({
+        'success': True,
+        'queued': True,
+        'job_id': str(job.pk),
+        'progress_url': reverse('background_job_status', kwargs={'job_id': job.pk}),
+        'message': message,
+        **extra,
+    })
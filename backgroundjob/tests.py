@@ -0,0 +1,89 @@
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from io import BytesIO
+import pandas as pd
+
+from .models import BackgroundJob
+from .runner import STALE_JOB_MESSAGE, fail_stale_jobs
+from usercalendar.models import Timelogs
+from userlogin.models import EmployeeLogin
+
+@override_settings(BACKGROUND_JOB_EAGER=True)
+class BackgroundJobTest(TestCase):
+    def setUp(self):
+        self.admin_user = EmployeeLogin.objects.create(
+            username='admin',
+            firstname='Admin',
+            lastname='User',
+            email='admin@example.com',
+            idnumber='67890',
+            hr_admin=True
+        )
+        self.other_user = EmployeeLogin.objects.create(
+            username='other',
+            firstname='Other',
+            lastname='User',
+            email='other@example.com',
+            idnumber='11111'
+        )
+
+    def _timelog_upload(self):
+        buffer = BytesIO()
+        pd.DataFrame(
+            [['67890', 'Admin User', '08/15/2025 8:00am', 'IN'], ['00000', 'Ghost', '08/15/2025 8:00am', 'IN']],
+            columns=['ID Number', 'Name', 'Date and Time', 'Entry']
+        ).to_excel(buffer, index=False)
+        return SimpleUploadedFile('timelogs.xlsx', buffer.getvalue())
+
+    def test_upload_is_queued_and_result_is_served_by_status_endpoint(self):
+        self.client.force_login(self.admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('import_timelogs'), {'file': self._timelog_upload()})
+
+        data = response.json()
+        self.assertTrue(data['queued'])
+        job = BackgroundJob.objects.get(pk=data['job_id'])
+        self.assertEqual(job.status, 'completed')
+        self.assertFalse(job.files.exists())
+        self.assertEqual(Timelogs.objects.filter(employee=self.admin_user).count(), 1)
+
+        status = self.client.get(data['progress_url']).json()
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['result']['success_count'], 1)
+        self.assertEqual(status['result']['error_count'], 1)
+        self.assertEqual(status['success_count'], 1)
+
+    def test_status_endpoint_hides_other_users_jobs(self):
+        self.client.force_login(self.admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.post(reverse('import_timelogs'), {'file': self._timelog_upload()}).json()
+
+        self.client.force_login(self.other_user)
+        response = self.client.get(data['progress_url'])
+        self.assertEqual(response.status_code, 404)
+
+    def test_jobs_abandoned_by_their_worker_are_marked_failed(self):
+        now = timezone.now()
+        abandoned = BackgroundJob.objects.create(job_type='usercalendar.import_timelogs', status='processing', started_at=now - timedelta(hours=1), heartbeat_at=now - timedelta(minutes=10))
+        legacy = BackgroundJob.objects.create(job_type='usercalendar.import_timelogs', status='processing', started_at=now - timedelta(hours=1))
+        running = BackgroundJob.objects.create(job_type='usercalendar.import_timelogs', status='processing', started_at=now - timedelta(hours=1), heartbeat_at=now)
+        pending = BackgroundJob.objects.create(job_type='usercalendar.import_timelogs', status='pending')
+
+        with self.settings(BACKGROUND_JOB_LEASE=300):
+            self.assertEqual(fail_stale_jobs(), 2)
+        self.assertEqual(
+            {job.pk: job.status for job in BackgroundJob.objects.all()},
+            {abandoned.pk: 'failed', legacy.pk: 'failed', running.pk: 'processing', pending.pk: 'pending'}
+        )
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.error_message, STALE_JOB_MESSAGE)
+        self.assertIsNotNone(abandoned.finished_at)
+
+        # Progress writes count as heartbeats
+        BackgroundJob.objects.filter(pk=running.pk).update(heartbeat_at=now - timedelta(minutes=10))
+        running.update_progress(1)
+        with self.settings(BACKGROUND_JOB_LEASE=300):
+            self.assertEqual(fail_stale_jobs(), 0)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('<uuid:job_id>/', views.job_status, name='background_job_status'),
+]
@@ -0,0 +1,33 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from .models import BackgroundJob
+
+@login_required(login_url="user-login")
+@require_GET
+def job_status(request, job_id):
+    """Progress and, once finished, the result payload of a background job"""
+    job = BackgroundJob.objects.filter(pk=job_id).first()
+    if not job or (job.created_by_id != request.user.id and not request.user.is_superuser):
+        return JsonResponse({'success': False, 'message': 'Job not found'}, status=404)
+
+    response_data = {
+        'success': True,
+        'job_id': str(job.pk),
+        'job_type': job.job_type,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'percentage': job.percentage,
+        'success_count': job.success_count,
+        'error_count': job.error_count,
+        'errors': job.errors,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.error_message:
+        response_data['error_message'] = job.error_message
+    if job.is_finished:
+        response_data['result'] = job.result
+
+    return JsonResponse(response_data)
@@ -1,9 +1,10 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+import shutil
 import tempfile
 import os
 
@@ -12,6 +13,10 @@ from userlogin.models import EmployeeLogin
 
 class CertificateModelTest(TestCase):
     def setUp(self):
+        # Uploaded files go to a throwaway media root, not the static tree
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
         self.employee = EmployeeLogin.objects.create(
             username='testuser',
             firstname='Test',
@@ -28,6 +33,10 @@ class CertificateModelTest(TestCase):
             hr_admin=True
         )
 
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
     def test_certificate_creation(self):
         certificate = Certificate.objects.create(
             employee=self.employee,
@@ -97,6 +106,10 @@ class CertificateModelTest(TestCase):
 
 class CertificateViewsTest(TestCase):
     def setUp(self):
+        # Uploaded files go to a throwaway media root, not the static tree
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
         self.employee = EmployeeLogin.objects.create(
             username='testuser',
             firstname='Test',
@@ -120,6 +133,10 @@ class CertificateViewsTest(TestCase):
             content_type='application/pdf'
         )
 
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
     def test_delete_certificate_view(self):
         certificate = Certificate.objects.create(
             employee=self.employee,
@@ -26,6 +26,7 @@ from django.core.paginator import Paginator
 from .models import Certificate
 from .forms import BulkCertificateUploadForm
 from userlogin.models import EmployeeLogin
+from notification.outbox import enqueue_email
 
 @login_required
 def employee_dashboard(request):
@@ -378,9 +379,9 @@ Laguna, Technopark, Biñan, Laguna
         email.body = html_message
         
         email.attach_file(attachment_path, mimetype='application/pdf')
-        email.send()
+        enqueue_email(email, source='certificate')
         
-        logger.info(f"Email sent successfully for certificate {certificate_id}")
+        logger.info(f"Email queued for certificate {certificate_id}")
         
         if not certificate.is_pdf and 'temp_file' in locals():
             os.unlink(attachment_path)
@@ -1,3 +1,7 @@
 from django.contrib import admin
+from .models import DashboardCounter
 
-# Register your models here.
+@admin.register(DashboardCounter)
+class DashboardCounterAdmin(admin.ModelAdmin):
+    list_display = ['name', 'value', 'updated_at']
+    readonly_fields = ['updated_at']
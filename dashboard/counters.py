@@ -0,0 +1,86 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from userlogin.models import EmployeeLogin
+from leaverequest.models import LeaveRequest
+from ticketing.models import Ticket
+from .models import DashboardCounter
+import logging
+
+logger = logging.getLogger(__name__)
+
+OPEN_TICKET_STATUSES = ['Processing']
+PENDING_LEAVE_STATUSES = ['routing']
+
+# Counter name -> queryset whose count the counter materializes
+COUNTER_QUERIES = {
+    'total_employees': lambda: EmployeeLogin.objects.filter(is_active=True),
+    'open_tickets': lambda: Ticket.objects.filter(status__in=OPEN_TICKET_STATUSES),
+    'pending_leaves': lambda: LeaveRequest.objects.filter(status__in=PENDING_LEAVE_STATUSES),
+}
+
+# Counter name -> (model, field, whether a value of that field is counted); the
+# signals compare a record's loaded and saved states against these to apply deltas
+COUNTED_STATES = {
+    'total_employees': (EmployeeLogin, 'is_active', lambda value: bool(value)),
+    'open_tickets': (Ticket, 'status', lambda value: value in OPEN_TICKET_STATUSES),
+    'pending_leaves': (LeaveRequest, 'status', lambda value: value in PENDING_LEAVE_STATUSES),
+}
+
+
+def refresh_counter(name):
+    """Recount one counter from its source table and store the result"""
+    value = COUNTER_QUERIES[name]().count()
+    DashboardCounter.objects.update_or_create(name=name, defaults={'value': value})
+    return value
+
+
+def refresh_counters():
+    return {name: refresh_counter(name) for name in COUNTER_QUERIES}
+
+
+def apply_counter_delta(name, delta):
+    """
+    Move a stored counter by ``delta`` within the current transaction. A
+    counter that was never materialized is left for get_counters to compute.
+    """
+    if delta:
+        # Drift must never fail the save that reports it; the next recount corrects the value
+        DashboardCounter.objects.filter(name=name).update(value=Greatest(F('value') + delta, Value(0)))
+
+
+def schedule_counter_refresh(name):
+    """Refresh a counter once the current transaction commits (immediately outside one)"""
+    def refresh():
+        try:
+            refresh_counter(name)
+        except Exception as e:
+            logger.error(f"Failed to refresh dashboard counter {name}: {str(e)}")
+    transaction.on_commit(refresh)
+
+
+def get_recount_interval():
+    return timedelta(seconds=getattr(settings, 'DASHBOARD_COUNTER_RECOUNT_INTERVAL', 900))
+
+
+def get_counters():
+    """
+    Read every dashboard counter with a single query. Counters that have never
+    been materialized (fresh database, new counter) are computed and stored.
+
+    Deltas from two loaded copies of the same record can both apply, so the
+    signals alone may drift. Counters not recounted within the recount
+    interval are recounted here; deltas are applied with update(), which
+    leaves updated_at at the last recount.
+    """
+    stale_before = timezone.now() - get_recount_interval()
+    counters = {}
+    for name, value, updated_at in DashboardCounter.objects.filter(name__in=COUNTER_QUERIES).values_list('name', 'value', 'updated_at'):
+        counters[name] = value if updated_at >= stale_before else refresh_counter(name)
+    for name in COUNTER_QUERIES:
+        if name not in counters:
+            counters[name] = refresh_counter(name)
+    return counters
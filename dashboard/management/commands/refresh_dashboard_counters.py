@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from dashboard.counters import refresh_counters
+
+class Command(BaseCommand):
+    help = 'Recount the materialized dashboard counters from their source tables'
+
+    def handle(self, *args, **options):
+        for name, value in refresh_counters().items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(self.style.SUCCESS('Dashboard counters refreshed'))
@@ -1,3 +1,15 @@
 from django.db import models
 
-# Create your models here.
+class DashboardCounter(models.Model):
+    """Company-wide totals shown on the overview, kept current by dashboard.signals"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Dashboard Counter'
+        verbose_name_plural = 'Dashboard Counters'
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -0,0 +1,78 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from userlogin.models import EmployeeLogin
+from leaverequest.models import LeaveRequest
+from ticketing.models import Ticket
+from .counters import COUNTED_STATES, apply_counter_delta, schedule_counter_refresh
+
+# Each record remembers whether it was counted when it was loaded, so a save or
+# delete moves its counter by the transition alone instead of recounting the
+# table. Records loaded with the field deferred fall back to a recount. Writes
+# that bypass signals (bulk_create, queryset.update) refresh their counter
+# directly, get_counters recounts any counter older than
+# DASHBOARD_COUNTER_RECOUNT_INTERVAL to bound drift from concurrent copies of a
+# record, and refresh_dashboard_counters recounts everything.
+
+def _state_key(name):
+    return f'_dashboard_counted_{name}'
+
+def _remember(name, instance):
+    _, field, counted = COUNTED_STATES[name]
+    # A deferred field is not loaded here, so reading an instance never costs a query
+    if field in instance.__dict__:
+        instance.__dict__[_state_key(name)] = counted(instance.__dict__[field])
+
+def _saved(name, instance, created, update_fields):
+    _, field, counted = COUNTED_STATES[name]
+    if update_fields is not None and field not in update_fields:
+        return
+    was_counted = False if created else instance.__dict__.get(_state_key(name))
+    is_counted = counted(getattr(instance, field))
+    if was_counted is None:
+        schedule_counter_refresh(name)
+    else:
+        apply_counter_delta(name, int(is_counted) - int(was_counted))
+    instance.__dict__[_state_key(name)] = is_counted
+
+def _deleted(name, instance):
+    was_counted = instance.__dict__.get(_state_key(name))
+    if was_counted is None:
+        schedule_counter_refresh(name)
+    elif was_counted:
+        apply_counter_delta(name, -1)
+
+@receiver(post_init, sender=EmployeeLogin)
+def employee_loaded(sender, instance, **kwargs):
+    _remember('total_employees', instance)
+
+@receiver(post_save, sender=EmployeeLogin)
+def employee_saved(sender, instance, created, update_fields=None, **kwargs):
+    _saved('total_employees', instance, created, update_fields)
+
+@receiver(post_delete, sender=EmployeeLogin)
+def employee_deleted(sender, instance, **kwargs):
+    _deleted('total_employees', instance)
+
+@receiver(post_init, sender=Ticket)
+def ticket_loaded(sender, instance, **kwargs):
+    _remember('open_tickets', instance)
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, update_fields=None, **kwargs):
+    _saved('open_tickets', instance, created, update_fields)
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    _deleted('open_tickets', instance)
+
+@receiver(post_init, sender=LeaveRequest)
+def leave_request_loaded(sender, instance, **kwargs):
+    _remember('pending_leaves', instance)
+
+@receiver(post_save, sender=LeaveRequest)
+def leave_request_saved(sender, instance, created, update_fields=None, **kwargs):
+    _saved('pending_leaves', instance, created, update_fields)
+
+@receiver(post_delete, sender=LeaveRequest)
+def leave_request_deleted(sender, instance, **kwargs):
+    _deleted('pending_leaves', instance)
@@ -1,3 +1,124 @@
+from datetime import date, timedelta
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from announcement.models import Announcement, AnnouncementReaction
+from leaverequest.models import LeaveRequest, LeaveType
+from userlogin.models import EmployeeLogin
+from .counters import get_counters
+from .models import DashboardCounter
+
+class DashboardCounterTest(TestCase):
+    def setUp(self):
+        self.user = EmployeeLogin.objects.create_user(
+            idnumber='10000', username='staff', firstname='Staff', lastname='User', password='secret'
+        )
+        self.leave_type = LeaveType.objects.create(name='Vacation Leave', code='VL')
+
+    def test_counters_follow_signals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            EmployeeLogin.objects.create_user(idnumber='10001', username='second', password='secret')
+            leave = LeaveRequest.objects.create(
+                employee=self.user, leave_type=self.leave_type, reason='Trip',
+                date_from=date(2025, 8, 4), date_to=date(2025, 8, 5), days_requested=2
+            )
+        self.assertEqual(get_counters()['total_employees'], 2)
+        self.assertEqual(get_counters()['pending_leaves'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            leave.status = 'approved'
+            leave.save()
+            self.user.active = False
+            self.user.save()
+        counters = get_counters()
+        self.assertEqual(counters['pending_leaves'], 0)
+        self.assertEqual(counters['total_employees'], 1)
+        self.assertEqual(counters['open_tickets'], 0)
+
+    def test_saves_move_counters_by_their_transition_without_recounting(self):
+        leave = LeaveRequest.objects.create(
+            employee=self.user, leave_type=self.leave_type, reason='Trip',
+            date_from=date(2025, 8, 4), date_to=date(2025, 8, 5), days_requested=2
+        )
+        self.assertEqual(get_counters()['pending_leaves'], 1)
+
+        leave = LeaveRequest.objects.get(pk=leave.pk)
+        with CaptureQueriesContext(connection) as queries:
+            leave.reason = 'Family trip'
+            leave.save()
+            leave.status = 'approved'
+            leave.save()
+            leave.save()
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+        self.assertEqual(get_counters()['pending_leaves'], 0)
+
+        LeaveRequest.objects.get(pk=leave.pk).delete()
+        second = LeaveRequest.objects.create(
+            employee=self.user, leave_type=self.leave_type, reason='Rest',
+            date_from=date(2025, 9, 1), date_to=date(2025, 9, 1), days_requested=1
+        )
+        self.assertEqual(get_counters()['pending_leaves'], 1)
+        LeaveRequest.objects.get(pk=second.pk).delete()
+        self.assertEqual(get_counters()['pending_leaves'], 0)
+
+        # A record loaded without the counted field falls back to a recount
+        with self.captureOnCommitCallbacks(execute=True):
+            employee = EmployeeLogin.objects.only('pk', 'idnumber').get(pk=self.user.pk)
+            employee.delete()
+        self.assertEqual(get_counters()['total_employees'], 0)
+
+    def test_drift_from_concurrent_copies_is_recounted_after_the_interval(self):
+        leave = LeaveRequest.objects.create(
+            employee=self.user, leave_type=self.leave_type, reason='Trip',
+            date_from=date(2025, 8, 4), date_to=date(2025, 8, 5), days_requested=2
+        )
+        leave.status = 'approved'
+        leave.save()
+        self.assertEqual(get_counters()['pending_leaves'], 0)
+
+        # Both copies were loaded as approved, so both saves apply the +1
+        first, second = LeaveRequest.objects.get(pk=leave.pk), LeaveRequest.objects.get(pk=leave.pk)
+        first.status = second.status = 'routing'
+        first.save()
+        second.save()
+        self.assertEqual(get_counters()['pending_leaves'], 2)
+        # A delta below zero is clamped instead of failing the save
+        for copy in (first, second, LeaveRequest.objects.get(pk=leave.pk)):
+            copy.status = 'approved'
+            copy.save()
+        self.assertEqual(get_counters()['pending_leaves'], 0)
+
+        first.status = 'routing'
+        first.save()
+        second.save()
+        self.assertEqual(get_counters()['pending_leaves'], 1)
+        DashboardCounter.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(get_counters()['pending_leaves'], 0)
+
+    def test_overview_query_count_does_not_grow_with_reactions(self):
+        self.client.force_login(self.user)
+        get_counters()
+
+        def overview_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('overview'))
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        Announcement.objects.create(author=self.user, title='First', content='Hello')
+        overview_queries()  # first visit materializes per-user state such as the notification inbox
+        baseline = overview_queries()
+
+        for index in range(5):
+            announcement = Announcement.objects.create(author=self.user, title=f'Post {index}', content='#news')
+            for reactor_index in range(3):
+                reactor = EmployeeLogin.objects.create_user(
+                    idnumber=f'2{index}{reactor_index}', username=f'reactor{index}{reactor_index}', password='secret'
+                )
+                AnnouncementReaction.objects.create(announcement=announcement, user=reactor, emoji='like')
+
+        self.assertEqual(overview_queries(), baseline)
+        self.assertEqual(DashboardCounter.objects.count(), 3)
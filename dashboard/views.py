@@ -11,67 +11,62 @@ from django.db import IntegrityError
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
 import re
 from userlogin.models import EmployeeLogin
 from announcement.models import Announcement, AnnouncementReaction
-from notification.models import Notification
+from notification.inbox import get_recent_notifications
 from usercalendar.models import Holiday
 from leaverequest.models import LeaveRequest
-from ticketing.models import Ticket
 from userprofile.models import PersonalInformation, ContactPerson, EmploymentInformation, EducationalBackground
+from .counters import get_counters
 
 @login_required(login_url="user-login")
 def overview(request):
-    # Get recent announcements (last 10)
-    announcements = Announcement.objects.filter(is_active=True).order_by('-created_at')[:10]
+    # Get recent announcements (last 10) with their reaction aggregates prefetched:
+    # the total is annotated, and the user's own reaction plus the latest 10
+    # reactors come from two prefetch queries shared by all announcements
+    announcements = Announcement.objects.filter(is_active=True).select_related('author').annotate(
+        reaction_count=Count('reactions', distinct=True)
+    ).prefetch_related(
+        Prefetch(
+            'reactions',
+            queryset=AnnouncementReaction.objects.filter(user=request.user),
+            to_attr='current_user_reactions'
+        ),
+        Prefetch(
+            'reactions',
+            queryset=AnnouncementReaction.objects.select_related('user').order_by('-created_at')[:10],
+            to_attr='latest_reactions'
+        ),
+    ).order_by('-created_at')[:10]
     
     # Add user reaction information and reactors data to each announcement
     announcement_data = []
     for announcement in announcements:
-        user_reaction = None
-        total_reactions = 0
-        reactors = []
-        
-        try:
-            # Get user's reaction
-            reaction = announcement.reactions.filter(user=request.user).first()
-            if reaction:
-                user_reaction = reaction.emoji
-            
-            # Get total reactions count
-            total_reactions = announcement.reactions.count()
-            
-            # Get reactors data for display
-            if total_reactions > 0:
-                reactors = announcement.reactions.select_related('user').order_by('-created_at')[:10]
-                reactors = [
-                    {
-                        'name': f"{r.user.firstname or ''} {r.user.lastname or ''}".strip() or r.user.name or 'Unknown User',
-                        'avatar': r.user.avatar.url if r.user.avatar and r.user.avatar.name != 'profile/avatar.svg' else None,
-                        'reaction': r.emoji
-                    }
-                    for r in reactors
-                ]
-        except Exception as e:
-            print(f"Error processing announcement {announcement.id}: {e}")
-            pass
+        user_reaction = announcement.current_user_reactions[0].emoji if announcement.current_user_reactions else None
+        reactors = [
+            {
+                'name': f"{r.user.firstname or ''} {r.user.lastname or ''}".strip() or r.user.username or 'Unknown User',
+                'avatar': r.user.avatar.url if r.user.avatar and r.user.avatar.name != 'profile/avatar.svg' else None,
+                'reaction': r.emoji
+            }
+            for r in announcement.latest_reactions
+        ]
         
         # Create a dictionary with all the data
         announcement_data.append({
             'announcement': announcement,
             'user_reaction': user_reaction,
-            'total_reactions': total_reactions,
+            'total_reactions': announcement.reaction_count,
             'reactors': reactors
         })
     
     # Get recent notifications for the user (last 10)
-    notifications = Notification.objects.filter(
-        recipient=request.user
-    ).order_by('-created_at')[:10]
+    notifications = get_recent_notifications(request.user)
     
     # Get current month holidays
     today = timezone.now().date()
@@ -85,22 +80,12 @@ def overview(request):
         date__range=[start_of_month, end_of_month]
     ).order_by('date')
     
-    # Calculate statistics
-    total_employees = EmployeeLogin.objects.filter(is_active=True).count()
+    # Company-wide statistics come from the materialized counters
+    counters = get_counters()
     
     # Present today (assuming timelogs exist)
     present_today = 0  # This would need timelog implementation
     
-    # Open tickets
-    open_tickets = Ticket.objects.filter(
-        status__in=['New', 'In Progress', 'Pending']
-    ).count() if hasattr(Ticket, 'status') else 0
-    
-    # Pending leaves
-    pending_leaves = LeaveRequest.objects.filter(
-        status='routing'
-    ).count()
-    
     # Get upcoming leaves for current user (next 30 days)
     upcoming_leaves = LeaveRequest.objects.filter(
         employee=request.user,
@@ -110,7 +95,10 @@ def overview(request):
     ).order_by('date_from')[:5]
     
     # Calculate profile completion percentage
-    profile_completion = calculate_profile_completion(request.user)
+    profile_user = EmployeeLogin.objects.select_related(
+        'personal_info', 'contact_person', 'employment_info'
+    ).get(pk=request.user.pk)
+    profile_completion = calculate_profile_completion(profile_user)
     
     # Get time-based greeting and user birthday info
     current_hour = timezone.now().hour
@@ -127,8 +115,8 @@ def overview(request):
     # Check if today is user's birthday
     is_birthday = False
     try:
-        if hasattr(request.user, 'personal_info') and request.user.personal_info.birth_date:
-            user_birthday = request.user.personal_info.birth_date
+        if hasattr(profile_user, 'personal_info') and profile_user.personal_info.birth_date:
+            user_birthday = profile_user.personal_info.birth_date
             today_date = timezone.now().date()
             if (user_birthday.month == today_date.month and 
                 user_birthday.day == today_date.day):
@@ -140,10 +128,10 @@ def overview(request):
         'announcements': announcement_data,
         'notifications': notifications,
         'holidays': holidays,
-        'total_employees': total_employees,
+        'total_employees': counters['total_employees'],
         'present_today': present_today,
-        'open_tickets': open_tickets,
-        'pending_leaves': pending_leaves,
+        'open_tickets': counters['open_tickets'],
+        'pending_leaves': counters['pending_leaves'],
         'upcoming_leaves': upcoming_leaves,
         'profile_completion': profile_completion,
         'emoji_choices': AnnouncementReaction.EMOJI_CHOICES,
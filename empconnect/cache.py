@@ -0,0 +1,37 @@
+"""
+Cache helpers shared by the apps.
+
+Payloads that are dropped together (a working calendar's years, the finance
+dashboard metrics, employee finance summaries) are keyed by a version string
+kept under a key of its own. Replacing the version orphans every payload at
+once; the old entries expire on their own timeouts.
+"""
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_cache_version(version_key):
+    """The version stored under ``version_key``, created on first use"""
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() keeps a version another process may have set in the meantime
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key, version)
+    return version
+
+
+def bump_cache_version(version_key):
+    """Drop every payload keyed by the current version"""
+    cache.set(version_key, uuid.uuid4().hex, None)
+
+
+def invalidate_on_commit(invalidate, *args):
+    """
+    Call ``invalidate(*args)`` now and again once the surrounding transaction
+    commits, so a request that read the old rows before the commit cannot
+    leave them cached.
+    """
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
@@ -0,0 +1,121 @@
+"""
+Streaming Excel exports shared by the report endpoints.
+
+Workbooks are opened in openpyxl write-only mode, so every appended row is
+serialized straight to disk instead of being kept as cell objects until the
+end. Sheets are therefore built top to bottom: column widths are fixed when the
+sheet is created and styles are applied per cell through named styles
+registered once per workbook.
+"""
+import tempfile
+from django.conf import settings
+from django.http import FileResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+CENTER = Alignment(horizontal='center', vertical='center')
+
+
+def solid_fill(color):
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+# Registered on every export workbook; reports add their own with ExportWorkbook(styles=...)
+EXPORT_STYLES = {
+    'title': {'font': Font(bold=True, size=14)},
+    'subtitle': {'font': Font(italic=True, size=12)},
+    'heading': {'font': Font(bold=True)},
+    'header': {'font': Font(bold=True), 'fill': solid_fill('FFFF00'), 'border': THIN_BORDER},
+    'cell': {'border': THIN_BORDER},
+    'status_approved': {'fill': solid_fill('90EE90'), 'border': THIN_BORDER},
+    'status_disapproved': {'fill': solid_fill('FFB6C1'), 'border': THIN_BORDER},
+}
+
+
+def get_export_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def iterate(queryset, chunk_size=None):
+    """Read a queryset in chunks without caching every row on the queryset"""
+    return queryset.iterator(chunk_size=chunk_size or get_export_chunk_size())
+
+
+class ExportSheet:
+    """A write-only worksheet that is filled one row at a time"""
+
+    def __init__(self, worksheet, widths=None):
+        self.worksheet = worksheet
+        self.row_count = 0
+        # Column widths are written before the first row, so they cannot be fitted afterwards
+        for column, width in enumerate(widths or [], 1):
+            if width:
+                worksheet.column_dimensions[get_column_letter(column)].width = width
+
+    def append(self, values, style=None, styles=None):
+        """
+        Append a row and return its row number.
+
+        ``style`` is the named style for every cell in the row; ``styles`` maps a
+        0-based column position to a style that overrides it. None values are
+        left as empty, unstyled cells.
+        """
+        row = []
+        for position, value in enumerate(values):
+            cell_style = (styles or {}).get(position) or style
+            if value is None or cell_style is None:
+                row.append(value)
+                continue
+            cell = WriteOnlyCell(self.worksheet, value)
+            cell.style = cell_style
+            row.append(cell)
+        self.worksheet.append(row)
+        self.row_count += 1
+        return self.row_count
+
+    def blank(self, count=1):
+        for _ in range(count):
+            self.append([])
+
+    def title(self, text, style='title', span=1):
+        """Append a single-cell row, merged across ``span`` columns"""
+        row = self.append([text], style=style)
+        if span > 1:
+            self.worksheet.merged_cells.add(f"A{row}:{get_column_letter(span)}{row}")
+        return row
+
+    def add_chart(self, chart, anchor):
+        self.worksheet.add_chart(chart, anchor)
+
+
+class ExportWorkbook:
+    """Write-only workbook with the export named styles registered"""
+
+    def __init__(self, styles=None):
+        self.workbook = Workbook(write_only=True)
+        for name, attrs in {**EXPORT_STYLES, **(styles or {})}.items():
+            self.workbook.add_named_style(NamedStyle(name=name, **attrs))
+
+    def create_sheet(self, title, widths=None):
+        return ExportSheet(self.workbook.create_sheet(title), widths)
+
+    def response(self, filename):
+        """Save to a temporary file and stream it back as an attachment"""
+        output = tempfile.TemporaryFile()
+        try:
+            self.workbook.save(output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
@@ -0,0 +1,28 @@
+"""
+Pre-aggregated rollup tables shared by the apps.
+
+Rollups (leaverequest.LeaveDailyStat, finance.FinanceDailyStat) keep one row
+per bucket with counters that signals move as records change. add_to_bucket
+is the one upsert they share; each model's unique constraint on the bucket key
+is what makes it safe when two requests create the same bucket at once.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def add_to_bucket(model, key, **deltas):
+    """
+    Add ``deltas`` ({field: amount}) to the ``model`` row matching ``key``,
+    creating the row with those amounts when it does not exist. Returns its pk.
+    """
+    with transaction.atomic():
+        pk = model.objects.filter(**key).values_list('pk', flat=True).first()
+        if pk is None:
+            try:
+                with transaction.atomic():
+                    return model.objects.create(**key, **deltas).pk
+            except IntegrityError:
+                # Another request created the bucket first
+                pk = model.objects.filter(**key).values_list('pk', flat=True).first()
+        model.objects.filter(pk=pk).update(**{field: F(field) + amount for field, amount in deltas.items()})
+    return pk
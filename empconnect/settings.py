@@ -32,6 +32,7 @@ INSTALLED_APPS = [
     'survey.apps.SurveyConfig',
     'training.apps.TrainingConfig',
     'evaluation.apps.EvaluationConfig',
+    'backgroundjob.apps.BackgroundjobConfig',
 ]
 
 AUTH_USER_MODEL = 'userlogin.EmployeeLogin'
@@ -68,6 +69,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notification.context_processors.notification_inbox',
             ],
         },
     },
@@ -123,3 +125,38 @@ STATICFILES_DIRS =[
 MEDIA_ROOT = BASE_DIR / 'static/images'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Upload/import jobs run on a bounded thread pool inside the web process.
+# Set BACKGROUND_JOB_RUN_IN_PROCESS = False when `manage.py run_background_jobs` runs as a separate worker.
+BACKGROUND_JOB_WORKERS = 2
+BACKGROUND_JOB_RUN_IN_PROCESS = True
+# A processing job without a heartbeat for this many seconds (its worker died) is marked failed
+BACKGROUND_JOB_LEASE = 300
+
+# Excel exports are written in write-only mode; querysets are read in chunks of this size
+EXPORT_CHUNK_SIZE = 2000
+
+# Cached working-day calendar (holidays and Sunday exceptions); signals invalidate it on change
+WORKING_CALENDAR_CACHE_TIMEOUT = 600
+
+# Cached approval chains (approvers, position levels, role holders); signals invalidate them on change
+APPROVAL_ROUTING_CACHE_TIMEOUT = 600
+
+# Outgoing mail is queued in the email outbox and delivered after commit, one SMTP connection per batch,
+# throttled to the provider's send rate (0 disables throttling).
+# In-process delivery retries on a timer and picks up leftovers when the web process starts.
+# Set EMAIL_OUTBOX_RUN_IN_PROCESS = False when `manage.py send_queued_emails` runs as a separate worker.
+EMAIL_OUTBOX_RUN_IN_PROCESS = True
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_RATE_PER_MINUTE = 60
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+
+# Cached finance dashboard cards and charts; rebuilding the finance rollup invalidates them
+FINANCE_METRICS_CACHE_TIMEOUT = 600
+
+# Cached per-employee finance summaries; finance writes invalidate them
+FINANCE_SUMMARY_CACHE_TIMEOUT = 600
+
+# Dashboard counters move by signal deltas; get_counters recounts any counter older than this (seconds)
+DASHBOARD_COUNTER_RECOUNT_INTERVAL = 900
@@ -23,6 +23,7 @@ urlpatterns = [
     path('survey/', include('survey.urls')),
     path('training/', include('training.urls')),
     path('evaluation/', include('evaluation.urls')),
+    path('jobs/', include('backgroundjob.urls')),
 ]
 
 if settings.DEBUG:
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empconnect.settings')
 
 application = get_wsgi_application()
+
+# Deliver mail that a previous process left in the email outbox
+from notification.outbox import start_in_process_delivery  # noqa: E402
+
+start_in_process_delivery()
@@ -0,0 +1,28 @@
+from backgroundjob.runner import register_job
+from notification.models import Notification
+from .views import process_tasklist_workbook
+
+@register_job('evaluation.upload_tasklist')
+def upload_tasklist_job(job):
+    uploaded_file = next(job.open_files())
+    try:
+        result = process_tasklist_workbook(uploaded_file)
+    finally:
+        uploaded_file.close()
+
+    # The upload form redirects straight away, so the outcome is delivered as a notification
+    if not result['success']:
+        message = result['message']
+    else:
+        message = f"Successfully imported {result['success_count']} tasklist entries."
+        if result['error_count'] > 0:
+            message += f" {result['error_count']} entries failed to import: " + "; ".join(result['errors'])
+
+    Notification.objects.create(
+        title="Tasklist Import",
+        sender=job.created_by,
+        recipient=job.created_by,
+        message=message,
+        module='evaluation'
+    )
+    return result
@@ -19,6 +19,7 @@ from .forms import (
     EmployeeFilterForm
 )
 from userlogin.models import EmployeeLogin
+from userprofile.approval_routing import get_supervisor
 from openpyxl.styles import Font, PatternFill, Alignment
 from .models import EvaluationInstance, EmployeeEvaluation
 from .utils import create_missing_instances, update_overdue_instances
@@ -26,6 +27,7 @@ from datetime import timedelta, datetime
 import calendar
 from openpyxl.worksheet.datavalidation import DataValidation
 from notification.models import Notification
+from backgroundjob.runner import enqueue_job
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
 @login_required
@@ -164,11 +166,9 @@ def evaluation_user_view(request):
     for assessment in pending_approver_assessments:
         approver = None
         if assessment.status == 'for_evaluation':
-            approver = assessment.employee.employment_info.approver if assessment.employee.employment_info else None
+            approver = get_supervisor(assessment.employee_id)
         elif assessment.status == 'for_review':
-            supervisor = assessment.employee.employment_info.approver
-            if hasattr(supervisor, 'employment_info') and supervisor.employment_info:
-                approver = supervisor.employment_info.approver
+            approver = get_supervisor(assessment.employee_id, depth=2)
         
         assessment_info = {
             'evaluation': assessment,
@@ -756,14 +756,20 @@ def upload_tasklist(request):
         messages.error(request, 'File size exceeds 10MB limit')
         return redirect(reverse('admin_evaluation') + '?tab=tasklist')
     
+    enqueue_job('evaluation.upload_tasklist', request.user, files=[uploaded_file])
+    messages.info(request, 'Tasklist file uploaded. It is being processed and you will be notified when the import finishes.')
+    return redirect(reverse('admin_evaluation') + '?tab=tasklist')
+
+
+def process_tasklist_workbook(uploaded_file):
+    """Create TaskList rows from the 'Tasklists' sheet of an uploaded workbook"""
     try:
         # Load the workbook
         wb = openpyxl.load_workbook(uploaded_file, data_only=True)
         
         # Check if Tasklists sheet exists
         if 'Tasklists' not in wb.sheetnames:
-            messages.error(request, 'Excel file must contain a "Tasklists" sheet')
-            return redirect(reverse('admin_evaluation') + '?tab=tasklist')
+            return {'success': False, 'message': 'Excel file must contain a "Tasklists" sheet'}
         
         tasklist_sheet = wb['Tasklists']
         
@@ -772,8 +778,7 @@ def upload_tasklist(request):
         header_2 = tasklist_sheet.cell(row=1, column=2).value
         
         if str(header_1).strip().lower() != 'id number' or str(header_2).strip().lower() != 'tasklist':
-            messages.error(request, 'Invalid Excel format. Headers must be "Id Number" and "Tasklist"')
-            return redirect(reverse('admin_evaluation') + '?tab=tasklist')
+            return {'success': False, 'message': 'Invalid Excel format. Headers must be "Id Number" and "Tasklist"'}
         
         # Process the data
         success_count = 0
@@ -826,24 +831,17 @@ def upload_tasklist(request):
                 error_count += 1
                 errors.append(f"Row {row_num}: Error processing - {str(e)}")
         
-        # Prepare success message
-        if success_count > 0:
-            messages.success(request, f'Successfully imported {success_count} tasklist entries')
-        
-        if error_count > 0:
-            messages.warning(request, f'{error_count} entries failed to import')
-            # Store errors in session for detailed display
-            request.session['tasklist_import_errors'] = errors[:10]  # Limit to first 10 errors
-
-        # Redirect back to admin_evaluation with tab query param
-        return redirect(reverse('admin_evaluation') + '?tab=tasklist')
+        return {
+            'success': True,
+            'success_count': success_count,
+            'error_count': error_count,
+            'errors': errors[:10]  # Limit to first 10 errors
+        }
 
     except openpyxl.utils.exceptions.InvalidFileException:
-        messages.error(request, 'Invalid Excel file format')
-        return redirect(reverse('admin_evaluation') + '?tab=tasklist')
+        return {'success': False, 'message': 'Invalid Excel file format'}
     except Exception as e:
-        messages.error(request, f'Error processing file: {str(e)}')
-        return redirect(reverse('admin_evaluation') + '?tab=tasklist')
+        return {'success': False, 'message': f'Error processing file: {str(e)}'}
 
 
 @login_required
@@ -1,15 +1,14 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.styles import Font, Alignment
 from datetime import datetime
-import io
+from empconnect.exports import ExportWorkbook, THIN_BORDER, iterate
 
 from .models import Feedback
 from .forms import FeedbackForm, ExportDateRangeForm, AdminNotesForm
@@ -141,56 +140,41 @@ def export_feedback(request):
     else:
         return JsonResponse({'error': 'Invalid date range'}, status=400)
 
+FEEDBACK_EXPORT_STYLES = {
+    'report_title': {'font': Font(bold=True, size=16), 'alignment': Alignment(horizontal='center')},
+    'report_subtitle': {'font': Font(bold=True, size=12), 'alignment': Alignment(horizontal='center')},
+    'section_title': {'font': Font(bold=True, size=14), 'alignment': Alignment(horizontal='center')},
+    'total_cell': {'font': Font(bold=True), 'border': THIN_BORDER},
+    'message_cell': {'border': THIN_BORDER, 'alignment': Alignment(vertical='top', wrap_text=True)},
+}
+
 def generate_excel_report(feedback_data, start_date, end_date):
-    wb = openpyxl.Workbook()
-    
-    summary_sheet = wb.active
-    summary_sheet.title = "Feedback Summary"
-    
-    feedback_sheet = wb.create_sheet(title="Feedback Details")
+    workbook = ExportWorkbook(styles=FEEDBACK_EXPORT_STYLES)
     
-    create_summary_sheet(summary_sheet, feedback_data)
-    create_feedback_sheet(feedback_sheet, feedback_data, start_date, end_date)
-    
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    create_summary_sheet(workbook.create_sheet("Feedback Summary", widths=[20, 20, 20, 20]), feedback_data)
+    create_feedback_sheet(
+        workbook.create_sheet("Feedback Details", widths=[20, 25, 30, 30, 50, 12]),
+        feedback_data, start_date, end_date
     )
-    response['Content-Disposition'] = f'attachment; filename="feedback_report_{start_date}_to_{end_date}.xlsx"'
     
-    return response
+    return workbook.response(f"feedback_report_{start_date}_to_{end_date}.xlsx")
 
 def create_summary_sheet(sheet, feedback_data):
-    sheet['A1'] = "RYONAN ELECTRIC PHILIPPINES"
-    sheet['A1'].font = Font(bold=True, size=16)
-    sheet['A1'].alignment = Alignment(horizontal='center')
-    sheet.merge_cells('A1:D1')
-    
-    sheet['A3'] = "FEEDBACK SUMMARY"
-    sheet['A3'].font = Font(bold=True, size=14)
-    sheet['A3'].alignment = Alignment(horizontal='center')
-    sheet.merge_cells('A3:D3')
-    
-    headers = ['Metric', 'Count', 'Percentage', 'Notes']
-    for col, header in enumerate(headers, 1):
-        cell = sheet.cell(row=5, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        cell.border = Border(
-            left=Side(border_style="thin"),
-            right=Side(border_style="thin"),
-            top=Side(border_style="thin"),
-            bottom=Side(border_style="thin")
-        )
-    
-    total_feedback = feedback_data.count()
-    anonymous_count = feedback_data.filter(is_anonymous=True).count()
+    sheet.title("RYONAN ELECTRIC PHILIPPINES", style='report_title', span=4)
+    sheet.blank()
+    sheet.title("FEEDBACK SUMMARY", style='section_title', span=4)
+    sheet.blank()
+    sheet.append(['Metric', 'Count', 'Percentage', 'Notes'], style='header')
+    
+    totals = feedback_data.aggregate(
+        total=Count('id'),
+        anonymous=Count('id', filter=Q(is_anonymous=True)),
+        read=Count('id', filter=Q(is_read=True)),
+    )
+    total_feedback = totals['total']
+    anonymous_count = totals['anonymous']
     named_count = total_feedback - anonymous_count
-    read_count = feedback_data.filter(is_read=True).count()
+    read_count = totals['read']
     unread_count = total_feedback - read_count
     
     summary_data = [
@@ -201,75 +185,29 @@ def create_summary_sheet(sheet, feedback_data):
         ('Unread', unread_count, f"{(unread_count/total_feedback*100):.1f}%" if total_feedback > 0 else '0%'),
     ]
     
-    row = 6
     for metric, count, percentage in summary_data:
-        sheet.cell(row=row, column=1, value=metric)
-        sheet.cell(row=row, column=2, value=count)
-        sheet.cell(row=row, column=3, value=percentage)
-        sheet.cell(row=row, column=4, value="")
-        
-        for col in range(1, 5):
-            cell = sheet.cell(row=row, column=col)
-            if metric == 'Total Feedback':
-                cell.font = Font(bold=True)
-            cell.border = Border(
-                left=Side(border_style="thin"),
-                right=Side(border_style="thin"),
-                top=Side(border_style="thin"),
-                bottom=Side(border_style="thin")
-            )
-        
-        row += 1
-    
-    for col in range(1, 5):
-        sheet.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 20
+        sheet.append(
+            [metric, count, percentage, ""],
+            style='total_cell' if metric == 'Total Feedback' else 'cell'
+        )
 
 def create_feedback_sheet(sheet, feedback_data, start_date, end_date):
-    sheet['A1'] = "RYONAN ELECTRIC PHILIPPINES"
-    sheet['A1'].font = Font(bold=True, size=16)
-    sheet['A1'].alignment = Alignment(horizontal='center')
-    sheet.merge_cells('A1:F1')
-    
-    sheet['A2'] = f"Employee Feedback Summary as of {start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}"
-    sheet['A2'].font = Font(bold=True, size=12)
-    sheet['A2'].alignment = Alignment(horizontal='center')
-    sheet.merge_cells('A2:F2')
-    
-    headers = ['Date Submitted', 'Submitter Name', 'Email', 'Subject', 'Message', 'Status']
-    for col, header in enumerate(headers, 1):
-        cell = sheet.cell(row=4, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        cell.border = Border(
-            left=Side(border_style="thin"),
-            right=Side(border_style="thin"),
-            top=Side(border_style="thin"),
-            bottom=Side(border_style="thin")
-        )
+    sheet.title("RYONAN ELECTRIC PHILIPPINES", style='report_title', span=6)
+    sheet.title(
+        f"Employee Feedback Summary as of {start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}",
+        style='report_subtitle', span=6
+    )
+    sheet.blank()
+    sheet.append(['Date Submitted', 'Submitter Name', 'Email', 'Subject', 'Message', 'Status'], style='header')
     
-    row = 5
-    for feedback in feedback_data:
+    for feedback in iterate(feedback_data.select_related('submitter')):
         status = "Read" if feedback.is_read else "Unread"
         
-        sheet.cell(row=row, column=1, value=feedback.created_at.strftime('%Y-%m-%d %H:%M'))
-        sheet.cell(row=row, column=2, value=feedback.display_name)
-        sheet.cell(row=row, column=3, value=feedback.display_email)
-        sheet.cell(row=row, column=4, value=feedback.subject)
-        sheet.cell(row=row, column=5, value=feedback.message)
-        sheet.cell(row=row, column=6, value=status)
-        
-        for col in range(1, 7):
-            cell = sheet.cell(row=row, column=col)
-            cell.border = Border(
-                left=Side(border_style="thin"),
-                right=Side(border_style="thin"),
-                top=Side(border_style="thin"),
-                bottom=Side(border_style="thin")
-            )
-            cell.alignment = Alignment(vertical='top', wrap_text=True)
-        
-        row += 1
-    
-    column_widths = [20, 25, 30, 30, 50, 12]
-    for col, width in enumerate(column_widths, 1):
-        sheet.column_dimensions[openpyxl.utils.get_column_letter(col)].width = width
\ No newline at end of file
+        sheet.append([
+            feedback.created_at.strftime('%Y-%m-%d %H:%M'),
+            feedback.display_name,
+            feedback.display_email,
+            feedback.subject,
+            feedback.message,
+            status,
+        ], style='message_cell')
@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.http import HttpResponseRedirect
-from .models import Payslip, Loan, Allowance, OJTPayslipData, LoanType, AllowanceType, LoanDeduction, Savings, OJTRate, SavingsType
+from .models import Payslip, PayslipEmailDelivery, Loan, Allowance, OJTPayslipData, LoanType, AllowanceType, LoanDeduction, Savings, OJTRate, SavingsType
 from .forms import LoanForm, LoanTypeForm, LoanDeductionForm, SavingsForm
+from .loan_ledger import refresh_loan_ledgers
+from .metrics import schedule_finance_stats_refresh
 
 @admin.register(Payslip)
 class PayslipAdmin(admin.ModelAdmin):
@@ -144,7 +146,7 @@ class LoanAdmin(admin.ModelAdmin):
     list_display = ['employee_name', 'loan_type', 'principal_amount', 'current_balance', 'balance_percentage', 'monthly_deduction', 'status', 'created_at']
     list_filter = ['loan_type', 'is_active', 'created_at', 'loan_type__is_stackable']
     search_fields = ['employee__firstname', 'employee__lastname', 'employee__idnumber', 'employee__username']
-    readonly_fields = ['current_balance', 'created_at', 'updated_at']
+    readonly_fields = ['current_balance', 'total_deducted', 'deduction_count', 'created_at', 'updated_at']
     inlines = [LoanDeductionInline]
     ordering = ['-created_at']
 
@@ -155,12 +157,20 @@ class LoanAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('is_active',)
         }),
+        ('Deductions', {
+            'fields': ('total_deducted', 'deduction_count')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         })
     )
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # The deduction inline writes rows directly
+        refresh_loan_ledgers([form.instance.pk])
+
     def employee_name(self, obj):
         emp = obj.employee
         display_name = f"{getattr(emp, 'firstname', '')} {getattr(emp, 'lastname', '')}".strip()
@@ -190,11 +200,14 @@ class LoanAdmin(admin.ModelAdmin):
 
     def mark_as_paid(self, request, queryset):
         updated = queryset.update(current_balance=0, is_active=False)
+        # update() skips the model signals that keep the rollup current
+        schedule_finance_stats_refresh('loans')
         self.message_user(request, f'{updated} loans marked as paid.')
     mark_as_paid.short_description = 'Mark selected loans as paid'
 
     def reactivate_loans(self, request, queryset):
         updated = queryset.filter(current_balance__gt=0).update(is_active=True)
+        schedule_finance_stats_refresh('loans')
         self.message_user(request, f'{updated} loans reactivated.')
     reactivate_loans.short_description = 'Reactivate selected loans'
 
@@ -224,6 +237,20 @@ class LoanDeductionAdmin(admin.ModelAdmin):
             return self.readonly_fields + ['loan', 'amount', 'cut_off']
         return self.readonly_fields
 
+    # Deductions saved or deleted here bypass Loan.apply_deduction; refresh the ledgers they touch
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_loan_ledgers([obj.loan_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_loan_ledgers([obj.loan_id])
+
+    def delete_queryset(self, request, queryset):
+        loan_ids = list(queryset.values_list('loan_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        refresh_loan_ledgers(loan_ids)
+
 admin.site.register(AllowanceType)
 
 
@@ -334,3 +361,10 @@ class OJTRateAdmin(admin.ModelAdmin):
     search_fields = ('site',)
     list_filter = ('site',)
     ordering = ('-created_at',)
+
+@admin.register(PayslipEmailDelivery)
+class PayslipEmailDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['payslip', 'recipient_email', 'status', 'attempts', 'sent_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['recipient_email', 'payslip__employee__idnumber', 'payslip__employee__lastname']
+    readonly_fields = ['created_at']
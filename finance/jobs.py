@@ -0,0 +1,221 @@
+import functools
+from backgroundjob.runner import register_job
+from notification.inbox import create_broadcast
+from .metrics import bulk_finance_writes
+from .models import Allowance, Payslip
+from .utils import send_cutoff_payslip_emails
+from .views import (
+    process_ojt_excel, process_loan_principal_excel, process_loan_deduction_excel,
+    process_allowance_file, process_savings_excel,
+)
+
+def _notify_upload(job, title, message):
+    create_broadcast(title=title, message=message, sender=job.created_by, module="finance")
+
+def _refreshes_finance_stats(*categories):
+    """Rebuild these rollup categories once when the job finishes, instead of per record written"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(job):
+            with bulk_finance_writes(*categories):
+                return handler(job)
+        return wrapper
+    return decorator
+
+@register_job('finance.ojt_payslip_upload')
+def ojt_payslip_upload_job(job):
+    cut_off = job.params['cut_off']
+    errors = []
+    all_error_rows = []  # Collect all error rows from all files
+    created = 0
+    updated = 0
+
+    for index, file in enumerate(job.open_files(), start=1):
+        try:
+            if not file.name.lower().endswith('.xlsx'):
+                errors.append(f'Only Excel (.xlsx) files are supported. File: {file.name}')
+                continue
+
+            try:
+                success, file_errors, file_created, file_updated, error_rows = process_ojt_excel(file, cut_off)
+                if success:
+                    created += file_created
+                    updated += file_updated
+                else:
+                    errors.extend(file_errors)
+                    if error_rows:
+                        all_error_rows.extend(error_rows)
+            except Exception as e:
+                errors.append(f'Error processing {file.name}: {str(e)}')
+        finally:
+            file.close()
+            job.update_progress(index)
+
+    if errors:
+        return {
+            'success': False,
+            'errors': errors,
+            'created': created,
+            'updated': updated,
+            'error_rows': all_error_rows
+        }
+
+    if created > 0 or updated > 0:
+        _notify_upload(job, "OJT Payslip Upload", f"Payslip for OJT has been uploaded for cut-off period {cut_off}.")
+
+    return {
+        'success': True,
+        'created': created,
+        'updated': updated,
+        'message': f'Successfully processed {created} new records and updated {updated} existing records.'
+    }
+
+@register_job('finance.loan_principal_upload')
+@_refreshes_finance_stats('loans')
+def loan_principal_upload_job(job):
+    file = next(job.open_files())
+    try:
+        success, errors, created, updated, stacked, not_uploaded_rows = process_loan_principal_excel(file)
+    finally:
+        file.close()
+
+    if errors:
+        return {
+            'success': False,
+            'errors': errors,
+            'created': created,
+            'updated': updated,
+            'stacked': stacked,
+            'not_uploaded_rows': not_uploaded_rows
+        }
+
+    if created > 0 or updated > 0 or stacked > 0:
+        _notify_upload(job, "Principal Balance Upload", "New principal loan balance has been successfully uploaded.")
+
+    return {
+        'success': True,
+        'created': created,
+        'updated': updated,
+        'stacked': stacked,
+        'not_uploaded_rows': not_uploaded_rows,
+        'message': f'Successfully processed {created} new loans, updated {updated} loans, and stacked {stacked} loans.'
+    }
+
+@register_job('finance.loan_deduction_upload')
+@_refreshes_finance_stats('loans')
+def loan_deduction_upload_job(job):
+    cutoff_date = job.params['cutoff_date']
+    file = next(job.open_files())
+    try:
+        success, errors, processed, added_deductions = process_loan_deduction_excel(file, cutoff_date)
+    finally:
+        file.close()
+
+    if errors:
+        return {
+            'success': False,
+            'errors': errors,
+            'processed': processed,
+            'added_deductions': added_deductions
+        }
+
+    if processed > 0:
+        _notify_upload(job, "Deduction Upload", f"Loan deductions has been successfully uploaded for cutoff period {cutoff_date}.")
+
+    return {
+        'success': True,
+        'processed': processed,
+        'added_deductions': added_deductions,
+        'message': f'Successfully processed {processed} loan deductions for {cutoff_date}.'
+    }
+
+@register_job('finance.allowances_upload')
+@_refreshes_finance_stats('allowances')
+def allowances_upload_job(job):
+    # Delete all Allowance records before import
+    Allowance.objects.all().delete()
+
+    success_count = 0
+    error_count = 0
+    error_details = []
+    all_error_rows = []  # Collect all error rows from all files
+
+    for index, file in enumerate(job.open_files(), start=1):
+        try:
+            if file.name.endswith(('.xlsx', '.xls', '.csv')):
+                success, errors, error_rows = process_allowance_file(file)
+                if success:
+                    success_count += 1
+                else:
+                    error_count += 1
+                    if errors:
+                        for error in errors:
+                            error_details.append({'filename': file.name, 'error': error})
+                    if error_rows:
+                        all_error_rows.extend(error_rows)
+            else:
+                error_count += 1
+                error_details.append({'filename': file.name, 'error': f"Invalid file type: {file.name}"})
+        except Exception as e:
+            error_count += 1
+            error_details.append({'filename': file.name, 'error': f"Error processing {file.name}: {str(e)}"})
+        finally:
+            file.close()
+            job.update_progress(index)
+
+    if error_count > 0 or len(all_error_rows) > 0:
+        return {
+            'success': False,
+            'message': f'Failed to upload {error_count} file(s)',
+            'error_count': error_count,
+            'success_count': success_count,
+            'errors': error_details,
+            'error_rows': all_error_rows
+        }
+
+    if success_count > 0:
+        _notify_upload(job, "Allowances Upload", "New allowances have been successfully uploaded.")
+
+    return {
+        'success': True,
+        'message': f'Successfully uploaded {success_count} allowance file(s)',
+        'success_count': success_count,
+        'error_count': error_count,
+        'errors': error_details
+    }
+
+@register_job('finance.savings_upload')
+@_refreshes_finance_stats('savings')
+def savings_upload_job(job):
+    file = next(job.open_files())
+    try:
+        result = process_savings_excel(file)
+    finally:
+        file.close()
+
+    if result.get('success_count', 0) > 0:
+        _notify_upload(job, "Savings Upload", "New savings has been successfully uploaded.")
+
+    return result
+
+@register_job('finance.send_cutoff_payslips')
+def send_cutoff_payslips_job(job):
+    cutoff_date = job.params['cutoff_date']
+    payslips = Payslip.objects.filter(cutoff_date=cutoff_date).select_related('employee').order_by('employee__idnumber')
+    if not job.params.get('resend'):
+        # Payslips still waiting in the outbox from an earlier send are not queued twice
+        payslips = payslips.filter(is_send_to_mail=False).exclude(email_deliveries__status='queued')
+    payslips = list(payslips)
+    job.update_progress(0, total=len(payslips))
+
+    def progress(processed, queued, failed):
+        job.update_progress(processed, success_count=queued, error_count=failed)
+
+    outcome = send_cutoff_payslip_emails(payslips, job=job, progress_callback=progress)
+    return {
+        'success': outcome['queued'] > 0 or not outcome['errors'],
+        'message': f"Payslips queued for email: {outcome['queued']}, Failed: {outcome['failed']}, No email: {outcome['skipped']}",
+        'success_count': outcome['queued'],
+        'error_count': outcome['failed'] + outcome['skipped'],
+        'errors': outcome['errors']
+    }
@@ -0,0 +1,57 @@
+"""
+Loan ledger.
+
+Loan.total_deducted and Loan.deduction_count mirror the loan's LoanDeduction
+rows, so loan reports and pages read them from the loan row instead of
+aggregating deductions per loan. Loan.apply_deduction and the bulk posting in
+finance.loan_posting keep them current. Deductions changed any other way (the
+admin inline) go through refresh_loan_ledgers, and the reconcile_loan_ledgers
+command checks every loan against its deductions.
+"""
+from collections import namedtuple
+from decimal import Decimal
+from django.db.models import Count, Sum
+from .models import Loan, LoanDeduction
+
+LEDGER_BATCH_SIZE = 1000
+CENT = Decimal('0.01')
+
+# stored and actual are (total deducted, deduction count)
+LedgerMismatch = namedtuple('LedgerMismatch', ['loan_id', 'stored', 'actual'])
+
+
+def get_deduction_totals(loan_ids=None):
+    """{loan id: (total deducted, deduction count)} from the LoanDeduction rows, in one grouped query"""
+    deductions = LoanDeduction.objects.all()
+    if loan_ids is not None:
+        deductions = deductions.filter(loan_id__in=loan_ids)
+    return {
+        loan_id: ((total or Decimal('0')).quantize(CENT), count)
+        for loan_id, total, count in deductions.order_by().values('loan_id').annotate(
+            total=Sum('amount'), count=Count('id')
+        ).values_list('loan_id', 'total', 'count')
+    }
+
+
+def find_ledger_mismatches(loan_ids=None):
+    """Loans whose stored ledger differs from their deductions"""
+    actual = get_deduction_totals(loan_ids)
+    loans = Loan.objects.all()
+    if loan_ids is not None:
+        loans = loans.filter(pk__in=loan_ids)
+    mismatches = []
+    for loan_id, total_deducted, deduction_count in loans.order_by('pk').values_list('pk', 'total_deducted', 'deduction_count'):
+        expected = actual.get(loan_id, (Decimal('0'), 0))
+        if (total_deducted, deduction_count) != expected:
+            mismatches.append(LedgerMismatch(loan_id, (total_deducted, deduction_count), expected))
+    return mismatches
+
+
+def refresh_loan_ledgers(loan_ids=None):
+    """Rewrite the ledgers that differ from their deductions; returns the mismatches fixed"""
+    mismatches = find_ledger_mismatches(loan_ids)
+    Loan.objects.bulk_update([
+        Loan(pk=mismatch.loan_id, total_deducted=mismatch.actual[0], deduction_count=mismatch.actual[1])
+        for mismatch in mismatches
+    ], ['total_deducted', 'deduction_count'], batch_size=LEDGER_BATCH_SIZE)
+    return mismatches
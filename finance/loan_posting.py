@@ -0,0 +1,145 @@
+"""
+Loan deduction posting for a payroll cut-off.
+
+post_loan_deductions takes the rows of a deduction upload and posts them with
+a fixed number of queries: employees, loan types and the candidate loans
+(annotated with whether they already have a deduction for the cut-off) are
+read in three bulk queries, balances are worked out in memory, and the
+LoanDeduction rows and Loan balances (with their ledgers, see
+finance.loan_ledger) are written with one bulk_create and one
+bulk_update inside a single short transaction.
+
+Rows are applied in file order with the same rules as Loan.apply_deduction:
+each row goes to the employee's oldest active loan of that type, a loan
+takes at most one deduction per cut-off, and a loan paid down to zero is
+closed, so a later row for the same loan type moves on to the next loan.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from userlogin.models import EmployeeLogin
+from .models import Loan, LoanDeduction, LoanType
+
+LOAN_POSTING_BATCH_SIZE = 1000
+
+
+def _is_blank(row):
+    return not row or all(cell is None or (isinstance(cell, str) and cell.strip() == '') for cell in row)
+
+
+def post_loan_deductions(rows, cutoff_date):
+    """
+    Post the deduction rows (Id Number, Name, Loan Type, Deduction) of an
+    upload, numbered from spreadsheet row 2.
+
+    Returns:
+        tuple: (processed: int, errors: list of 'Row n: remark',
+                rejected rows: list of the four columns plus the remark)
+    """
+    errors = []
+    rejected = []
+    rows = [
+        (row_idx, row) for row_idx, row in enumerate(rows, start=2)
+        if not _is_blank(row) and len(row) >= 4
+    ]
+
+    def reject(row_idx, values, remark):
+        errors.append(f'Row {row_idx}: {remark}')
+        rejected.append(list(values) + [remark])
+
+    id_numbers = {str(row[0]) for _, row in rows if row[0]}
+    loan_type_names = {str(row[2]).strip() for _, row in rows if row[2]}
+
+    employees = dict(EmployeeLogin.objects.filter(idnumber__in=id_numbers).values_list('idnumber', 'pk'))
+    loan_types = dict(LoanType.objects.filter(loan_type__in=loan_type_names).values_list('loan_type', 'pk'))
+
+    # Oldest first, as the per-row lookup picked them
+    candidates = defaultdict(list)
+    already_deducted = set()
+    for loan in Loan.objects.filter(
+        employee_id__in=employees.values(),
+        loan_type_id__in=loan_types.values(),
+        is_active=True,
+        current_balance__gt=0,
+    ).annotate(
+        has_cutoff_deduction=Exists(LoanDeduction.objects.filter(loan=OuterRef('pk'), cut_off=cutoff_date))
+    ).order_by('created_at', 'pk'):
+        candidates[(loan.employee_id, loan.loan_type_id)].append(loan)
+        if loan.has_cutoff_deduction:
+            already_deducted.add(loan.pk)
+
+    deductions = []
+    changed_loans = {}
+    for row_idx, row in rows:
+        employee_id, name, loan_type_name, deduction_amount = row[:4]
+        if not all([employee_id, loan_type_name, deduction_amount]):
+            reject(row_idx, row[:4], 'Missing required data (Id Number, Loan Type, or Deduction)')
+            continue
+
+        employee_pk = employees.get(str(employee_id))
+        if employee_pk is None:
+            reject(row_idx, row[:4], f'Employee {employee_id} not found')
+            continue
+
+        loan_type_pk = loan_types.get(str(loan_type_name).strip())
+        if loan_type_pk is None:
+            reject(row_idx, row[:4], f'Loan type {loan_type_name} not found')
+            continue
+
+        try:
+            deduction_amount = Decimal(str(deduction_amount))
+        except Exception:
+            reject(row_idx, row[:4], 'Invalid deduction amount')
+            continue
+        # NaN and Infinity parse but cannot be compared with or subtracted from a balance
+        if not deduction_amount.is_finite():
+            reject(row_idx, row[:4], 'Invalid deduction amount')
+            continue
+        values = [employee_id, name, loan_type_name, deduction_amount]
+
+        loan = next((
+            loan for loan in candidates[(employee_pk, loan_type_pk)]
+            if loan.is_active and loan.current_balance > 0
+        ), None)
+        if loan is None:
+            reject(row_idx, values, f'No active loan found for {employee_id} - {loan_type_name}')
+            continue
+        if loan.pk in already_deducted:
+            reject(row_idx, values, f'Deduction already exists for {cutoff_date}')
+            continue
+
+        amount = min(deduction_amount, loan.current_balance)
+        if amount <= 0:
+            reject(row_idx, values, 'No deduction applied (loan may be fully paid)')
+            continue
+
+        deductions.append(LoanDeduction(
+            loan=loan,
+            amount=amount,
+            cut_off=cutoff_date,
+            balance_before=loan.current_balance,
+            balance_after=loan.current_balance - amount,
+        ))
+        loan.current_balance -= amount
+        loan.total_deducted += amount
+        loan.deduction_count += 1
+        if loan.current_balance <= 0:
+            loan.is_active = False
+            loan.current_balance = Decimal('0')
+        already_deducted.add(loan.pk)
+        changed_loans[loan.pk] = loan
+
+    now = timezone.now()
+    for loan in changed_loans.values():
+        loan.updated_at = now
+    with transaction.atomic():
+        LoanDeduction.objects.bulk_create(deductions, batch_size=LOAN_POSTING_BATCH_SIZE)
+        Loan.objects.bulk_update(
+            changed_loans.values(),
+            ['current_balance', 'is_active', 'total_deducted', 'deduction_count', 'updated_at'],
+            batch_size=LOAN_POSTING_BATCH_SIZE
+        )
+
+    return len(deductions), errors, rejected
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from finance.metrics import STAT_SOURCES, refresh_finance_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the finance dashboard rollup from payslips, loans, allowances and savings (all categories, or some).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('categories', nargs='*', choices=list(STAT_SOURCES), help='Categories to rebuild (default: all)')
+
+    def handle(self, *args, **options):
+        rows = refresh_finance_stats(options['categories'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt finance statistics: {rows} rows written'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from finance.loan_ledger import find_ledger_mismatches, refresh_loan_ledgers
+
+class Command(BaseCommand):
+    help = 'Check Loan.total_deducted/deduction_count against the LoanDeduction rows (and repair them with --fix)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite the ledgers that do not match')
+
+    def handle(self, *args, **options):
+        mismatches = refresh_loan_ledgers() if options['fix'] else find_ledger_mismatches()
+        for mismatch in mismatches:
+            (stored_total, stored_count), (total, count) = mismatch.stored, mismatch.actual
+            self.stdout.write(
+                f"Loan {mismatch.loan_id}: ledger {stored_total} over {stored_count} deduction(s), "
+                f"deductions {total} over {count}"
+            )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All loan ledgers match their deductions'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(mismatches)} loan ledger(s)'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(mismatches)} loan ledger(s) do not match; run with --fix to repair'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from finance.utils import render_cutoff_ojt_payslips
+
+class Command(BaseCommand):
+    help = 'Pre-render the OJT payslip PDFs of a cut-off into the PDF cache using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('cut_off', help='Cut-off exactly as stored on the OJT payslips')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of render processes (defaults to the CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        outcome = render_cutoff_ojt_payslips(options['cut_off'], workers=options['workers'])
+        for error in outcome['errors']:
+            self.stderr.write(f"Payslip {error['payslip_id']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {outcome['rendered']} payslip(s), {outcome['cached']} already cached, {len(outcome['errors'])} error(s)"
+        ))
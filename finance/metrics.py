@@ -0,0 +1,310 @@
+"""
+Finance dashboard metrics.
+
+FinanceDailyStat holds how many payslips, loans, allowances and savings
+records there are per day and per type, with their amounts (outstanding loan
+balance, allowance amount, unwithdrawn savings). Days are the payslip cut-off
+date, or the local date the other records were created.
+
+Records saved or deleted one at a time (finance pages, forms, the admin,
+emergency loans approved in PRF, Loan.apply_deduction) move their own day and
+type bucket through the finance.signals receivers. Upload and posting jobs
+write in bulk: they run inside bulk_finance_writes, which skips the per-record
+updates for their categories and rebuilds those categories from the finance
+tables (one grouped query each) once the job commits; rebuild_finance_stats
+recomputes everything. The dashboard cards and charts read a few grouped
+queries over the rollup, and their payloads are kept in the Django cache under
+a version key that every change bumps.
+"""
+import calendar
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from decimal import Decimal
+from urllib.parse import quote
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from empconnect.cache import bump_cache_version, get_cache_version, invalidate_on_commit
+from empconnect.rollups import add_to_bucket
+from userlogin.models import EmployeeLogin
+from .models import Allowance, FinanceDailyStat, Loan, Payslip, Savings
+from .summary import schedule_finance_summary_invalidation
+
+logger = logging.getLogger(__name__)
+
+STAT_BATCH_SIZE = 1000
+FINANCE_METRICS_VERSION_KEY = 'finance_metrics:version'
+CARDS_KEY = 'finance_metrics:{version}:cards:{today}'
+CHART_KEY = 'finance_metrics:{version}:chart:{today}:{category}:{period}:{type_name}'
+
+# category: (model, day, type name, amount)
+STAT_SOURCES = {
+    'payslips': (Payslip, F('cutoff_date'), Value(''), None),
+    'loans': (Loan, TruncDate('created_at'), F('loan_type__loan_type'), Sum('current_balance', filter=Q(is_active=True))),
+    'allowances': (Allowance, TruncDate('created_at'), F('allowance_type__allowance_type'), Sum('amount')),
+    'savings': (Savings, TruncDate('created_at'), Coalesce(F('savings_type__savings_type'), Value('')), Sum('amount', filter=Q(is_withdrawn=False))),
+}
+
+STAT_CATEGORIES = {model: category for category, (model, *_) in STAT_SOURCES.items()}
+
+# category: (dataset label, line colour, fill colour); payslip charts plot counts, the others amounts
+CHART_STYLES = {
+    'payslips': ('Payslips Uploaded', '#f97316', 'rgba(249, 115, 22, 0.1)'),
+    'loans': ('Total Loan Balance', '#2563eb', 'rgba(37, 99, 235, 0.1)'),
+    'allowances': ('Total Allowance Amount', '#22c55e', 'rgba(34, 197, 94, 0.1)'),
+    'savings': ('Total Savings', '#8b5cf6', 'rgba(139, 92, 246, 0.1)'),
+}
+
+
+def get_cache_timeout():
+    return getattr(settings, 'FINANCE_METRICS_CACHE_TIMEOUT', 600)
+
+
+def invalidate_finance_metrics():
+    """Drop every cached card and chart payload (they are keyed by version)"""
+    bump_cache_version(FINANCE_METRICS_VERSION_KEY)
+
+
+def _build_stats(category):
+    model, day, type_name, amount = STAT_SOURCES[category]
+    grouped = model.objects.annotate(day=day, type_label=type_name).order_by().values('day', 'type_label')
+    grouped = grouped.annotate(record_count=Count('id'), **({'total': amount} if amount is not None else {}))
+    return [
+        FinanceDailyStat(
+            date=row['day'],
+            category=category,
+            type_name=row['type_label'] or '',
+            record_count=row['record_count'],
+            amount=row.get('total') or 0,
+        )
+        for row in grouped
+    ]
+
+
+def refresh_finance_stats(categories=None):
+    """Recompute the rollup of the given categories (all by default); returns the rows written"""
+    categories = list(categories or STAT_SOURCES)
+    stats = [stat for category in categories for stat in _build_stats(category)]
+    with transaction.atomic():
+        FinanceDailyStat.objects.filter(category__in=categories).delete()
+        FinanceDailyStat.objects.bulk_create(stats, batch_size=STAT_BATCH_SIZE)
+    invalidate_finance_metrics()
+    return len(stats)
+
+
+def schedule_finance_stats_refresh(*categories):
+    """Refresh the given categories once the surrounding transaction commits; employee summaries are dropped too"""
+    schedule_finance_summary_invalidation()
+
+    def refresh():
+        try:
+            refresh_finance_stats(categories)
+        except Exception:
+            logger.exception(f"Finance statistics refresh failed for {', '.join(categories)}")
+    transaction.on_commit(refresh)
+
+
+# Categories whose per-record updates are skipped in this thread (see bulk_finance_writes)
+_bulk_writes = threading.local()
+
+
+@contextmanager
+def bulk_finance_writes(*categories):
+    """
+    Skip per-record rollup updates for ``categories`` inside the block and
+    rebuild them once it commits, for jobs that write many records.
+    """
+    previous = getattr(_bulk_writes, 'categories', frozenset())
+    _bulk_writes.categories = previous | set(categories)
+    try:
+        yield
+    finally:
+        _bulk_writes.categories = previous
+        schedule_finance_stats_refresh(*categories)
+
+
+def is_tracked(model):
+    """Whether saves of ``model`` update the rollup one record at a time in this thread"""
+    return STAT_CATEGORIES[model] not in getattr(_bulk_writes, 'categories', frozenset())
+
+
+def _type_name(record, field):
+    related = getattr(record, field)
+    return getattr(related, field) if related is not None else ''
+
+
+def get_stat_snapshot(record):
+    """The (category, date, type name, amount) bucket share a finance record is counted under"""
+    if isinstance(record, Payslip):
+        return ('payslips', Payslip._meta.get_field('cutoff_date').to_python(record.cutoff_date), '', Decimal('0'))
+    day = timezone.localdate(record.created_at)
+    if isinstance(record, Loan):
+        amount = record.current_balance if record.is_active else 0
+        return ('loans', day, _type_name(record, 'loan_type'), Decimal(str(amount)))
+    if isinstance(record, Allowance):
+        return ('allowances', day, _type_name(record, 'allowance_type'), Decimal(str(record.amount)))
+    amount = 0 if record.is_withdrawn else record.amount
+    return ('savings', day, _type_name(record, 'savings_type'), Decimal(str(amount)))
+
+
+def get_stored_snapshot(record):
+    """The snapshot of a record as it is in the database, before an update is written"""
+    model = type(record)
+    related = [field for field in ('loan_type', 'allowance_type', 'savings_type') if hasattr(model, field)]
+    stored = model.objects.select_related(*related).filter(pk=record.pk).first()
+    return get_stat_snapshot(stored) if stored else None
+
+
+def _apply(category, day, type_name, count, amount):
+    pk = add_to_bucket(
+        FinanceDailyStat, {'date': day, 'category': category, 'type_name': type_name}, record_count=count, amount=amount
+    )
+    # A rebuild has no row for an empty bucket either
+    FinanceDailyStat.objects.filter(pk=pk, record_count__lte=0).delete()
+
+
+def record_stat_change(before, after):
+    """Move one record from its ``before`` snapshot to its ``after`` snapshot (either may be None)"""
+    if before == after:
+        return
+    with transaction.atomic():
+        if before:
+            category, day, type_name, amount = before
+            _apply(category, day, type_name, -1, -amount)
+        if after:
+            category, day, type_name, amount = after
+            _apply(category, day, type_name, 1, amount)
+    invalidate_on_commit(invalidate_finance_metrics)
+
+
+def _month_start(year, month):
+    # Months before January roll back into the previous year
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return date(year, month, 1)
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def month_over_month(this_month, last_month):
+    """(percent change capped at 100, whether it went up) as the dashboard cards show it"""
+    if not last_month:
+        return 0, True
+    percent = min(round(((this_month - last_month) / last_month) * 100, 1), 100)
+    return percent, this_month >= last_month
+
+
+def _build_cards(today):
+    month_start = today.replace(day=1)
+    last_month_start = _month_start(today.year, today.month - 1)
+    quarter_start = _month_start(today.year, 3 * ((today.month - 1) // 3) + 1)
+    year_start = today.replace(month=1, day=1)
+
+    cards = {}
+    employees = EmployeeLogin.objects.filter(is_active=True).aggregate(
+        total=Count('pk'),
+        this_month=Count('pk', filter=Q(date_joined__gte=_local_midnight(month_start))),
+        last_month=Count('pk', filter=Q(date_joined__gte=_local_midnight(last_month_start), date_joined__lt=_local_midnight(month_start))),
+    )
+    cards['total_employees'] = employees['total']
+    cards['employees_percent'], cards['employees_positive'] = month_over_month(employees['this_month'], employees['last_month'])
+
+    totals = {
+        row['category']: row for row in FinanceDailyStat.objects.order_by().values('category').annotate(
+            total=Sum('record_count'),
+            this_month=Sum('record_count', filter=Q(date__gte=month_start)),
+            last_month=Sum('record_count', filter=Q(date__gte=last_month_start, date__lt=month_start)),
+            month_amount=Sum('amount', filter=Q(date__gte=month_start)),
+            quarter_amount=Sum('amount', filter=Q(date__gte=quarter_start)),
+            year_amount=Sum('amount', filter=Q(date__gte=year_start)),
+        )
+    }
+    for category in STAT_SOURCES:
+        row = totals.get(category, {})
+        cards[f'total_{category}'] = row.get('total') or 0
+        cards[f'{category}_percent'], cards[f'{category}_positive'] = month_over_month(row.get('this_month') or 0, row.get('last_month') or 0)
+
+    loans = totals.get('loans', {})
+    cards['month_total_balance'] = float(loans.get('month_amount') or 0)
+    cards['quarter_total_balance'] = float(loans.get('quarter_amount') or 0)
+    cards['year_total_balance'] = float(loans.get('year_amount') or 0)
+    return cards
+
+
+def get_dashboard_cards(today=None):
+    """Totals and month-over-month changes for the finance dashboard cards, from the rollup"""
+    today = today or timezone.localdate()
+    key = CARDS_KEY.format(version=get_cache_version(FINANCE_METRICS_VERSION_KEY), today=today.isoformat())
+    cards = cache.get(key)
+    if cards is None:
+        cards = _build_cards(today)
+        cache.set(key, cards, get_cache_timeout())
+    return cards
+
+
+def _build_chart(category, type_name, period, today):
+    if period == 'month':
+        start = today.replace(day=1)
+        end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+        buckets = [date(today.year, today.month, day) for day in range(1, end.day + 1)]
+        labels = [day.strftime('%b %d') for day in buckets]
+    else:
+        if period == 'quarter':
+            # The last three months, this one included
+            buckets = [_month_start(today.year, today.month - offset) for offset in (2, 1, 0)]
+            labels = [month.strftime('%b %Y') for month in buckets]
+        else:
+            buckets = [date(today.year, month, 1) for month in range(1, 13)]
+            labels = [month.strftime('%b') for month in buckets]
+        start = buckets[0]
+        end = buckets[-1].replace(day=calendar.monthrange(buckets[-1].year, buckets[-1].month)[1])
+
+    stats = FinanceDailyStat.objects.filter(category=category, date__range=[start, end])
+    if type_name:
+        stats = stats.filter(type_name=type_name)
+    values = dict.fromkeys(buckets, 0)
+    for day, record_count, amount in stats.order_by().values('date').annotate(
+        record_count=Sum('record_count'), total=Sum('amount')
+    ).values_list('date', 'record_count', 'total'):
+        bucket = day if period == 'month' else day.replace(day=1)
+        values[bucket] += record_count if category == 'payslips' else float(amount or 0)
+
+    label, color, fill = CHART_STYLES[category]
+    return {
+        'labels': labels,
+        'datasets': [{
+            'label': label,
+            'data': [values[bucket] for bucket in buckets],
+            'borderColor': color,
+            'backgroundColor': fill,
+            'barBackgroundColor': color,
+            'barBorderColor': color,
+            'tension': 0.4,
+            'fill': True
+        }]
+    }
+
+
+def get_chart_data(category, type_name='', period='month', today=None):
+    """
+    Chart.js labels and dataset for a category (optionally one type) over
+    this month (per day), the last three months or this year (per month).
+    """
+    if category not in STAT_SOURCES:
+        return {'labels': [], 'datasets': []}
+    period = period if period in ('month', 'quarter') else 'year'
+    today = today or timezone.localdate()
+    key = CHART_KEY.format(
+        version=get_cache_version(FINANCE_METRICS_VERSION_KEY), today=today.isoformat(), category=category, period=period, type_name=quote(type_name)
+    )
+    chart = cache.get(key)
+    if chart is None:
+        chart = _build_chart(category, type_name, period, today)
+        cache.set(key, chart, get_cache_timeout())
+    return chart
@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-18 00:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backgroundjob', '0001_initial'),
+        ('finance', '0008_allowance_is_percentage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayslipEmailDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient_email', models.EmailField(blank=True, max_length=254)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sent', 'Sent'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='queued', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payslip_deliveries', to='backgroundjob.backgroundjob')),
+                ('payslip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_deliveries', to='finance.payslip')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['job', 'status'], name='finance_pay_job_id_8fce1e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:33
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_loan_ledgers(apps, schema_editor):
+    # Same totals as finance.loan_ledger.get_deduction_totals
+    Loan = apps.get_model('finance', 'Loan')
+    LoanDeduction = apps.get_model('finance', 'LoanDeduction')
+    loans = []
+    for row in LoanDeduction.objects.order_by().values('loan_id').annotate(total=Sum('amount'), count=Count('id')):
+        loans.append(Loan(pk=row['loan_id'], total_deducted=row['total'] or 0, deduction_count=row['count']))
+    Loan.objects.bulk_update(loans, ['total_deducted', 'deduction_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_payslipemaildelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='deduction_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='total_deducted',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_loan_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:37
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_finance_stats(apps, schema_editor):
+    # Same grouping as finance.metrics.refresh_finance_stats
+    FinanceDailyStat = apps.get_model('finance', 'FinanceDailyStat')
+    sources = {
+        'payslips': (apps.get_model('finance', 'Payslip'), F('cutoff_date'), Value(''), None),
+        'loans': (apps.get_model('finance', 'Loan'), TruncDate('created_at'), F('loan_type__loan_type'), Sum('current_balance', filter=Q(is_active=True))),
+        'allowances': (apps.get_model('finance', 'Allowance'), TruncDate('created_at'), F('allowance_type__allowance_type'), Sum('amount')),
+        'savings': (apps.get_model('finance', 'Savings'), TruncDate('created_at'), Coalesce(F('savings_type__savings_type'), Value('')), Sum('amount', filter=Q(is_withdrawn=False))),
+    }
+    stats = []
+    for category, (model, day, type_name, amount) in sources.items():
+        grouped = model.objects.annotate(day=day, type_label=type_name).order_by().values('day', 'type_label')
+        grouped = grouped.annotate(record_count=Count('id'), **({'total': amount} if amount is not None else {}))
+        stats.extend(
+            FinanceDailyStat(
+                date=row['day'],
+                category=category,
+                type_name=row['type_label'] or '',
+                record_count=row['record_count'],
+                amount=row.get('total') or 0,
+            )
+            for row in grouped
+        )
+    FinanceDailyStat.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_loan_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(choices=[('payslips', 'Payslips'), ('loans', 'Loans'), ('allowances', 'Allowances'), ('savings', 'Savings')], max_length=20)),
+                ('type_name', models.CharField(blank=True, max_length=100)),
+                ('record_count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'date'], name='finance_daily_stat_cat_idx')],
+                'unique_together': {('date', 'category', 'type_name')},
+            },
+        ),
+        migrations.RunPython(backfill_finance_stats, migrations.RunPython.noop),
+    ]
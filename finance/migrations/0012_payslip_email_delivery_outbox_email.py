@@ -0,0 +1,20 @@
+# Generated by Django 6.1.2 on 2026-10-18 02:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_finance_daily_stat'),
+        ('notification', '0006_fold_for_all_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payslipemaildelivery',
+            name='email',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payslip_deliveries', to='notification.outgoingemail'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from decimal import Decimal
 from userlogin.models import EmployeeLogin
 
@@ -21,6 +22,35 @@ class Payslip(models.Model):
             display_name = getattr(emp, 'username', None) or getattr(emp, 'idnumber', None) or str(emp.pk)
         return f"Payslip for {display_name} - {self.cutoff_date}"
 
+class PayslipEmailDelivery(models.Model):
+    """Outcome of emailing one payslip as part of a bulk cut-off send"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+
+    payslip = models.ForeignKey(Payslip, on_delete=models.CASCADE, related_name='email_deliveries')
+    job = models.ForeignKey('backgroundjob.BackgroundJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='payslip_deliveries')
+    # The outbox message carrying the payslip; its outcome is copied here
+    email = models.ForeignKey('notification.OutgoingEmail', on_delete=models.SET_NULL, null=True, blank=True, related_name='payslip_deliveries')
+    recipient_email = models.EmailField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['job', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.payslip} -> {self.recipient_email or 'no email'} ({self.status})"
+
 class LoanType(models.Model):
     loan_type = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -37,6 +67,9 @@ class Loan(models.Model):
     current_balance = models.DecimalField(max_digits=10, decimal_places=2)   # Current remaining balance
     monthly_deduction = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     is_active = models.BooleanField(default=True)
+    # Ledger of the loan's LoanDeduction rows, kept in step by finance.loan_ledger
+    total_deducted = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    deduction_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -56,29 +89,52 @@ class Loan(models.Model):
         self.current_balance += Decimal(str(amount))
         self.save()
 
+    @property
+    def paid(self):
+        """Principal paid down so far (0 without a principal)"""
+        if self.principal_amount > 0:
+            return self.principal_amount - self.current_balance
+        return Decimal('0')
+
+    @property
+    def percent(self):
+        """Remaining balance as a percentage of the principal (100 without a principal)"""
+        if self.principal_amount > 0:
+            return float(self.current_balance / self.principal_amount * 100)
+        return 100
+
+    @property
+    def percent_paid(self):
+        return 100 - self.percent
+
     def apply_deduction(self, amount, cut_off):
         """Apply deduction and create deduction record"""
         deduction_amount = min(Decimal(str(amount)), self.current_balance)
         
         if deduction_amount > 0:
-            # Create deduction record
-            LoanDeduction.objects.create(
-                loan=self,
-                amount=deduction_amount,
-                cut_off=cut_off,
-                balance_before=self.current_balance,
-                balance_after=self.current_balance - deduction_amount
-            )
-            
-            # Update current balance
-            self.current_balance -= deduction_amount
-            
-            # Mark as inactive if fully paid
-            if self.current_balance <= 0:
-                self.is_active = False
-                self.current_balance = Decimal('0')
-            
-            self.save()
+            with transaction.atomic():
+                # Create deduction record
+                LoanDeduction.objects.create(
+                    loan=self,
+                    amount=deduction_amount,
+                    cut_off=cut_off,
+                    balance_before=self.current_balance,
+                    balance_after=self.current_balance - deduction_amount
+                )
+                
+                # Update current balance
+                self.current_balance -= deduction_amount
+                
+                # Mark as inactive if fully paid
+                if self.current_balance <= 0:
+                    self.is_active = False
+                    self.current_balance = Decimal('0')
+                
+                # Ledger counters are incremented in the database, not from this instance's copy
+                self.total_deducted = F('total_deducted') + deduction_amount
+                self.deduction_count = F('deduction_count') + 1
+                self.save()
+                self.refresh_from_db(fields=['total_deducted', 'deduction_count'])
             return deduction_amount
         return Decimal('0')
 
@@ -246,3 +302,30 @@ class Savings(models.Model):
     @property
     def current_balance(self):
         return Decimal('0') if self.is_withdrawn else self.amount
+
+
+class FinanceDailyStat(models.Model):
+    """Finance records per day, category and type (see finance.metrics)"""
+    CATEGORY_CHOICES = [
+        ('payslips', 'Payslips'),
+        ('loans', 'Loans'),
+        ('allowances', 'Allowances'),
+        ('savings', 'Savings'),
+    ]
+
+    date = models.DateField()
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
+    # Loan, allowance or savings type name; blank for payslips and untyped savings
+    type_name = models.CharField(max_length=100, blank=True)
+    record_count = models.IntegerField(default=0)
+    # Outstanding loan balance, allowance amount or unwithdrawn savings; 0 for payslips
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.date} {self.category} {self.type_name}: {self.record_count}"
+
+    class Meta:
+        unique_together = ['date', 'category', 'type_name']
+        indexes = [
+            models.Index(fields=['category', 'date'], name='finance_daily_stat_cat_idx'),
+        ]
@@ -0,0 +1,199 @@
+"""
+OJT payslip import for a cut-off.
+
+import_ojt_payslips takes the header row and the data rows of an upload
+(streamed from a read-only workbook) and applies them with a fixed number of
+queries. Columns are matched to OJTPayslipData fields by header name once, so
+the template columns may come in any order; a sheet whose headers are not
+recognised is read in template order, and a sheet that has only some of the
+template headers is rejected with the ones it is missing. Employees and the
+payslips they already have for the cut-off are read in two bulk queries, and
+the new and changed payslips are written with one bulk_create and one
+bulk_update inside a single short transaction.
+
+An employee listed more than once keeps the values of their last row, and an
+existing payslip is updated in place, as the per-row upsert did. Bulk writes
+skip the model signals, so the finance summaries and the cached PDFs of the
+updated payslips are dropped here.
+"""
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from userlogin.models import EmployeeLogin
+from .models import OJTPayslipData
+from .summary import schedule_finance_summary_invalidation
+from .utils import invalidate_ojt_payslip_pdf
+import logging
+
+logger = logging.getLogger(__name__)
+
+OJT_IMPORT_BATCH_SIZE = 500
+# Template columns copied into the rejected rows workbook, before the remark
+ERROR_ROW_COLUMNS = 6
+
+# Template column order (see ojt_payslip_template): (field, accepted headers)
+OJT_COLUMNS = [
+    ('idnumber', ('ID_NO', 'ID_NUMBER', 'IDNUMBER')),
+    ('regular_day', ('REGULAR_DAY',)),
+    ('allowance_day', ('ALLOWANCE_DAY',)),
+    ('total_allowance', ('TOTAL_ALLOWANCE',)),
+    ('nd_allowance', ('ND_ALLOWANCE',)),
+    ('grand_total', ('GRAND_TOTAL',)),
+    ('basic_school_share', ('BASIC_SCHOOL_SHARE',)),
+    ('basic_ojt_share', ('BASIC_OJT_SHARE',)),
+    ('deduction', ('DEDUCTION',)),
+    ('net_ojt_share', ('NET_OJT_SHARE',)),
+    ('rice_allowance', ('RICE_ALLOWANCE',)),
+    ('ot_allowance', ('OT_ALLOWANCE',)),
+    ('nd_ot_allowance', ('ND_OT_ALLOWANCE',)),
+    ('special_holiday', ('SPECIAL_HOLIDAY',)),
+    ('legal_holiday', ('LEGAL_HOLIDAY',)),
+    ('satoff_allowance', ('SATOFF_ALLOWANCE',)),
+    ('rd_ot', ('RD_OT',)),
+    ('adjustment', ('ADJUSTMENT',)),
+    ('deduction_2', ('DEDUCTION_2',)),
+    ('ot_pay_allowance', ('OT_PAY_ALLOWANCE',)),
+    ('total_allow', ('TOTAL_ALLOW',)),
+    ('holiday_hours', ('HOLIDAY_DATE', 'HOLIDAY_HOURS')),
+    ('rd_ot_days', ('RD_OT_DATE', 'RD_OT_DAYS')),
+    ('perfect_attendance', ('PERFECT_ATTENDANCE',)),
+]
+AMOUNT_FIELDS = [field for field, _ in OJT_COLUMNS[1:]]
+
+
+def _is_blank(row):
+    return not row or all(cell is None or (isinstance(cell, str) and cell.strip() == '') for cell in row)
+
+
+def _normalize_header(header):
+    return str(header).strip().upper().replace(' ', '_') if header is not None else ''
+
+
+def map_columns(headers):
+    """
+    Match the sheet's columns to OJTPayslipData fields by header name.
+
+    Returns:
+        tuple: ({field: column index}, template headers missing from the sheet);
+               template order, with nothing missing, when no ID header is recognised
+    """
+    positions = {}
+    for index, header in enumerate(headers or ()):
+        positions.setdefault(_normalize_header(header), index)
+
+    columns = {}
+    for field, names in OJT_COLUMNS:
+        index = next((positions[name] for name in names if name in positions), None)
+        if index is not None:
+            columns[field] = index
+    if 'idnumber' not in columns:
+        return {field: index for index, (field, _) in enumerate(OJT_COLUMNS)}, []
+    return columns, [names[0] for field, names in OJT_COLUMNS if field not in columns]
+
+
+def _to_decimal(value):
+    if value is None or value == '':
+        return Decimal('0')
+    try:
+        value = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return Decimal('0')
+    return value if value.is_finite() else Decimal('0')
+
+
+def _fits(value, field):
+    # Whole digits the column can hold (max_digits - decimal_places)
+    return abs(value) < 10 ** (field.max_digits - field.decimal_places)
+
+
+def _drop_cached_pdfs(payslip_ids):
+    for payslip_id in payslip_ids:
+        try:
+            invalidate_ojt_payslip_pdf(payslip_id)
+        except Exception as e:
+            logger.warning(f"Could not drop cached PDFs of OJT payslip {payslip_id}: {str(e)}")
+
+
+def import_ojt_payslips(headers, rows, cut_off):
+    """
+    Create or update the cut-off's OJT payslips from the data rows of an
+    upload, numbered from spreadsheet row 2.
+
+    Returns:
+        tuple: (created: int, updated: int, errors: list of 'Row n: remark',
+                rejected rows: list of the first six template columns plus the remark)
+    """
+    rejections = []
+    columns, missing = map_columns(headers)
+    if missing:
+        # A misspelled header would otherwise clear that amount on every payslip
+        return 0, 0, [f"Missing template columns: {', '.join(missing)}"], []
+    model_fields = {field: OJTPayslipData._meta.get_field(field) for field in AMOUNT_FIELDS}
+
+    def cell(row, field):
+        index = columns.get(field)
+        return row[index] if row and index is not None and index < len(row) else None
+
+    def reject(row_idx, row, remark):
+        # In template order, whatever order the sheet's columns came in
+        values = [cell(row, field) for field, _ in OJT_COLUMNS[:ERROR_ROW_COLUMNS]]
+        rejections.append((row_idx, remark, ['' if value is None else value for value in values] + [remark]))
+
+    # One pass over the sheet, keeping only the parsed amounts of each row
+    parsed = []
+    for row_idx, row in enumerate(rows, start=2):
+        if _is_blank(row):
+            continue
+        employee_id = cell(row, 'idnumber')
+        if employee_id is None or (isinstance(employee_id, str) and not employee_id.strip()):
+            reject(row_idx, row, 'Missing employee ID')
+            continue
+        amounts = {field: _to_decimal(cell(row, field)) for field in AMOUNT_FIELDS}
+        too_large = next((field for field, value in amounts.items() if not _fits(value, model_fields[field])), None)
+        if too_large:
+            reject(row_idx, row, f'{too_large.upper()} is too large')
+            continue
+        parsed.append((row_idx, row, str(employee_id).strip(), amounts))
+
+    employees = dict(EmployeeLogin.objects.filter(
+        idnumber__in={employee_id for _, _, employee_id, _ in parsed}
+    ).values_list('idnumber', 'pk'))
+    # Oldest first, so an employee with duplicate payslips gets their newest one updated
+    existing = {
+        payslip.employee_id: payslip
+        for payslip in OJTPayslipData.objects.filter(
+            employee_id__in=employees.values(), cut_off=cut_off
+        ).order_by('created_at', 'pk')
+    }
+
+    to_create = {}
+    to_update = {}
+    created = updated = 0
+    for row_idx, row, employee_id, amounts in parsed:
+        employee_pk = employees.get(employee_id)
+        if employee_pk is None:
+            reject(row_idx, row, f'Employee {employee_id} not found')
+            continue
+
+        payslip = to_create.get(employee_pk) or existing.get(employee_pk)
+        if payslip is None:
+            to_create[employee_pk] = OJTPayslipData(employee_id=employee_pk, cut_off=cut_off, **amounts)
+            created += 1
+            continue
+        for field, value in amounts.items():
+            setattr(payslip, field, value)
+        if payslip.pk is not None:
+            to_update[payslip.pk] = payslip
+        updated += 1
+
+    with transaction.atomic():
+        OJTPayslipData.objects.bulk_create(to_create.values(), batch_size=OJT_IMPORT_BATCH_SIZE)
+        OJTPayslipData.objects.bulk_update(to_update.values(), AMOUNT_FIELDS, batch_size=OJT_IMPORT_BATCH_SIZE)
+        if to_create or to_update:
+            schedule_finance_summary_invalidation()
+            updated_ids = list(to_update)
+            transaction.on_commit(lambda: _drop_cached_pdfs(updated_ids))
+
+    # Rows are rejected while parsing and after the lookups; report them in sheet order
+    rejections.sort(key=lambda rejection: rejection[0])
+    errors = [f'Row {row_idx}: {remark}' for row_idx, remark, _ in rejections]
+    return created, updated, errors, [values for _, _, values in rejections]
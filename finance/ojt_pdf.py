@@ -0,0 +1,203 @@
+"""
+ReportLab layout of the OJT payslip PDF.
+
+Kept free of Django model imports so process-pool workers can render from a
+plain payload (see finance.utils.render_cutoff_ojt_payslips). Styles are built
+once per process and the logo is read from disk once and reused.
+"""
+from functools import lru_cache
+from io import BytesIO
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+
+# Bump when the layout changes so cached PDFs are re-rendered
+OJT_PDF_LAYOUT_VERSION = 1
+
+OJT_PAYSLIP_PDF_FIELDS = [
+    'regular_day', 'allowance_day', 'nd_allowance', 'grand_total', 'basic_school_share',
+    'basic_ojt_share', 'deduction', 'net_ojt_share', 'rice_allowance', 'ot_allowance',
+    'nd_ot_allowance', 'special_holiday', 'legal_holiday', 'satoff_allowance', 'rd_ot',
+    'perfect_attendance', 'adjustment', 'deduction_2', 'ot_pay_allowance',
+]
+
+COMPANY_INFO_MARKUP = """
+    <para align=center>
+    <b>RYONAN ELECTRIC PHILIPPINES CORPORATION</b><br/>
+    105 East Main Avenue, Special Export Processing Zone<br/>
+    Laguna, Technopark, Biñan, Laguna
+    </para>
+"""
+
+COMPANY_INFO_STYLE = ParagraphStyle('CompanyInfo', fontSize=12, fontName='Helvetica', alignment=TA_CENTER)
+TOTAL_ALLOWANCE_STYLE = ParagraphStyle(
+    'TotalAllowance',
+    fontSize=16,
+    fontName='Helvetica-Bold',
+    alignment=TA_RIGHT,
+    spaceBefore=10,
+    spaceAfter=10
+)
+
+HEADER_WITH_LOGO_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (1, 0), (1, 0), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+])
+HEADER_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+EMPLOYEE_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+SECTIONS_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (1, -1), 0.5, colors.black),
+    ('GRID', (3, 0), (4, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),   # Labels left-aligned
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),  # Values right-aligned
+    ('ALIGN', (3, 0), (3, -1), 'LEFT'),   # Labels left-aligned
+    ('ALIGN', (4, 0), (4, -1), 'RIGHT'),  # Values right-aligned
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+
+    # Header rows styling exactly like modal
+    ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (3, 0), (4, 0), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
+    ('BACKGROUND', (3, 0), (4, 0), colors.lightgrey),
+
+    # Highlight NET BASIC ALLOW. OJT SHARE and NET OJT OT PAY ALLOWANCE like modal
+    ('FONTNAME', (0, 9), (1, 9), 'Helvetica-Bold'),  # NET BASIC ALLOW. OJT SHARE
+    ('BACKGROUND', (0, 9), (1, 9), colors.lightyellow),
+    ('FONTNAME', (3, 11), (4, 11), 'Helvetica-Bold'),  # NET OJT OT PAY ALLOWANCE
+    ('BACKGROUND', (3, 11), (4, 11), colors.lightyellow),
+])
+
+
+@lru_cache(maxsize=4)
+def load_logo(logo_path):
+    """Read the logo once per process; None when it is missing or unreadable"""
+    try:
+        with open(logo_path, 'rb') as logo_file:
+            return logo_file.read()
+    except (OSError, TypeError):
+        return None
+
+
+def _header(logo_path):
+    company_info = Paragraph(COMPANY_INFO_MARKUP, COMPANY_INFO_STYLE)
+    logo_bytes = load_logo(logo_path) if logo_path else None
+    if logo_bytes:
+        try:
+            logo = Image(BytesIO(logo_bytes), width=0.8*inch, height=0.8*inch)
+            header_table = Table([[logo, company_info]], colWidths=[1*inch, 5*inch])
+            header_table.setStyle(HEADER_WITH_LOGO_STYLE)
+            return header_table
+        except Exception:
+            pass
+    # Fallback without logo - center everything
+    header_table = Table([[company_info]], colWidths=[6*inch])
+    header_table.setStyle(HEADER_STYLE)
+    return header_table
+
+
+def _amount(value):
+    return f"{float(value):,.2f}"
+
+
+def render_ojt_payslip(payload, logo_path=None):
+    """
+    Render one OJT payslip to PDF bytes.
+
+    ``payload`` is a plain dict with 'idnumber', 'name', 'line_name', 'cut_off'
+    and every name in OJT_PAYSLIP_PDF_FIELDS (as strings or numbers).
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+    elements = [_header(logo_path), Spacer(1, 20)]
+
+    # Employee info grid (2x2) exactly like modal
+    employee_data = [
+        ['ID Number:', payload['idnumber'] or '-', 'Cut-Off:', payload['cut_off']],
+        ['Name:', payload['name'], 'Line:', payload['line_name']]
+    ]
+    employee_table = Table(employee_data, colWidths=[1.2*inch, 2.3*inch, 1.2*inch, 2.3*inch])
+    employee_table.setStyle(EMPLOYEE_TABLE_STYLE)
+    elements.append(employee_table)
+    elements.append(Spacer(1, 20))
+
+    # Payslip sections exactly like modal - no peso signs
+    regular_day_data = [
+        ['Regular Day', ''],
+        ['REGULAR # of Days Work', f"{payload['regular_day']}"],
+        ['ALLOWANCE/DAY', _amount(payload['allowance_day'])],
+        ['Total:', f"{float(payload['regular_day']) * float(payload['allowance_day']):,.2f}"],
+        ['REG ND ALLOWANCE', _amount(payload['nd_allowance'])],
+        ['GRAND TOTAL', _amount(payload['grand_total'])],
+        ['BASIC ALLOW.SCHOOL SHARE', _amount(payload['basic_school_share'])],
+        ['BASIC ALLOW. OJT SHARE', _amount(payload['basic_ojt_share'])],
+        ['DEDUCTION', _amount(payload['deduction'])],
+        ['NET BASIC ALLOW. OJT SHARE', _amount(payload['net_ojt_share'])],
+    ]
+    allowances_data = [
+        ['Allowances', ''],
+        ['RICE ALLOWANCE', _amount(payload['rice_allowance'])],
+        ['Reg OT ALLOWANCE', _amount(payload['ot_allowance'])],
+        ['REG ND OT ALLOWANCE', _amount(payload['nd_ot_allowance'])],
+        ['SPECIAL HOLIDAY', _amount(payload['special_holiday'])],
+        ['LEGAL HOLIDAY', _amount(payload['legal_holiday'])],
+        ['SAT-OFF ALLOWANCE', _amount(payload['satoff_allowance'])],
+        ['RD OT', _amount(payload['rd_ot'])],
+        ['PERFECT ATTENDANCE', _amount(payload['perfect_attendance'])],
+        ['ADJUSTMENT', _amount(payload['adjustment'])],
+        ['DEDUCTION 2', _amount(payload['deduction_2'])],
+        ['NET OJT OT PAY ALLOWANCE', _amount(payload['ot_pay_allowance'])],
+    ]
+
+    # Create side-by-side tables exactly like modal
+    sections_data = []
+    for i in range(max(len(regular_day_data), len(allowances_data))):
+        row = list(regular_day_data[i]) if i < len(regular_day_data) else ['', '']
+        row.append('')  # Spacer column
+        row.extend(allowances_data[i] if i < len(allowances_data) else ['', ''])
+        sections_data.append(row)
+
+    sections_table = Table(sections_data, colWidths=[2.3*inch, 1.2*inch, 0.2*inch, 2.3*inch, 1.2*inch])
+    sections_table.setStyle(SECTIONS_TABLE_STYLE)
+    elements.append(sections_table)
+    elements.append(Spacer(1, 20))
+
+    # Total allowance - Right aligned without table
+    total_allowance_value = float(payload['net_ojt_share'] or 0) + float(payload['ot_pay_allowance'] or 0)
+    elements.append(Paragraph(f"TOTAL ALLOWANCE: {total_allowance_value:,.2f}", TOTAL_ALLOWANCE_STYLE))
+
+    doc.build(elements)
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content
+
+
+def render_ojt_payslip_job(item):
+    """Process-pool entry point: (payslip id, payload, logo_path) -> (payslip id, PDF bytes)"""
+    payslip_id, payload, logo_path = item
+    return payslip_id, render_ojt_payslip(payload, logo_path)
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .metrics import get_stat_snapshot, get_stored_snapshot, is_tracked, record_stat_change, schedule_finance_stats_refresh
+from notification.models import OutgoingEmail
+from .models import Allowance, AllowanceType, Loan, LoanType, OJTPayslipData, Payslip, Savings, SavingsType
+from .summary import schedule_finance_summary_invalidation
+from .utils import invalidate_ojt_payslip_pdf, record_payslip_email_outcome
+import logging
+
+logger = logging.getLogger(__name__)
+
+@receiver([post_save, post_delete], sender=OJTPayslipData)
+def ojt_payslip_changed(sender, instance, **kwargs):
+    # Cached renders are keyed by content, so a stale file is never served; this just reclaims storage
+    payslip_id = instance.pk
+
+    def invalidate():
+        try:
+            invalidate_ojt_payslip_pdf(payslip_id)
+        except Exception as e:
+            logger.warning(f"Could not drop cached PDFs of OJT payslip {payslip_id}: {str(e)}")
+    transaction.on_commit(invalidate)
+
+@receiver(post_save, sender=OutgoingEmail)
+def outgoing_email_saved(sender, instance, created, **kwargs):
+    # The outbox saves a message once per delivery attempt; cut-off payslip deliveries follow it
+    if not created:
+        record_payslip_email_outcome(instance)
+
+@receiver([post_save, post_delete], sender=Payslip)
+@receiver([post_save, post_delete], sender=OJTPayslipData)
+@receiver([post_save, post_delete], sender=Loan)
+@receiver([post_save, post_delete], sender=Allowance)
+@receiver([post_save, post_delete], sender=Savings)
+def finance_record_saved(sender, instance, **kwargs):
+    # Bulk writes go through the upload/posting paths, which drop every summary
+    schedule_finance_summary_invalidation(instance.employee_id)
+
+# The dashboard rollup moves each record saved or deleted on its own between day/type buckets;
+# bulk jobs skip this and rebuild their categories once (see metrics.bulk_finance_writes)
+
+@receiver(pre_save, sender=Payslip)
+@receiver(pre_save, sender=Loan)
+@receiver(pre_save, sender=Allowance)
+@receiver(pre_save, sender=Savings)
+def remember_stat_snapshot(sender, instance, raw=False, **kwargs):
+    tracked = not raw and is_tracked(sender) and instance.pk and not instance._state.adding
+    instance._stat_snapshot = get_stored_snapshot(instance) if tracked else None
+
+@receiver(post_save, sender=Payslip)
+@receiver(post_save, sender=Loan)
+@receiver(post_save, sender=Allowance)
+@receiver(post_save, sender=Savings)
+def finance_stat_record_saved(sender, instance, raw=False, **kwargs):
+    if not raw and is_tracked(sender):
+        record_stat_change(getattr(instance, '_stat_snapshot', None), get_stat_snapshot(instance))
+
+@receiver(post_delete, sender=Payslip)
+@receiver(post_delete, sender=Loan)
+@receiver(post_delete, sender=Allowance)
+@receiver(post_delete, sender=Savings)
+def finance_stat_record_deleted(sender, instance, **kwargs):
+    if is_tracked(sender):
+        record_stat_change(get_stat_snapshot(instance), None)
+
+# Rollup rows carry the type names; renaming a type (or clearing it from savings) rebuilds its category
+
+@receiver(post_save, sender=LoanType)
+@receiver(post_save, sender=AllowanceType)
+@receiver(post_save, sender=SavingsType)
+def finance_type_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_finance_stats_refresh({LoanType: 'loans', AllowanceType: 'allowances', SavingsType: 'savings'}[sender])
+
+@receiver(post_delete, sender=SavingsType)
+def savings_type_deleted(sender, instance, **kwargs):
+    schedule_finance_stats_refresh('savings')
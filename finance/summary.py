@@ -0,0 +1,130 @@
+"""
+Per-employee finance summary.
+
+get_finance_summary works out the figures the finance pages show for an
+employee with one aggregate query per finance table: the active loan balance,
+the allowance and savings totals, the payslip count and the month-over-month
+counts of the employee's finance cards. It also keeps the fields of the few
+latest payslips the employee card renders, as plain values: cached model
+instances would carry their related rows (and go stale with them). The pages read the record lists they show (and
+paginate payslips) from the database.
+
+Summaries are kept in the Django cache per employee. Saving or deleting a
+finance record drops its employee's summary (finance.signals); uploads,
+postings and other bulk writes bump a version key that drops every summary at
+once.
+"""
+from collections import namedtuple
+from datetime import date, datetime, time
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from empconnect.cache import bump_cache_version, get_cache_version, invalidate_on_commit
+from .models import Allowance, Loan, Payslip, Savings
+
+FINANCE_SUMMARY_VERSION_KEY = 'finance_summary:version'
+SUMMARY_KEY = 'finance_summary:{version}:{employee_id}'
+
+LATEST_PAYSLIPS = 5
+LATEST_PAYSLIP_FIELDS = ('pk', 'cutoff_date', 'file_path', 'is_send_to_mail', 'date_uploaded')
+CENT = Decimal('0.01')
+
+FinanceSummary = namedtuple('FinanceSummary', [
+    'built_on',
+    'payslip_count',
+    'latest_payslips',              # LATEST_PAYSLIP_FIELDS of the LATEST_PAYSLIPS newest cut-offs
+    'total_active_loan_balance',
+    'total_allowances',             # every allowance
+    'allowance_balance',            # allowances not yet deposited
+    'total_savings',                # unwithdrawn savings
+    'monthly_counts',               # {category: (this month, last month)}
+])
+
+
+def get_cache_timeout():
+    return getattr(settings, 'FINANCE_SUMMARY_CACHE_TIMEOUT', 600)
+
+
+def invalidate_finance_summaries(employee_id=None):
+    """Drop one employee's summary, or every summary (they are keyed by version)"""
+    if employee_id is None:
+        bump_cache_version(FINANCE_SUMMARY_VERSION_KEY)
+    else:
+        cache.delete(SUMMARY_KEY.format(version=get_cache_version(FINANCE_SUMMARY_VERSION_KEY), employee_id=employee_id))
+
+
+def schedule_finance_summary_invalidation(employee_id=None):
+    invalidate_on_commit(invalidate_finance_summaries, employee_id)
+
+
+def _month_starts(today):
+    month_start = today.replace(day=1)
+    last_month_start = date(today.year - 1, 12, 1) if today.month == 1 else date(today.year, today.month - 1, 1)
+    return last_month_start, month_start
+
+
+def _monthly_aggregates(field, today):
+    """Count(filter=...) aggregates of the records dated this month and last month by ``field``"""
+    last_month_start, month_start = _month_starts(today)
+    if field != 'cutoff_date':
+        # created_at is a datetime; compare it with the local midnights that start each month
+        last_month_start, month_start = (
+            timezone.make_aware(datetime.combine(day, time.min)) for day in (last_month_start, month_start)
+        )
+    return {
+        'this_month': Count('pk', filter=Q(**{f'{field}__gte': month_start})),
+        'last_month': Count('pk', filter=Q(**{f'{field}__gte': last_month_start, f'{field}__lt': month_start})),
+    }
+
+
+def _build_summary(employee_id, today):
+    zero = Value(Decimal('0'), output_field=DecimalField())
+    payslips = Payslip.objects.filter(employee_id=employee_id).aggregate(
+        total=Count('pk'), **_monthly_aggregates('cutoff_date', today),
+    )
+    loans = Loan.objects.filter(employee_id=employee_id).aggregate(
+        balance=Coalesce(Sum('current_balance', filter=Q(is_active=True)), zero),
+        **_monthly_aggregates('created_at', today),
+    )
+    allowances = Allowance.objects.filter(employee_id=employee_id).aggregate(
+        total=Coalesce(Sum('amount'), zero),
+        balance=Coalesce(Sum('amount', filter=Q(deposit_date__isnull=True)), zero),
+        **_monthly_aggregates('created_at', today),
+    )
+    savings = Savings.objects.filter(employee_id=employee_id).aggregate(
+        total=Coalesce(Sum('amount', filter=Q(is_withdrawn=False)), zero),
+        **_monthly_aggregates('created_at', today),
+    )
+    latest_payslips = list(
+        Payslip.objects.filter(employee_id=employee_id).order_by('-cutoff_date', '-pk').values(*LATEST_PAYSLIP_FIELDS)[:LATEST_PAYSLIPS]
+    )
+
+    return FinanceSummary(
+        built_on=today,
+        payslip_count=payslips['total'],
+        latest_payslips=latest_payslips,
+        # Sums come back from the database unrounded; keep them in cents like the model fields
+        total_active_loan_balance=loans['balance'].quantize(CENT),
+        total_allowances=allowances['total'].quantize(CENT),
+        allowance_balance=allowances['balance'].quantize(CENT),
+        total_savings=savings['total'].quantize(CENT),
+        monthly_counts={
+            category: (totals['this_month'], totals['last_month'])
+            for category, totals in (('payslips', payslips), ('loans', loans), ('allowances', allowances), ('savings', savings))
+        },
+    )
+
+
+def get_finance_summary(employee_id):
+    """The employee's FinanceSummary, from the cache when it is still current"""
+    today = timezone.localdate()
+    key = SUMMARY_KEY.format(version=get_cache_version(FINANCE_SUMMARY_VERSION_KEY), employee_id=employee_id)
+    summary = cache.get(key)
+    # Month-over-month counts depend on the day the summary was built
+    if summary is None or summary.built_on != today:
+        summary = _build_summary(employee_id, today)
+        cache.set(key, summary, get_cache_timeout())
+    return summary
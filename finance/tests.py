@@ -1,3 +1,500 @@
-from django.test import TestCase
+import os
+import shutil
+import smtplib
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
 
-# Create your tests here.
+from backgroundjob.models import BackgroundJob
+from empconnect.exports import XLSX_CONTENT_TYPE
+from notification.models import OutgoingEmail
+from notification.outbox import send_queued_emails
+
+from userlogin.models import EmployeeLogin
+from .models import Allowance, AllowanceType, FinanceDailyStat, Loan, LoanDeduction, LoanType, OJTPayslipData, Payslip, PayslipEmailDelivery, Savings
+from .loan_ledger import find_ledger_mismatches
+from .metrics import refresh_finance_stats
+from .ojt_import import OJT_COLUMNS
+from .summary import get_finance_summary
+from .utils import get_ojt_payslip_pdf, ingest_payslip_pdfs, ojt_payslip_cache_path, render_cutoff_ojt_payslips
+from .views import process_loan_deduction_excel, process_ojt_excel
+
+class PayslipIngestionTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.admin = EmployeeLogin.objects.create_user(idnumber='90000', username='admin', password='secret')
+        self.employee = EmployeeLogin.objects.create_user(idnumber='960921', username='mier', firstname='Ana', lastname='Mier', password='secret')
+        self.other = EmployeeLogin.objects.create_user(idnumber='960922', username='cruz', password='secret')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _pdf(self, name, content=b'%PDF-1.4 payslip'):
+        return SimpleUploadedFile(name, content, content_type='application/pdf')
+
+    def test_ingest_resolves_validates_and_upserts(self):
+        cutoff = date(2025, 8, 15)
+        uploads, errors = ingest_payslip_pdfs([
+            self._pdf('960921_mier.pdf'),
+            self._pdf('960922_dela cruz.pdf'),
+            self._pdf('notes.txt'),
+            self._pdf('badname.pdf'),
+            self._pdf('111111_ghost.pdf'),
+            self._pdf('960921_mier copy.pdf'),
+        ], cutoff, self.admin)
+
+        self.assertEqual([upload['action'] for upload in uploads], ['Created', 'Created'])
+        self.assertEqual(uploads[0]['employee_name'], 'Ana Mier')
+        self.assertEqual([error['filename'] for error in errors], ['notes.txt', 'badname.pdf', '111111_ghost.pdf', '960921_mier copy.pdf'])
+        self.assertEqual(Payslip.objects.count(), 2)
+
+        first = Payslip.objects.get(employee=self.employee)
+        first.is_send_to_mail = True
+        first.save()
+        old_path = first.file_path.path
+
+        uploads, errors = ingest_payslip_pdfs([self._pdf('960921_mier.pdf', b'%PDF-1.4 corrected')], cutoff, self.admin)
+        self.assertEqual((uploads[0]['action'], errors), ('Updated', []))
+        replaced = Payslip.objects.get(employee=self.employee)
+        self.assertFalse(replaced.is_send_to_mail)
+        self.assertEqual(replaced.file_path.read(), b'%PDF-1.4 corrected')
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(Payslip.objects.count(), 2)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_RUN_IN_PROCESS=False,
+    EMAIL_OUTBOX_BATCH_SIZE=2,
+    EMAIL_OUTBOX_RATE_PER_MINUTE=0,
+    EMAIL_OUTBOX_RETRY_DELAY=0,
+    BACKGROUND_JOB_EAGER=True,
+)
+class PayslipEmailDispatchTest(TestCase):
+    def setUp(self):
+        self.admin = EmployeeLogin.objects.create_user(idnumber='90000', username='admin', password='secret', accounting_admin=True)
+        cutoff = date(2025, 8, 15)
+        for index, email in enumerate(['a@example.com', 'b@example.com', '', 'c@example.com']):
+            employee = EmployeeLogin.objects.create_user(idnumber=f'5000{index}', username=f'emp{index}', email=email, password='secret')
+            Payslip.objects.create(employee=employee, cutoff_date=cutoff, file_path='', uploaded_by=self.admin)
+
+    def test_cutoff_job_queues_through_the_outbox_and_records_deliveries(self):
+        transient_failures = [smtplib.SMTPServerDisconnected('Connection unexpectedly closed')]
+        original_send = locmem.EmailBackend.send_messages
+
+        def flaky_send(backend, messages):
+            if transient_failures:
+                raise transient_failures.pop()
+            return original_send(backend, messages)
+
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('send_cutoff_payslips'), {'cutoff_date': '2025-08-15'})
+
+        job = BackgroundJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.result['success_count'], job.result['error_count']), (3, 1))
+        self.assertEqual(PayslipEmailDelivery.objects.filter(status='queued', email__isnull=False).count(), 3)
+        self.assertEqual(mail.outbox, [])
+
+        # A second send leaves the payslips still waiting in the outbox alone
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('send_cutoff_payslips'), {'cutoff_date': '2025-08-15'})
+        self.assertEqual(OutgoingEmail.objects.count(), 3)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', flaky_send):
+            self.assertEqual(send_queued_emails(), {'sent': 3, 'retrying': 1, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(Payslip.objects.filter(is_send_to_mail=True).count(), 3)
+        statuses = dict(PayslipEmailDelivery.objects.values_list('payslip__employee__idnumber', 'status'))
+        self.assertEqual(statuses, {'50000': 'sent', '50001': 'sent', '50002': 'skipped', '50003': 'sent'})
+        self.assertEqual(PayslipEmailDelivery.objects.get(payslip__employee__idnumber='50000').attempts, 2)
+
+
+class OJTPayslipPDFCacheTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        employee = EmployeeLogin.objects.create_user(idnumber='70000', username='ojt', firstname='On', lastname='Job', password='secret')
+        self.payslip = OJTPayslipData.objects.create(employee=employee, cut_off='Aug 1-15 2025', regular_day=10, allowance_day=400)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_render_is_cached_until_the_record_changes(self):
+        first = get_ojt_payslip_pdf(self.payslip)
+        self.assertTrue(first.startswith(b'%PDF'))
+        path = ojt_payslip_cache_path(self.payslip)
+        self.assertTrue(default_storage.exists(path))
+
+        with mock.patch('finance.utils.render_ojt_payslip') as render:
+            self.assertEqual(get_ojt_payslip_pdf(self.payslip), first)
+            render.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payslip.adjustment = 150
+            self.payslip.save()
+        self.assertFalse(default_storage.exists(path))
+        self.assertNotEqual(ojt_payslip_cache_path(self.payslip), path)
+        get_ojt_payslip_pdf(self.payslip)
+        self.assertTrue(default_storage.exists(ojt_payslip_cache_path(self.payslip)))
+
+    def test_batch_render_skips_cached_payslips(self):
+        outcome = render_cutoff_ojt_payslips('Aug 1-15 2025', workers=1)
+        self.assertEqual((outcome['rendered'], outcome['cached'], outcome['errors']), (1, 0, []))
+        self.assertEqual(render_cutoff_ojt_payslips('Aug 1-15 2025', workers=1)['cached'], 1)
+
+
+class EmployeeTotalLoansExportTest(TestCase):
+    def setUp(self):
+        self.admin = EmployeeLogin.objects.create_user(idnumber='90001', username='accounting', password='secret', accounting_admin=True)
+        employee = EmployeeLogin.objects.create_user(idnumber='80000', username='loaner', firstname='Lea', lastname='Santos', password='secret')
+        loan_type = LoanType.objects.create(loan_type='Salary Loan')
+        loan = Loan.objects.create(employee=employee, loan_type=loan_type, principal_amount=1000, current_balance=1000, monthly_deduction=100)
+        loan.apply_deduction(100, 'Aug 1-15 2025')
+        loan.apply_deduction(150, 'Aug 16-31 2025')
+        Loan.objects.create(employee=employee, loan_type=LoanType.objects.create(loan_type='Paid Loan'), principal_amount=500, current_balance=0)
+
+    def test_export_streams_styled_workbook(self):
+        self.client.force_login(self.admin)
+        # Session, user, then one query for the loans (deduction totals are on the loan ledger)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('export_employee_total_loans'))
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], XLSX_CONTENT_TYPE)
+
+        sheet = load_workbook(BytesIO(content))['Employee Total Loans']
+        self.assertEqual(sheet['A4'].value, 'Id Number')
+        self.assertEqual(sheet['A4'].style, 'loan_header')
+        self.assertIn('A1:G1', sheet.merged_cells)
+        rows = list(sheet.iter_rows(min_row=5, values_only=True))
+        self.assertEqual(rows, [('80000', 'Lea Santos', 'Salary Loan', 100.0, 1000.0, 250.0, 750.0)])
+
+
+class LoanDeductionPostingTest(TestCase):
+    def setUp(self):
+        self.cutoff = 'Sep 1-15 2025'
+        self.salary = LoanType.objects.create(loan_type='Salary Loan')
+        self.lea = EmployeeLogin.objects.create_user(idnumber='81000', username='lea', password='secret')
+        self.ben = EmployeeLogin.objects.create_user(idnumber='81001', username='ben', password='secret')
+        EmployeeLogin.objects.create_user(idnumber='81002', username='noloan', password='secret')
+        self.older = Loan.objects.create(employee=self.lea, loan_type=self.salary, principal_amount=100, current_balance=100)
+        self.newer = Loan.objects.create(employee=self.lea, loan_type=self.salary, principal_amount=500, current_balance=500)
+        self.posted = Loan.objects.create(employee=self.ben, loan_type=self.salary, principal_amount=300, current_balance=300)
+        self.posted.apply_deduction(50, self.cutoff)
+
+    def _upload(self, lines):
+        content = 'Id Number,Name,Loan Type,Deduction\n' + '\n'.join(lines)
+        return process_loan_deduction_excel(SimpleUploadedFile('deductions.csv', content.encode()), self.cutoff)
+
+    def test_rows_are_posted_in_file_order_with_bulk_writes(self):
+        lines = [
+            '81000,Lea,Salary Loan,150',   # Pays off the older loan
+            '81000,Lea,Salary Loan,50',    # Moves on to the newer loan
+            '81000,Lea,Salary Loan,20',    # The newer loan already has this cut-off
+            '81001,Ben,Salary Loan,50',
+            '99999,Ghost,Salary Loan,50',
+            '81000,Lea,Car Loan,50',
+            '81000,Lea,Salary Loan,abc',
+            '81002,No Loan,Salary Loan,10',
+            ',,,',
+            '81000,Lea,,10',
+            '81001,Ben,Salary Loan,NaN',
+            '81001,Ben,Salary Loan,-Infinity',
+        ]
+        # Employees, loan types, candidate loans; then the insert and update inside a savepoint
+        with self.assertNumQueries(7):
+            success, errors, processed, rejected = self._upload(lines)
+
+        self.assertFalse(success)
+        self.assertEqual(processed, 2)
+        self.assertEqual(errors, [
+            'Row 4: Deduction already exists for Sep 1-15 2025',
+            'Row 5: Deduction already exists for Sep 1-15 2025',
+            'Row 6: Employee 99999 not found',
+            'Row 7: Loan type Car Loan not found',
+            'Row 8: Invalid deduction amount',
+            'Row 9: No active loan found for 81002 - Salary Loan',
+            'Row 11: Missing required data (Id Number, Loan Type, or Deduction)',
+            'Row 12: Invalid deduction amount',
+            'Row 13: Invalid deduction amount',
+        ])
+        self.assertEqual(rejected[0], ['81000', 'Lea', 'Salary Loan', Decimal('20'), 'Deduction already exists for Sep 1-15 2025'])
+        self.assertEqual(rejected[-3], ['81000', 'Lea', '', '10', 'Missing required data (Id Number, Loan Type, or Deduction)'])
+        self.assertEqual(rejected[-1], ['81001', 'Ben', 'Salary Loan', '-Infinity', 'Invalid deduction amount'])
+
+        self.older.refresh_from_db()
+        self.newer.refresh_from_db()
+        self.assertEqual((self.older.current_balance, self.older.is_active), (Decimal('0'), False))
+        self.assertEqual((self.newer.current_balance, self.newer.is_active), (Decimal('450'), True))
+        self.assertEqual(
+            list(self.older.deductions.values_list('amount', 'balance_before', 'balance_after')),
+            [(Decimal('100'), Decimal('100'), Decimal('0'))]
+        )
+        self.assertEqual(LoanDeduction.objects.filter(cut_off=self.cutoff).count(), 3)
+
+
+class LoanLedgerTest(TestCase):
+    def setUp(self):
+        self.cutoff = 'Oct 1-15 2025'
+        self.employee = EmployeeLogin.objects.create_user(idnumber='82000', username='ledger', password='secret')
+        self.loan_type = LoanType.objects.create(loan_type='Salary Loan')
+        self.loan = Loan.objects.create(employee=self.employee, loan_type=self.loan_type, principal_amount=400, current_balance=400)
+
+    def test_apply_deduction_and_bulk_posting_keep_the_ledger(self):
+        self.loan.apply_deduction(100, 'Sep 16-30 2025')
+        self.assertEqual((self.loan.total_deducted, self.loan.deduction_count), (Decimal('100'), 1))
+        self.assertEqual(self.loan.paid, Decimal('100'))
+        self.assertEqual(self.loan.percent_paid, 25)
+
+        content = 'Id Number,Name,Loan Type,Deduction\n82000,Ledger,Salary Loan,500'
+        process_loan_deduction_excel(SimpleUploadedFile('deductions.csv', content.encode()), self.cutoff)
+        self.loan.refresh_from_db()
+        self.assertEqual((self.loan.total_deducted, self.loan.deduction_count, self.loan.is_active), (Decimal('400'), 2, False))
+        self.assertEqual(find_ledger_mismatches(), [])
+
+    def test_reconcile_command_reports_and_repairs_drift(self):
+        self.loan.apply_deduction(100, self.cutoff)
+        # A deduction written directly, outside apply_deduction and the bulk posting
+        LoanDeduction.objects.create(loan=self.loan, amount=50, cut_off='Oct 16-31 2025', balance_before=300, balance_after=250)
+
+        out = StringIO()
+        call_command('reconcile_loan_ledgers', stdout=out)
+        self.assertIn(f'Loan {self.loan.pk}: ledger 100.00 over 1 deduction(s), deductions 150.00 over 2', out.getvalue())
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.total_deducted, Decimal('100'))
+
+        call_command('reconcile_loan_ledgers', '--fix', stdout=StringIO())
+        self.loan.refresh_from_db()
+        self.assertEqual((self.loan.total_deducted, self.loan.deduction_count), (Decimal('150'), 2))
+        self.assertEqual(find_ledger_mismatches(), [])
+
+
+@override_settings(BACKGROUND_JOB_EAGER=True)
+class FinanceMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = EmployeeLogin.objects.create_user(idnumber='90002', username='metrics', password='secret', accounting_admin=True)
+        self.employee = EmployeeLogin.objects.create_user(idnumber='83000', username='borrower', password='secret')
+        salary = LoanType.objects.create(loan_type='Salary Loan')
+        car = LoanType.objects.create(loan_type='Car Loan')
+        Loan.objects.create(employee=self.employee, loan_type=salary, principal_amount=1000, current_balance=1000)
+        Loan.objects.create(employee=self.employee, loan_type=car, principal_amount=500, current_balance=500)
+        Loan.objects.create(employee=self.employee, loan_type=car, principal_amount=200, current_balance=200, is_active=False)
+        Allowance.objects.create(employee=self.employee, allowance_type=AllowanceType.objects.create(allowance_type='Rice'), amount=75)
+        refresh_finance_stats()
+        self.today_index = timezone.localdate().day - 1
+
+    def _metrics(self, **params):
+        return self.client.get(reverse('finance_metrics'), {'category': 'loans', 'period': 'month', **params}).json()
+
+    def test_cards_and_charts_are_read_from_the_cached_rollup(self):
+        self.assertEqual(FinanceDailyStat.objects.filter(category='loans').count(), 2)
+        self.client.force_login(self.admin)
+        # Session, user, employee counts, the rollup totals, the chart series
+        with self.assertNumQueries(5):
+            payload = self._metrics()
+        self.assertEqual((payload['cards']['total_loans'], payload['cards']['total_allowances']), (3, 1))
+        self.assertEqual(payload['cards']['month_total_balance'], 1500.0)
+        self.assertEqual(payload['chart_data']['datasets'][0]['data'][self.today_index], 1500.0)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self._metrics(), payload)
+        car = self._metrics(type='Car Loan', period='year')['chart_data']
+        self.assertEqual(len(car['labels']), 12)
+        self.assertEqual(car['datasets'][0]['data'][timezone.localdate().month - 1], 500.0)
+
+    def test_finished_upload_job_refreshes_the_rollup_and_cached_metrics(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self._metrics()['cards']['month_total_balance'], 1500.0)
+
+        upload = SimpleUploadedFile('deductions.csv', b'Id Number,Name,Loan Type,Deduction\n83000,Borrower,Salary Loan,400')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('loan_deduction_upload'), {'file': upload, 'cutoff_date': 'Oct 1-15 2025'})
+        self.assertEqual(BackgroundJob.objects.get(pk=response.json()['job_id']).status, 'completed')
+
+        payload = self._metrics()
+        self.assertEqual(payload['cards']['month_total_balance'], 1100.0)
+        self.assertEqual(payload['chart_data']['datasets'][0]['data'][self.today_index], 1100.0)
+
+    def test_single_record_writes_move_their_own_bucket(self):
+        def rollup():
+            return sorted(FinanceDailyStat.objects.values_list('date', 'category', 'type_name', 'record_count', 'amount'))
+
+        self.client.force_login(self.admin)
+        self.assertEqual(self._metrics()['cards']['month_total_balance'], 1500.0)
+        salary, car = Loan.objects.order_by('pk')[:2]
+        emergency = LoanType.objects.create(loan_type='Emergency Loan')
+        with mock.patch('finance.metrics.refresh_finance_stats') as refresh, self.captureOnCommitCallbacks(execute=True):
+            # An emergency loan approved in PRF, a deduction posted from the admin form, a type change
+            Loan.objects.create(employee=self.employee, loan_type=emergency, principal_amount=300, current_balance=300)
+            salary.apply_deduction(1000, 'Oct 1-15 2025')
+            car.loan_type = emergency
+            car.save()
+            Allowance.objects.get().delete()
+            savings = Savings.objects.create(employee=self.employee, amount=250)
+            savings.withdraw()
+            Payslip.objects.create(employee=self.employee, cutoff_date='2025-10-15', file_path='payslips/p.pdf')
+            Payslip.objects.create(employee=self.admin, cutoff_date='2025-10-15', file_path='payslips/q.pdf').delete()
+        refresh.assert_not_called()
+
+        incremental = rollup()
+        refresh_finance_stats()
+        self.assertEqual(incremental, rollup())
+        self.assertEqual(self._metrics()['cards']['month_total_balance'], 800.0)
+
+
+class FinanceSummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = EmployeeLogin.objects.create_user(idnumber='90003', username='summary', password='secret', accounting_admin=True)
+        self.employee = EmployeeLogin.objects.create_user(idnumber='84000', username='saver', firstname='Sam', lastname='Reyes', password='secret')
+        Payslip.objects.create(employee=self.employee, cutoff_date=date(2025, 9, 15), file_path='payslips/sep.pdf', uploaded_by=self.admin)
+        loan_type = LoanType.objects.create(loan_type='Salary Loan')
+        Loan.objects.create(employee=self.employee, loan_type=loan_type, principal_amount=1000, current_balance=250)
+        Loan.objects.create(employee=self.employee, loan_type=loan_type, principal_amount=300, current_balance=0, is_active=False)
+        rice = AllowanceType.objects.create(allowance_type='Rice')
+        Allowance.objects.create(employee=self.employee, allowance_type=rice, amount=100)
+        Allowance.objects.create(employee=self.employee, allowance_type=rice, amount=40, deposit_date=date(2025, 9, 30))
+        Savings.objects.create(employee=self.employee, amount=500)
+        Savings.objects.create(employee=self.employee, amount=90, is_withdrawn=True)
+
+    def test_summary_is_built_with_one_aggregate_per_table_and_cached(self):
+        # Four aggregates and the latest payslips
+        with self.assertNumQueries(5):
+            summary = get_finance_summary(self.employee.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_finance_summary(self.employee.pk).latest_payslips[0]['file_path'], 'payslips/sep.pdf')
+
+        self.assertEqual((summary.payslip_count, summary.monthly_counts['payslips']), (1, (0, 0)))
+        self.assertEqual(summary.total_active_loan_balance, Decimal('250'))
+        self.assertEqual((summary.total_allowances, summary.allowance_balance), (Decimal('140'), Decimal('100')))
+        self.assertEqual(summary.total_savings, Decimal('500'))
+        self.assertEqual(summary.monthly_counts['loans'], (2, 0))
+
+        self.client.force_login(self.admin)
+        allowances = self.client.get(reverse('employee_allowances', args=[self.employee.pk])).json()
+        self.assertEqual([record['is_active'] for record in allowances['allowance_groups']['Rice']], [False, True])
+        details = self.client.get(reverse('employee_details', args=[self.employee.pk])).json()
+        self.assertTrue(details['success'])
+        self.assertIn('payslips/sep.pdf', details['html'])
+        self.assertEqual(details['total_savings'], '500.00')
+
+        Payslip.objects.bulk_create([
+            Payslip(employee=self.employee, cutoff_date=date(2025, 10, day), file_path=f'payslips/oct{day}.pdf') for day in range(1, 11)
+        ])
+        page = self.client.get(reverse('ajax_employee_payslips', args=[self.employee.pk]), {'page': 2}).json()
+        self.assertIn('payslips/sep.pdf', page['html'])
+        self.assertNotIn('payslips/oct10.pdf', page['html'])
+
+    def test_finance_writes_drop_the_cached_summary(self):
+        self.assertEqual(get_finance_summary(self.employee.pk).allowance_balance, Decimal('100'))
+        allowance = Allowance.objects.create(employee=self.employee, allowance_type=AllowanceType.objects.get(), amount=25)
+        self.assertEqual(get_finance_summary(self.employee.pk).allowance_balance, Decimal('125'))
+
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete_allowance', args=[allowance.pk]), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(get_finance_summary(self.employee.pk).allowance_balance, Decimal('100'))
+
+        self.client.force_login(self.employee)
+        response = self.client.get(reverse('user_finance'))
+        self.assertEqual(response.context['total_loans'], Decimal('250'))
+        self.assertEqual(len(response.context['savings']), 1)
+
+
+class OJTPayslipImportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cut_off = 'Oct 1-15 2025'
+        self.ana = EmployeeLogin.objects.create_user(idnumber='71000', username='ana', password='secret')
+        self.raf = EmployeeLogin.objects.create_user(idnumber='71001', username='raf', password='secret')
+        self.existing = OJTPayslipData.objects.create(employee=self.raf, cut_off=self.cut_off, regular_day=5, adjustment=20)
+        OJTPayslipData.objects.create(employee=self.ana, cut_off='Sep 16-30 2025', regular_day=9)
+
+    def _workbook(self, headers, rows):
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.append(headers)
+        for row in rows:
+            worksheet.append(row)
+        content = BytesIO()
+        workbook.save(content)
+        return SimpleUploadedFile('ojt.xlsx', content.getvalue())
+
+    def test_rows_are_upserted_with_bulk_writes(self):
+        # Columns out of template order, then the rest of the template; unknown columns are ignored
+        rest = [names[0] for _, names in OJT_COLUMNS if names[0] not in ('ID_NO', 'REGULAR_DAY', 'GRAND_TOTAL', 'HOLIDAY_DATE')]
+        blank = [None] * len(rest)
+        upload = self._workbook(
+            ['Notes', 'GRAND_TOTAL', 'ID_NO', 'Regular_Day', 'HOLIDAY_DATE'] + rest,
+            [
+                ['first', 1000, 71000, 10, 8] + blank,
+                ['update', 500, '71001', 12, None] + blank,
+                [None, None, None, None, None] + blank,
+                ['ghost', 10, 99999, 1, 0] + blank,
+                ['no id', 10, None, 1, 0] + [7] + blank[1:],
+                ['huge', 10 ** 9, 71000, 1, 0] + blank,
+                ['again', 1200, 71000, 11, 'n/a'] + blank,
+            ]
+        )
+        # Employees, existing payslips; then the insert and update inside a savepoint
+        with self.assertNumQueries(6):
+            success, errors, created, updated, error_rows = process_ojt_excel(upload, self.cut_off)
+
+        self.assertFalse(success)
+        self.assertEqual((created, updated), (1, 2))
+        self.assertEqual(errors, [
+            'Row 5: Employee 99999 not found',
+            'Row 6: Missing employee ID',
+            'Row 7: GRAND_TOTAL is too large',
+        ])
+        # ID_NO, REGULAR_DAY, ALLOWANCE_DAY, TOTAL_ALLOWANCE, ND_ALLOWANCE, GRAND_TOTAL
+        self.assertEqual(error_rows[1], ['', 1, 7, '', '', 10, 'Missing employee ID'])
+
+        ana = OJTPayslipData.objects.get(employee=self.ana, cut_off=self.cut_off)
+        self.assertEqual((ana.regular_day, ana.grand_total, ana.holiday_hours), (Decimal('11'), Decimal('1200'), Decimal('0')))
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.regular_day, self.existing.grand_total), (Decimal('12'), Decimal('500')))
+        # Blank cells are cleared, as the per-row upsert did
+        self.assertEqual(self.existing.adjustment, Decimal('0'))
+        self.assertEqual(OJTPayslipData.objects.count(), 3)
+
+    def test_sheet_missing_template_headers_is_rejected(self):
+        headers = [names[0] for _, names in OJT_COLUMNS]
+        headers[headers.index('ADJUSTMENT')] = 'ADJUSTMNT'
+        upload = self._workbook(headers[:-1], [[71001] + [1] * (len(headers) - 2)])
+        self.assertEqual(
+            process_ojt_excel(upload, self.cut_off),
+            (False, ['Missing template columns: ADJUSTMENT, PERFECT_ATTENDANCE'], 0, 0, [])
+        )
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.adjustment, Decimal('20'))
+
+    def test_sheet_without_known_headers_is_read_in_template_order(self):
+        upload = self._workbook(['a', 'b', 'c'], [[71000, 3, 400]])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(process_ojt_excel(upload, self.cut_off), (True, [], 1, 0, []))
+        ana = OJTPayslipData.objects.get(employee=self.ana, cut_off=self.cut_off)
+        self.assertEqual((ana.regular_day, ana.allowance_day), (Decimal('3'), Decimal('400')))
+        self.assertEqual(
+            process_ojt_excel(self._workbook(['ID_NO'], []), self.cut_off),
+            (False, ['Excel file is empty or has no data'], 0, 0, [])
+        )
@@ -20,6 +20,7 @@ urlpatterns = [
     path('ojt-payslip/send/<int:payslip_id>/', views.send_ojt_payslip_email, name='send_ojt_payslip_email'),
     path('payslips/upload/', views.regular_payslip_upload, name='upload_payslip'),
     path('payslip/send/<int:payslip_id>/', views.send_payslip, name='send_payslip'),
+    path('payslips/send-cutoff/', views.send_cutoff_payslips, name='send_cutoff_payslips'),
     path('payslip/delete/<int:payslip_id>/', views.delete_payslip, name='delete_payslip'),
 
     path('loans/export/principal-template/', views.export_loan_principal_template, name='export_loan_principal_template'),
@@ -38,7 +39,7 @@ urlpatterns = [
     path('employees/', views.employees_list, name='employees_list'),
     path('employee/<int:employee_id>/allowances/', views.employee_allowances, name='employee_allowances'),
     path('employee/<int:employee_id>/details/', views.employee_finance_details, name='employee_finance_details'),
-    path('chart-data/', views.chart_data, name='chart_data'),
+    path('metrics/', views.finance_metrics, name='finance_metrics'),
     path('filter-options/', views.filter_options, name='filter_options'),
     path('employee-table/', views.employee_table_partial, name='employee_table_partial'),
     path('employee-details/<int:employee_id>/', views.employee_details, name='employee_details'),
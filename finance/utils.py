@@ -1,19 +1,23 @@
+import hashlib
+import json
 import os
+import re
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
 from decimal import Decimal
 from django.core.mail import EmailMessage
 from django.conf import settings
 from django.template.loader import render_to_string
 from userlogin.models import EmployeeLogin
+from notification.outbox import enqueue_email
 from io import BytesIO
-from reportlab.pdfgen import canvas
 from django.utils import timezone
 from . import models
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+from .ojt_pdf import OJT_PAYSLIP_PDF_FIELDS, OJT_PDF_LAYOUT_VERSION, render_ojt_payslip, render_ojt_payslip_job
+from .summary import schedule_finance_summary_invalidation
 import logging
 
 logger = logging.getLogger(__name__)
@@ -59,9 +63,9 @@ class PayslipEmailService:
             if payslip.file_path and os.path.exists(payslip.file_path.path):
                 email.attach_file(payslip.file_path.path)
             
-            email.send()
+            enqueue_email(email, source='finance.payslip')
             
-            logger.info(f"Payslip email sent successfully to {email_address} for employee {payslip.employee.idnumber}")
+            logger.info(f"Payslip email queued for {email_address} for employee {payslip.employee.idnumber}")
             return True, f"Payslip sent successfully to {email_address}"
             
         except Exception as e:
@@ -82,126 +86,7 @@ class OJTPayslipPDFGenerator:
         Returns:
             BytesIO: PDF file buffer
         """
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Company header
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        
-        story.append(Paragraph("RYONAN ELECTRIC PHILIPPINES", title_style))
-        story.append(Paragraph("OJT PAYSLIP", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Employee information
-        employee_info = [
-            ['Employee Name:', ojt_payslip_data.employee.full_name],
-            ['ID Number:', ojt_payslip_data.employee.idnumber],
-            ['Cut-off Period:', ojt_payslip_data.cut_off],
-        ]
-        
-        employee_table = Table(employee_info, colWidths=[2*inch, 3*inch])
-        employee_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(employee_table)
-        story.append(Spacer(1, 20))
-        
-        # Earnings section
-        earnings_data = [
-            ['EARNINGS', '', ''],
-            ['Regular Days', str(ojt_payslip_data.regular_day), ''],
-            ['Allowance Days', str(ojt_payslip_data.allowance_day), ''],
-            ['Rice Allowance', str(ojt_payslip_data.rice_allowance), ''],
-            ['Special Holiday', str(ojt_payslip_data.special_holiday), ''],
-            ['Legal Holiday', str(ojt_payslip_data.legal_holiday), ''],
-            ['Perfect Attendance', str(ojt_payslip_data.perfect_attendance), ''],
-            ['', '', ''],
-            ['GROSS TOTAL', ojt_payslip_data.grand_total or '0', ''],
-        ]
-        
-        earnings_table = Table(earnings_data, colWidths=[2.5*inch, 1.5*inch, 1*inch])
-        earnings_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(earnings_table)
-        story.append(Spacer(1, 20))
-        
-        # Deductions section
-        deductions_data = [
-            ['DEDUCTIONS', '', ''],
-            ['Deduction 1', str(ojt_payslip_data.deduction), ''],
-            ['Deduction 2', str(ojt_payslip_data.deduction_2), ''],
-            ['', '', ''],
-            ['TOTAL DEDUCTIONS', str(float(ojt_payslip_data.deduction) + float(ojt_payslip_data.deduction_2)), ''],
-        ]
-        
-        deductions_table = Table(deductions_data, colWidths=[2.5*inch, 1.5*inch, 1*inch])
-        deductions_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightcoral),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(deductions_table)
-        story.append(Spacer(1, 20))
-        
-        # Net pay section
-        net_pay_data = [
-            ['NET OJT SHARE', ojt_payslip_data.net_ojt_share or '0'],
-        ]
-        
-        net_pay_table = Table(net_pay_data, colWidths=[3*inch, 2*inch])
-        net_pay_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.darkgreen),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 2, colors.black)
-        ]))
-        
-        story.append(net_pay_table)
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return BytesIO(get_ojt_payslip_pdf(ojt_payslip_data))
 
 class ExcelPayslipProcessor:
     """Process Excel files for OJT payslips"""
@@ -380,4 +265,337 @@ def get_employee_emails(employee):
         if work_email:
             emails['work'] = work_email
     
-    return emails
\ No newline at end of file
+    return emails
+
+
+# Payslip PDFs are named "idnumber_lastname.pdf" (e.g., "960921_mier.pdf" or "960921_dela cruz.pdf").
+# Lastname can contain spaces, the important part is the idnumber
+PAYSLIP_FILENAME_PATTERN = re.compile(r'^([A-Za-z0-9]+)_(.+)\.pdf$', re.IGNORECASE)
+PAYSLIP_STORAGE_WORKERS = 8
+PAYSLIP_UPSERT_BATCH_SIZE = 500
+
+def _store_payslip_file(file, final_filename):
+    # Storage backends read the upload through chunks(), so the PDF is never buffered whole
+    return default_storage.save(f"payslips/{final_filename}", file)
+
+def _upsert_payslips(payslips):
+    """Insert payslips, replacing the file of any existing (employee, cutoff_date) row"""
+    conflict_target = {}
+    if connection.features.supports_update_conflicts_with_target:
+        conflict_target['unique_fields'] = ['employee', 'cutoff_date']
+    for start in range(0, len(payslips), PAYSLIP_UPSERT_BATCH_SIZE):
+        with transaction.atomic():
+            models.Payslip.objects.bulk_create(
+                payslips[start:start + PAYSLIP_UPSERT_BATCH_SIZE],
+                update_conflicts=True,
+                update_fields=['file_path', 'uploaded_by', 'date_uploaded', 'is_send_to_mail'],
+                **conflict_target
+            )
+
+def ingest_payslip_pdfs(files, cutoff_date, uploaded_by):
+    """
+    Store a batch of payslip PDFs and record them against their employees.
+
+    Every ID number is resolved with one query, files are streamed to storage
+    on a thread pool, and Payslip rows are written with a chunked bulk upsert on
+    (employee, cutoff_date). Re-uploading a cut-off replaces the stored PDF and
+    clears its sent flag; the replaced file is removed from storage.
+
+    Args:
+        files: uploaded PDF files
+        cutoff_date: datetime.date of the cut-off
+        uploaded_by: EmployeeLogin performing the upload
+
+    Returns:
+        tuple: (successful_uploads: list of dict, errors: list of {'filename', 'error'})
+    """
+    errors = []
+    accepted = []
+    for file in files:
+        if not file.name.lower().endswith('.pdf'):
+            errors.append({'filename': file.name, 'error': 'Only PDF files are allowed'})
+            continue
+        match = PAYSLIP_FILENAME_PATTERN.match(file.name)
+        if not match:
+            errors.append({'filename': file.name, 'error': 'Invalid filename format. Expected: idnumber_lastname.pdf (e.g., 960921_mier.pdf)'})
+            continue
+        accepted.append((file, match.group(1)))
+
+    employees = EmployeeLogin.objects.in_bulk({employee_id for _, employee_id in accepted}, field_name='idnumber')
+    existing_files = dict(
+        models.Payslip.objects.filter(
+            cutoff_date=cutoff_date,
+            employee__in=[employee.pk for employee in employees.values()]
+        ).values_list('employee_id', 'file_path')
+    )
+
+    pending = []
+    claimed = set()
+    for file, employee_id in accepted:
+        employee = employees.get(employee_id)
+        if employee is None:
+            errors.append({'filename': file.name, 'error': f'Employee with ID {employee_id} not found in the system'})
+            continue
+        if employee.pk in claimed:
+            errors.append({'filename': file.name, 'error': f'Duplicate payslip for employee {employee_id} in this upload'})
+            continue
+        claimed.add(employee.pk)
+        pending.append((file, employee_id, employee, f"{cutoff_date.isoformat()}_{file.name}"))
+
+    stored = []
+    with ThreadPoolExecutor(max_workers=PAYSLIP_STORAGE_WORKERS) as pool:
+        futures = [(item, pool.submit(_store_payslip_file, item[0], item[3])) for item in pending]
+        for item, future in futures:
+            try:
+                stored.append((item, future.result()))
+            except Exception as e:
+                logger.error(f"Failed to store payslip {item[0].name}: {str(e)}")
+                errors.append({'filename': item[0].name, 'error': str(e)})
+
+    now = timezone.now()
+    payslips = [
+        models.Payslip(
+            employee=employee,
+            cutoff_date=cutoff_date,
+            file_path=file_path,
+            uploaded_by=uploaded_by,
+            date_uploaded=now,
+            is_send_to_mail=False
+        )
+        for (_, _, employee, _), file_path in stored
+    ]
+    try:
+        _upsert_payslips(payslips)
+    except Exception as e:
+        logger.error(f"Payslip upsert failed for cut-off {cutoff_date}: {str(e)}")
+        for (file, _, _, _), file_path in stored:
+            default_storage.delete(file_path)
+            errors.append({'filename': file.name, 'error': str(e)})
+        return [], errors
+
+    successful_uploads = []
+    for (file, employee_id, employee, final_filename), file_path in stored:
+        previous_file = existing_files.get(employee.pk)
+        if previous_file and previous_file != file_path:
+            try:
+                default_storage.delete(previous_file)
+            except Exception as e:
+                logger.warning(f"Could not remove replaced payslip {previous_file}: {str(e)}")
+        successful_uploads.append({
+            'filename': file.name,
+            'employee_id': employee_id,
+            'employee_name': f"{employee.firstname} {employee.lastname}",
+            'final_filename': final_filename,
+            'action': 'Updated' if previous_file else 'Created'
+        })
+
+    logger.info(f"Payslip ingestion for {cutoff_date}: {len(successful_uploads)} stored, {len(errors)} errors")
+    return successful_uploads, errors
+
+def build_payslip_email(payslip, email_address):
+    """Build the HTML payslip email (with the PDF attached) sent to an employee"""
+    email_context = {
+        'payslip': payslip,
+        'employee': payslip.employee,
+    }
+    email_message = EmailMessage(
+        subject=f"Payslip - {payslip.cutoff_date.strftime('%b %d, %Y')} - {payslip.employee.full_name}",
+        body=render_to_string('finance/email_template.html', email_context),
+        from_email=settings.EMAIL_HOST_USER,
+        to=[email_address],
+    )
+    email_message.content_subtype = 'html'
+    if payslip.file_path and hasattr(payslip.file_path, 'path'):
+        email_message.attach_file(payslip.file_path.path)
+    return email_message
+
+def send_cutoff_payslip_emails(payslips, job=None, progress_callback=None):
+    """
+    Queue every payslip in ``payslips`` for emailing to its employee's address on file.
+
+    The messages go through the email outbox, which batches, throttles and
+    retries them. Every payslip gets a PayslipEmailDelivery row linked to its
+    queued message; record_payslip_email_outcome copies the outbox's outcome
+    onto it and flags sent payslips is_send_to_mail.
+
+    Returns:
+        dict: {'queued': int, 'failed': int, 'skipped': int, 'errors': list}
+    """
+    payslips = list(payslips)
+    deliveries = models.PayslipEmailDelivery.objects.bulk_create([
+        models.PayslipEmailDelivery(
+            payslip=payslip,
+            job=job,
+            recipient_email=payslip.employee.email or '',
+            status='queued' if payslip.employee.email else 'skipped',
+            error_message='' if payslip.employee.email else 'No email address on file',
+        )
+        for payslip in payslips
+    ])
+
+    errors = [
+        {'employee_id': payslip.employee.idnumber, 'employee_name': payslip.employee.full_name, 'email': '', 'error': delivery.error_message}
+        for payslip, delivery in zip(payslips, deliveries) if delivery.status == 'skipped'
+    ]
+    skipped = len(errors)
+    queued = 0
+    failed = 0
+    processed = skipped
+
+    for payslip, delivery in zip(payslips, deliveries):
+        if delivery.status != 'queued':
+            continue
+        try:
+            with transaction.atomic():
+                delivery.email = enqueue_email(build_payslip_email(payslip, delivery.recipient_email), source='finance.cutoff_payslip')
+                delivery.save(update_fields=['email'])
+            queued += 1
+        except Exception as e:
+            # The message could not be built (e.g. the PDF is missing); nothing was queued
+            delivery.status = 'failed'
+            delivery.error_message = str(e)
+            delivery.save(update_fields=['status', 'error_message'])
+            failed += 1
+            errors.append({
+                'employee_id': payslip.employee.idnumber,
+                'employee_name': payslip.employee.full_name,
+                'email': delivery.recipient_email,
+                'error': str(e),
+            })
+
+        processed += 1
+        if progress_callback:
+            progress_callback(processed, queued, failed + skipped)
+
+    logger.info(f"Payslip email dispatch: {queued} queued, {failed} failed, {skipped} skipped")
+    return {
+        'queued': queued,
+        'failed': failed,
+        'skipped': skipped,
+        'errors': errors,
+    }
+
+def record_payslip_email_outcome(email):
+    """Copy the outbox's outcome for ``email`` onto the payslip deliveries it carries"""
+    status = email.status if email.status in ('sent', 'failed') else 'queued'
+    with transaction.atomic():
+        updated = models.PayslipEmailDelivery.objects.filter(email=email).update(
+            status=status, attempts=email.attempts, error_message=email.last_error, sent_at=email.sent_at
+        )
+        if updated and status == 'sent':
+            models.Payslip.objects.filter(email_deliveries__email=email).update(is_send_to_mail=True)
+            schedule_finance_summary_invalidation()
+
+OJT_PDF_CACHE_DIR = 'ojt_payslips'
+
+def get_ojt_logo_path():
+    return os.path.join(settings.STATIC_ROOT or settings.STATICFILES_DIRS[0], 'images', 'icon', 'ryonanlogo.png')
+
+def ojt_payslip_payload(payslip):
+    """Everything the OJT payslip PDF shows, as plain JSON-friendly values"""
+    employee = payslip.employee
+    try:
+        line = employee.employment_info.line
+        line_name = line.line_name if line else '-'
+    except Exception:
+        line_name = '-'
+    payload = {
+        'idnumber': employee.idnumber,
+        'name': f"{employee.firstname} {employee.lastname}",
+        'line_name': line_name,
+        'cut_off': payslip.cut_off,
+    }
+    for field in OJT_PAYSLIP_PDF_FIELDS:
+        payload[field] = str(getattr(payslip, field))
+    return payload
+
+def ojt_payslip_cache_path(payslip, payload=None):
+    """Storage path of the rendered PDF, keyed by a hash of everything it shows"""
+    payload = payload or ojt_payslip_payload(payslip)
+    digest = hashlib.sha256(
+        json.dumps({'layout': OJT_PDF_LAYOUT_VERSION, **payload}, sort_keys=True).encode()
+    ).hexdigest()
+    return f"{OJT_PDF_CACHE_DIR}/{payslip.pk}/{digest[:32]}.pdf"
+
+def invalidate_ojt_payslip_pdf(payslip_id):
+    """Drop every cached render of a payslip"""
+    directory = f"{OJT_PDF_CACHE_DIR}/{payslip_id}"
+    try:
+        _, filenames = default_storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for filename in filenames:
+        default_storage.delete(f"{directory}/{filename}")
+
+def _store_ojt_pdf(path, pdf_content):
+    if default_storage.exists(path):
+        return
+    default_storage.save(path, ContentFile(pdf_content))
+
+def get_ojt_payslip_pdf(payslip):
+    """
+    Rendered OJT payslip PDF bytes, served from storage when the record has
+    not changed since the last render.
+    """
+    payload = ojt_payslip_payload(payslip)
+    path = ojt_payslip_cache_path(payslip, payload)
+    try:
+        if default_storage.exists(path):
+            with default_storage.open(path, 'rb') as cached:
+                return cached.read()
+    except Exception as e:
+        logger.warning(f"Could not read cached OJT payslip {path}: {str(e)}")
+
+    pdf_content = render_ojt_payslip(payload, get_ojt_logo_path())
+    try:
+        invalidate_ojt_payslip_pdf(payslip.pk)
+        _store_ojt_pdf(path, pdf_content)
+    except Exception as e:
+        logger.warning(f"Could not cache OJT payslip {path}: {str(e)}")
+    return pdf_content
+
+def render_cutoff_ojt_payslips(cut_off, workers=None):
+    """
+    Pre-render every OJT payslip of a cut-off into the PDF cache.
+
+    Payloads are built in this process; rendering runs in a process pool since
+    ReportLab layout is CPU-bound. Payslips whose current render is already
+    cached are skipped.
+
+    Returns:
+        dict: {'rendered': int, 'cached': int, 'errors': list}
+    """
+    payslips = models.OJTPayslipData.objects.filter(cut_off=cut_off).select_related(
+        'employee', 'employee__employment_info__line'
+    )
+    logo_path = get_ojt_logo_path()
+    pending = {}
+    cached = 0
+    for payslip in payslips:
+        payload = ojt_payslip_payload(payslip)
+        path = ojt_payslip_cache_path(payslip, payload)
+        if default_storage.exists(path):
+            cached += 1
+            continue
+        pending[payslip.pk] = (path, payload)
+
+    rendered = 0
+    errors = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            items = [(payslip_id, payload, logo_path) for payslip_id, (_, payload) in pending.items()]
+            futures = {pool.submit(render_ojt_payslip_job, item): item[0] for item in items}
+            for future in as_completed(futures):
+                payslip_id = futures[future]
+                try:
+                    _, pdf_content = future.result()
+                    invalidate_ojt_payslip_pdf(payslip_id)
+                    _store_ojt_pdf(pending[payslip_id][0], pdf_content)
+                    rendered += 1
+                except Exception as e:
+                    logger.error(f"Failed to render OJT payslip {payslip_id}: {str(e)}")
+                    errors.append({'payslip_id': payslip_id, 'error': str(e)})
+
+    logger.info(f"OJT payslip renders for {cut_off}: {rendered} rendered, {cached} already cached, {len(errors)} errors")
+    return {'rendered': rendered, 'cached': cached, 'errors': errors}
+
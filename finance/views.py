@@ -15,10 +15,11 @@ from django.conf import settings
 from django.db.models import Q
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from userlogin.models import EmployeeLogin
 import pandas as pd
-from reportlab.lib.pagesizes import letter
 import io
+import itertools
 import openpyxl
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
@@ -26,7 +27,15 @@ from openpyxl.worksheet.datavalidation import DataValidation
 from io import BytesIO
 from .models import Payslip, Loan, Allowance, OJTPayslipData, AllowanceType, LoanType, LoanDeduction, Savings, OJTRate, SavingsType
 from .forms import PayslipUploadForm, EmployeeSearchForm, EmailSelectionForm, SavingsUploadForm
-from notification.models import Notification
+from .utils import ingest_payslip_pdfs, build_payslip_email, get_ojt_payslip_pdf
+from .loan_posting import post_loan_deductions
+from .ojt_import import import_ojt_payslips
+from .metrics import get_chart_data, get_dashboard_cards, month_over_month, schedule_finance_stats_refresh
+from .summary import get_finance_summary
+from notification.inbox import create_broadcast
+from notification.outbox import enqueue_email
+from backgroundjob.runner import enqueue_job, job_queued_response
+from empconnect.exports import ExportWorkbook, CENTER, THIN_BORDER, iterate
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_GET
 from userlogin.models import EmployeeLogin
@@ -34,14 +43,6 @@ from .models import Payslip
 from django.core.files.storage import default_storage
 from decimal import Decimal
 from django.db import transaction, models
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.platypus.frames import Frame
-from reportlab.platypus.doctemplate import PageTemplate, BaseDocTemplate
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-import os
 
 @login_required(login_url="user-login")
 def finance_dashboard(request):
@@ -58,25 +59,6 @@ def finance_dashboard(request):
 
     if is_admin:
         # Admin view
-        from django.utils import timezone
-        from datetime import timedelta
-        from django.db.models import Sum
-        now = timezone.now()
-        first_of_this_month = now.replace(day=1)
-        first_of_last_month = (first_of_this_month - timedelta(days=1)).replace(day=1)
-        last_of_last_month = first_of_this_month - timedelta(days=1)
-
-        # Employees
-        employees_this_month = EmployeeLogin.objects.filter(is_active=True, date_joined__gte=first_of_this_month).count()
-        employees_last_month = EmployeeLogin.objects.filter(is_active=True, date_joined__gte=first_of_last_month, date_joined__lt=first_of_this_month).count()
-        total_employees = EmployeeLogin.objects.filter(is_active=True).count()
-        employees_percent = 0
-        employees_positive = True
-        if employees_last_month:
-            employees_percent = round(((employees_this_month - employees_last_month) / employees_last_month) * 100, 1)
-            employees_percent = min(employees_percent, 100)
-            employees_positive = employees_this_month >= employees_last_month
-
         # Employee list for table (exclude current user and all admin flags)
         employee_list = EmployeeLogin.objects.filter(
             is_active=True
@@ -116,73 +98,12 @@ def finance_dashboard(request):
         page_number = request.GET.get('page')
         employee_page_obj = paginator.get_page(page_number)
 
-        # Payslips
-        payslips_this_month = Payslip.objects.filter(cutoff_date__gte=first_of_this_month).count()
-        payslips_last_month = Payslip.objects.filter(cutoff_date__gte=first_of_last_month, cutoff_date__lt=first_of_this_month).count()
-        total_payslips = Payslip.objects.count()
-        payslips_percent = 0
-        payslips_positive = True
-        if payslips_last_month:
-            payslips_percent = round(((payslips_this_month - payslips_last_month) / payslips_last_month) * 100, 1)
-            payslips_percent = min(payslips_percent, 100)
-            payslips_positive = payslips_this_month >= payslips_last_month
-
-        # Loans
-        loans_this_month = Loan.objects.filter(created_at__gte=first_of_this_month).count()
-        loans_last_month = Loan.objects.filter(created_at__gte=first_of_last_month, created_at__lt=first_of_this_month).count()
-        total_loans = Loan.objects.count()
-        loans_percent = 0
-        loans_positive = True
-        if loans_last_month:
-            loans_percent = round(((loans_this_month - loans_last_month) / loans_last_month) * 100, 1)
-            loans_percent = min(loans_percent, 100)
-            loans_positive = loans_this_month >= loans_last_month
-
-        # Allowances
-        allowances_this_month = Allowance.objects.filter(created_at__gte=first_of_this_month).count()
-        allowances_last_month = Allowance.objects.filter(created_at__gte=first_of_last_month, created_at__lt=first_of_this_month).count()
-        total_allowances = Allowance.objects.count()
-        allowances_percent = 0
-        allowances_positive = True
-        if allowances_last_month:
-            allowances_percent = round(((allowances_this_month - allowances_last_month) / allowances_last_month) * 100, 1)
-            allowances_percent = min(allowances_percent, 100)
-            allowances_positive = allowances_this_month >= allowances_last_month
-
-        # Chart data: total loan balances for month, quarter, year
-        # Month
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        # Quarter
-        quarter = (now.month - 1) // 3 + 1
-        quarter_start_month = 3 * (quarter - 1) + 1
-        quarter_start = now.replace(month=quarter_start_month, day=1, hour=0, minute=0, second=0, microsecond=0)
-        # Year
-        year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        month_total_balance = Loan.objects.filter(is_active=True, created_at__gte=month_start).aggregate(total=Sum('current_balance'))['total'] or 0
-        quarter_total_balance = Loan.objects.filter(is_active=True, created_at__gte=quarter_start).aggregate(total=Sum('current_balance'))['total'] or 0
-        year_total_balance = Loan.objects.filter(is_active=True, created_at__gte=year_start).aggregate(total=Sum('current_balance'))['total'] or 0
-
+        context.update(get_dashboard_cards())
         context.update({
             'is_admin': True,
-            'total_employees': total_employees,
-            'employees_percent': employees_percent,
-            'employees_positive': employees_positive,
-            'total_payslips': total_payslips,
-            'payslips_percent': payslips_percent,
-            'payslips_positive': payslips_positive,
-            'total_loans': total_loans,
-            'loans_percent': loans_percent,
-            'loans_positive': loans_positive,
-            'total_allowances': total_allowances,
-            'allowances_percent': allowances_percent,
-            'allowances_positive': allowances_positive,
             'employee_list': employee_page_obj,
             'employee_page_obj': employee_page_obj,
             'search': search,
-            'month_total_balance': float(month_total_balance),
-            'quarter_total_balance': float(quarter_total_balance),
-            'year_total_balance': float(year_total_balance),
         })
     else:
         # Employee view
@@ -211,118 +132,41 @@ def user_finance(request):
     else:
         employment_type = 'regular'
 
-    # Get payslips, allowances, loans, and savings for the current user
-    payslips = Payslip.objects.filter(employee=user).order_by('-cutoff_date')
-    from django.db.models import Sum
-    allowances = Allowance.objects.filter(employee=user).order_by('-created_at')
-    loans = Loan.objects.filter(employee=user).order_by('-created_at')
-    
-    # Filter savings based on withdrawal date criteria
+    summary = get_finance_summary(user.pk)
+
+    # Withdrawn savings are only listed for a week after the withdrawal
     from datetime import timedelta
     one_week_ago = now - timedelta(weeks=1)
-    
-    # Get all savings and filter based on withdrawal criteria
-    all_savings = Savings.objects.filter(employee=user).order_by('-created_at')
-    savings = []
-    
-    for saving in all_savings:
-        if saving.is_withdrawn:
-            # If withdrawn, only show if withdrawal was within the last week
-            if saving.withdrawal_date and saving.withdrawal_date >= one_week_ago:
-                savings.append(saving)
-        else:
-            # If not withdrawn, always show
-            savings.append(saving)
-    
-    savings_sorted = sorted(savings, key=lambda s: (s.is_withdrawn, -s.created_at.timestamp() if s.created_at else 0))
+    savings = Savings.objects.filter(employee=user).filter(
+        Q(is_withdrawn=False) | Q(withdrawal_date__gte=one_week_ago)
+    ).select_related('savings_type').order_by('is_withdrawn', '-created_at')
 
     # Dashboard stats: this month vs last month for each metric
-    first_of_this_month = now.replace(day=1)
-    first_of_last_month = (first_of_this_month - timedelta(days=1)).replace(day=1)
-    # Payslips
-    payslips_this_month = Payslip.objects.filter(employee=user, cutoff_date__gte=first_of_this_month).count()
-    payslips_last_month = Payslip.objects.filter(employee=user, cutoff_date__gte=first_of_last_month, cutoff_date__lt=first_of_this_month).count()
-    total_payslips = payslips.count()
-    payslips_percent = 0
-    payslips_positive = True
-    if payslips_last_month:
-        payslips_percent = round(((payslips_this_month - payslips_last_month) / payslips_last_month) * 100, 1)
-        payslips_percent = min(payslips_percent, 100)
-        payslips_positive = payslips_this_month >= payslips_last_month
-
-    # Allowances - total only counts allowances without deposit_date (balance allowances)
-    allowances_this_month = Allowance.objects.filter(employee=user, created_at__gte=first_of_this_month).count()
-    allowances_last_month = Allowance.objects.filter(employee=user, created_at__gte=first_of_last_month, created_at__lt=first_of_this_month).count()
-    total_allowances = allowances.filter(deposit_date__isnull=True).aggregate(total=Sum('amount'))['total'] or 0
-    allowances_percent = 0
-    allowances_positive = True
-    if allowances_last_month:
-        allowances_percent = round(((allowances_this_month - allowances_last_month) / allowances_last_month) * 100, 1)
-        allowances_percent = min(allowances_percent, 100)
-        allowances_positive = allowances_this_month >= allowances_last_month
-
-    # Savings
-    savings_this_month = Savings.objects.filter(employee=user, created_at__gte=first_of_this_month).count()
-    savings_last_month = Savings.objects.filter(employee=user, created_at__gte=first_of_last_month, created_at__lt=first_of_this_month).count()
-    total_savings = Savings.objects.filter(employee=user, is_withdrawn=False).aggregate(total=Sum('amount'))['total'] or 0
-    savings_percent = 0
-    savings_positive = True
-    if savings_last_month:
-        savings_percent = round(((savings_this_month - savings_last_month) / savings_last_month) * 100, 1)
-        savings_percent = min(savings_percent, 100)
-        savings_positive = savings_this_month >= savings_last_month
-
-    # Loans
-    loans_this_month = Loan.objects.filter(employee=user, created_at__gte=first_of_this_month).count()
-    loans_last_month = Loan.objects.filter(employee=user, created_at__gte=first_of_last_month, created_at__lt=first_of_this_month).count()
-    total_loans = Loan.objects.filter(employee=user, is_active=True).aggregate(total=models.Sum('current_balance'))['total'] or 0
-    loans_percent = 0
-    loans_positive = True
-    if loans_last_month:
-        loans_percent = round(((loans_this_month - loans_last_month) / loans_last_month) * 100, 1)
-        loans_percent = min(loans_percent, 100)
-        loans_positive = loans_this_month >= loans_last_month
-
-    # Precompute paid and percent for each loan (similar to employee_finance_details)
-    total_active_loan_balance = 0
-    for loan in loans:
-        try:
-            principal = float(getattr(loan, 'principal_amount', 0) or 0)
-            current_balance = float(getattr(loan, 'current_balance', 0) or 0)
-            if principal > 0:
-                paid = principal - current_balance
-                percent = (current_balance / principal * 100)
-            else:
-                paid = 0
-                percent = 100  # If no principal, consider fully paid
-        except Exception:
-            paid = 0
-            percent = 100
-        loan.paid = paid
-        loan.percent = percent
-        loan.percent_paid = 100 - percent
-        if getattr(loan, 'is_active', False):
-            total_active_loan_balance += current_balance
+    payslips_percent, payslips_positive = month_over_month(*summary.monthly_counts['payslips'])
+    allowances_percent, allowances_positive = month_over_month(*summary.monthly_counts['allowances'])
+    savings_percent, savings_positive = month_over_month(*summary.monthly_counts['savings'])
+    loans_percent, loans_positive = month_over_month(*summary.monthly_counts['loans'])
 
     content = {
         'now': now,
         'employment_type': employment_type,
-        'payslips': payslips,
+        'payslips': Payslip.objects.filter(employee=user).select_related('employee', 'uploaded_by').order_by('-cutoff_date'),
         'ojtpayslips': OJTPayslipData.objects.filter(employee=user).order_by('-created_at'),
-        'allowances': allowances,
-        'loans': loans,
-        'savings': savings_sorted,
-        'total_active_loan_balance': total_active_loan_balance,
-        'total_payslips': total_payslips,
+        'allowances': Allowance.objects.filter(employee=user).select_related('allowance_type').order_by('-created_at'),
+        'loans': Loan.objects.filter(employee=user).select_related('loan_type').order_by('-created_at'),
+        'savings': savings,
+        'total_active_loan_balance': summary.total_active_loan_balance,
+        'total_payslips': summary.payslip_count,
         'payslips_percent': payslips_percent,
         'payslips_positive': payslips_positive,
-        'total_allowances': total_allowances,
+        # Allowances not yet deposited
+        'total_allowances': summary.allowance_balance,
         'allowances_percent': allowances_percent,
         'allowances_positive': allowances_positive,
-        'total_savings': total_savings,
+        'total_savings': summary.total_savings,
         'savings_percent': savings_percent,
         'savings_positive': savings_positive,
-        'total_loans': total_loans,
+        'total_loans': summary.total_active_loan_balance,
         'loans_percent': loans_percent,
         'loans_positive': loans_positive,
     }
@@ -337,179 +181,37 @@ def ojt_payslip_upload(request):
     if request.method == 'POST':
         files = request.FILES.getlist('files')
         cut_off = request.POST.get('cutoff_date', '')
-        errors = []
-        all_error_rows = []  # Collect all error rows from all files
-        created = 0
-        updated = 0
 
         if not cut_off:
             return JsonResponse({'success': False, 'message': 'Cut-off period is required'})
 
-        for file in files:
-            if not file.name.lower().endswith('.xlsx'):
-                errors.append(f'Only Excel (.xlsx) files are supported. File: {file.name}')
-                continue
-                
-            try:
-                success, file_errors, file_created, file_updated, error_rows = process_ojt_excel(file, cut_off)
-                if success:
-                    created += file_created
-                    updated += file_updated
-                else:
-                    errors.extend(file_errors)
-                    if error_rows:
-                        all_error_rows.extend(error_rows)
-            except Exception as e:
-                errors.append(f'Error processing {file.name}: {str(e)}')
-
-        if errors:
-            return JsonResponse({
-                'success': False, 
-                'errors': errors, 
-                'created': created,
-                'updated': updated,
-                'error_rows': all_error_rows
-            })
-        
-        # Create notification for successful upload
-        if created > 0 or updated > 0:
-            Notification.objects.create(
-                title="OJT Payslip Upload",
-                message=f"Payslip for OJT has been uploaded for cut-off period {cut_off}.",
-                sender=request.user,
-                recipient=request.user,
-                module="finance",
-                for_all=True
-            )
-            
-        return JsonResponse({
-            'success': True, 
-            'created': created,
-            'updated': updated,
-            'message': f'Successfully processed {created} new records and updated {updated} existing records.'
-        })
+        job = enqueue_job('finance.ojt_payslip_upload', request.user, files=files, params={'cut_off': cut_off}, total=len(files))
+        return job_queued_response(job)
         
     return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
 
 def process_ojt_excel(file, cut_off):
-
-    errors = []
-    error_rows = []  # Store rows with errors for download
-    created = 0
-    updated = 0
-    
     try:
-        workbook = openpyxl.load_workbook(file, data_only=True)
-        worksheet = workbook.active
-        rows = list(worksheet.values)
-        
-        if len(rows) < 2:
-            return False, ['Excel file is empty or has no data'], 0, 0, []
-        
-        headers = rows[0]
-        data_rows = rows[1:]
-        
-        with transaction.atomic():
-            for row_idx, row in enumerate(data_rows, start=2):
-                try:
-                    # Skip completely empty rows
-                    if not row or all(cell is None or (isinstance(cell, str) and cell.strip() == '') for cell in row):
-                        continue
+        # Streamed row by row; the importer keeps only the parsed amounts
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = next(rows, None)
+            first_row = next(rows, None)
+            if headers is None or first_row is None:
+                return False, ['Excel file is empty or has no data'], 0, 0, []
+
+            # Two lookups, then one bulk insert and one bulk update for the whole file
+            created, updated, errors, error_rows = import_ojt_payslips(
+                headers, itertools.chain([first_row], rows), cut_off
+            )
+        finally:
+            workbook.close()
 
-                    employee_id = row[0] if row and len(row) > 0 else None
-                    if not employee_id:
-                        remark = 'Missing employee ID'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        error_row = list(row[:6]) if row else ['', '', '', '', '', '']
-                        # Pad to 6 columns if needed
-                        while len(error_row) < 6:
-                            error_row.append('')
-                        error_row.append(remark)  # Add remarks column
-                        error_rows.append(error_row)
-                        continue
-                    
-                    try:
-                        employee = EmployeeLogin.objects.get(idnumber=str(employee_id))
-                    except EmployeeLogin.DoesNotExist:
-                        remark = f'Employee {employee_id} not found'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        error_row = list(row[:6]) if row else ['', '', '', '', '', '']
-                        while len(error_row) < 6:
-                            error_row.append('')
-                        error_row.append(remark)
-                        error_rows.append(error_row)
-                        continue
-                    
-                    def safe_decimal(value):
-                        if value is None or value == '':
-                            return Decimal('0')
-                        try:
-                            return Decimal(str(value))
-                        except:
-                            return Decimal('0')
-                    
-                    payslip_data = {
-                        'employee': employee,
-                        'cut_off': cut_off,
-                        'regular_day': safe_decimal(row[1] if len(row) > 1 else None),
-                        'allowance_day': safe_decimal(row[2] if len(row) > 2 else None),
-                        'total_allowance': safe_decimal(row[3] if len(row) > 3 else None),
-                        'nd_allowance': safe_decimal(row[4] if len(row) > 4 else None),
-                        'grand_total': safe_decimal(row[5] if len(row) > 5 else None),
-                        'basic_school_share': safe_decimal(row[6] if len(row) > 6 else None),
-                        'basic_ojt_share': safe_decimal(row[7] if len(row) > 7 else None),
-                        'deduction': safe_decimal(row[8] if len(row) > 8 else None),
-                        'net_ojt_share': safe_decimal(row[9] if len(row) > 9 else None),
-                        'rice_allowance': safe_decimal(row[10] if len(row) > 10 else None),
-                        'ot_allowance': safe_decimal(row[11] if len(row) > 11 else None),
-                        'nd_ot_allowance': safe_decimal(row[12] if len(row) > 12 else None),
-                        'special_holiday': safe_decimal(row[13] if len(row) > 13 else None),
-                        'legal_holiday': safe_decimal(row[14] if len(row) > 14 else None),
-                        'satoff_allowance': safe_decimal(row[15] if len(row) > 15 else None),
-                        'rd_ot': safe_decimal(row[16] if len(row) > 16 else None),
-                        'adjustment': safe_decimal(row[17] if len(row) > 17 else None),
-                        'deduction_2': safe_decimal(row[18] if len(row) > 18 else None),
-                        'ot_pay_allowance': safe_decimal(row[19] if len(row) > 19 else None),
-                        'total_allow': safe_decimal(row[20] if len(row) > 20 else None),
-                        'holiday_hours': safe_decimal(row[21] if len(row) > 21 else None),
-                        'rd_ot_days': safe_decimal(row[22] if len(row) > 22 else None),
-                        'perfect_attendance': safe_decimal(row[23] if len(row) > 23 else None),
-                    }
-                    
-                    # Check if record exists
-                    existing_record = OJTPayslipData.objects.filter(
-                        employee=employee,
-                        cut_off=cut_off
-                    ).first()
-                    
-                    if existing_record:
-                        # Update existing record
-                        for field, value in payslip_data.items():
-                            if field not in ['employee', 'cut_off']:
-                                setattr(existing_record, field, value)
-                        existing_record.save()
-                        updated += 1
-                    else:
-                        # Create new record
-                        OJTPayslipData.objects.create(**payslip_data)
-                        created += 1
-                        
-                except Exception as e:
-                    remark = str(e)
-                    errors.append(f'Row {row_idx}: {remark}')
-                    error_row = list(row[:6]) if row else ['', '', '', '', '', '']
-                    while len(error_row) < 6:
-                        error_row.append('')
-                    error_row.append(remark)
-                    error_rows.append(error_row)
-                    continue
-        
-        workbook.close()
-        
         if errors:
             return False, errors, created, updated, error_rows
         return True, [], created, updated, []
-        
+
     except Exception as e:
         return False, [f'Error reading Excel file: {str(e)}'], 0, 0, []
 
@@ -795,74 +497,27 @@ def regular_payslip_upload(request):
     if request.method == 'POST':
         files = request.FILES.getlist('files')
         cutoff_date = request.POST.get('cutoff_date')
-        errors = []
-        success_count = 0
-        processed = 0
-        successful_uploads = []
 
         if not files:
             return JsonResponse({'success': False, 'message': 'No files selected'})
         if not cutoff_date:
             return JsonResponse({'success': False, 'message': 'Cutoff date is required'})
+        parsed_cutoff = parse_date(cutoff_date)
+        if not parsed_cutoff:
+            return JsonResponse({'success': False, 'message': 'Invalid cutoff date'})
 
-        for file in files:
-            try:
-                # Validate file type
-                if not file.name.lower().endswith('.pdf'):
-                    errors.append({'filename': file.name, 'error': 'Only PDF files are allowed'})
-                    processed += 1
-                    continue
-
-                # Parse filename: "idnumber_lastname.pdf" (e.g., "960921_mier.pdf" or "960921_dela cruz.pdf")
-                # Lastname can contain spaces, the important part is the idnumber
-                import re
-                filename_pattern = r'^([A-Za-z0-9]+)_(.+)\.pdf$'
-                match = re.match(filename_pattern, file.name, re.IGNORECASE)
-                if not match:
-                    errors.append({'filename': file.name, 'error': 'Invalid filename format. Expected: idnumber_lastname.pdf (e.g., 960921_mier.pdf)'})
-                    processed += 1
-                    continue
-                employee_id, lastname = match.groups()
-
-                # Find employee by ID number (the important validation)
-                from userlogin.models import EmployeeLogin
-                try:
-                    employee = EmployeeLogin.objects.get(idnumber=employee_id)
-                except EmployeeLogin.DoesNotExist:
-                    errors.append({'filename': file.name, 'error': f'Employee with ID {employee_id} not found in the system'})
-                    processed += 1
-                    continue
-
-                # Save file with new name: {cutoff_date}_{original_filename}
-                final_filename = f"{cutoff_date}_{file.name}"
-                from django.core.files.base import ContentFile
-                from django.core.files.storage import default_storage
-                file_path = default_storage.save(f"payslips/{final_filename}", ContentFile(file.read()))
-
-                # Create Payslip record
-                from .models import Payslip
-                payslip = Payslip.objects.create(
-                    employee=employee,
-                    cutoff_date=cutoff_date,
-                    file_path=file_path,
-                    uploaded_by=request.user
-                )
-                successful_uploads.append({'filename': file.name, 'employee_id': employee_id, 'employee_name': f"{employee.firstname} {employee.lastname}", 'final_filename': final_filename, 'action': 'Created'})
-                success_count += 1
-                processed += 1
-            except Exception as e:
-                errors.append({'filename': file.name, 'error': str(e)})
-                processed += 1
+        successful_uploads, errors = ingest_payslip_pdfs(files, parsed_cutoff, request.user)
+        success_count = len(successful_uploads)
+        if success_count:
+            schedule_finance_stats_refresh('payslips')
 
         # Create notification for successful upload
         if success_count > 0:
-            Notification.objects.create(
+            create_broadcast(
                 title="Regular Payslip Upload",
                 message=f"Regular payslip has been uploaded for cutoff Period: {cutoff_date}.",
                 sender=request.user,
-                recipient=request.user,
-                module="finance",
-                for_all=True
+                module="finance"
             )
 
         # Determine overall success status
@@ -956,17 +611,18 @@ def ajax_employee_payslips(request, employee_id):
     try:
         employee = EmployeeLogin.objects.get(id=employee_id)
         search = request.GET.get('search', '').strip()
-        payslip_qs = Payslip.objects.filter(employee=employee)
+        payslip_list = Payslip.objects.filter(employee=employee)
         if search:
             from django.db.models import Q
-            payslip_qs = payslip_qs.filter(
+            payslip_list = payslip_list.filter(
                 Q(cutoff_date__icontains=search) |
                 Q(date_uploaded__icontains=search) |
                 Q(uploaded_by__firstname__icontains=search) |
                 Q(uploaded_by__lastname__icontains=search) |
                 Q(file_path__icontains=search)
             )
-        payslip_list = payslip_qs.order_by('-cutoff_date')
+        # The paginator counts and slices in the database
+        payslip_list = payslip_list.select_related('employee', 'uploaded_by').order_by('-cutoff_date', '-pk')
         page_number = request.GET.get('page')
         from django.core.paginator import Paginator
         paginator = Paginator(payslip_list, 10)
@@ -998,36 +654,8 @@ def loan_principal_upload(request):
                         file = files[0]
                 if not file or not file.name.lower().endswith('.xlsx'):
                     return JsonResponse({'success': False, 'message': 'Please upload an Excel (.xlsx) file'})
-                success, errors, created, updated, stacked, not_uploaded_rows = process_loan_principal_excel(file)
-                if errors:
-                    return JsonResponse({
-                        'success': False,
-                        'errors': errors,
-                        'created': created,
-                        'updated': updated,
-                        'stacked': stacked,
-                        'not_uploaded_rows': not_uploaded_rows
-                    })
-                
-                # Create notification for successful upload
-                if created > 0 or updated > 0 or stacked > 0:
-                    Notification.objects.create(
-                        title="Principal Balance Upload",
-                        message=f"New principal loan balance has been successfully uploaded.",
-                        sender=request.user,
-                        recipient=request.user,
-                        module="finance",
-                        for_all=True
-                    )
-                
-                return JsonResponse({
-                    'success': True,
-                    'created': created,
-                    'updated': updated,
-                    'stacked': stacked,
-                    'not_uploaded_rows': not_uploaded_rows,
-                    'message': f'Successfully processed {created} new loans, updated {updated} loans, and stacked {stacked} loans.'
-                })
+                job = enqueue_job('finance.loan_principal_upload', request.user, files=[file], total=1)
+                return job_queued_response(job)
             except Exception as e:
                 import traceback
                 import sys
@@ -1064,33 +692,8 @@ def loan_deduction_upload(request):
                 if not cutoff_date:
                     return JsonResponse({'success': False, 'message': 'Cutoff date is required'})
                 
-                success, errors, processed, added_deductions = process_loan_deduction_excel(file, cutoff_date)
-                
-                if errors:
-                    return JsonResponse({
-                        'success': False, 
-                        'errors': errors, 
-                        'processed': processed,
-                        'added_deductions': added_deductions
-                    })
-                
-                # Create notification for successful upload
-                if processed > 0:
-                    Notification.objects.create(
-                        title="Deduction Upload",
-                        message=f"Loan deductions has been successfully uploaded for cutoff period {cutoff_date}.",
-                        sender=request.user,
-                        recipient=request.user,
-                        module="finance",
-                        for_all=True
-                    )
-                    
-                return JsonResponse({
-                    'success': True, 
-                    'processed': processed,
-                    'added_deductions': added_deductions,
-                    'message': f'Successfully processed {processed} loan deductions for {cutoff_date}.'
-                })
+                job = enqueue_job('finance.loan_deduction_upload', request.user, files=[file], params={'cutoff_date': cutoff_date}, total=1)
+                return job_queued_response(job)
                 
             except Exception as e:
                 import traceback
@@ -1225,11 +828,6 @@ def process_loan_principal_excel(file):
         return False, [f'Error reading Excel file: {str(e)}'], 0, 0, 0, []
 
 def process_loan_deduction_excel(file, cutoff_date):
-
-    errors = []
-    processed = 0
-    added_deductions = []
-    
     try:
         if file.name.lower().endswith('.csv'):
             # Handle CSV files
@@ -1248,108 +846,8 @@ def process_loan_deduction_excel(file, cutoff_date):
         if len(rows) < 2:
             return False, ['File is empty or has no data'], 0, []
         
-        headers = rows[0]
-        data_rows = rows[1:]
-        
-        with transaction.atomic():
-            for row_idx, row in enumerate(data_rows, start=2):
-                try:
-                    # Skip completely empty rows
-                    if not row or all(cell is None or (isinstance(cell, str) and cell.strip() == '') for cell in row):
-                        continue
-                    # Expecting: Id Number, Name, Loan Type, Deduction
-                    if len(row) < 4:
-                        continue
-                    employee_id = row[0]
-                    name = row[1]  # not used for lookup
-                    loan_type_name = row[2]
-                    deduction_amount = row[3]
-                    if not all([employee_id, loan_type_name, deduction_amount]):
-                        remark = 'Missing required data (Id Number, Loan Type, or Deduction)'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        # Always output 4 columns + remark for error file
-                        added_deductions.append([
-                            row[0] if len(row) > 0 else '',
-                            row[1] if len(row) > 1 else '',
-                            row[2] if len(row) > 2 else '',
-                            row[3] if len(row) > 3 else '',
-                            remark
-                        ])
-                        continue
-                    # Find employee
-                    try:
-                        employee = EmployeeLogin.objects.get(idnumber=str(employee_id))
-                    except EmployeeLogin.DoesNotExist:
-                        remark = f'Employee {employee_id} not found'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        added_deductions.append([
-                            employee_id, name, loan_type_name, deduction_amount, remark
-                        ])
-                        continue
-                    # Find loan type
-                    try:
-                        loan_type = LoanType.objects.get(loan_type=str(loan_type_name).strip())
-                    except LoanType.DoesNotExist:
-                        remark = f'Loan type {loan_type_name} not found'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        added_deductions.append([
-                            employee_id, name, loan_type_name, deduction_amount, remark
-                        ])
-                        continue
-                    # Convert deduction amount
-                    try:
-                        deduction_amount = Decimal(str(deduction_amount))
-                    except:
-                        remark = 'Invalid deduction amount'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        added_deductions.append([
-                            employee_id, name, loan_type_name, deduction_amount, remark
-                        ])
-                        continue
-                    # Find oldest active loan (order by created_at ascending)
-                    loan = Loan.objects.filter(
-                        employee=employee,
-                        loan_type=loan_type,
-                        is_active=True,
-                        current_balance__gt=0
-                    ).order_by('created_at').first()
-                    if not loan:
-                        remark = f'No active loan found for {employee_id} - {loan_type_name}'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        added_deductions.append([
-                            employee_id, name, loan_type_name, deduction_amount, remark
-                        ])
-                        continue
-                    # Check if deduction already exists for this cutoff
-                    if LoanDeduction.objects.filter(loan=loan, cut_off=cutoff_date).exists():
-                        remark = f'Deduction already exists for {cutoff_date}'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        added_deductions.append([
-                            employee_id, name, loan_type_name, deduction_amount, remark
-                        ])
-                        continue
-                    # Apply deduction
-                    actual_deduction = loan.apply_deduction(deduction_amount, cutoff_date)
-                    if actual_deduction > 0:
-                        processed += 1
-                    else:
-                        remark = 'No deduction applied (loan may be fully paid)'
-                        errors.append(f'Row {row_idx}: {remark}')
-                        added_deductions.append([
-                            employee_id, name, loan_type_name, deduction_amount, remark
-                        ])
-                except Exception as e:
-                    remark = str(e)
-                    errors.append(f'Row {row_idx}: {remark}')
-                    # Defensive: always output 4 columns + remark
-                    added_deductions.append([
-                        row[0] if len(row) > 0 else '',
-                        row[1] if len(row) > 1 else '',
-                        row[2] if len(row) > 2 else '',
-                        row[3] if len(row) > 3 else '',
-                        remark
-                    ])
-                    continue
+        # Three lookups, then one bulk insert and one bulk update for the whole file
+        processed, errors, added_deductions = post_loan_deductions(rows[1:], cutoff_date)
         
         if errors:
             return False, errors, processed, added_deductions
@@ -1618,66 +1116,10 @@ def allowances_upload(request):
 
     if request.method == 'POST':
         try:
-            from .models import Allowance
-            # Delete all Allowance records before import
-            Allowance.objects.all().delete()
-
+            # Existing allowances are replaced inside the job, not before it is queued
             files = request.FILES.getlist('files')
-            success_count = 0
-            error_count = 0
-            error_details = []
-            all_error_rows = []  # Collect all error rows from all files
-
-            for file in files:
-                try:
-                    if file.name.endswith(('.xlsx', '.xls', '.csv')):
-                        # Process allowance file (now only inserts into Allowance model)
-                        success, errors, error_rows = process_allowance_file(file)
-                        if success:
-                            success_count += 1
-                        else:
-                            error_count += 1
-                            if errors:
-                                for error in errors:
-                                    error_details.append({'filename': file.name, 'error': error})
-                            if error_rows:
-                                all_error_rows.extend(error_rows)
-                    else:
-                        error_count += 1
-                        error_details.append({'filename': file.name, 'error': f"Invalid file type: {file.name}"})
-                except Exception as e:
-                    error_count += 1
-                    error_details.append({'filename': file.name, 'error': f"Error processing {file.name}: {str(e)}"})
-
-            # Always return JSON for POST requests (fixes frontend invalid response format)
-            if error_count > 0 or len(all_error_rows) > 0:
-                return JsonResponse({
-                    'success': False,
-                    'message': f'Failed to upload {error_count} file(s)',
-                    'error_count': error_count,
-                    'success_count': success_count,
-                    'errors': error_details,
-                    'error_rows': all_error_rows
-                }, content_type='application/json')
-            else:
-                # Create notification for successful upload
-                if success_count > 0:
-                    Notification.objects.create(
-                        title="Allowances Upload",
-                        message=f"New allowances have been successfully uploaded.",
-                        sender=request.user,
-                        recipient=request.user,
-                        module="finance",
-                        for_all=True
-                    )
-                
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Successfully uploaded {success_count} allowance file(s)',
-                    'success_count': success_count,
-                    'error_count': error_count,
-                    'errors': error_details
-                }, content_type='application/json')
+            job = enqueue_job('finance.allowances_upload', request.user, files=files, total=len(files))
+            return job_queued_response(job)
 
         except Exception as e:
             # Always return JSON for POST errors
@@ -1966,42 +1408,13 @@ def send_payslip(request, payslip_id):
         if not selected_email:
             return JsonResponse({'success': False, 'message': 'Email address is required'})
     
-        # Prepare email context
-        email_context = {
-            'payslip': payslip,
-            'employee': payslip.employee,
-        }
-        
-        # Render email template
-        html_message = render_to_string('finance/email_template.html', email_context)
-        
-        # Create email subject  
-        subject = f"Payslip - {payslip.cutoff_date.strftime('%b %d, %Y')} - {payslip.employee.full_name}"
-        
-        # Create email message with configured sender
-        from django.core.mail import EmailMessage
-        from django.conf import settings
-        
-        # Use specific email configuration from settings
-        email_message = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email=settings.EMAIL_HOST_USER,  # Use configured sender email
-            to=[selected_email],
-        )
-        
-        # Set email as HTML
-        email_message.content_subtype = 'html'
-        
-        # Attach payslip file if it exists
-        if payslip.file_path and hasattr(payslip.file_path, 'path'):
-            try:
-                email_message.attach_file(payslip.file_path.path)
-            except Exception as e:
-                return JsonResponse({'success': False, 'message': f'Error attaching file: {str(e)}'})
+        try:
+            email_message = build_payslip_email(payslip, selected_email)
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': f'Error attaching file: {str(e)}'})
         
-        # Send email
-        email_message.send()
+        # Delivered by the email outbox after this request
+        enqueue_email(email_message, source='finance.payslip')
         
         # Update payslip status
         payslip.is_send_to_mail = True
@@ -2016,6 +1429,27 @@ def send_payslip(request, payslip_id):
         return JsonResponse({'success': False, 'message': f'Error sending email: {str(e)}'})
 
 
+@login_required(login_url="user-login")
+@require_POST
+def send_cutoff_payslips(request):
+    """Queue emailing every payslip of a cut-off to its employee"""
+    if not request.user.accounting_admin:
+        return JsonResponse({'success': False, 'message': 'Permission denied'})
+
+    cutoff_date = parse_date(request.POST.get('cutoff_date', ''))
+    if not cutoff_date:
+        return JsonResponse({'success': False, 'message': 'A valid cutoff date is required'})
+    if not Payslip.objects.filter(cutoff_date=cutoff_date).exists():
+        return JsonResponse({'success': False, 'message': f'No payslips uploaded for cutoff {cutoff_date}'})
+
+    job = enqueue_job(
+        'finance.send_cutoff_payslips',
+        request.user,
+        params={'cutoff_date': cutoff_date.isoformat(), 'resend': request.POST.get('resend') == 'true'}
+    )
+    return job_queued_response(job, message=f'Sending payslips for cutoff {cutoff_date}.')
+
+
 @login_required(login_url="user-login")
 def employee_finance_details(request, employee_id):
     user = request.user
@@ -2026,49 +1460,23 @@ def employee_finance_details(request, employee_id):
 
     try:
         employee = EmployeeLogin.objects.get(id=employee_id)
+        summary = get_finance_summary(employee.pk)
         search = request.GET.get('search', '').strip()
-        payslip_qs = Payslip.objects.filter(employee=employee)
+        payslip_list = Payslip.objects.filter(employee=employee)
         if search:
             from django.db.models import Q
-            payslip_qs = payslip_qs.filter(
+            payslip_list = payslip_list.filter(
                 Q(cutoff_date__icontains=search) |
                 Q(date_uploaded__icontains=search) |
                 Q(uploaded_by__firstname__icontains=search) |
                 Q(uploaded_by__lastname__icontains=search)
             )
-        payslip_list = payslip_qs.order_by('-cutoff_date')
+        # The paginator counts and slices in the database
+        payslip_list = payslip_list.select_related('employee', 'uploaded_by').order_by('-cutoff_date', '-pk')
         page_number = request.GET.get('page')
         from django.core.paginator import Paginator
         paginator = Paginator(payslip_list, 10)
         payslips = paginator.get_page(page_number)
-        loans = Loan.objects.filter(employee=employee).order_by('-created_at')
-        # Precompute paid and percent for each loan (percent = (current_balance / principal_amount) * 100, paid = principal_amount - current_balance)
-        total_active_loan_balance = 0
-        for loan in loans:
-            try:
-                principal = float(getattr(loan, 'principal_amount', 0) or 0)
-                current_balance = float(getattr(loan, 'current_balance', 0) or 0)
-                if principal > 0:
-                    paid = principal - current_balance
-                    percent = (current_balance / principal * 100)
-                else:
-                    paid = 0
-                    percent = 100  # If no principal, consider fully paid
-            except Exception:
-                paid = 0
-                percent = 100
-            loan.paid = paid
-            loan.percent = percent
-            loan.percent_paid = 100 - percent
-            if getattr(loan, 'is_active', False):
-                total_active_loan_balance += current_balance
-
-
-        allowances = Allowance.objects.filter(employee=employee).order_by('-created_at')
-        total_allowances = sum(a.amount for a in allowances)
-
-        # Add savings queryset for this employee
-        savings = Savings.objects.filter(employee=employee).order_by('-created_at')
 
         from datetime import datetime
 
@@ -2080,14 +1488,14 @@ def employee_finance_details(request, employee_id):
         context = {
             'employee': employee,
             'payslips': payslips,
-            'loans': loans,
-            'allowances': allowances,
-            'total_allowances': total_allowances,
-            'total_active_loan_balance': total_active_loan_balance,
+            'loans': Loan.objects.filter(employee=employee).select_related('loan_type').order_by('-created_at'),
+            'allowances': Allowance.objects.filter(employee=employee).select_related('allowance_type').order_by('-created_at'),
+            'total_allowances': summary.total_allowances,
+            'total_active_loan_balance': summary.total_active_loan_balance,
             'now': datetime.now(),
             'search': search,
             'ojt_payslips': ojt_payslips,
-            'savings': savings,
+            'savings': Savings.objects.filter(employee=employee).select_related('savings_type').order_by('-created_at'),
         }
 
         return render(request, 'finance/employee_finance_details.html', context)
@@ -2105,22 +1513,20 @@ def employee_allowances(request, employee_id):
         return JsonResponse({'success': False, 'message': 'Permission denied'})
 
     employee = get_object_or_404(EmployeeLogin, id=employee_id)
-    allowances = Allowance.objects.filter(employee=employee).order_by('-start_date')
+    summary = get_finance_summary(employee.pk)
 
-    # Group allowances by type
+    # Group allowances by type; an allowance stays active until it is deposited
     allowance_groups = {}
-    for allowance in allowances:
-        allowance_type = allowance.get_allowance_type_display()
-        if allowance_type not in allowance_groups:
-            allowance_groups[allowance_type] = []
-        allowance_groups[allowance_type].append({
+    for allowance in Allowance.objects.filter(employee=employee).select_related('allowance_type').order_by('-created_at'):
+        allowance_groups.setdefault(allowance.allowance_type.allowance_type, []).append({
             'id': allowance.id,
             'amount': str(allowance.amount),
-            'frequency': allowance.get_frequency_display(),
-            'start_date': allowance.start_date.strftime('%Y-%m-%d'),
-            'end_date': allowance.end_date.strftime('%Y-%m-%d') if allowance.end_date else None,
-            'is_active': allowance.is_active,
-            'description': allowance.description,
+            'is_percentage': allowance.is_percentage,
+            'frequency': allowance.period_covered or '',
+            'start_date': (allowance.deposit_date or timezone.localdate(allowance.created_at)).strftime('%Y-%m-%d'),
+            'end_date': None,
+            'is_active': allowance.deposit_date is None,
+            'description': None,
         })
 
     return JsonResponse({
@@ -2129,7 +1535,9 @@ def employee_allowances(request, employee_id):
             'name': employee.full_name,
             'idnumber': employee.idnumber,
         },
-        'allowance_groups': allowance_groups
+        'allowance_groups': allowance_groups,
+        'total_allowances': str(summary.total_allowances),
+        'allowance_balance': str(summary.allowance_balance),
     })
 
 @login_required(login_url="user-login")
@@ -2244,175 +1652,19 @@ def employee_table_partial(request):
     return JsonResponse({'html': html})
 
 @login_required(login_url="user-login")
-def chart_data(request):
-    try:
-        if not request.user.accounting_admin:
-            return JsonResponse({'success': False, 'message': 'Permission denied'})
-
-        category = request.GET.get('category', '')
-        filter_type = request.GET.get('type', '')
-        period = request.GET.get('period', 'month')
-
-        from datetime import datetime, timedelta
-        from django.db.models import Sum, Count
-        from django.db.models.functions import TruncDate, TruncMonth, TruncYear
-
-        now = timezone.now()
-
-        import calendar
-        if period == 'month':
-            # This Month: 1st to last day of current month
-            start_date = now.replace(day=1)
-            last_day = calendar.monthrange(now.year, now.month)[1]
-            end_date = now.replace(day=last_day)
-            # Prepare all days in month
-            all_days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
-        elif period == 'quarter':
-            # This Quarter: last 3 months (labels: months only)
-            # Get the last 3 months including current
-            months = [(now.year, now.month - i) for i in reversed(range(3))]
-            # Adjust for year wrap
-            months = [(y if m > 0 else y - 1, m if m > 0 else m + 12) for (y, m) in months]
-            start_date = datetime(months[0][0], months[0][1], 1, tzinfo=now.tzinfo)
-            last_day = calendar.monthrange(months[-1][0], months[-1][1])[1]
-            end_date = datetime(months[-1][0], months[-1][1], last_day, tzinfo=now.tzinfo)
-            all_months = [(y, m) for (y, m) in months]
-        else:  # year
-            # This Year: all months of current year
-            start_date = now.replace(month=1, day=1)
-            end_date = now.replace(month=12, day=calendar.monthrange(now.year, 12)[1])
-            all_months = [(now.year, m) for m in range(1, 13)]
-
-        chart_data = {
-            'labels': [],
-            'datasets': []
-        }
-
-        if category == 'loans':
-            if filter_type:
-                loans = Loan.objects.filter(
-                    loan_type__loan_type=filter_type,
-                    created_at__gte=start_date,
-                    created_at__lte=end_date
-                )
-            else:
-                loans = Loan.objects.filter(
-                    created_at__gte=start_date,
-                    created_at__lte=end_date
-                )
-
-            # Group by month/week/day based on period using Django's date functions
-            if period == 'month':
-                loans_data = loans.annotate(
-                    period=TruncDate('created_at')
-                ).values('period').annotate(
-                    total_amount=Sum('current_balance'),
-                    count=Count('id')
-                ).order_by('period')
-                # Map date to value
-                data_map = {item['period'].date() if hasattr(item['period'], 'date') else item['period']: float(item['total_amount'] or 0) for item in loans_data}
-                labels = [d.strftime('%b %d') for d in all_days]
-                data = [data_map.get(d.date() if hasattr(d, 'date') else d, 0) for d in all_days]
-            elif period == 'quarter':
-                loans_data = loans.annotate(
-                    period=TruncMonth('created_at')
-                ).values('period').annotate(
-                    total_amount=Sum('current_balance'),
-                    count=Count('id')
-                ).order_by('period')
-                # Map (year, month) to value
-                data_map = {(item['period'].year, item['period'].month): float(item['total_amount'] or 0) for item in loans_data}
-                labels = [datetime(y, m, 1).strftime('%b %Y') for (y, m) in all_months]
-                data = [data_map.get((y, m), 0) for (y, m) in all_months]
-            else:  # year
-                loans_data = loans.annotate(
-                    period=TruncMonth('created_at')
-                ).values('period').annotate(
-                    total_amount=Sum('current_balance'),
-                    count=Count('id')
-                ).order_by('period')
-                # Map (year, month) to value
-                data_map = {(item['period'].year, item['period'].month): float(item['total_amount'] or 0) for item in loans_data}
-                labels = [datetime(now.year, m, 1).strftime('%b') for (y, m) in all_months]
-                data = [data_map.get((now.year, m), 0) for (y, m) in all_months]
-
-            chart_data['labels'] = labels
-            chart_data['datasets'] = [{
-                'label': 'Total Loan Balance',
-                'data': data,
-                'borderColor': '#2563eb',
-                'backgroundColor': 'rgba(37, 99, 235, 0.1)',
-                'barBackgroundColor': '#2563eb',
-                'barBorderColor': '#2563eb',
-                'tension': 0.4,
-                'fill': True
-            }]
-
-        elif category == 'allowances':
-            if filter_type:
-                allowances = Allowance.objects.filter(
-                    allowance_type__allowance_type=filter_type,
-                    created_at__gte=start_date,
-                    created_at__lte=end_date
-                )
-            else:
-                allowances = Allowance.objects.filter(
-                    created_at__gte=start_date,
-                    created_at__lte=end_date
-                )
-
-            # Group by month/week/day based on period using Django's date functions
-            if period == 'month':
-                allowances_data = allowances.annotate(
-                    period=TruncDate('created_at')
-                ).values('period').annotate(
-                    total_amount=Sum('amount'),
-                    count=Count('id')
-                ).order_by('period')
-                data_map = {item['period'].date() if hasattr(item['period'], 'date') else item['period']: float(item['total_amount'] or 0) for item in allowances_data}
-                labels = [d.strftime('%b %d') for d in all_days]
-                data = [data_map.get(d.date() if hasattr(d, 'date') else d, 0) for d in all_days]
-            elif period == 'quarter':
-                allowances_data = allowances.annotate(
-                    period=TruncMonth('created_at')
-                ).values('period').annotate(
-                    total_amount=Sum('amount'),
-                    count=Count('id')
-                ).order_by('period')
-                data_map = {(item['period'].year, item['period'].month): float(item['total_amount'] or 0) for item in allowances_data}
-                labels = [datetime(y, m, 1).strftime('%b %Y') for (y, m) in all_months]
-                data = [data_map.get((y, m), 0) for (y, m) in all_months]
-            else:  # year
-                allowances_data = allowances.annotate(
-                    period=TruncMonth('created_at')
-                ).values('period').annotate(
-                    total_amount=Sum('amount'),
-                    count=Count('id')
-                ).order_by('period')
-                data_map = {(item['period'].year, item['period'].month): float(item['total_amount'] or 0) for item in allowances_data}
-                labels = [datetime(now.year, m, 1).strftime('%b') for (y, m) in all_months]
-                data = [data_map.get((now.year, m), 0) for (y, m) in all_months]
-
-            chart_data['labels'] = labels
-            chart_data['datasets'] = [{
-                'label': 'Total Allowance Amount',
-                'data': data,
-                'borderColor': '#22c55e',
-                'backgroundColor': 'rgba(34, 197, 94, 0.1)',
-                'barBackgroundColor': '#22c55e',
-                'barBorderColor': '#22c55e',
-                'tension': 0.4,
-                'fill': True
-            }]
+@require_GET
+def finance_metrics(request):
+    """Dashboard cards and the chart for a category/type/period, from the finance rollup"""
+    if not request.user.accounting_admin:
+        return JsonResponse({'success': False, 'message': 'Permission denied'})
 
-        return JsonResponse({
-            'success': True,
-            'chart_data': chart_data
-        })
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return JsonResponse({'success': False, 'error': str(e)})
+    return JsonResponse({
+        'success': True,
+        'cards': get_dashboard_cards(),
+        'chart_data': get_chart_data(
+            request.GET.get('category', ''), request.GET.get('type', ''), request.GET.get('period', 'month')
+        ),
+    })
 
 @login_required(login_url="user-login")
 def filter_options(request):
@@ -2446,39 +1698,11 @@ def employee_details(request, employee_id):
 
     try:
         employee = EmployeeLogin.objects.get(id=employee_id)
-        payslips = Payslip.objects.filter(employee=employee).order_by('-cutoff_date')[:5]
-        # Inline HTML for payslip list (no employee name or 'Payslips' title)
-        payslip_html = ''
-        if payslips:
-            payslip_html += '<div class="payslips-grid">'
-            for payslip in payslips:
-                payslip_html += f'''
-                <div class="payslip-card">
-                    <div class="card-header">
-                        <h4>{payslip.cutoff_date.strftime('%b %d')} - {payslip.cutoff_date.strftime('%b %d, %Y')}</h4>
-                        <span class="payslip-type-badge {payslip.employee_type}">{payslip.get_employee_type_display()}</span>
-                    </div>
-                    <div class="card-body">
-                        <div class="payslip-details">
-                            <div class="detail-row">
-                                <span class="label">Period:</span>
-                                <span class="value">{payslip.cutoff_date.strftime('%Y-%m-%d')} to {payslip.cutoff_date.strftime('%Y-%m-%d')}</span>
-                            </div>
-                            <div class="detail-row">
-                                <span class="label">Amount:</span>
-                                <span class="value highlight">₱{payslip.amount:.2f}</span>
-                            </div>
-                            <div class="detail-row">
-                                <span class="label">Uploaded:</span>
-                                <span class="value">{payslip.date_uploaded.strftime('%b %d, %Y')}</span>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                '''
-            payslip_html += '</div>'
-        else:
-            payslip_html += ''
+        summary = get_finance_summary(employee.pk)
+        # The five latest payslips (no employee name or 'Payslips' title)
+        payslip_html = render_to_string('finance/partials/employee_payslip_cards.html', {
+            'payslips': summary.latest_payslips,
+        })
         return JsonResponse({
             'success': True,
             'employee': {
@@ -2487,7 +1711,10 @@ def employee_details(request, employee_id):
                 'idnumber': employee.idnumber,
                 'email': employee.email,
             },
-            'html': payslip_html
+            'html': payslip_html,
+            'total_active_loan_balance': str(summary.total_active_loan_balance),
+            'total_allowances': str(summary.total_allowances),
+            'total_savings': str(summary.total_savings),
         })
     except EmployeeLogin.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Employee not found'})
@@ -2543,7 +1770,7 @@ def loan_deductions_list(request, loan_id):
         # Only allow if user can view this employee's finance
         user = request.user
         deductions = LoanDeduction.objects.filter(loan=loan).order_by('-created_at')
-        total_deduction = deductions.aggregate(total=models.Sum('amount'))['total'] or 0
+        total_deduction = loan.total_deducted
         html = render_to_string('finance/partials/loan_deductions_list.html', {
             'deductions': deductions,
             'total_deduction': total_deduction,
@@ -2566,100 +1793,47 @@ def export_finance_report(request):
     else:
         return HttpResponseBadRequest('Invalid export type')
     
+LOAN_EXPORT_STYLES = {
+    'loan_title': {'font': Font(bold=True, size=14), 'alignment': CENTER},
+    'loan_subtitle': {'font': Font(bold=True, size=12), 'alignment': CENTER},
+    'loan_header': {'font': Font(bold=True, color='000000'), 'fill': PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid'), 'border': THIN_BORDER, 'alignment': CENTER},
+}
+
 # Export Employee Total Loans Report (Excel)
 @login_required(login_url="user-login")
 @user_passes_test(lambda u: u.is_superuser or u.accounting_admin or u.hr_admin)
 def export_employee_total_loans(request):
-    # Only export loans with nonzero balance
+    # Only export loans with nonzero balance; deduction totals come from the loan ledger
     loans = Loan.objects.filter(current_balance__gt=0).select_related('employee', 'loan_type')
-    data = []
-    for loan in loans:
-        deductions = loan.deductions.aggregate(total=models.Sum('amount'))['total'] or 0
-        remaining_balance = loan.principal_amount - deductions
-        data.append({
-            'idnumber': loan.employee.idnumber or '',
-            'name': f"{loan.employee.firstname or ''} {loan.employee.lastname or ''}".strip(),
-            'loan_type': loan.loan_type.loan_type,
-            'monthly_deduction': loan.monthly_deduction,
-            'principal_amount': loan.principal_amount,
-            'total_deduction': deductions,
-            'remaining_balance': remaining_balance,
-        })
-
-    from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Employee Total Loans"
+    workbook = ExportWorkbook(styles=LOAN_EXPORT_STYLES)
+    ws = workbook.create_sheet("Employee Total Loans", widths=[14, 30, 22, 20, 20, 18, 20])
 
     # Title and subtitle
-    ws.merge_cells('A1:G1')
-    ws['A1'] = "RYONAN ELECTRIC PHILIPPINES CORPORATION"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-
-    ws.merge_cells('A2:G2')
-    ws['A2'] = "Employee Loan Balances"
-    ws['A2'].font = Font(bold=True, size=12)
-    ws['A2'].alignment = Alignment(horizontal='center', vertical='center')
-
-    # Empty row (row 3)
+    ws.title("RYONAN ELECTRIC PHILIPPINES CORPORATION", style='loan_title', span=7)
+    ws.title("Employee Loan Balances", style='loan_subtitle', span=7)
+    ws.blank()
 
     # Header row (row 4)
     headers = [
         'Id Number', 'Name', 'Loan Type', 'Monthly Deduction', 'Principal Balance', 'Total Deduction', 'Remaining Balance'
     ]
-    ws.append(['']*7)  # row 3 blank
-    ws.append(headers)  # row 4
-
-    # Style header row
-    header_font = Font(bold=True, color='000000')
-    header_fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')  # Yellow
-    border = Border(
-        left=Side(border_style='thin'),
-        right=Side(border_style='thin'),
-        top=Side(border_style='thin'),
-        bottom=Side(border_style='thin')
-    )
-    for col_num in range(1, 8):
-        cell = ws.cell(row=4, column=col_num)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = border
-        cell.alignment = Alignment(horizontal='center', vertical='center')
+    ws.append(headers, style='loan_header')
 
     # Data rows (start at row 5)
-    for i, row in enumerate(data, start=5):
+    for loan in iterate(loans):
+        deductions = loan.total_deducted
         ws.append([
-            row['idnumber'],
-            row['name'],
-            row['loan_type'],
-            float(row['monthly_deduction']),
-            float(row['principal_amount']),
-            float(row['total_deduction']),
-            float(row['remaining_balance']),
-        ])
-        for col_num in range(1, 8):
-            cell = ws.cell(row=i, column=col_num)
-            cell.border = border
-
-    # Auto-width columns
-    for col in ws.columns:
-        max_length = 0
-        col_letter = get_column_letter(col[0].column)
-        for cell in col:
-            try:
-                if cell.value and len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        ws.column_dimensions[col_letter].width = max_length + 2
+            loan.employee.idnumber or '',
+            f"{loan.employee.firstname or ''} {loan.employee.lastname or ''}".strip(),
+            loan.loan_type.loan_type,
+            float(loan.monthly_deduction),
+            float(loan.principal_amount),
+            float(deductions),
+            float(loan.principal_amount - deductions),
+        ], style='cell')
 
-    # Prepare response
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=employee_total_loans.xlsx'
-    wb.save(response)
-    return response
+    return workbook.response('employee_total_loans.xlsx')
 
 # Export Employee Savings Report (Excel)
 @login_required(login_url="user-login")
@@ -2979,163 +2153,145 @@ def savings_upload(request):
         form = SavingsUploadForm(request.POST, request.FILES)
         if form.is_valid():
             excel_file = request.FILES['file']
+            job = enqueue_job('finance.savings_upload', request.user, files=[excel_file], total=1)
+            return job_queued_response(job)
+        else:
+            return JsonResponse({
+                'success': False,
+                'message': 'Please select a valid Excel file.'
+            })
+    
+    return JsonResponse({
+        'success': False,
+        'message': 'Invalid request method.'
+    })
+
+def process_savings_excel(excel_file):
+    try:
+        # Read Excel file
+        wb = openpyxl.load_workbook(excel_file)
+        
+        # Look for "Savings Template" sheet specifically
+        sheet_name = None
+        if 'Savings Template' in wb.sheetnames:
+            sheet_name = 'Savings Template'
+        elif 'Sheet1' in wb.sheetnames:  # Fallback to Sheet1
+            sheet_name = 'Sheet1'
+        else:
+            # Use the first sheet if neither exists
+            sheet_name = wb.sheetnames[0]
+        
+        ws = wb[sheet_name]
+        
+        success_count = 0
+        error_count = 0
+        errors = []
+        error_rows = []  # Store rows with errors for download
+        
+        # Skip header row, start from row 2
+        for row_num in range(2, ws.max_row + 1):
+            id_number = ws.cell(row=row_num, column=1).value  # Column A: Id Number
+            name = ws.cell(row=row_num, column=2).value       # Column B: Name (for reference only)
+            savings_amount = ws.cell(row=row_num, column=3).value  # Column C: Savings
+            savings_type_name = ws.cell(row=row_num, column=4).value  # Column D: Savings Type
+            
+            # Skip empty rows
+            if not id_number or not savings_amount:
+                continue
             
             try:
-                # Read Excel file
-                wb = openpyxl.load_workbook(excel_file)
+                # Find employee by ID number
+                employee = EmployeeLogin.objects.get(idnumber=str(id_number).strip())
                 
-                # Look for "Savings Template" sheet specifically
-                sheet_name = None
-                if 'Savings Template' in wb.sheetnames:
-                    sheet_name = 'Savings Template'
-                elif 'Sheet1' in wb.sheetnames:  # Fallback to Sheet1
-                    sheet_name = 'Sheet1'
-                else:
-                    # Use the first sheet if neither exists
-                    sheet_name = wb.sheetnames[0]
-                
-                ws = wb[sheet_name]
+                # Convert amount to Decimal
+                original_savings_amount = savings_amount
+                savings_amount = Decimal(str(savings_amount))
                 
-                success_count = 0
-                error_count = 0
-                errors = []
-                error_rows = []  # Store rows with errors for download
+                if savings_amount <= 0:
+                    error_count += 1
+                    remark = "Savings amount must be greater than 0"
+                    errors.append(f"Row {row_num}: {remark}.")
+                    error_rows.append([id_number, name, original_savings_amount, savings_type_name, remark])
+                    continue
                 
-                # Skip header row, start from row 2
-                for row_num in range(2, ws.max_row + 1):
-                    id_number = ws.cell(row=row_num, column=1).value  # Column A: Id Number
-                    name = ws.cell(row=row_num, column=2).value       # Column B: Name (for reference only)
-                    savings_amount = ws.cell(row=row_num, column=3).value  # Column C: Savings
-                    savings_type_name = ws.cell(row=row_num, column=4).value  # Column D: Savings Type
-                    
-                    # Skip empty rows
-                    if not id_number or not savings_amount:
-                        continue
-                    
+                # Find savings type if provided
+                savings_type = None
+                if savings_type_name:
+                    original_savings_type_name = savings_type_name
+                    savings_type_name = str(savings_type_name).strip()
                     try:
-                        # Find employee by ID number
-                        employee = EmployeeLogin.objects.get(idnumber=str(id_number).strip())
-                        
-                        # Convert amount to Decimal
-                        original_savings_amount = savings_amount
-                        savings_amount = Decimal(str(savings_amount))
-                        
-                        if savings_amount <= 0:
-                            error_count += 1
-                            remark = "Savings amount must be greater than 0"
-                            errors.append(f"Row {row_num}: {remark}.")
-                            error_rows.append([id_number, name, original_savings_amount, savings_type_name, remark])
-                            continue
-                        
-                        # Find savings type if provided
-                        savings_type = None
-                        if savings_type_name:
-                            original_savings_type_name = savings_type_name
-                            savings_type_name = str(savings_type_name).strip()
-                            try:
-                                savings_type = SavingsType.objects.get(savings_type=savings_type_name)
-                            except SavingsType.DoesNotExist:
-                                error_count += 1
-                                remark = f"Savings type '{savings_type_name}' not found"
-                                errors.append(f"Row {row_num}: {remark}.")
-                                error_rows.append([id_number, name, original_savings_amount, original_savings_type_name, remark])
-                                continue
-                        
-                        # Try to find existing non-withdrawn savings for this employee with the same savings type
-                        existing_savings = Savings.objects.filter(
-                            employee=employee,
-                            savings_type=savings_type,
-                            is_withdrawn=False
-                        ).first()
-                        
-                        if existing_savings:
-                            # Add to existing non-withdrawn savings of the same type
-                            existing_savings.amount += savings_amount
-                            existing_savings.save()
-                        else:
-                            # Create new savings record since no non-withdrawn savings of this type exist
-                            Savings.objects.create(
-                                employee=employee,
-                                savings_type=savings_type,
-                                amount=savings_amount,
-                                deposit_date=timezone.now().date(),
-                                is_withdrawn=False
-                            )
-                        
-                        success_count += 1
-                        
-                    except EmployeeLogin.DoesNotExist:
+                        savings_type = SavingsType.objects.get(savings_type=savings_type_name)
+                    except SavingsType.DoesNotExist:
                         error_count += 1
-                        remark = f"Employee with ID '{id_number}' not found"
+                        remark = f"Savings type '{savings_type_name}' not found"
                         errors.append(f"Row {row_num}: {remark}.")
-                        error_rows.append([id_number, name, savings_amount, savings_type_name, remark])
-                    except (ValueError, TypeError) as e:
-                        error_count += 1
-                        remark = f"Invalid savings amount '{savings_amount}': {str(e)}"
-                        errors.append(f"Row {row_num}: {remark}")
-                        error_rows.append([id_number, name, savings_amount, savings_type_name, remark])
-                    except Exception as e:
-                        error_count += 1
-                        remark = str(e)
-                        errors.append(f"Row {row_num}: {remark}")
-                        error_rows.append([id_number, name, savings_amount, savings_type_name, remark])
+                        error_rows.append([id_number, name, original_savings_amount, original_savings_type_name, remark])
+                        continue
                 
-                # Prepare response message
-                if success_count > 0 and error_count == 0:
-                    messages.success(request, f'Successfully imported {success_count} savings records.')
-                elif success_count > 0 and error_count > 0:
-                    messages.warning(request, f'Imported {success_count} records successfully. {error_count} records failed.')
-                    for error in errors[:5]:  # Show first 5 errors
-                        messages.error(request, error)
-                else:
-                    messages.error(request, 'No records were imported.')
-                    for error in errors[:5]:  # Show first 5 errors
-                        messages.error(request, error)
+                # Try to find existing non-withdrawn savings for this employee with the same savings type
+                existing_savings = Savings.objects.filter(
+                    employee=employee,
+                    savings_type=savings_type,
+                    is_withdrawn=False
+                ).first()
                 
-                # Create notification for successful upload
-                if success_count > 0:
-                    Notification.objects.create(
-                        title="Savings Upload",
-                        message=f"New savings has been successfully uploaded.",
-                        sender=request.user,
-                        recipient=request.user,
-                        module="finance",
-                        for_all=True
+                if existing_savings:
+                    # Add to existing non-withdrawn savings of the same type
+                    existing_savings.amount += savings_amount
+                    existing_savings.save()
+                else:
+                    # Create new savings record since no non-withdrawn savings of this type exist
+                    Savings.objects.create(
+                        employee=employee,
+                        savings_type=savings_type,
+                        amount=savings_amount,
+                        deposit_date=timezone.now().date(),
+                        is_withdrawn=False
                     )
                 
-                # Return response with error_rows if there are errors
-                if error_count > 0:
-                    return JsonResponse({
-                        'success': False,
-                        'message': f'Processed {success_count + error_count} records. {success_count} successful, {error_count} failed.',
-                        'success_count': success_count,
-                        'error_count': error_count,
-                        'errors': errors,
-                        'error_rows': error_rows,
-                        'redirect_url': '/finance/admin/'
-                    })
-                
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Processed {success_count + error_count} records. {success_count} successful, {error_count} failed.',
-                    'redirect_url': '/finance/admin/'
-                })
+                success_count += 1
                 
+            except EmployeeLogin.DoesNotExist:
+                error_count += 1
+                remark = f"Employee with ID '{id_number}' not found"
+                errors.append(f"Row {row_num}: {remark}.")
+                error_rows.append([id_number, name, savings_amount, savings_type_name, remark])
+            except (ValueError, TypeError) as e:
+                error_count += 1
+                remark = f"Invalid savings amount '{savings_amount}': {str(e)}"
+                errors.append(f"Row {row_num}: {remark}")
+                error_rows.append([id_number, name, savings_amount, savings_type_name, remark])
             except Exception as e:
-                return JsonResponse({
-                    'success': False,
-                    'message': f'Error processing file: {str(e)}'
-                })
-        else:
-            return JsonResponse({
+                error_count += 1
+                remark = str(e)
+                errors.append(f"Row {row_num}: {remark}")
+                error_rows.append([id_number, name, savings_amount, savings_type_name, remark])
+        
+        # Return response with error_rows if there are errors
+        if error_count > 0:
+            return {
                 'success': False,
-                'message': 'Please select a valid Excel file.'
-            })
-    
-    return JsonResponse({
-        'success': False,
-        'message': 'Invalid request method.'
-    })
+                'message': f'Processed {success_count + error_count} records. {success_count} successful, {error_count} failed.',
+                'success_count': success_count,
+                'error_count': error_count,
+                'errors': errors,
+                'error_rows': error_rows,
+                'redirect_url': '/finance/admin/'
+            }
+        
+        return {
+            'success': True,
+            'message': f'Processed {success_count + error_count} records. {success_count} successful, {error_count} failed.',
+            'success_count': success_count,
+            'error_count': error_count,
+            'redirect_url': '/finance/admin/'
+        }
+        
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f'Error processing file: {str(e)}'
+        }
 
 @login_required(login_url="user-login")
 @require_POST
@@ -3216,7 +2372,7 @@ Finance Department
         filename = f"OJT_Payslip_{request.user.idnumber}_{payslip.cut_off.replace('/', '_')}.pdf"
         email_msg.attach(filename, pdf_content, 'application/pdf')
         
-        email_msg.send()
+        enqueue_email(email_msg, source='finance.ojt_payslip')
         
         return JsonResponse({
             'success': True,
@@ -3229,211 +2385,5 @@ Finance Department
         return JsonResponse({'success': False, 'message': f'Error sending email: {str(e)}'})
 
 def generate_ojt_payslip_pdf(payslip):
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-    
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Company header exactly like modal
-    logo_path = os.path.join(settings.STATIC_ROOT or settings.STATICFILES_DIRS[0], 'images', 'icon', 'ryonanlogo.png')
-    
-    try:
-        if os.path.exists(logo_path):
-            logo = Image(logo_path, width=0.8*inch, height=0.8*inch)
-            
-            # Create header with logo on left and centered text
-            company_info = Paragraph("""
-                <para align=center>
-                <b>RYONAN ELECTRIC PHILIPPINES CORPORATION</b><br/>
-                105 East Main Avenue, Special Export Processing Zone<br/>
-                Laguna, Technopark, Biñan, Laguna
-                </para>
-            """, ParagraphStyle('CompanyInfo', fontSize=12, fontName='Helvetica', alignment=TA_CENTER))
-            
-            header_data = [[logo, company_info]]
-            header_table = Table(header_data, colWidths=[1*inch, 5*inch])
-            header_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-                ('ALIGN', (1, 0), (1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                ('TOPPADDING', (0, 0), (-1, -1), 0),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-            ]))
-        else:
-            # Fallback without logo - center everything
-            company_info = Paragraph("""
-                <para align=center>
-                <b>RYONAN ELECTRIC PHILIPPINES CORPORATION</b><br/>
-                105 East Main Avenue, Special Export Processing Zone<br/>
-                Laguna, Technopark, Biñan, Laguna
-                </para>
-            """, ParagraphStyle('CompanyInfo', fontSize=12, fontName='Helvetica', alignment=TA_CENTER))
-            
-            header_table = Table([[company_info]], colWidths=[6*inch])
-            header_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-    except:
-        # Fallback without logo - center everything
-        company_info = Paragraph("""
-            <para align=center>
-            <b>RYONAN ELECTRIC PHILIPPINES CORPORATION</b><br/>
-            105 East Main Avenue, Special Export Processing Zone<br/>
-            Laguna, Technopark, Biñan, Laguna
-            </para>
-        """, ParagraphStyle('CompanyInfo', fontSize=12, fontName='Helvetica', alignment=TA_CENTER))
-        
-        header_table = Table([[company_info]], colWidths=[6*inch])
-        header_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-    
-    elements.append(header_table)
-    elements.append(Spacer(1, 20))
-    
-    # Employee info grid (2x2) exactly like modal
-    try:
-        if hasattr(payslip.employee, 'employment_info') and payslip.employee.employment_info:
-            if hasattr(payslip.employee.employment_info, 'line') and payslip.employee.employment_info.line:
-                line_name = payslip.employee.employment_info.line.line_name
-            else:
-                line_name = '-'
-        else:
-            line_name = '-'
-    except Exception:
-        line_name = '-'
-    
-    employee_data = [
-        ['ID Number:', payslip.employee.idnumber or '-', 'Cut-Off:', payslip.cut_off],
-        ['Name:', f"{payslip.employee.firstname} {payslip.employee.lastname}", 'Line:', line_name]
-    ]
-    
-    employee_table = Table(employee_data, colWidths=[1.2*inch, 2.3*inch, 1.2*inch, 2.3*inch])
-    employee_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    
-    elements.append(employee_table)
-    elements.append(Spacer(1, 20))
-    
-    # Payslip sections exactly like modal - no peso signs
-    regular_day_data = [
-        ['Regular Day', ''],
-        ['REGULAR # of Days Work', f"{payslip.regular_day}"],
-        ['ALLOWANCE/DAY', f"{float(payslip.allowance_day):,.2f}"],
-        ['Total:', f"{float(payslip.regular_day) * float(payslip.allowance_day):,.2f}"],
-        ['REG ND ALLOWANCE', f"{float(payslip.nd_allowance):,.2f}"],
-        ['GRAND TOTAL', f"{float(payslip.grand_total):,.2f}"],
-        ['BASIC ALLOW.SCHOOL SHARE', f"{float(payslip.basic_school_share):,.2f}"],
-        ['BASIC ALLOW. OJT SHARE', f"{float(payslip.basic_ojt_share):,.2f}"],
-        ['DEDUCTION', f"{float(payslip.deduction):,.2f}"],
-        ['NET BASIC ALLOW. OJT SHARE', f"{float(payslip.net_ojt_share):,.2f}"],
-    ]
-    
-    allowances_data = [
-        ['Allowances', ''],
-        ['RICE ALLOWANCE', f"{float(payslip.rice_allowance):,.2f}"],
-        ['Reg OT ALLOWANCE', f"{float(payslip.ot_allowance):,.2f}"],
-        ['REG ND OT ALLOWANCE', f"{float(payslip.nd_ot_allowance):,.2f}"],
-        ['SPECIAL HOLIDAY', f"{float(payslip.special_holiday):,.2f}"],
-        ['LEGAL HOLIDAY', f"{float(payslip.legal_holiday):,.2f}"],
-        ['SAT-OFF ALLOWANCE', f"{float(payslip.satoff_allowance):,.2f}"],
-        ['RD OT', f"{float(payslip.rd_ot):,.2f}"],
-        ['PERFECT ATTENDANCE', f"{float(payslip.perfect_attendance):,.2f}"],
-        ['ADJUSTMENT', f"{float(payslip.adjustment):,.2f}"],
-        ['DEDUCTION 2', f"{float(payslip.deduction_2):,.2f}"],
-        ['NET OJT OT PAY ALLOWANCE', f"{float(payslip.ot_pay_allowance):,.2f}"],
-    ]
-    
-    # Create side-by-side tables exactly like modal
-    sections_data = []
-    max_rows = max(len(regular_day_data), len(allowances_data))
-    
-    for i in range(max_rows):
-        row = []
-        if i < len(regular_day_data):
-            row.extend(regular_day_data[i])
-        else:
-            row.extend(['', ''])
-        
-        row.append('')  # Spacer column
-        
-        if i < len(allowances_data):
-            row.extend(allowances_data[i])
-        else:
-            row.extend(['', ''])
-        
-        sections_data.append(row)
-    
-    sections_table = Table(sections_data, colWidths=[2.3*inch, 1.2*inch, 0.2*inch, 2.3*inch, 1.2*inch])
-    sections_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (1, -1), 0.5, colors.black),
-        ('GRID', (3, 0), (4, -1), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),   # Labels left-aligned
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),  # Values right-aligned
-        ('ALIGN', (3, 0), (3, -1), 'LEFT'),   # Labels left-aligned
-        ('ALIGN', (4, 0), (4, -1), 'RIGHT'),  # Values right-aligned
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        
-        # Header rows styling exactly like modal
-        ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (3, 0), (4, 0), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-        ('BACKGROUND', (3, 0), (4, 0), colors.lightgrey),
-        
-        # Highlight NET BASIC ALLOW. OJT SHARE and NET OJT OT PAY ALLOWANCE like modal
-        ('FONTNAME', (0, 9), (1, 9), 'Helvetica-Bold'),  # NET BASIC ALLOW. OJT SHARE
-        ('BACKGROUND', (0, 9), (1, 9), colors.lightyellow),
-        ('FONTNAME', (3, 11), (4, 11), 'Helvetica-Bold'),  # NET OJT OT PAY ALLOWANCE
-        ('BACKGROUND', (3, 11), (4, 11), colors.lightyellow),
-    ]))
-    
-    elements.append(sections_table)
-    elements.append(Spacer(1, 20))
-    
-    # Total allowance - Right aligned without table, like image 1
-    net_basic_ojt_share = float(payslip.net_ojt_share) if payslip.net_ojt_share else 0.0
-    net_ojt_ot_pay_allowance = float(payslip.ot_pay_allowance) if payslip.ot_pay_allowance else 0.0
-    total_allowance_value = net_basic_ojt_share + net_ojt_ot_pay_allowance
-    
-    # Create right-aligned total allowance paragraph
-    total_allowance_style = ParagraphStyle(
-        'TotalAllowance',
-        fontSize=16,
-        fontName='Helvetica-Bold',
-        alignment=TA_RIGHT,
-        spaceBefore=10,
-        spaceAfter=10
-    )
-    
-    total_allowance_text = f"TOTAL ALLOWANCE: {total_allowance_value:,.2f}"
-    total_allowance_para = Paragraph(total_allowance_text, total_allowance_style)
-    
-    elements.append(total_allowance_para)
-    
-    # Build PDF
-    doc.build(elements)
-    
-    pdf_content = buffer.getvalue()
-    buffer.close()
-    
-    return pdf_content
+    # Served from the render cache unless the payslip changed since the last render
+    return get_ojt_payslip_pdf(payslip)
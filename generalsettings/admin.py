@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Line, Department, Position
+from .models import Line, Department, Position, Sequence
 
 @admin.register(Line)
 class LineAdmin(admin.ModelAdmin):
@@ -20,3 +20,9 @@ class DepartmentAdmin(admin.ModelAdmin):
     get_lines.short_description = 'Lines'
 
 admin.site.register(Position)
+
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_value')
+    search_fields = ('name',)
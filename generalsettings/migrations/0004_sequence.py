@@ -0,0 +1,25 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generalsettings', '0003_position_is_line_leader'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequence',
+                'verbose_name_plural': 'Sequences',
+            },
+        ),
+    ]
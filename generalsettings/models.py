@@ -38,3 +38,16 @@ class Position(models.Model):
 
     def __str__(self):
         return self.position
+
+
+class Sequence(models.Model):
+    """Last number handed out for a control-number series (see generalsettings.sequences)"""
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Sequence"
+        verbose_name_plural = "Sequences"
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
@@ -0,0 +1,36 @@
+"""
+Control-number sequences shared by leave requests, PRFs and tickets.
+
+Each series is one row in the Sequence table. Taking a number is a single
+``UPDATE ... SET last_value = last_value + 1`` on that row followed by a read
+inside the same transaction, so concurrent submissions queue on the row lock
+and never receive the same number, and nothing has to sort the source table.
+
+The first time a series is used its row is created from ``seed``: a callable
+returning the last number already issued (e.g. read from existing records),
+so numbering continues from data created before the sequence existed.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, F, Max
+from django.db.models.functions import Cast
+from .models import Sequence
+
+
+def next_value(name, seed=None):
+    """Atomically take the next number of the ``name`` series"""
+    with transaction.atomic():
+        if not Sequence.objects.filter(name=name).update(last_value=F('last_value') + 1):
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, last_value=(seed() if seed else 0) + 1)
+            except IntegrityError:
+                # Another request created the series first; take the next number after theirs
+                Sequence.objects.filter(name=name).update(last_value=F('last_value') + 1)
+        return Sequence.objects.filter(name=name).values_list('last_value', flat=True).get()
+
+
+def max_numeric(queryset, field):
+    """Largest all-digit value of a CharField as an int (None if there is none), for seeds"""
+    return queryset.filter(**{f'{field}__regex': r'^[0-9]+$'}).aggregate(
+        value=Max(Cast(field, BigIntegerField()))
+    )['value']
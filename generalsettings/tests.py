@@ -1,3 +1,41 @@
+from datetime import date
 from django.test import TestCase
 
-# Create your tests here.
+from leaverequest.models import LeaveRequest, LeaveType
+from ticketing.models import Ticket
+from userlogin.models import EmployeeLogin
+from .models import Sequence
+from .sequences import next_value
+
+class SequenceTest(TestCase):
+    def setUp(self):
+        self.employee = EmployeeLogin.objects.create(idnumber='50000', username='numbered')
+
+    def test_new_series_starts_after_seed_and_increments(self):
+        self.assertEqual(next_value('plain'), 1)
+        self.assertEqual(next_value('plain'), 2)
+        self.assertEqual(next_value('seeded', seed=lambda: 41), 42)
+        # The seed is only read when the series is created
+        self.assertEqual(next_value('seeded', seed=lambda: 0), 43)
+
+    def test_leave_numbers_continue_from_existing_requests(self):
+        leave_type = LeaveType.objects.create(name='Vacation', code='VL')
+        def leave(control_number=''):
+            return LeaveRequest.objects.create(
+                control_number=control_number, employee=self.employee, leave_type=leave_type,
+                date_from=date(2026, 1, 5), date_to=date(2026, 1, 5), days_requested=1, reason='x'
+            )
+        # 999 sorts after 1005 as a string; the seed compares numerically
+        leave('1005')
+        leave('999')
+        leave('BENCH1')
+
+        self.assertEqual([leave().control_number, leave().control_number], ['1006', '1007'])
+        self.assertEqual(Sequence.objects.get(name='leave_request').last_value, 1007)
+
+    def test_ticket_numbers_are_per_day(self):
+        first = Ticket.objects.create(requestor=self.employee, requestor_name='Numbered', problem_details='x')
+        second = Ticket.objects.create(requestor=self.employee, requestor_name='Numbered', problem_details='x')
+
+        self.assertRegex(first.ticket_number, r'^TKT\d{8}0001$')
+        self.assertEqual(second.ticket_number, first.ticket_number[:-4] + '0002')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LeaverequestConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'leaverequest'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -18,6 +18,7 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from .models import LeaveRequest, LeaveType, LeaveBalance, LeaveReason
+from usercalendar.working_calendar import working_days_between
 
 class LeaveRequestForm(forms.ModelForm):
     leave_reason = forms.ModelChoiceField(
@@ -124,38 +125,7 @@ class LeaveRequestForm(forms.ModelForm):
     
     def calculate_working_days_for_validation(self, start_date, end_date):
         """Calculate working days for validation purposes"""
-        from usercalendar.models import Holiday
-        from .models import SundayException
-        from datetime import timedelta
-        
-        working_days = 0
-        current_date = start_date
-        
-        # Get holidays and Sunday exceptions
-        holidays = set(Holiday.objects.filter(
-            date__range=[start_date, end_date]
-        ).values_list('date', flat=True))
-        
-        sunday_exceptions = set(SundayException.objects.filter(
-            date__range=[start_date, end_date]
-        ).values_list('date', flat=True))
-        
-        while current_date <= end_date:
-            # Check if it's a holiday
-            is_holiday = current_date in holidays
-            
-            # Check if it's Sunday and if it's exempted
-            is_sunday = current_date.weekday() == 6  # Monday=0, Sunday=6
-            is_sunday_exempted = current_date in sunday_exceptions
-            
-            # Count the day if it's not a holiday and either not Sunday or is an exempted Sunday
-            if not is_holiday and (not is_sunday or is_sunday_exempted):
-                working_days += 1
-            
-            # Move to next day
-            current_date += timedelta(days=1)
-        
-        return working_days  # Allow 0 working days
+        return working_days_between(start_date, end_date)  # Allow 0 working days
 
 class LeaveApprovalForm(forms.Form):
     ACTION_CHOICES = [
@@ -0,0 +1,122 @@
+"""
+Approver inbox for leave requests.
+
+An approver sees their routing actions first, newest first, followed by the
+actions they already decided. Pages are fetched with keyset (cursor)
+pagination over the (approver, status, created_at) index: a cursor names the
+row a page starts after (or ends before), so every page is one LIMIT query per
+section whether it is the first page or the five hundredth, and no COUNT(*) of
+the whole history is run. Searches match the lowercase LeaveRequest.search_text
+column instead of an OR of icontains across five joined tables.
+"""
+import base64
+from datetime import datetime
+from django.db.models import Q
+from .models import LeaveApprovalAction, LeaveRequest
+
+INBOX_PAGE_SIZE = 10
+# Routing actions are listed before the ones the approver already decided
+INBOX_SECTIONS = [
+    ('routing', Q(status='routing')),
+    ('decided', Q(status__in=['approved', 'disapproved'])),
+]
+SEARCH_TEXT_BATCH_SIZE = 500
+
+
+def get_inbox_actions(user, search=''):
+    actions = LeaveApprovalAction.objects.filter(approver=user).exclude(
+        Q(status='cancelled') | Q(comments='Updated my leave request')
+    )
+    search = search.strip().lower()
+    if search:
+        actions = actions.filter(leave_request__search_text__contains=search)
+    return actions
+
+
+def encode_cursor(section, action, index):
+    raw = f"{section}|{action.created_at.isoformat()}|{action.pk}|{index}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(section index, created_at, pk, row index) or None for a missing or malformed cursor"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        section, created_at, pk, index = raw.split('|')
+        sections = [name for name, _ in INBOX_SECTIONS]
+        return sections.index(section), datetime.fromisoformat(created_at), int(pk), int(index)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class InboxPage:
+    """One page of approval actions; iterates like a Paginator page"""
+
+    def __init__(self, actions, start, has_previous, has_next):
+        self.actions = actions
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.start_index = start + 1 if actions else 0
+        self.end_index = start + len(actions)
+        self.previous_cursor = encode_cursor(*actions[0], start) if actions and has_previous else None
+        self.next_cursor = encode_cursor(*actions[-1], self.end_index - 1) if actions and has_next else None
+
+    def __iter__(self):
+        return (action for _, action in self.actions)
+
+    def __len__(self):
+        return len(self.actions)
+
+
+def get_inbox_page(user, search='', after=None, before=None, page_size=INBOX_PAGE_SIZE):
+    """The page after the ``after`` cursor, before the ``before`` cursor, or the first page"""
+    position = decode_cursor(before or after)
+    backwards = bool(before) and position is not None
+    actions = get_inbox_actions(user, search).select_related(
+        'leave_request__employee', 'leave_request__leave_type', 'leave_request__leave_reason'
+    )
+
+    sections = list(enumerate(INBOX_SECTIONS))
+    if backwards:
+        sections.reverse()
+
+    rows = []
+    for section_index, (section, section_filter) in sections:
+        if position and (section_index > position[0] if backwards else section_index < position[0]):
+            continue
+        queryset = actions.filter(section_filter)
+        if position and section_index == position[0]:
+            _, created_at, pk, _ = position
+            if backwards:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        ordering = ['created_at', 'pk'] if backwards else ['-created_at', '-pk']
+        rows.extend((section, action) for action in queryset.order_by(*ordering)[:page_size + 1 - len(rows)])
+        if len(rows) > page_size:
+            break
+
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+        start = max(position[3] - len(rows), 0) if more else 0
+        return InboxPage(rows, start, has_previous=more, has_next=True)
+
+    start = position[3] + 1 if position else 0
+    return InboxPage(rows, start, has_previous=position is not None, has_next=more)
+
+
+def refresh_search_text(leave_requests):
+    """Recompute LeaveRequest.search_text after a name it is built from changed"""
+    changed = []
+    queryset = leave_requests.select_related('employee', 'leave_type', 'leave_reason').order_by()
+    for leave_request in queryset.iterator(chunk_size=SEARCH_TEXT_BATCH_SIZE):
+        search_text = leave_request.build_search_text()
+        if search_text != leave_request.search_text:
+            leave_request.search_text = search_text
+            changed.append(leave_request)
+    LeaveRequest.objects.bulk_update(changed, ['search_text'], batch_size=SEARCH_TEXT_BATCH_SIZE)
+    return len(changed)
@@ -0,0 +1,12 @@
+from backgroundjob.runner import register_job
+from .views import process_balance_import
+
+@register_job('leaverequest.import_balance')
+def import_balance_job(job):
+    uploaded_file = next(job.open_files())
+    try:
+        return process_balance_import(uploaded_file, delete_all=job.params.get('delete_all', False))
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+    finally:
+        uploaded_file.close()
@@ -0,0 +1,131 @@
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from empconnect.exports import ExportWorkbook
+from generalsettings.models import Department
+from leaverequest.models import LeaveReason, LeaveRequest, LeaveType
+from leaverequest.views import (
+    LEAVE_EXPORT_STYLES, create_overview_sheet, create_ranking_sheet, create_routing_sheet,
+    create_summary_sheet, get_fiscal_year, get_report_leave_requests,
+)
+from userlogin.models import EmployeeLogin
+from userprofile.models import EmploymentInformation
+
+BENCHMARK_PREFIX = 'BENCH'
+BENCHMARK_BATCH_SIZE = 5000
+BENCHMARK_STATUSES = ['routing', 'approved', 'disapproved', 'cancelled']
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the leave report export (query count and wall time per sheet) against generated '
+        'leave requests. The data is created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000, help='Leave requests to generate')
+        parser.add_argument('--reasons', type=int, default=40, help='Leave reasons to spread them over')
+        parser.add_argument('--employees', type=int, default=500, help='Employees to spread them over')
+        parser.add_argument('--departments', type=int, default=10, help='Departments to spread employees over')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        fiscal_year_start, fiscal_year_end = get_fiscal_year()
+        date_from, date_to = date(fiscal_year_start, 5, 1), date(fiscal_year_end, 4, 30)
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            self._generate(options, fiscal_year_start)
+            self.stdout.write(
+                f"Generated {options['requests']} leave requests over {options['reasons']} reasons "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+
+            leave_requests = get_report_leave_requests(date_from, date_to)
+            workbook = ExportWorkbook(styles=LEAVE_EXPORT_STYLES)
+            steps = [
+                ('Overview', lambda: create_overview_sheet(workbook, leave_requests, date_from, date_to)),
+                ('Leave Ranking', lambda: create_ranking_sheet(workbook, date_from, date_to)),
+                ('Leave Summary', lambda: create_summary_sheet(workbook, leave_requests, date_from, date_to)),
+                ('Routing Leave', lambda: create_routing_sheet(workbook, leave_requests, date_from, date_to)),
+                ('Save workbook', lambda: workbook.workbook.save(tempfile.TemporaryFile())),
+            ]
+
+            total_queries = 0
+            total_seconds = 0
+            for name, step in steps:
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    step()
+                    elapsed = time.perf_counter() - started
+                total_queries += len(queries)
+                total_seconds += elapsed
+                self.stdout.write(f"  {name:<15} {len(queries):>4} queries  {elapsed:8.2f}s")
+            self.stdout.write(f"  {'Total':<15} {total_queries:>4} queries  {total_seconds:8.2f}s")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Leave report benchmark finished; generated data rolled back'))
+
+    def _generate(self, options, fiscal_year_start):
+        rng = random.Random(options['seed'])
+
+        departments = Department.objects.bulk_create([
+            Department(department_name=f"{BENCHMARK_PREFIX} Department {index}")
+            for index in range(options['departments'])
+        ])
+        employees = EmployeeLogin.objects.bulk_create([
+            EmployeeLogin(
+                username=f"{BENCHMARK_PREFIX.lower()}{index}", idnumber=f"{BENCHMARK_PREFIX}{index}",
+                firstname='Bench', lastname=str(index),
+            )
+            for index in range(options['employees'])
+        ], batch_size=BENCHMARK_BATCH_SIZE)
+        EmploymentInformation.objects.bulk_create([
+            EmploymentInformation(user=employee, department=rng.choice(departments), employment_type='Regular')
+            for employee in employees
+        ], batch_size=BENCHMARK_BATCH_SIZE)
+
+        leave_types = LeaveType.objects.bulk_create([
+            LeaveType(name=f"{BENCHMARK_PREFIX} Leave {index}", code=f"{BENCHMARK_PREFIX[:2]}{index}")
+            for index in range(5)
+        ])
+        reasons = LeaveReason.objects.bulk_create([
+            LeaveReason(leave_type=leave_types[index % len(leave_types)], reason_text=f"{BENCHMARK_PREFIX} reason {index}")
+            for index in range(options['reasons'])
+        ])
+
+        fiscal_start = date(fiscal_year_start, 5, 1)
+        requests = []
+        for index in range(options['requests']):
+            reason = rng.choice(reasons)
+            start = fiscal_start + timedelta(days=rng.randrange(365))
+            requests.append(LeaveRequest(
+                control_number=f"{BENCHMARK_PREFIX}{index:08d}",
+                employee=rng.choice(employees),
+                leave_type=reason.leave_type,
+                leave_reason=reason,
+                date_from=start,
+                date_to=start + timedelta(days=rng.randrange(3)),
+                days_requested=1,
+                reason='Benchmark',
+                status=rng.choice(BENCHMARK_STATUSES),
+            ))
+        created = LeaveRequest.objects.bulk_create(requests, batch_size=BENCHMARK_BATCH_SIZE)
+
+        # bulk_create stamps date_prepared with now; spread the requests over the fiscal months instead
+        block_size = -(-len(created) // 12)
+        for month_offset in range(12):
+            block = created[month_offset * block_size:(month_offset + 1) * block_size]
+            if not block:
+                continue
+            year, month = divmod(4 + month_offset, 12)
+            prepared = timezone.make_aware(datetime(fiscal_year_start + year, month + 1, 15, 9))
+            LeaveRequest.objects.filter(
+                pk__range=(block[0].pk, block[-1].pk), control_number__startswith=BENCHMARK_PREFIX
+            ).update(date_prepared=prepared)
@@ -0,0 +1,21 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from leaverequest.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily leave statistics rollup from the leave requests (all dates, or a range).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options['date_from']) if options['date_from'] else None
+            date_to = date.fromisoformat(options['date_to']) if options['date_to'] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        rows = rebuild_daily_stats(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt leave statistics: {rows} rows written'))
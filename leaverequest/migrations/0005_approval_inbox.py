@@ -0,0 +1,49 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_search_text(apps, schema_editor):
+    # Mirrors LeaveRequest.build_search_text for the requests created before the column
+    LeaveRequest = apps.get_model('leaverequest', 'LeaveRequest')
+    batch = []
+    queryset = LeaveRequest.objects.select_related('employee', 'leave_type', 'leave_reason')
+    for leave_request in queryset.iterator(chunk_size=500):
+        values = [
+            leave_request.control_number,
+            leave_request.employee.firstname, leave_request.employee.lastname, leave_request.employee.idnumber,
+            leave_request.leave_type.name,
+            leave_request.leave_reason.reason_text if leave_request.leave_reason else None,
+        ]
+        leave_request.search_text = '\n'.join(value for value in values if value).lower()
+        batch.append(leave_request)
+        if len(batch) >= 500:
+            LeaveRequest.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    LeaveRequest.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaverequest', '0004_alter_leaveapprovalaction_action'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaverequest',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='leaveapprovalaction',
+            index=models.Index(fields=['approver', 'status', 'created_at'], name='leave_action_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaveapprovalaction',
+            index=models.Index(fields=['approver', 'created_at'], name='leave_action_history_idx'),
+        ),
+    ]
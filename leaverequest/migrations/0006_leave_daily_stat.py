@@ -0,0 +1,55 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    # Same grouping as leaverequest.stats.rebuild_daily_stats
+    LeaveRequest = apps.get_model('leaverequest', 'LeaveRequest')
+    LeaveDailyStat = apps.get_model('leaverequest', 'LeaveDailyStat')
+    grouped = LeaveRequest.objects.annotate(day=TruncDate('date_prepared')).order_by().values(
+        'day', 'leave_type_id', 'employee__employment_info__department_id', 'status'
+    ).annotate(request_count=Count('id'), days=Sum('days_requested'))
+    LeaveDailyStat.objects.bulk_create([
+        LeaveDailyStat(
+            date=row['day'],
+            leave_type_id=row['leave_type_id'],
+            department_id=row['employee__employment_info__department_id'],
+            status=row['status'],
+            request_count=row['request_count'],
+            days=row['days'] or 0,
+        )
+        for row in grouped
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generalsettings', '0004_sequence'),
+        ('leaverequest', '0005_approval_inbox'),
+        ('userprofile', '0005_remove_employmentinformation_innovator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('routing', 'Routing'), ('approved', 'Approved'), ('disapproved', 'Disapproved'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('request_count', models.IntegerField(default=0)),
+                ('days', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leave_daily_stats', to='generalsettings.department')),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='leaverequest.leavetype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'status'], name='leave_daily_stat_date_idx')],
+                'unique_together': {('date', 'leave_type', 'department', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
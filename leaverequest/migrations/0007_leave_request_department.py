@@ -0,0 +1,51 @@
+# Generated by Django 6.1.2 on 2026-10-18 02:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_departments(apps, schema_editor):
+    # Existing requests take the employee's current department, then the rollup is
+    # rebuilt from them with the same grouping as leaverequest.stats.rebuild_daily_stats
+    LeaveRequest = apps.get_model('leaverequest', 'LeaveRequest')
+    LeaveDailyStat = apps.get_model('leaverequest', 'LeaveDailyStat')
+    EmploymentInformation = apps.get_model('userprofile', 'EmploymentInformation')
+    LeaveRequest.objects.update(department_id=Subquery(
+        EmploymentInformation.objects.filter(user_id=OuterRef('employee_id')).values('department_id')[:1]
+    ))
+
+    grouped = LeaveRequest.objects.annotate(day=TruncDate('date_prepared')).order_by().values(
+        'day', 'leave_type_id', 'department_id', 'status'
+    ).annotate(request_count=Count('id'), days=Sum('days_requested'))
+    LeaveDailyStat.objects.all().delete()
+    LeaveDailyStat.objects.bulk_create([
+        LeaveDailyStat(
+            date=row['day'],
+            leave_type_id=row['leave_type_id'],
+            department_id=row['department_id'],
+            status=row['status'],
+            request_count=row['request_count'],
+            days=row['days'] or 0,
+        )
+        for row in grouped
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generalsettings', '0004_sequence'),
+        ('leaverequest', '0006_leave_daily_stat'),
+        ('userprofile', '0005_remove_employmentinformation_innovator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaverequest',
+            name='department',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leave_requests', to='generalsettings.department'),
+        ),
+        migrations.RunPython(backfill_departments, migrations.RunPython.noop),
+    ]
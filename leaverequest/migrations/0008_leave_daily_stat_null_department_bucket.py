@@ -0,0 +1,40 @@
+# Generated by Django 6.1.2 on 2026-10-18 02:42
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_null_department_buckets(apps, schema_editor):
+    """Fold the duplicate no-department buckets the old unique_together let through into one row each"""
+    LeaveDailyStat = apps.get_model('leaverequest', 'LeaveDailyStat')
+    duplicates = LeaveDailyStat.objects.filter(department__isnull=True).values('date', 'leave_type', 'status').annotate(
+        rows=Count('id'), total_count=Sum('request_count'), total_days=Sum('days')
+    ).filter(rows__gt=1)
+    for bucket in duplicates:
+        rows = LeaveDailyStat.objects.filter(
+            date=bucket['date'], leave_type=bucket['leave_type'], status=bucket['status'], department__isnull=True
+        ).order_by('pk')
+        kept = rows.first()
+        rows.exclude(pk=kept.pk).delete()
+        LeaveDailyStat.objects.filter(pk=kept.pk).update(request_count=bucket['total_count'], days=bucket['total_days'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generalsettings', '0004_sequence'),
+        ('leaverequest', '0007_leave_request_department'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_null_department_buckets, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='leavedailystat',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='leavedailystat',
+            constraint=models.UniqueConstraint(models.F('date'), models.F('leave_type'), django.db.models.functions.comparison.Coalesce('department', models.Value(0)), models.F('status'), name='leave_daily_stat_bucket'),
+        ),
+    ]
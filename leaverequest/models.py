@@ -1,9 +1,12 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import timedelta
 from userlogin.models import EmployeeLogin
-from usercalendar.models import Holiday
+from userprofile.models import EmploymentInformation
+from usercalendar.working_calendar import working_days_between
+from generalsettings.sequences import max_numeric, next_value
 
 class SundayException(models.Model):
     date = models.DateField(unique=True)
@@ -61,17 +64,18 @@ class LeaveBalance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    @staticmethod
+    def get_validity_status(valid_from, valid_to, today=None):
+        now = today or timezone.now().date()
+        if now > valid_to:
+            return 'for_conversion'
+        elif now >= valid_from and now <= valid_to:
+            return 'active'
+        return 'expired'
+
     def save(self, *args, **kwargs):
         self.remaining = self.entitled - self.used
-        
-        now = timezone.now().date()
-        if now > self.valid_to:
-            self.validity_status = 'for_conversion'
-        elif now >= self.valid_from and now <= self.valid_to:
-            self.validity_status = 'active'
-        else:
-            self.validity_status = 'expired'
-            
+        self.validity_status = self.get_validity_status(self.valid_from, self.valid_to)
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -102,45 +106,44 @@ class LeaveRequest(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='routing')
     date_prepared = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # The employee's department when the request was filed; the daily statistics are counted under it
+    department = models.ForeignKey(
+        'generalsettings.Department', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='leave_requests'
+    )
+    # Lowercase control number, employee and leave names, one per line, for the approvals search
+    search_text = models.TextField(blank=True, default='', editable=False)
     
     def save(self, *args, **kwargs):
         if not self.control_number:
-            last_request = LeaveRequest.objects.order_by('-control_number').first()
-            if last_request and last_request.control_number.isdigit():
-                self.control_number = str(int(last_request.control_number) + 1)
-            else:
-                self.control_number = "1000"
+            self.control_number = str(next_value(
+                'leave_request',
+                seed=lambda: max_numeric(LeaveRequest.objects.all(), 'control_number') or 999
+            ))
 
         if self.date_from and self.date_to:
             working_days = self.calculate_working_days(self.date_from, self.date_to)
             self.days_requested = working_days
 
+        if self._state.adding and self.department_id is None:
+            self.department_id = EmploymentInformation.objects.filter(
+                user_id=self.employee_id
+            ).values_list('department_id', flat=True).first()
+
+        self.search_text = self.build_search_text()
         super().save(*args, **kwargs)
 
+    def build_search_text(self):
+        values = [
+            self.control_number,
+            self.employee.firstname, self.employee.lastname, self.employee.idnumber,
+            self.leave_type.name,
+            self.leave_reason.reason_text if self.leave_reason else None,
+        ]
+        return '\n'.join(value for value in values if value).lower()
+
     def calculate_working_days(self, start_date, end_date):
-        working_days = 0
-        current_date = start_date
-        
-        holidays = set(Holiday.objects.filter(
-            date__range=[start_date, end_date]
-        ).values_list('date', flat=True))
-        
-        sunday_exceptions = set(SundayException.objects.filter(
-            date__range=[start_date, end_date]
-        ).values_list('date', flat=True))
-        
-        while current_date <= end_date:
-            is_holiday = current_date in holidays
-            
-            is_sunday = current_date.weekday() == 6
-            is_sunday_exempted = current_date in sunday_exceptions
-            
-            if not is_holiday and (not is_sunday or is_sunday_exempted):
-                working_days += 1
-            
-            current_date += timedelta(days=1)
-        
-        return working_days
+        return working_days_between(start_date, end_date)
     
     def __str__(self):
         return f"{self.control_number} - {self.employee.full_name}"
@@ -155,6 +158,31 @@ class LeaveRequest(models.Model):
         ordering = ['-date_prepared']
 
 
+class LeaveDailyStat(models.Model):
+    """Leave requests filed per day, leave type, department and status (see leaverequest.stats)"""
+    date = models.DateField()
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE, related_name='daily_stats')
+    department = models.ForeignKey(
+        'generalsettings.Department', on_delete=models.SET_NULL, null=True, blank=True, related_name='leave_daily_stats'
+    )
+    status = models.CharField(max_length=20, choices=LeaveRequest.STATUS_CHOICES)
+    request_count = models.IntegerField(default=0)
+    days = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.date} {self.leave_type} {self.status}: {self.request_count}"
+
+    class Meta:
+        constraints = [
+            # NULLs never collide in a plain unique index; fold "no department" into one bucket
+            models.UniqueConstraint(
+                'date', 'leave_type', Coalesce('department', Value(0)), 'status', name='leave_daily_stat_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'status'], name='leave_daily_stat_date_idx'),
+        ]
+
 class LeaveApprovalAction(models.Model):
     ACTION_CHOICES = [
         ('updated', 'Updated'),
@@ -179,4 +207,9 @@ class LeaveApprovalAction(models.Model):
 
     class Meta:
         ordering = ['sequence', 'created_at']
-        unique_together = ['leave_request', 'approver', 'sequence', 'action']
\ No newline at end of file
+        unique_together = ['leave_request', 'approver', 'sequence', 'action']
+        indexes = [
+            # Approver inbox: routing section and keyset pages (see leaverequest.inbox)
+            models.Index(fields=['approver', 'status', 'created_at'], name='leave_action_inbox_idx'),
+            models.Index(fields=['approver', 'created_at'], name='leave_action_history_idx'),
+        ]
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .inbox import refresh_search_text
+from .models import LeaveRequest
+from .stats import get_stat_snapshot, get_stored_snapshot, record_change
+
+# LeaveRequest.search_text copies names from these rows; keep it in step when they are renamed
+SEARCH_TEXT_USER_FIELDS = {'firstname', 'lastname', 'idnumber'}
+
+@receiver(post_save, sender='userlogin.EmployeeLogin')
+def employee_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not SEARCH_TEXT_USER_FIELDS.intersection(update_fields)):
+        return
+    refresh_search_text(LeaveRequest.objects.filter(employee=instance))
+
+@receiver(post_save, sender='leaverequest.LeaveType')
+def leave_type_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_text(LeaveRequest.objects.filter(leave_type=instance))
+
+@receiver(post_save, sender='leaverequest.LeaveReason')
+def leave_reason_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_text(LeaveRequest.objects.filter(leave_reason=instance))
+
+# The daily statistics rollup follows every request through its status changes
+
+@receiver(pre_save, sender=LeaveRequest)
+def remember_stat_snapshot(sender, instance, **kwargs):
+    instance._stat_snapshot = get_stored_snapshot(instance.pk) if instance.pk else None
+
+@receiver(post_save, sender=LeaveRequest)
+def leave_request_saved(sender, instance, **kwargs):
+    record_change(getattr(instance, '_stat_snapshot', None), get_stat_snapshot(instance))
+
+@receiver(post_delete, sender=LeaveRequest)
+def leave_request_deleted(sender, instance, **kwargs):
+    record_change(get_stat_snapshot(instance), None)
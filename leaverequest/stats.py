@@ -0,0 +1,140 @@
+"""
+Daily leave statistics rollup.
+
+LeaveDailyStat holds how many leave requests (and how many requested days)
+were filed on each day, per leave type, the employee's department and the
+request's current status. The LeaveRequest signals move a request between
+buckets when it is filed, changes status, type or length, or is deleted, so the
+admin dashboard and charts read a handful of pre-aggregated rows instead of
+counting the request table per stat and per bucket.
+
+Days are the local date of ``date_prepared``; the department is the one
+stored on the request when it was filed, so a request stays in its bucket when
+the employee later moves to another department. ``rebuild_daily_stats``
+(the rebuild_leave_stats command) recomputes any date range from the requests
+themselves, for backfilling and for correcting writes that bypass signals.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from empconnect.rollups import add_to_bucket
+from .models import LeaveDailyStat, LeaveRequest
+
+STAT_BATCH_SIZE = 1000
+
+
+def get_stat_snapshot(leave_request):
+    """The (date, leave type, department, status, days) a request is counted under"""
+    return (
+        timezone.localdate(leave_request.date_prepared),
+        leave_request.leave_type_id,
+        leave_request.department_id,
+        leave_request.status,
+        Decimal(leave_request.days_requested or 0),
+    )
+
+
+def get_stored_snapshot(pk):
+    """The snapshot of a request as it is in the database, before an update is written"""
+    stored = LeaveRequest.objects.filter(pk=pk).only(
+        'date_prepared', 'leave_type_id', 'department_id', 'status', 'days_requested'
+    ).first()
+    return get_stat_snapshot(stored) if stored else None
+
+
+def _apply(day, leave_type_id, department_id, status, count, days):
+    add_to_bucket(
+        LeaveDailyStat,
+        {'date': day, 'leave_type_id': leave_type_id, 'department_id': department_id, 'status': status},
+        request_count=count, days=days,
+    )
+
+
+def record_change(before, after):
+    """Move one request from its ``before`` snapshot to its ``after`` snapshot (either may be None)"""
+    if before == after:
+        return
+    with transaction.atomic():
+        if before:
+            day, leave_type_id, department_id, status, days = before
+            _apply(day, leave_type_id, department_id, status, -1, -days)
+        if after:
+            day, leave_type_id, department_id, status, days = after
+            _apply(day, leave_type_id, department_id, status, 1, days)
+
+
+def record_changes(changes):
+    """
+    record_change for many requests at once, for writes made with queryset.update().
+    ``changes`` is an iterable of (before, after); moves into and out of the same
+    bucket are netted, so each bucket is written once.
+    """
+    deltas = {}
+    for before, after in changes:
+        if before == after:
+            continue
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot:
+                day, leave_type_id, department_id, status, days = snapshot
+                key = (day, leave_type_id, department_id, status)
+                count, total = deltas.get(key, (0, Decimal(0)))
+                deltas[key] = (count + sign, total + sign * days)
+
+    with transaction.atomic():
+        for (day, leave_type_id, department_id, status), (count, days) in deltas.items():
+            if count or days:
+                _apply(day, leave_type_id, department_id, status, count, days)
+
+
+def rebuild_daily_stats(start=None, end=None):
+    """Recompute the rollup for the given (inclusive) date range, or for all dates; returns the rows written"""
+    stats = LeaveDailyStat.objects.all()
+    requests = LeaveRequest.objects.all()
+    if start:
+        stats = stats.filter(date__gte=start)
+        requests = requests.filter(date_prepared__date__gte=start)
+    if end:
+        stats = stats.filter(date__lte=end)
+        requests = requests.filter(date_prepared__date__lte=end)
+
+    grouped = requests.annotate(day=TruncDate('date_prepared')).order_by().values(
+        'day', 'leave_type_id', 'department_id', 'status'
+    ).annotate(request_count=Count('id'), days=Sum('days_requested'))
+
+    with transaction.atomic():
+        stats.delete()
+        created = LeaveDailyStat.objects.bulk_create([
+            LeaveDailyStat(
+                date=row['day'],
+                leave_type_id=row['leave_type_id'],
+                department_id=row['department_id'],
+                status=row['status'],
+                request_count=row['request_count'],
+                days=row['days'] or 0,
+            )
+            for row in grouped
+        ], batch_size=STAT_BATCH_SIZE)
+    return len(created)
+
+
+def get_status_totals(start=None, end=None):
+    """{status: requests filed} over the given (inclusive) date range, or all time"""
+    stats = LeaveDailyStat.objects.all()
+    if start:
+        stats = stats.filter(date__gte=start)
+    if end:
+        stats = stats.filter(date__lte=end)
+    totals = dict.fromkeys([status for status, _ in LeaveRequest.STATUS_CHOICES], 0)
+    for status, total in stats.order_by().values('status').annotate(total=Sum('request_count')).values_list('status', 'total'):
+        totals[status] = total or 0
+    return totals
+
+
+def get_daily_status_counts(start, end):
+    """[(date, status, requests filed)] for each day in the (inclusive) range that has any"""
+    return list(
+        LeaveDailyStat.objects.filter(date__range=[start, end]).order_by().values('date', 'status')
+        .annotate(total=Sum('request_count')).values_list('date', 'status', 'total')
+    )
@@ -1,3 +1,327 @@
-from django.test import TestCase
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+import pandas as pd
+from django.core import mail
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from dashboard.counters import get_counters
+from generalsettings.models import Department
+from notification.outbox import send_queued_emails
+from userlogin.models import EmployeeLogin
+from userprofile.models import EmploymentInformation
+from .inbox import get_inbox_page
+from .models import LeaveApprovalAction, LeaveBalance, LeaveDailyStat, LeaveReason, LeaveRequest, LeaveType
+from .stats import get_daily_status_counts, get_status_totals, rebuild_daily_stats
+from .views import get_leave_reason_ranking, process_balance_import
+
+class LeaveReasonRankingTest(TestCase):
+    def setUp(self):
+        self.employee = EmployeeLogin.objects.create_user(idnumber='30000', username='leaver', password='secret')
+        self.leave_type = LeaveType.objects.create(name='Vacation', code='VL')
+        self.trip = LeaveReason.objects.create(leave_type=self.leave_type, reason_text='Trip')
+        self.family = LeaveReason.objects.create(leave_type=self.leave_type, reason_text='Family')
+
+    def _request(self, reason, prepared):
+        leave = LeaveRequest.objects.create(
+            employee=self.employee, leave_type=self.leave_type,
+            leave_reason=reason, date_from=prepared.date(), date_to=prepared.date(), days_requested=1, reason='x'
+        )
+        LeaveRequest.objects.filter(pk=leave.pk).update(date_prepared=prepared)
+
+    def test_monthly_counts_are_pivoted_from_one_query(self):
+        self._request(self.trip, timezone.make_aware(datetime(2025, 5, 1, 0, 30)))
+        self._request(self.trip, timezone.make_aware(datetime(2026, 4, 30, 23, 0)))
+        self._request(self.trip, timezone.make_aware(datetime(2025, 12, 10, 9)))
+        self._request(self.family, timezone.make_aware(datetime(2025, 12, 11, 9)))
+        self._request(None, timezone.make_aware(datetime(2025, 6, 2, 9)))
+        # Outside the fiscal year
+        self._request(self.family, timezone.make_aware(datetime(2026, 5, 1, 9)))
+
+        with self.assertNumQueries(1):
+            ranking = get_leave_reason_ranking(2025)
+
+        self.assertEqual(ranking, [
+            ('Trip', [1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1]),
+            (None, [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]),
+            ('Family', [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0]),
+        ])
+
+
+class BalanceImportTest(TestCase):
+    def setUp(self):
+        self.employee = EmployeeLogin.objects.create_user(idnumber='31000', username='balancer', password='secret')
+        self.vacation = LeaveType.objects.create(name='Vacation', code='VL')
+        self.sick = LeaveType.objects.create(name='Sick', code='SL')
+        self.existing = LeaveBalance.objects.create(
+            employee=self.employee, leave_type=self.vacation, entitled=5, used=2,
+            valid_from=date(2025, 1, 1), valid_to=date(2025, 12, 31)
+        )
+
+    def _upload(self, rows):
+        output = io.BytesIO()
+        columns = ['Id Number', 'Name', 'Leave Type', 'Entitled', 'Valid From', 'Valid To']
+        pd.DataFrame(rows, columns=columns).to_excel(output, sheet_name='Upload Balance', index=False)
+        output.seek(0)
+        return output
+
+    def test_upserts_rows_and_reports_errors(self):
+        upload = self._upload([
+            [31000, 'Balancer', 'Vacation', 10, datetime(2025, 1, 1), datetime(2025, 12, 31)],
+            ['31000', 'Balancer', 'Sick', 7.5, datetime(2025, 1, 1), datetime(2025, 12, 31)],
+            ['31000', 'Balancer', 'Sick', 3, datetime(2025, 1, 1), datetime(2025, 12, 31)],
+            ['99999', 'Nobody', 'Sick', 3, datetime(2025, 1, 1), datetime(2025, 12, 31)],
+            ['31000', 'Balancer', 'Unknown', 3, datetime(2025, 1, 1), datetime(2025, 12, 31)],
+        ])
+
+        # Employees, leave types, existing balances and the upsert, plus the atomic block's savepoint pair
+        with self.assertNumQueries(6):
+            result = process_balance_import(upload)
+
+        self.assertEqual(result['message'], 'Import completed. 1 records created, 1 updated, 1 skipped.')
+        self.assertEqual(result['errors'], [
+            'Row 5: Employee with ID 99999 not found',
+            "Row 6: Leave type 'Unknown' not found",
+        ])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.entitled, self.existing.used, self.existing.remaining), (10, 2, 8))
+        sick = LeaveBalance.objects.get(leave_type=self.sick)
+        self.assertEqual((sick.entitled, sick.remaining, sick.validity_status), (Decimal('7.5'), Decimal('7.5'), 'for_conversion'))
+
+    def test_delete_all_is_rolled_back_when_the_import_fails(self):
+        upload = self._upload([['31000', 'Balancer', 'Sick', 5, datetime(2026, 1, 1), datetime(2026, 12, 31)]])
+
+        with mock.patch.object(LeaveBalance.objects, 'bulk_create', side_effect=DatabaseError('write failed')):
+            with self.assertRaises(DatabaseError):
+                process_balance_import(upload, delete_all=True)
+
+        self.assertEqual(list(LeaveBalance.objects.values_list('pk', flat=True)), [self.existing.pk])
+
+
+class ApprovalInboxTest(TestCase):
+    def setUp(self):
+        self.approver = EmployeeLogin.objects.create_user(idnumber='32000', username='approver', password='secret')
+        self.employee = EmployeeLogin.objects.create_user(
+            idnumber='32001', username='filer', password='secret', firstname='Maria', lastname='Santos'
+        )
+        self.leave_type = LeaveType.objects.create(name='Vacation', code='VL')
+        base = timezone.make_aware(datetime(2026, 3, 1, 8))
+        self.actions = []
+        for index in range(13):
+            leave = LeaveRequest.objects.create(
+                employee=self.employee, leave_type=self.leave_type,
+                date_from=date(2026, 3, 2), date_to=date(2026, 3, 2), days_requested=1, reason='x'
+            )
+            action = LeaveApprovalAction.objects.create(
+                leave_request=leave, approver=self.approver, sequence=1, action='submitted',
+                status='routing' if index % 3 == 0 else 'approved'
+            )
+            # Two actions share a timestamp so the pk tie-break is exercised
+            LeaveApprovalAction.objects.filter(pk=action.pk).update(created_at=base + timedelta(hours=index // 2 * 2))
+            self.actions.append(action)
+
+    def _expected(self):
+        actions = LeaveApprovalAction.objects.filter(approver=self.approver)
+        return [
+            *actions.filter(status='routing').order_by('-created_at', '-pk').values_list('pk', flat=True),
+            *actions.exclude(status='routing').order_by('-created_at', '-pk').values_list('pk', flat=True),
+        ]
+
+    def test_pages_walk_forwards_and_backwards(self):
+        pages = []
+        page = get_inbox_page(self.approver, page_size=5)
+        while True:
+            pages.append(page)
+            if not page.has_next:
+                break
+            # At most one LIMIT query per inbox section, whatever the depth
+            with CaptureQueriesContext(connection) as queries:
+                page = get_inbox_page(self.approver, after=page.next_cursor, page_size=5)
+            self.assertLessEqual(len(queries), 2)
+
+        self.assertEqual([action.pk for page in pages for action in page], self._expected())
+        self.assertEqual([(page.start_index, page.end_index) for page in pages], [(1, 5), (6, 10), (11, 13)])
+        self.assertFalse(pages[0].has_previous)
+
+        previous = get_inbox_page(self.approver, before=pages[2].previous_cursor, page_size=5)
+        self.assertEqual([action.pk for action in previous], [action.pk for action in pages[1]])
+        self.assertEqual((previous.start_index, previous.has_previous, previous.has_next), (6, True, True))
+
+    def test_search_uses_search_text_and_follows_renames(self):
+        self.assertEqual(len(get_inbox_page(self.approver, 'SANTOS', page_size=20)), 13)
+        self.assertEqual(len(get_inbox_page(self.approver, 'santos\nvacation', page_size=20)), 0)
+
+        self.employee.lastname = 'Reyes'
+        self.employee.save()
+        self.assertEqual(len(get_inbox_page(self.approver, 'santos', page_size=20)), 0)
+        self.assertEqual(len(get_inbox_page(self.approver, 'reyes', page_size=20)), 13)
+
+
+class LeaveDailyStatTest(TestCase):
+    def setUp(self):
+        self.employee = EmployeeLogin.objects.create_user(idnumber='33000', username='stats', password='secret')
+        self.department = Department.objects.create(department_name='Assembly')
+        EmploymentInformation.objects.create(user=self.employee, department=self.department, employment_type='Regular')
+        self.vacation = LeaveType.objects.create(name='Vacation', code='VL')
+        self.sick = LeaveType.objects.create(name='Sick', code='SL')
+
+    def _request(self, leave_type, days=1):
+        return LeaveRequest.objects.create(
+            employee=self.employee, leave_type=leave_type,
+            date_from=date(2026, 3, 2), date_to=date(2026, 3, 1 + days), days_requested=days, reason='x'
+        )
+
+    def _rows(self):
+        return sorted(LeaveDailyStat.objects.exclude(request_count=0).values_list(
+            'date', 'leave_type_id', 'department_id', 'status', 'request_count', 'days'
+        ))
+
+    def test_transitions_match_a_rebuild(self):
+        first = self._request(self.vacation, days=2)
+        second = self._request(self.vacation)
+        third = self._request(self.sick)
+
+        first.status = 'approved'
+        first.save()
+        second.status = 'disapproved'
+        second.save()
+        second.save()  # Saving without a change leaves the rollup alone
+        third.leave_type = self.vacation
+        third.save()
+        self._request(self.sick).delete()
+
+        today = timezone.localdate()
+        self.assertEqual(get_status_totals(), {'routing': 1, 'approved': 1, 'disapproved': 1, 'cancelled': 0})
+        self.assertEqual(
+            sorted(get_daily_status_counts(today, today)),
+            [(today, 'approved', 1), (today, 'disapproved', 1), (today, 'routing', 1)]
+        )
+
+        incremental = self._rows()
+        rebuild_daily_stats()
+        self.assertEqual(self._rows(), incremental)
+        self.assertIn((today, self.vacation.pk, self.department.pk, 'approved', 1, Decimal('2')), incremental)
+
+    def test_request_stays_in_the_department_it_was_filed_under(self):
+        leave = self._request(self.vacation)
+        self.assertEqual(leave.department, self.department)
+
+        molding = Department.objects.create(department_name='Molding')
+        EmploymentInformation.objects.filter(user=self.employee).update(department=molding)
+        leave.status = 'approved'
+        leave.save()
+
+        today = timezone.localdate()
+        incremental = self._rows()
+        self.assertEqual(incremental, [(today, self.vacation.pk, self.department.pk, 'approved', 1, Decimal('1'))])
+        self.assertFalse(LeaveDailyStat.objects.filter(request_count__lt=0).exists())
+        rebuild_daily_stats()
+        self.assertEqual(self._rows(), incremental)
+
+    def test_requests_without_a_department_share_one_bucket(self):
+        EmploymentInformation.objects.filter(user=self.employee).update(department=None)
+        self._request(self.vacation)
+        self._request(self.vacation)
+        stat = LeaveDailyStat.objects.get()
+        self.assertEqual((stat.department_id, stat.request_count), (None, 2))
+        # The race fallback in _apply relies on the database rejecting a second no-department row
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LeaveDailyStat.objects.create(date=stat.date, leave_type=self.vacation, status=stat.status, request_count=1)
+
+
+@override_settings(EMAIL_OUTBOX_RUN_IN_PROCESS=False, EMAIL_OUTBOX_RATE_PER_MINUTE=0)
+class BulkApprovalTest(TestCase):
+    def setUp(self):
+        self.hr = EmployeeLogin.objects.create_user(idnumber='34000', username='hrbulk', password='secret', hr_admin=True)
+        self.regular = EmployeeLogin.objects.create_user(
+            idnumber='34001', username='regular', password='secret', email='regular@example.com'
+        )
+        self.probationary = EmployeeLogin.objects.create_user(idnumber='34002', username='probie', password='secret')
+        self.department = Department.objects.create(department_name='Molding')
+        EmploymentInformation.objects.create(user=self.regular, department=self.department, employment_type='Regular')
+        EmploymentInformation.objects.create(user=self.probationary, department=self.department, employment_type='Probationary')
+        self.vacation = LeaveType.objects.create(name='Vacation', code='VL')
+        self.old_period = LeaveBalance.objects.create(
+            employee=self.regular, leave_type=self.vacation, entitled=5,
+            valid_from=date(2025, 1, 1), valid_to=date(2025, 12, 31)
+        )
+        self.new_period = LeaveBalance.objects.create(
+            employee=self.regular, leave_type=self.vacation, entitled=5,
+            valid_from=date(2026, 1, 1), valid_to=date(2026, 12, 31)
+        )
+
+    def _request(self, employee, date_from, date_to, approver=None):
+        leave = LeaveRequest.objects.create(
+            employee=employee, leave_type=self.vacation, date_from=date_from, date_to=date_to,
+            days_requested=1, reason='x'
+        )
+        LeaveApprovalAction.objects.create(
+            leave_request=leave, approver=approver or self.hr, sequence=1, status='routing', action='submitted'
+        )
+        return leave
+
+    def _post(self, control_numbers):
+        return self.client.post(
+            reverse('hr_admin_bulk_approve'),
+            data=json.dumps({'control_numbers': control_numbers, 'comments': 'Enjoy'}),
+            content_type='application/json'
+        )
+
+    def test_deducts_across_periods_in_one_transaction(self):
+        # Wed Dec 31 2025 to Fri Jan 2 2026: one working day in the 2025 period, two in 2026
+        spanning = self._request(self.regular, date(2025, 12, 31), date(2026, 1, 2))
+        exempt = self._request(self.probationary, date(2026, 2, 2), date(2026, 2, 2))
+        elsewhere = self._request(self.regular, date(2026, 3, 2), date(2026, 3, 2), approver=self.regular)
+
+        self.client.force_login(self.hr)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post([spanning.control_number, exempt.control_number, elsewhere.control_number, '999999'])
+
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['approved'], [spanning.control_number, exempt.control_number])
+        self.assertEqual(set(data['skipped']), {elsewhere.control_number, '999999'})
+
+        self.old_period.refresh_from_db()
+        self.new_period.refresh_from_db()
+        self.assertEqual((self.old_period.used, self.old_period.remaining), (Decimal('1'), Decimal('4')))
+        self.assertEqual((self.new_period.used, self.new_period.remaining), (Decimal('2'), Decimal('3')))
+
+        self.assertEqual(
+            set(LeaveRequest.objects.values_list('control_number', 'status')),
+            {(spanning.control_number, 'approved'), (exempt.control_number, 'approved'), (elsewhere.control_number, 'routing')}
+        )
+        action = spanning.approval_actions.get()
+        self.assertEqual((action.status, action.action), ('approved', 'approved'))
+        self.assertTrue(action.comments.startswith('Enjoy\n\nLeave balance deducted successfully.'))
+        self.assertIn('without balance deduction', exempt.approval_actions.get().comments)
+
+        # Queued work ran after commit: one notification and one email per approval
+        send_queued_emails()
+        self.assertEqual(self.regular.received_notifications.filter(notification_type='approved').count(), 1)
+        self.assertEqual(self.probationary.received_notifications.filter(notification_type='approved').count(), 1)
+        self.assertEqual([message.to for message in mail.outbox], [['regular@example.com']])
+        self.assertEqual(get_status_totals()['approved'], 2)
+
+    def test_bulk_approval_refreshes_the_pending_leaves_counter(self):
+        first = self._request(self.regular, date(2026, 3, 2), date(2026, 3, 2))
+        second = self._request(self.probationary, date(2026, 3, 3), date(2026, 3, 3))
+        self.assertEqual(get_counters()['pending_leaves'], 2)
+
+        self.client.force_login(self.hr)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._post([first.control_number, second.control_number])
+        self.assertEqual(get_counters()['pending_leaves'], 0)
+
+    def test_rejects_other_users(self):
+        leave = self._request(self.regular, date(2026, 3, 2), date(2026, 3, 2))
+        self.client.force_login(self.regular)
+        self.assertEqual(self._post([leave.control_number]).status_code, 403)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, 'routing')
@@ -25,6 +25,7 @@ urlpatterns = [
     # HR Admin approval views
     path('admin/approval-detail/<str:control_number>/', views.hr_admin_approval_detail, name='hr_admin_approval_detail'),
     path('admin/process-approval/<str:control_number>/', views.hr_admin_process_approval, name='hr_admin_process_approval'),
+    path('admin/bulk-approve/', views.hr_admin_bulk_approve, name='hr_admin_bulk_approve'),
     
     # AJAX endpoints
     path('ajax/balance/', views.get_leave_balance, name='get_leave_balance'),
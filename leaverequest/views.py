@@ -5,25 +5,36 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.core.paginator import Paginator
-from django.db.models import Q, F, Exists, OuterRef, Subquery, Count, Q
+from django.db.models import Q, F, Exists, OuterRef, Subquery, Count, Q, Prefetch
 from django.utils import timezone
+from django.db import transaction
+from django.db.models.functions import TruncMonth
 from django.views.decorators.http import require_POST
 from userlogin.models import EmployeeLogin
-from .models import LeaveRequest, LeaveType, LeaveBalance, LeaveApprovalAction, LeaveReason, SundayException
+from .models import LeaveRequest, LeaveType, LeaveBalance, LeaveApprovalAction, LeaveReason
 from .forms import LeaveRequestForm, LeaveApprovalForm, LeaveSearchForm
-from django.db.models import Case, When, IntegerField, Max
+from django.db.models import Max
 from datetime import date, datetime, timedelta
 from collections import defaultdict
 from generalsettings.models import Department, Line, Position
 import calendar
 from decimal import Decimal
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from django.conf import settings
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.styles import Font
 from openpyxl.chart import LineChart, Reference
 from notification.models import Notification
+from notification.inbox import schedule_inbox_refresh
+from notification.outbox import enqueue_email
+from backgroundjob.runner import enqueue_job, job_queued_response
+from dashboard.counters import schedule_counter_refresh
+from empconnect.exports import ExportWorkbook, THIN_BORDER, iterate, solid_fill
+from usercalendar.working_calendar import get_holidays_payload, working_days_between
+from .inbox import get_inbox_actions, get_inbox_page
+from .stats import get_daily_status_counts, get_stat_snapshot, get_status_totals, record_changes
+from userprofile.approval_routing import get_approval_chain, get_next_approver, get_role_holder, get_supervisor
 
 @login_required(login_url="user-login")
 def leave_dashboard(request):
@@ -57,32 +68,13 @@ def leave_dashboard(request):
     
     grouped_balances.sort(key=lambda x: x['valid_from'], reverse=True)
     
-    # Handle pending approvals with pagination and search
-    for_leave_approval = (
-        LeaveApprovalAction.objects
-        .filter(approver=user)
-        .annotate(routing_priority=Case(When(status='routing', then=0), default=1, output_field=IntegerField()))
-        .exclude(Q(status__iexact='cancelled') | Q(comments='Updated my leave request'))
-        .select_related('leave_request__employee', 'leave_request__leave_type', 'leave_request__leave_reason')
-        .order_by('routing_priority', '-created_at')
-    )
-
-    # Search functionality for approvals
+    # Pending approvals: keyset pages over the approver's inbox (see leaverequest.inbox)
     search_query = request.GET.get('search', '').strip()
-    if search_query:
-        for_leave_approval = for_leave_approval.filter(
-            Q(leave_request__control_number__icontains=search_query) |
-            Q(leave_request__employee__firstname__icontains=search_query) |
-            Q(leave_request__employee__lastname__icontains=search_query) |
-            Q(leave_request__employee__idnumber__icontains=search_query) |
-            Q(leave_request__leave_type__name__icontains=search_query) |
-            Q(leave_request__leave_reason__reason_text__icontains=search_query)
-        )
-
-    # Pagination for pending approvals
-    approvals_page = request.GET.get('approvals_page', 1)
-    approvals_paginator = Paginator(for_leave_approval, 10)
-    pending_approvals_page_obj = approvals_paginator.get_page(approvals_page)
+    pending_approvals_page_obj = get_inbox_page(
+        user, search_query,
+        after=request.GET.get('approvals_after'),
+        before=request.GET.get('approvals_before'),
+    )
 
     pending_routing_count = LeaveApprovalAction.objects.filter(approver=user, status='routing').count()
 
@@ -124,7 +116,7 @@ def leave_dashboard(request):
         'leave_balance_sets': grouped_balances,
         'pending_approvals': pending_approvals_page_obj,
         'pending_routing_count': pending_routing_count,
-        'is_approver': for_leave_approval.exists(),
+        'is_approver': bool(pending_approvals_page_obj) or get_inbox_actions(user).exists(),
         'recent_leaves': annotated_recent,
         'my_requests_page_obj': my_requests_page_obj,
         'search_query': search_query,
@@ -188,57 +180,33 @@ def apply_leave(request):
             
             # Rule 1: Urgent leave (< 1 day notice, non-clinic) → IAD Admin
             if not leave_request.leave_type.go_to_clinic and notice_days < 1:
-                iad_admin = EmployeeLogin.objects.filter(iad_admin=True, is_active=True).first()
-                if iad_admin:
-                    approver = iad_admin
-                else:
-                    hr_manager = EmployeeLogin.objects.filter(hr_manager=True, is_active=True).first()
-                    if hr_manager:
-                        approver = hr_manager
-                    else:
-                        hr_admin = EmployeeLogin.objects.filter(hr_admin=True, is_active=True).first()
-                        approver = hr_admin
+                approver = get_role_holder('iad_admin', 'hr_manager', 'hr_admin')
             
             # Rule 2: Regular leave (≥ 1 day notice, non-clinic) → Employee's approver
             elif not leave_request.leave_type.go_to_clinic and notice_days >= 1:
-                try:
-                    employment_info = request.user.employment_info
-                    if employment_info.approver and employment_info.approver.is_active:
-                        approver = employment_info.approver
-                    else:
-                        error_msg = 'You do not have an assigned approver. Please assign an approver before submitting leave requests.'
-                        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                            return JsonResponse({'success': False, 'message': error_msg})
-                        messages.error(request, error_msg)
-                        return redirect('user_leave')
-                except:
+                if get_approval_chain(request.user) is None:
                     error_msg = 'Your employment information is incomplete. Please contact HR to complete your profile before submitting leave requests.'
                     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({'success': False, 'message': error_msg})
                     messages.error(request, error_msg)
                     return redirect('user_leave')
+                supervisor = get_supervisor(request.user)
+                if supervisor and supervisor.is_active:
+                    approver = supervisor
+                else:
+                    error_msg = 'You do not have an assigned approver. Please assign an approver before submitting leave requests.'
+                    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                        return JsonResponse({'success': False, 'message': error_msg})
+                    messages.error(request, error_msg)
+                    return redirect('user_leave')
             
             # Rule 3: Clinic leave (go_to_clinic = True) → Clinic Admin
             elif leave_request.leave_type.go_to_clinic:
-                clinic_admin = EmployeeLogin.objects.filter(clinic_admin=True, is_active=True).first()
-                if clinic_admin:
-                    approver = clinic_admin
-                else:
-                    hr_manager = EmployeeLogin.objects.filter(hr_manager=True, is_active=True).first()
-                    if hr_manager:
-                        approver = hr_manager
-                    else:
-                        hr_admin = EmployeeLogin.objects.filter(hr_admin=True, is_active=True).first()
-                        approver = hr_admin
+                approver = get_role_holder('clinic_admin', 'hr_manager', 'hr_admin')
             
             # Final fallback to HR manager or HR admin if no approver found
             if not approver:
-                hr_manager = EmployeeLogin.objects.filter(hr_manager=True, is_active=True).first()
-                if hr_manager:
-                    approver = hr_manager
-                else:
-                    hr_admin = EmployeeLogin.objects.filter(hr_admin=True, is_active=True).first()
-                    approver = hr_admin
+                approver = get_role_holder('hr_manager', 'hr_admin')
             
             # If still no approver found, show error
             if not approver:
@@ -396,19 +364,12 @@ def edit_leave(request, control_number):
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
 
-def restore_leave_balances(leave_request):
+def split_leave_by_balance_periods(leave_request, leave_balances):
     """
-    Restore leave balances when canceling an approved leave request.
-    Split the leave request across matching leave balance periods and restore balances.
+    Split a leave request across the balance periods that cover it.
+    Yields (balance, period_start, period_end, working_days) for each covered stretch.
     """
-    from datetime import timedelta
-    
-    # Get all leave balances for this employee and leave type
-    leave_balances = LeaveBalance.objects.filter(
-        employee=leave_request.employee,
-        leave_type=leave_request.leave_type
-    ).order_by('valid_from')
-    
+    leave_balances = list(leave_balances)
     current_date = leave_request.date_from
     
     while current_date <= leave_request.date_to:
@@ -420,44 +381,37 @@ def restore_leave_balances(leave_request):
                 break
         
         if not matching_balance:
-            current_date += timedelta(days=1)
+            # Skip ahead to the next period that starts after this date
+            next_starts = [balance.valid_from for balance in leave_balances if balance.valid_from > current_date]
+            if not next_starts:
+                break
+            current_date = min(next_starts)
             continue
         
         # Find the end date for this balance period
         period_end = min(leave_request.date_to, matching_balance.valid_to)
+        yield matching_balance, current_date, period_end, working_days_between(current_date, period_end)
         
-        # Calculate hours for this period
-        period_hours = 0
-        temp_date = current_date
-        
-        # Get holidays and sunday exceptions for the period
-        from usercalendar.models import Holiday
-        holidays = set(Holiday.objects.filter(
-            date__range=[current_date, period_end]
-        ).values_list('date', flat=True))
-        
-        sunday_exceptions = set(SundayException.objects.filter(
-            date__range=[current_date, period_end]
-        ).values_list('date', flat=True))
-        
-        while temp_date <= period_end:
-            is_holiday = temp_date in holidays
-            is_sunday = temp_date.weekday() == 6
-            is_sunday_exempted = temp_date in sunday_exceptions
-            
-            # Count as working day if not holiday and (not sunday or sunday exempted)
-            if not is_holiday and (not is_sunday or is_sunday_exempted):
-                period_hours += 8  # 8 hours per working day
-            
-            temp_date += timedelta(days=1)
-        
-        # Convert hours to days (8 hours = 1 day)
-        days_to_restore = period_hours / 8
-        
+        # Move to the next period
+        current_date = period_end + timedelta(days=1)
+
+def restore_leave_balances(leave_request):
+    """
+    Restore leave balances when canceling an approved leave request.
+    Split the leave request across matching leave balance periods and restore balances.
+    """
+    from decimal import Decimal
+    
+    # Get all leave balances for this employee and leave type
+    leave_balances = LeaveBalance.objects.filter(
+        employee=leave_request.employee,
+        leave_type=leave_request.leave_type
+    ).order_by('valid_from')
+    
+    for matching_balance, period_start, period_end, days_to_restore in split_leave_by_balance_periods(leave_request, leave_balances):
         if days_to_restore > 0:
             # Restore the balance
-            from decimal import Decimal
-            days_decimal = Decimal(str(days_to_restore))
+            days_decimal = Decimal(days_to_restore)
             
             # First, calculate what the new used value would be
             new_used = matching_balance.used - days_decimal
@@ -474,9 +428,6 @@ def restore_leave_balances(leave_request):
                 matching_balance.used = new_used
             
             matching_balance.save()
-        
-        # Move to the next period
-        current_date = period_end + timedelta(days=1)
 
 @login_required(login_url="user-login")
 @require_POST
@@ -529,11 +480,7 @@ def approver_dashboard(request):
     if search_form.is_valid():
         if search_form.cleaned_data['search']:
             search_term = search_form.cleaned_data['search']
-            pending_approvals = pending_approvals.filter(
-                Q(control_number__icontains=search_term) |
-                Q(employee__firstname__icontains=search_term) |
-                Q(employee__lastname__icontains=search_term)
-            )
+            pending_approvals = pending_approvals.filter(search_text__contains=search_term.lower())
     
     paginator = Paginator(pending_approvals, 10)
     page = request.GET.get('page')
@@ -547,54 +494,6 @@ def approver_dashboard(request):
     
     return render(request, 'leaverequest/approver_dashboard.html', context)
 
-def get_next_approver(leave_request, current_approver):
-    try:
-        # Rule 1: If current approver is Clinic Admin → next is IAD Admin
-        if current_approver.clinic_admin:
-            iad_admin = EmployeeLogin.objects.filter(iad_admin=True, active=True).first()
-            return iad_admin
-        
-        # Rule 2: If current approver is IAD Admin → next is requestor's direct supervisor
-        if current_approver.iad_admin:
-            if (hasattr(leave_request.employee, 'employment_info') and 
-                leave_request.employee.employment_info.approver):
-                return leave_request.employee.employment_info.approver
-        
-        # Get position levels for rules 4 & 5
-        requestor_level = None
-        current_approver_level = None
-        
-        if (hasattr(leave_request.employee, 'employment_info') and 
-            leave_request.employee.employment_info.position):
-            requestor_level = int(leave_request.employee.employment_info.position.level)
-        
-        if (hasattr(current_approver, 'employment_info') and 
-            current_approver.employment_info.position):
-            current_approver_level = int(current_approver.employment_info.position.level)
-        
-        # Rule 4: If requestor's level ≠ 2 or 3, and current approver level = 2 → HR Admin
-        if (requestor_level and requestor_level not in [2, 3] and 
-            current_approver_level == 3):
-            hr_admin = EmployeeLogin.objects.filter(hr_admin=True, active=True).first()
-            return hr_admin
-        
-        # Rule 5: If requestor's level = 2, and current approver level = 3 → HR Admin  
-        if (requestor_level in [2, 3] and current_approver_level == 3):
-            hr_admin = EmployeeLogin.objects.filter(hr_admin=True, active=True).first()
-            return hr_admin
-        
-        # Rule 3: For other cases → current user's direct supervisor
-        if (hasattr(current_approver, 'employment_info') and 
-            current_approver.employment_info.approver):
-            return current_approver.employment_info.approver
-        
-        # No next approver found
-        return None
-        
-    except Exception as e:
-        print(f"Error determining next approver: {e}")
-        return None
-
 @login_required(login_url="user-login")
 @require_POST
 def process_approval(request, control_number):
@@ -610,7 +509,7 @@ def process_approval(request, control_number):
         data = json.loads(request.body)
         action = data.get('action')
         comments = data.get('comments', '')
-        next_approver = get_next_approver(leave_request_obj, request.user)
+        next_approver = get_next_approver(leave_request_obj.employee, request.user)
 
         if action == 'approve' and leave_request_obj.status == 'disapproved':
             leave_status = 'disapproved'
@@ -784,12 +683,6 @@ def admin_dashboard(request):
         prev_start = current_start.replace(month=current_start.month - 1, day=1)
     prev_end = current_start - timedelta(days=1)
 
-    def count_in_range(qs, start, end, status=None):
-        base = LeaveRequest.objects.filter(date_prepared__date__gte=start, date_prepared__date__lte=end)
-        if status:
-            base = base.filter(status=status)
-        return base.count()
-
     def pct_change(curr, prev):
         if prev == 0:
             if curr == 0:
@@ -797,20 +690,25 @@ def admin_dashboard(request):
             return 100.0
         return round(((curr - prev) / prev) * 100.0, 1)
 
-    total_curr = count_in_range(LeaveRequest.objects.all(), current_start, current_end)
-    total_prev = count_in_range(LeaveRequest.objects.all(), prev_start, prev_end)
+    # Read from the daily statistics rollup instead of counting requests per stat
+    current_totals = get_status_totals(current_start, current_end)
+    previous_totals = get_status_totals(prev_start, prev_end)
+    all_time_totals = get_status_totals()
+
+    total_curr = sum(current_totals.values())
+    total_prev = sum(previous_totals.values())
     total_pct = pct_change(total_curr, total_prev)
 
-    routing_curr = count_in_range(LeaveRequest.objects.all(), current_start, current_end, status='routing')
-    routing_prev = count_in_range(LeaveRequest.objects.all(), prev_start, prev_end, status='routing')
+    routing_curr = current_totals['routing']
+    routing_prev = previous_totals['routing']
     routing_pct = pct_change(routing_curr, routing_prev)
 
-    approved_curr = count_in_range(LeaveRequest.objects.all(), current_start, current_end, status='approved')
-    approved_prev = count_in_range(LeaveRequest.objects.all(), prev_start, prev_end, status='approved')
+    approved_curr = current_totals['approved']
+    approved_prev = previous_totals['approved']
     approved_pct = pct_change(approved_curr, approved_prev)
 
-    disapproved_curr = count_in_range(LeaveRequest.objects.all(), current_start, current_end, status='disapproved')
-    disapproved_prev = count_in_range(LeaveRequest.objects.all(), prev_start, prev_end, status='disapproved')
+    disapproved_curr = current_totals['disapproved']
+    disapproved_prev = previous_totals['disapproved']
     disapproved_pct = pct_change(disapproved_curr, disapproved_prev)
 
     # Pagination for table
@@ -823,10 +721,10 @@ def admin_dashboard(request):
     departments = Department.objects.all().order_by('department_name')
     
     stats = {
-        'total_requests': LeaveRequest.objects.count(),
-        'pending_requests': LeaveRequest.objects.filter(status='routing').count(),
-        'approved_requests': LeaveRequest.objects.filter(status='approved').count(),
-        'disapproved_requests': LeaveRequest.objects.filter(status='disapproved').count(),
+        'total_requests': sum(all_time_totals.values()),
+        'pending_requests': all_time_totals['routing'],
+        'approved_requests': all_time_totals['approved'],
+        'disapproved_requests': all_time_totals['disapproved'],
     }
     
     # Leave Balances with search functionality
@@ -966,48 +864,28 @@ def admin_chart_data(request):
             end_date = current_date.replace(month=12, day=31)
             period_label = f"{current_date.year}"
         
-        # Get all leave requests in the period
-        leave_requests = LeaveRequest.objects.filter(
-            date_prepared__date__gte=start_date,
-            date_prepared__date__lte=end_date
-        ).select_related('leave_type')
-        
-        # Prepare time series data
+        # Daily per-status counts for the period from the statistics rollup
         time_data = defaultdict(lambda: defaultdict(int))
         time_labels = []
-        
+        for day, status, total in get_daily_status_counts(start_date, end_date):
+            # Days for the month view, months for the quarter and year views
+            time_data[day.day if period == 'month' else day.month][status] += total
+
         if period == 'month':
-            # Group by days
             current_day = start_date
             while current_day <= end_date:
                 time_labels.append(current_day.day)
                 current_day += timedelta(days=1)
-            
-            for request in leave_requests:
-                day_key = request.date_prepared.date().day
-                status = request.status
-                time_data[day_key][status] += 1
-                
         elif period == 'quarter':
-            # Group by months
             current_month = start_date.replace(day=1)
             while current_month <= end_date:
                 time_labels.append(current_month.strftime('%b'))
-                month_key = current_month.month
-                for request in leave_requests.filter(date_prepared__month=month_key):
-                    status = request.status
-                    time_data[month_key][status] += 1
                 if current_month.month == 12:
                     current_month = current_month.replace(year=current_month.year + 1, month=1)
                 else:
                     current_month = current_month.replace(month=current_month.month + 1)
         else:
-            # Group by months for the year
-            for month in range(1, 13):
-                time_labels.append(calendar.month_abbr[month])
-                for request in leave_requests.filter(date_prepared__month=month):
-                    status = request.status
-                    time_data[month][status] += 1
+            time_labels = [calendar.month_abbr[month] for month in range(1, 13)]
         
         # Prepare datasets
         statuses = ['routing', 'approved', 'disapproved', 'cancelled']
@@ -1149,10 +1027,17 @@ def leave_chart_data(request):
             else:
                 current_month = current_month.replace(month=current_month.month + 1)
         
-        for leave_request in leave_requests.filter(status='approved'):
-            month_key = leave_request.date_prepared.date().replace(day=1)
+        approved_by_month = (
+            leave_requests.filter(status='approved')
+            .annotate(month=TruncMonth('date_prepared'))
+            .order_by()
+            .values_list('month', 'leave_type__name')
+            .annotate(total=Count('id'))
+        )
+        for month, leave_type_name, total in approved_by_month:
+            month_key = timezone.localtime(month).date()
             if month_key in months:
-                monthly_data[month_key][leave_request.leave_type.name] += 1
+                monthly_data[month_key][leave_type_name] += total
         
         line_chart_labels = [month.strftime('%b') for month in months]
         line_chart_datasets = []
@@ -1250,8 +1135,12 @@ def approval_chart_data(request):
         colors = ['#6366f1', '#10b981', '#f59e0b', '#ef4444', '#06b6d4', '#8b5cf6', '#f472b6', '#facc15']
         background_colors = []
         color_index = 0
+        type_counts = dict(
+            all_approval_actions.order_by().values_list('leave_request__leave_type')
+            .annotate(total=Count('id')).values_list('leave_request__leave_type', 'total')
+        )
         for lt in leave_types_all:
-            cnt = all_approval_actions.filter(leave_request__leave_type=lt).count()
+            cnt = type_counts.get(lt.pk, 0)
             if cnt > 0:  # Only include leave types with values > 0
                 labels.append(lt.name)
                 type_data.append(cnt)
@@ -1269,36 +1158,26 @@ def approval_chart_data(request):
             while current_day <= end_date:
                 time_labels.append(current_day.day)
                 current_day += timedelta(days=1)
-            
-            for action in all_approval_actions:
-                # Use action_at if available (completed), otherwise use created_at (pending)
-                action_date = action.action_at.date() if action.action_at else action.created_at.date()
-                day_key = action_date.day
-                leave_type_name = action.leave_request.leave_type.name
-                time_data[day_key][leave_type_name] += 1
-                
         elif period == 'quarter':
             current_month = start_date.replace(day=1)
             while current_month <= end_date:
                 time_labels.append(current_month.strftime('%b'))
-                month_key = current_month.month
-                for action in all_approval_actions:
-                    action_date = action.action_at.date() if action.action_at else action.created_at.date()
-                    if action_date.month == month_key:
-                        leave_type_name = action.leave_request.leave_type.name
-                        time_data[month_key][leave_type_name] += 1
                 if current_month.month == 12:
                     current_month = current_month.replace(year=current_month.year + 1, month=1)
                 else:
                     current_month = current_month.replace(month=current_month.month + 1)
         else:
-            for month in range(1, 13):
-                time_labels.append(calendar.month_abbr[month])
-                for action in all_approval_actions:
-                    action_date = action.action_at.date() if action.action_at else action.created_at.date()
-                    if action_date.month == month:
-                        leave_type_name = action.leave_request.leave_type.name
-                        time_data[month][leave_type_name] += 1
+            time_labels = [calendar.month_abbr[month] for month in range(1, 13)]
+
+        # One pass over the actions: days for the month view, months otherwise
+        quarter_months = range(start_date.month, start_date.month + 3)
+        for action in all_approval_actions:
+            # Use action_at if available (completed), otherwise use created_at (pending)
+            action_date = action.action_at.date() if action.action_at else action.created_at.date()
+            bucket = action_date.day if period == 'month' else action_date.month
+            if period == 'quarter' and bucket not in quarter_months:
+                continue
+            time_data[bucket][action.leave_request.leave_type.name] += 1
         
         line_chart_datasets = []
         colors = ['#6366f1', '#10b981', '#f59e0b', '#ef4444', '#06b6d4', '#8b5cf6']
@@ -1364,19 +1243,7 @@ def leave_reasons_api(request, leave_type_id):
 
 @login_required(login_url="user-login")
 def holidays_and_exceptions_api(request):
-    from usercalendar.models import Holiday
-    from .models import SundayException
-    
-    holidays = Holiday.objects.all().values('date', 'name', 'holiday_type')
-    holidays_list = [{'date': holiday['date'].strftime('%Y-%m-%d'), 'name': holiday['name'], 'type': holiday['holiday_type']} for holiday in holidays]
-    
-    sunday_exceptions = SundayException.objects.all().values('date', 'description')
-    exceptions_list = [{'date': exception['date'].strftime('%Y-%m-%d'), 'description': exception['description']} for exception in sunday_exceptions]
-    
-    return JsonResponse({
-        'holidays': holidays_list,
-        'sunday_exceptions': exceptions_list
-    })
+    return JsonResponse(get_holidays_payload())
 
 @login_required(login_url="user-login")
 def check_approver_api(request):
@@ -1435,32 +1302,12 @@ def search_approvals_ajax(request):
     """AJAX endpoint for searching approvals"""
     user = request.user
     search_query = request.GET.get('search', '').strip()
-    page = request.GET.get('page', 1)
-    
-    # Get pending approvals with search
-    for_leave_approval = (
-        LeaveApprovalAction.objects
-        .filter(approver=user)
-        .annotate(routing_priority=Case(When(status='routing', then=0), default=1, output_field=IntegerField()))
-        .exclude(Q(status__iexact='cancelled') | Q(comments='Updated my leave request'))
-        .select_related('leave_request__employee', 'leave_request__leave_type', 'leave_request__leave_reason')
-        .order_by('routing_priority', '-created_at')
-    )
-
-    # Apply search filter
-    if search_query:
-        for_leave_approval = for_leave_approval.filter(
-            Q(leave_request__control_number__icontains=search_query) |
-            Q(leave_request__employee__firstname__icontains=search_query) |
-            Q(leave_request__employee__lastname__icontains=search_query) |
-            Q(leave_request__employee__idnumber__icontains=search_query) |
-            Q(leave_request__leave_type__name__icontains=search_query) |
-            Q(leave_request__leave_reason__reason_text__icontains=search_query)
-        )
 
-    # Pagination
-    paginator = Paginator(for_leave_approval, 10)
-    pending_approvals_page_obj = paginator.get_page(page)
+    pending_approvals_page_obj = get_inbox_page(
+        user, search_query,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
     
     # Prepare data for JSON response
     approvals_data = []
@@ -1481,16 +1328,12 @@ def search_approvals_ajax(request):
     return JsonResponse({
         'approvals': approvals_data,
         'pagination': {
-            'has_previous': pending_approvals_page_obj.has_previous(),
-            'has_next': pending_approvals_page_obj.has_next(),
-            'previous_page_number': pending_approvals_page_obj.previous_page_number() if pending_approvals_page_obj.has_previous() else None,
-            'next_page_number': pending_approvals_page_obj.next_page_number() if pending_approvals_page_obj.has_next() else None,
-            'number': pending_approvals_page_obj.number,
-            'num_pages': pending_approvals_page_obj.paginator.num_pages,
-            'start_index': pending_approvals_page_obj.start_index(),
-            'end_index': pending_approvals_page_obj.end_index(),
-            'count': pending_approvals_page_obj.paginator.count,
-            'page_range': list(pending_approvals_page_obj.paginator.page_range)
+            'has_previous': pending_approvals_page_obj.has_previous,
+            'has_next': pending_approvals_page_obj.has_next,
+            'previous_cursor': pending_approvals_page_obj.previous_cursor,
+            'next_cursor': pending_approvals_page_obj.next_cursor,
+            'start_index': pending_approvals_page_obj.start_index,
+            'end_index': pending_approvals_page_obj.end_index,
         },
         'search_query': search_query
     })
@@ -1690,6 +1533,41 @@ def hr_admin_process_approval(request, control_number):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+# Most leave requests approved in one bulk call
+BULK_APPROVAL_LIMIT = 200
+
+@login_required(login_url="user-login")
+@require_POST
+def hr_admin_bulk_approve(request):
+    if not (request.user.hr_admin or request.user.hr_manager or 
+            request.user.is_superuser or request.user.is_staff):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
+
+    control_numbers = data.get('control_numbers')
+    if not isinstance(control_numbers, list) or not control_numbers:
+        return JsonResponse({'error': 'No leave requests selected'}, status=400)
+    if len(control_numbers) > BULK_APPROVAL_LIMIT:
+        return JsonResponse({'error': f'Approve at most {BULK_APPROVAL_LIMIT} leave requests at a time'}, status=400)
+
+    try:
+        approved, skipped = bulk_approve_leave_requests(
+            request.user, control_numbers, str(data.get('comments', '')).strip()
+        )
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(approved)} leave request(s) approved, {len(skipped)} skipped',
+        'approved': approved,
+        'skipped': skipped,
+    })
+
 def process_leave_approval_with_balance_check(leave_request, original_comments):
     employee = leave_request.employee
     
@@ -1770,7 +1648,7 @@ def deduct_leave_balance(leave_request):
     Split the leave request across matching leave balance periods and deduct balances.
     Uses the same logic as restore_leave_balances but in reverse.
     """
-    from datetime import timedelta
+    from decimal import Decimal
     
     employee = leave_request.employee
     leave_type = leave_request.leave_type
@@ -1784,57 +1662,10 @@ def deduct_leave_balance(leave_request):
     if not leave_balances.exists():
         raise Exception(f"No valid leave balance found for {employee.full_name} - {leave_type.name}")
     
-    current_date = leave_request.date_from
-    
-    while current_date <= leave_request.date_to:
-        # Find the leave balance that covers this date
-        matching_balance = None
-        for balance in leave_balances:
-            if balance.valid_from <= current_date <= balance.valid_to:
-                matching_balance = balance
-                break
-        
-        if not matching_balance:
-            current_date += timedelta(days=1)
-            continue
-        
-        # Find the end date for this balance period
-        period_end = min(leave_request.date_to, matching_balance.valid_to)
-        
-        # Calculate hours for this period
-        period_hours = 0
-        temp_date = current_date
-        
-        # Get holidays and sunday exceptions for the period
-        from usercalendar.models import Holiday
-        holidays = set(Holiday.objects.filter(
-            date__range=[current_date, period_end]
-        ).values_list('date', flat=True))
-        
-        sunday_exceptions = set(SundayException.objects.filter(
-            date__range=[current_date, period_end]
-        ).values_list('date', flat=True))
-        
-        while temp_date <= period_end:
-            is_holiday = temp_date in holidays
-            is_sunday = temp_date.weekday() == 6
-            is_sunday_exempted = temp_date in sunday_exceptions
-            
-            # Count as working day if not holiday and (not sunday or sunday exempted)
-            if not is_holiday and (not is_sunday or is_sunday_exempted):
-                period_hours += 8  # 8 hours per working day
-            
-            temp_date += timedelta(days=1)
-        
-        # Convert hours to days (8 hours = 1 day)
-        days_to_deduct = period_hours / 8
-        
+    for matching_balance, period_start, period_end, days_to_deduct in split_leave_by_balance_periods(leave_request, leave_balances):
         if days_to_deduct > 0:
-            # Deduct the balance
-            from decimal import Decimal
-            days_decimal = Decimal(str(days_to_deduct))
-            
             # Deduct from balance (opposite of restore)
+            days_decimal = Decimal(days_to_deduct)
             matching_balance.used += days_decimal
             matching_balance.remaining -= days_decimal
             
@@ -1843,13 +1674,171 @@ def deduct_leave_balance(leave_request):
                 print(f"Warning: Balance {matching_balance.id} remaining went negative: {matching_balance.remaining}")
             
             matching_balance.save()
-            print(f"Deducted {days_to_deduct} days from balance {matching_balance.id} for period {current_date} to {period_end}. New remaining: {matching_balance.remaining}")
-        
-        # Move to the next period
-        current_date = period_end + timedelta(days=1)
+            print(f"Deducted {days_to_deduct} days from balance {matching_balance.id} for period {period_start} to {period_end}. New remaining: {matching_balance.remaining}")
     
     print(f"Successfully processed leave deduction for {employee.full_name} - {leave_type.name}")
 
+# Employment types whose approved leaves are not deducted from a balance
+BALANCE_EXEMPT_EMPLOYMENT_TYPES = ('probationary', 'ojt')
+
+def _with_comment(comments, note):
+    return f"{comments}\n\n{note}" if comments else note
+
+def plan_leave_deduction(leave_request, balances, comments=''):
+    """
+    Work out what approving ``leave_request`` deducts, without writing anything.
+    ``balances`` are the employee's balances of the request's leave type.
+    Returns (comments, [(balance, days)]) with the same notes as
+    process_leave_approval_with_balance_check.
+    """
+    employment_info = getattr(leave_request.employee, 'employment_info', None)
+    employment_type = (getattr(employment_info, 'employment_type', '') or '').lower()
+    if employment_type in BALANCE_EXEMPT_EMPLOYMENT_TYPES:
+        return _with_comment(comments, f"Leave approved without balance deduction (Employee type: {employment_type.title()})."), []
+
+    leave_type = leave_request.leave_type
+    if not leave_type.is_deducted:
+        return _with_comment(comments, f"Leave approved without balance deduction (Leave type '{leave_type.name}' is configured to not deduct from balance)."), []
+
+    balances = sorted(
+        (balance for balance in balances
+         if balance.valid_from <= leave_request.date_to and balance.valid_to >= leave_request.date_from),
+        key=lambda balance: balance.valid_from
+    )
+    if not balances:
+        return _with_comment(comments, f"No active leave balance found for this leave type ({leave_type.name})."), []
+
+    deductions = [
+        (balance, Decimal(days))
+        for balance, _, _, days in split_leave_by_balance_periods(leave_request, balances)
+        if days > 0
+    ]
+    total_remaining = sum(balance.remaining for balance in balances)
+    total_deducted = sum(days for _, days in deductions)
+    if total_remaining < total_deducted:
+        note = f"Insufficient leave balance. Available: {total_remaining} days, Requested: {total_deducted} days. Leave approved but balance may go negative."
+    else:
+        note = f"Leave balance deducted successfully. Remaining balance: {total_remaining - total_deducted} days."
+    return _with_comment(comments, note), deductions
+
+def bulk_approve_leave_requests(approver, control_numbers, comments=''):
+    """
+    Approve many leave requests as ``approver`` in one transaction.
+
+    The requests and every balance they can deduct from are locked with one
+    SELECT ... FOR UPDATE each; deductions are worked out per balance period in
+    memory and written with one bulk_update, as are the approval actions and the
+    request statuses. Notifications and decision emails go out after commit.
+
+    Returns (approved control numbers, {control number: reason skipped}).
+    """
+    control_numbers = list(dict.fromkeys(str(number).strip() for number in control_numbers if str(number).strip()))
+    now = timezone.now()
+    skipped = {}
+
+    with transaction.atomic():
+        leave_requests = {
+            leave_request.control_number: leave_request
+            for leave_request in LeaveRequest.objects.select_for_update(of=('self',)).select_related(
+                'employee__employment_info', 'leave_type'
+            ).filter(control_number__in=control_numbers)
+        }
+
+        # The approver's latest action on each request, as in hr_admin_process_approval
+        actions = {}
+        for action in LeaveApprovalAction.objects.filter(
+            leave_request__in=leave_requests.values(), approver=approver
+        ).order_by('sequence', 'created_at'):
+            actions[action.leave_request_id] = action
+
+        to_approve = []
+        for control_number in control_numbers:
+            leave_request = leave_requests.get(control_number)
+            if leave_request is None:
+                skipped[control_number] = 'Leave request not found'
+            elif leave_request.pk not in actions:
+                skipped[control_number] = 'No pending approval found for this user'
+            elif leave_request.status in ('cancelled', 'disapproved'):
+                skipped[control_number] = f'Leave request is {leave_request.status}'
+            else:
+                to_approve.append(leave_request)
+
+        pending = [leave_request for leave_request in to_approve if leave_request.status != 'approved']
+        balances = defaultdict(list)
+        if pending:
+            for balance in LeaveBalance.objects.select_for_update().filter(
+                employee_id__in={leave_request.employee_id for leave_request in pending},
+                leave_type_id__in={leave_request.leave_type_id for leave_request in pending},
+                valid_from__lte=max(leave_request.date_to for leave_request in pending),
+                valid_to__gte=min(leave_request.date_from for leave_request in pending),
+            ):
+                balances[(balance.employee_id, balance.leave_type_id)].append(balance)
+
+        changed_balances = {}
+        stat_changes = []
+        for leave_request in to_approve:
+            action = actions[leave_request.pk]
+            if leave_request.status == 'approved':
+                action.comments = comments
+            else:
+                action.comments, deductions = plan_leave_deduction(
+                    leave_request, balances[(leave_request.employee_id, leave_request.leave_type_id)], comments
+                )
+                for balance, days in deductions:
+                    balance.used += days
+                    balance.remaining -= days
+                    changed_balances[balance.pk] = balance
+                before = get_stat_snapshot(leave_request)
+                leave_request.status = 'approved'
+                stat_changes.append((before, get_stat_snapshot(leave_request)))
+            action.action = 'approved'
+            action.status = 'approved'
+            action.action_at = now
+
+        for balance in changed_balances.values():
+            balance.validity_status = LeaveBalance.get_validity_status(balance.valid_from, balance.valid_to)
+            balance.updated_at = now
+        LeaveBalance.objects.bulk_update(
+            changed_balances.values(), ['used', 'remaining', 'validity_status', 'updated_at']
+        )
+        LeaveApprovalAction.objects.bulk_update(
+            [actions[leave_request.pk] for leave_request in to_approve], ['action', 'status', 'action_at', 'comments']
+        )
+        if pending:
+            LeaveRequest.objects.filter(pk__in=[leave_request.pk for leave_request in pending]).update(
+                status='approved', updated_at=now
+            )
+            # queryset.update() does not send the signals that keep the rollup and the dashboard counter current
+            record_changes(stat_changes)
+            schedule_counter_refresh('pending_leaves')
+
+        transaction.on_commit(lambda: notify_leave_approvals(
+            approver, [(leave_request, actions[leave_request.pk].comments) for leave_request in to_approve]
+        ))
+
+    return [leave_request.control_number for leave_request in to_approve], skipped
+
+def notify_leave_approvals(approver, approvals):
+    """Notify and email employees about approved leaves; ``approvals`` is [(leave request, comments)]"""
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            title="Leave Approved",
+            message=f"Your leave request for {leave_request.date_from.strftime('%b %d, %Y')} to {leave_request.date_to.strftime('%b %d, %Y')} has been approved.",
+            notification_type="approved",
+            sender=approver,
+            recipient=leave_request.employee,
+            for_all=False,
+            module="leave"
+        )
+        for leave_request, _ in approvals
+    ])
+    # bulk_create does not send the post_save that keeps unread counters current
+    for recipient_id in {notification.recipient_id for notification in notifications}:
+        schedule_inbox_refresh(recipient_id)
+
+    for leave_request, comments in approvals:
+        send_leave_decision_email(leave_request, True, comments)
+
 def send_leave_decision_email(leave_request, is_approved, comments):
     try:
         employee = leave_request.employee
@@ -1910,13 +1899,13 @@ Best regards,
 HR Department
 REPConnect
 """
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@repconnect.com'),
-            recipient_list=[employee.email] if hasattr(employee, 'email') and employee.email else [],
-            fail_silently=True,
-        )
+        if getattr(employee, 'email', None):
+            enqueue_email(EmailMessage(
+                subject=subject,
+                body=message,
+                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@repconnect.com'),
+                to=[employee.email],
+            ), source='leave')
         
     except Exception as e:
         print(f"Email notification failed: {str(e)}")
@@ -2002,115 +1991,90 @@ def export_leave_report(request):
     except ValueError:
         return JsonResponse({'error': 'Invalid date format'}, status=400)
     
-    # Get filtered leave requests
-    leave_requests = LeaveRequest.objects.filter(
-        Q(date_from__gte=date_from, date_from__lte=date_to) |
-        Q(date_to__gte=date_from, date_to__lte=date_to) |
-        Q(date_from__lte=date_from, date_to__gte=date_to)
-    ).select_related('employee', 'leave_type', 'leave_reason', 'employee__employment_info__department')
+    workbook = build_leave_report(date_from, date_to)
     
-    # Create workbook
-    wb = Workbook()
-    
-    # Remove default sheet
-    wb.remove(wb.active)
-    
-    # Create sheets
-    create_overview_sheet(wb, leave_requests, date_from, date_to)
-    create_ranking_sheet(wb, date_from, date_to)
-    create_summary_sheet(wb, leave_requests, date_from, date_to)
-    create_routing_sheet(wb, leave_requests, date_from, date_to)
-    
-    # Save to memory
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    # Create response
-    response = HttpResponse(
-        output.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="leave_report_{date_from_str}_to_{date_to_str}.xlsx"'
+    response = workbook.response(f"leave_report_{date_from_str}_to_{date_to_str}.xlsx")
     response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     response['Pragma'] = 'no-cache'
     response['Expires'] = '0'
     
     return response
 
-def apply_sheet_formatting(ws, start_row=1):
-    """Apply consistent formatting to all sheets"""
-    # Define styles
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Apply borders to all cells with data
-    for row in ws.iter_rows(min_row=start_row):
-        for cell in row:
-            if cell.value is not None:
-                cell.border = thin_border
-    
-    # Apply header formatting only to header row (start_row + 2)
-    header_row_num = start_row
-    for cell in ws[header_row_num]:
-        if cell.value is not None:
-            cell.font = header_font
-            cell.fill = header_fill
+def get_report_leave_requests(date_from, date_to):
+    """Leave requests overlapping the report period"""
+    return LeaveRequest.objects.filter(
+        Q(date_from__gte=date_from, date_from__lte=date_to) |
+        Q(date_to__gte=date_from, date_to__lte=date_to) |
+        Q(date_from__lte=date_from, date_to__gte=date_to)
+    ).select_related('employee', 'leave_type', 'leave_reason', 'employee__employment_info__department')
 
-def create_overview_sheet(wb, leave_requests, date_from, date_to):
-    ws = wb.create_sheet("Overview")
-    
-    ws['A1'] = "RYONAN ELECTRIC PHILIPPINES CORPORATION"
-    ws['A2'] = f"Leave Overview ({date_from} to {date_to})"
+def build_leave_report(date_from, date_to):
+    """Build the four-sheet leave report; every sheet is filled from one grouped query or one stream"""
+    leave_requests = get_report_leave_requests(date_from, date_to)
+    workbook = ExportWorkbook(styles=LEAVE_EXPORT_STYLES)
     
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A2'].font = Font(italic=True, size=12)
-    ws.merge_cells('A1:F1')
-    ws.merge_cells('A2:F2')
-    
-    headers = ['Leave Type', 'Leave Count', 'Leave Percentage']
-    
-    departments = Department.objects.values_list('department_name', flat=True).distinct()
-    headers.extend(departments)
-    
-    for col, header in enumerate(headers, 1):
-        ws.cell(row=4, column=col, value=header)
-    
-    leave_type_stats = leave_requests.values('leave_type__name').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    total_requests = leave_requests.count()
-    
-    row = 5
-    for stat in leave_type_stats:
-        leave_type = stat['leave_type__name']
-        count = stat['count']
+    # Create sheets
+    create_overview_sheet(workbook, leave_requests, date_from, date_to)
+    create_ranking_sheet(workbook, date_from, date_to)
+    create_summary_sheet(workbook, leave_requests, date_from, date_to)
+    create_routing_sheet(workbook, leave_requests, date_from, date_to)
+    return workbook
+
+def get_fiscal_year(today=None):
+    """(start year, end year) of the May-April fiscal year containing ``today``"""
+    today = today or datetime.now()
+    if today.month >= 5:
+        return today.year, today.year + 1
+    return today.year - 1, today.year
+
+LEAVE_EXPORT_STYLES = {
+    'leave_routing': {'fill': solid_fill("FFFF99"), 'border': THIN_BORDER},
+    'leave_cancelled': {'fill': solid_fill("D3D3D3"), 'border': THIN_BORDER},
+}
+
+# Status cell styles on the Leave Summary sheet
+LEAVE_STATUS_STYLES = {
+    'approved': 'status_approved',
+    'disapproved': 'status_disapproved',
+    'routing': 'leave_routing',
+    'cancelled': 'leave_cancelled',
+}
+
+def add_sheet_titles(sheet, title, span):
+    """Company title, report subtitle and a spacer row; the table header lands on row 4"""
+    sheet.title("RYONAN ELECTRIC PHILIPPINES CORPORATION", span=span)
+    sheet.title(title, style='subtitle', span=span)
+    sheet.blank()
+
+def create_overview_sheet(workbook, leave_requests, date_from, date_to):
+    departments = list(Department.objects.values_list('department_name', flat=True).distinct())
+    headers = ['Leave Type', 'Leave Count', 'Leave Percentage'] + departments
+    
+    sheet = workbook.create_sheet("Overview")
+    add_sheet_titles(sheet, f"Leave Overview ({date_from} to {date_to})", span=6)
+    header_row = sheet.append(headers, style='header')
+    
+    # One grouped query: requests per (leave type, department); type totals are summed from it
+    type_counts = defaultdict(int)
+    dept_counts = defaultdict(dict)
+    for stat in leave_requests.values(
+        'leave_type__name', 'employee__employment_info__department__department_name'
+    ).annotate(count=Count('id')).order_by():
+        type_counts[stat['leave_type__name']] += stat['count']
+        dept_counts[stat['leave_type__name']][stat['employee__employment_info__department__department_name']] = stat['count']
+    
+    total_requests = sum(type_counts.values())
+    
+    last_row = header_row
+    for leave_type, count in sorted(type_counts.items(), key=lambda item: (-item[1], item[0])):
         percentage = (count / total_requests * 100) if total_requests > 0 else 0
+        dept_dict = dept_counts[leave_type]
         
-        ws.cell(row=row, column=1, value=leave_type)
-        ws.cell(row=row, column=2, value=count)
-        ws.cell(row=row, column=3, value=f"{percentage:.1f}%")
-        
-        dept_stats = leave_requests.filter(leave_type__name=leave_type).values(
-            'employee__employment_info__department__department_name'
-        ).annotate(count=Count('id'))
-        
-        dept_dict = {dept['employee__employment_info__department__department_name']: dept['count'] for dept in dept_stats}
-        
-        for col, dept_name in enumerate(departments, 4):
-            dept_count = dept_dict.get(dept_name, 0)
-            ws.cell(row=row, column=col, value=dept_count)
-        
-        row += 1
+        last_row = sheet.append(
+            [leave_type, count, f"{percentage:.1f}%"] + [dept_dict.get(dept_name, 0) for dept_name in departments],
+            style='cell'
+        )
     
-    chart_start_row = row + 2
     chart = LineChart()
     chart.title = "Leave Type Distribution"
     chart.style = 13
@@ -2118,167 +2082,109 @@ def create_overview_sheet(wb, leave_requests, date_from, date_to):
     chart.x_axis.title = 'Leave Types'
     
     # Data for chart (Leave Type and Count)
-    data = Reference(ws, min_col=2, min_row=4, max_row=row-1, max_col=2)  # Count column
-    cats = Reference(ws, min_col=1, min_row=5, max_row=row-1)  # Leave type names
+    data = Reference(sheet.worksheet, min_col=2, min_row=header_row, max_row=last_row, max_col=2)  # Count column
+    cats = Reference(sheet.worksheet, min_col=1, min_row=header_row + 1, max_row=last_row)  # Leave type names
     chart.add_data(data, titles_from_data=True)
     chart.set_categories(cats)
     
-    ws.add_chart(chart, f"A{chart_start_row}")
-    
-    apply_sheet_formatting(ws, 4)
+    sheet.add_chart(chart, f"A{last_row + 3}")
 
-def create_ranking_sheet(wb, date_from, date_to):
-    ws = wb.create_sheet("Leave Ranking")
+def get_leave_reason_ranking(fiscal_year_start):
+    """
+    Monthly leave counts per reason for the May-April fiscal year, most used reason first.
+
+    One query groups the fiscal year's requests by reason and TruncMonth(date_prepared);
+    the result is pivoted into twelve month columns in memory.
+    Returns a list of (reason_text, [May..Apr counts]).
+    """
+    fiscal_year_end = fiscal_year_start + 1
+    month_starts = [date(fiscal_year_start, month, 1) for month in range(5, 13)] + [date(fiscal_year_end, month, 1) for month in range(1, 5)]
+    month_index = {month_start: index for index, month_start in enumerate(month_starts)}
     
-    ws['A1'] = "RYONAN ELECTRIC PHILIPPINES CORPORATION"
+    monthly_stats = LeaveRequest.objects.filter(
+        date_prepared__date__gte=date(fiscal_year_start, 5, 1),
+        date_prepared__date__lte=date(fiscal_year_end, 4, 30)
+    ).annotate(
+        month=TruncMonth('date_prepared')
+    ).values('leave_reason__reason_text', 'month').annotate(count=Count('id')).order_by()
     
-    current_date = datetime.now()
-    if current_date.month >= 5:
-        fiscal_year_start = current_date.year
-        fiscal_year_end = current_date.year + 1
-    else:
-        fiscal_year_start = current_date.year - 1
-        fiscal_year_end = current_date.year
+    ranking = defaultdict(lambda: [0] * len(month_starts))
+    for stat in monthly_stats:
+        month = stat['month']
+        if isinstance(month, datetime):
+            month = timezone.localtime(month).date() if timezone.is_aware(month) else month.date()
+        ranking[stat['leave_reason__reason_text']][month_index[month]] += stat['count']
     
-    ws['A2'] = f"Leave Reason Ranking for FY {fiscal_year_start}-{fiscal_year_end}"
+    return sorted(ranking.items(), key=lambda item: (-sum(item[1]), item[0] or ''))
+
+def create_ranking_sheet(workbook, date_from, date_to):
+    fiscal_year_start, fiscal_year_end = get_fiscal_year()
     
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A2'].font = Font(italic=True, size=12)
-    ws.merge_cells('A1:N1')
-    ws.merge_cells('A2:N2')
+    sheet = workbook.create_sheet("Leave Ranking")
+    add_sheet_titles(sheet, f"Leave Reason Ranking for FY {fiscal_year_start}-{fiscal_year_end}", span=14)
     
     months = ['May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar', 'Apr']
     headers = ['Leave Reason'] + [f"{month} {fiscal_year_start if i < 8 else fiscal_year_end}" for i, month in enumerate(months)]
+    sheet.append(headers, style='header')
     
-    for col, header in enumerate(headers, 1):
-        ws.cell(row=4, column=col, value=header)
-    
-    fiscal_start_date = datetime(fiscal_year_start, 5, 1).date()
-    fiscal_end_date = datetime(fiscal_year_end, 4, 30).date()
-    
-    fiscal_requests = LeaveRequest.objects.filter(
-        date_prepared__date__gte=fiscal_start_date,
-        date_prepared__date__lte=fiscal_end_date
-    )
-    
-    leave_reason_stats = fiscal_requests.values('leave_reason__reason_text').annotate(
-        total_count=Count('id')
-    ).order_by('-total_count')
-    
-    row = 5
-    for stat in leave_reason_stats:
-        reason = stat['leave_reason__reason_text'] or 'No Reason'
-        ws.cell(row=row, column=1, value=reason)
-        
-        for month_idx, month in enumerate(months):
-            if month_idx < 8:
-                year = fiscal_year_start
-                month_num = month_idx + 5
-            else:
-                year = fiscal_year_end
-                month_num = month_idx - 7
-            
-            monthly_count = fiscal_requests.filter(
-                leave_reason__reason_text=stat['leave_reason__reason_text'],
-                date_prepared__year=year,
-                date_prepared__month=month_num
-            ).count()
-            
-            ws.cell(row=row, column=month_idx + 2, value=monthly_count)
-        
-        row += 1
-    
-    apply_sheet_formatting(ws, 4)
+    for reason, monthly_counts in get_leave_reason_ranking(fiscal_year_start):
+        sheet.append([reason or 'No Reason'] + monthly_counts, style='cell')
 
-def create_summary_sheet(wb, leave_requests, date_from, date_to):
+def create_summary_sheet(workbook, leave_requests, date_from, date_to):
     """Create Leave Summary sheet with all leave requests"""
-    ws = wb.create_sheet("Leave Summary")
-    
-    # Headers
-    ws['A1'] = "RYONAN ELECTRIC PHILIPPINES CORPORATION"
-    ws['A2'] = f"Leave Request Summary ({date_from} to {date_to})"
-    
-    # Make headers bold and italic for subheader
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A2'].font = Font(italic=True, size=12)
-    ws.merge_cells('A1:G1')
-    ws.merge_cells('A2:G2')
+    sheet = workbook.create_sheet("Leave Summary")
+    add_sheet_titles(sheet, f"Leave Request Summary ({date_from} to {date_to})", span=7)
     
     # Column headers
     headers = ['Control Number', 'Date Prepared', 'Id Number', 'Employee Name', 'Department', 'Leave Category', 'Leave Type', 'Leave Reason', 'Status']
-    for col, header in enumerate(headers, 1):
-        ws.cell(row=4, column=col, value=header)
-    
-    # Status colors
-    status_colors = {
-        'approved': PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid"),  # Light green
-        'disapproved': PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid"),  # Light red
-        'routing': PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid"),  # Light yellow
-        'cancelled': PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid"),  # Light gray
-    }
-    
-    # Add data
-    row = 5
-    for leave in leave_requests.order_by('-date_prepared'):
-        ws.cell(row=row, column=1, value=leave.control_number)
-        ws.cell(row=row, column=2, value=leave.date_prepared.strftime('%Y-%m-%d'))
-        ws.cell(row=row, column=3, value=leave.employee.idnumber)
-        ws.cell(row=row, column=4, value=leave.employee.full_name)
-        ws.cell(row=row, column=5, value=leave.employee.employment_info.department.department_name if leave.employee.employment_info else 'N/A')
-        ws.cell(row=row, column=6, value=leave.leave_type.name)
-        ws.cell(row=row, column=7, value=leave.leave_reason.reason_text if leave.leave_reason else 'N/A')
-        ws.cell(row=row, column=8, value=leave.reason if leave.reason else 'N/A')
-        
-        # Status cell with color
-        status_cell = ws.cell(row=row, column=9, value=leave.get_status_display())
-        if leave.status in status_colors:
-            status_cell.fill = status_colors[leave.status]
-        
-        row += 1
-    
-    apply_sheet_formatting(ws, 4)
-
-def create_routing_sheet(wb, leave_requests, date_from, date_to):
+    sheet.append(headers, style='header')
+    
+    for leave in iterate(leave_requests.order_by('-date_prepared')):
+        sheet.append([
+            leave.control_number,
+            leave.date_prepared.strftime('%Y-%m-%d'),
+            leave.employee.idnumber,
+            leave.employee.full_name,
+            leave.employee.employment_info.department.department_name if leave.employee.employment_info else 'N/A',
+            leave.leave_type.name,
+            leave.leave_reason.reason_text if leave.leave_reason else 'N/A',
+            leave.reason if leave.reason else 'N/A',
+            leave.get_status_display(),
+        ], style='cell', styles={8: LEAVE_STATUS_STYLES.get(leave.status)})
+
+def create_routing_sheet(workbook, leave_requests, date_from, date_to):
     """Create Routing Leave sheet with pending requests"""
-    ws = wb.create_sheet("Routing Leave")
-    
-    # Headers
-    ws['A1'] = "RYONAN ELECTRIC PHILIPPINES CORPORATION"
-    ws['A2'] = f"Leave For Routing ({date_from} to {date_to})"
-    
-    # Make headers bold and italic for subheader
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A2'].font = Font(italic=True, size=12)
-    ws.merge_cells('A1:G1')
-    ws.merge_cells('A2:G2')
+    sheet = workbook.create_sheet("Routing Leave")
+    add_sheet_titles(sheet, f"Leave For Routing ({date_from} to {date_to})", span=7)
     
     # Column headers
     headers = ['Control Number', 'Id Number', 'Employee Name', 'Department', 'Leave Type', 'Leave Category', 'Leave Reason', 'Duration', 'Current Approver']
-    for col, header in enumerate(headers, 1):
-        ws.cell(row=4, column=col, value=header)
-    
-    # Filter for routing status only
-    routing_requests = leave_requests.filter(status='routing').order_by('-date_prepared')
+    sheet.append(headers, style='header')
+    
+    # Filter for routing status only, with the pending approval step fetched per chunk
+    routing_requests = leave_requests.filter(status='routing').order_by('-date_prepared').prefetch_related(
+        Prefetch(
+            'approval_actions',
+            queryset=LeaveApprovalAction.objects.filter(status='routing').select_related('approver'),
+            to_attr='routing_actions'
+        )
+    )
     
-    # Add data
-    row = 5
-    for leave in routing_requests:
-        # Get current approver
-        current_action = leave.approval_actions.filter(status='routing').first()
+    for leave in iterate(routing_requests):
+        current_action = leave.routing_actions[0] if leave.routing_actions else None
         current_approver = current_action.approver.full_name if current_action else 'N/A'
         
-        ws.cell(row=row, column=1, value=leave.control_number)
-        ws.cell(row=row, column=2, value=leave.employee.idnumber)
-        ws.cell(row=row, column=3, value=leave.employee.full_name)
-        ws.cell(row=row, column=4, value=leave.employee.employment_info.department.department_name if leave.employee.employment_info else 'N/A')
-        ws.cell(row=row, column=5, value=leave.leave_type.name)
-        ws.cell(row=row, column=6, value=leave.leave_reason.reason_text if leave.leave_reason else 'N/A')
-        ws.cell(row=row, column=7, value=leave.reason if leave.reason else 'N/A')
-        ws.cell(row=row, column=8, value=leave.duration_display)
-        ws.cell(row=row, column=9, value=current_approver)
-        row += 1
-    
-    apply_sheet_formatting(ws, 4)
+        sheet.append([
+            leave.control_number,
+            leave.employee.idnumber,
+            leave.employee.full_name,
+            leave.employee.employment_info.department.department_name if leave.employee.employment_info else 'N/A',
+            leave.leave_type.name,
+            leave.leave_reason.reason_text if leave.leave_reason else 'N/A',
+            leave.reason if leave.reason else 'N/A',
+            leave.duration_display,
+            current_approver,
+        ], style='cell')
 
 @login_required(login_url="user-login")
 def get_balance_details(request, balance_id):
@@ -2471,72 +2377,120 @@ def import_balance(request):
         if not uploaded_file:
             return JsonResponse({'success': False, 'error': 'No file uploaded'}, status=400)
         
-        # Delete all existing balances if requested
-        if delete_all:
-            LeaveBalance.objects.all().delete()
-        
-        # Process Excel file
-        import pandas as pd
-        df = pd.read_excel(uploaded_file, sheet_name='Upload Balance')
-        
-        created_count = 0
-        skipped_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                # Get employee by ID number
-                employee = EmployeeLogin.objects.get(idnumber=row['Id Number'])
-
-                # Get leave type
-                leave_type = LeaveType.objects.get(name=row['Leave Type'])
-
-                # Convert pandas Timestamp to date if necessary
-                valid_from = row['Valid From']
-                valid_to = row['Valid To']
-                if hasattr(valid_from, 'to_pydatetime'):
-                    valid_from = valid_from.to_pydatetime().date()
-                elif hasattr(valid_from, 'date'):
-                    valid_from = valid_from.date()
-                if hasattr(valid_to, 'to_pydatetime'):
-                    valid_to = valid_to.to_pydatetime().date()
-                elif hasattr(valid_to, 'date'):
-                    valid_to = valid_to.date()
-
-                # Check for duplicates
-                existing = LeaveBalance.objects.filter(
-                    employee=employee,
-                    leave_type=leave_type,
-                    valid_from=valid_from,
-                    valid_to=valid_to
-                ).exists()
-
-                if existing:
-                    skipped_count += 1
-                    continue
-
-                # Create balance
-                LeaveBalance.objects.create(
-                    employee=employee,
-                    leave_type=leave_type,
-                    entitled=row['Entitled'],
-                    valid_from=valid_from,
-                    valid_to=valid_to
-                )
-                created_count += 1
-                
-            except EmployeeLogin.DoesNotExist:
-                errors.append(f"Row {index + 2}: Employee with ID {row['Id Number']} not found")
-            except LeaveType.DoesNotExist:
-                errors.append(f"Row {index + 2}: Leave type '{row['Leave Type']}' not found")
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        return JsonResponse({
-            'success': True,
-            'message': f'Import completed. {created_count} records created, {skipped_count} skipped.',
-            'errors': errors if errors else None
-        })
+        job = enqueue_job('leaverequest.import_balance', request.user, files=[uploaded_file], params={'delete_all': delete_all})
+        return job_queued_response(job)
         
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+BALANCE_IMPORT_BATCH_SIZE = 1000
+BALANCE_UNIQUE_FIELDS = ['employee', 'leave_type', 'valid_from', 'valid_to']
+
+
+def _import_id_number(value):
+    # Excel hands numeric ID numbers back as floats (12345.0)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def process_balance_import(uploaded_file, delete_all=False):
+    """
+    Upsert leave balances from the 'Upload Balance' sheet; returns the import_balance payload.
+
+    Employees and leave types are resolved with one query each and existing
+    balances with one query on the unique key, then every row is written with a
+    single bulk upsert. An existing balance keeps its used days and gets the new
+    entitlement. With delete_all the wipe and the insert run in one transaction,
+    so a failed import leaves the previous balances in place.
+    """
+    import pandas as pd
+    df = pd.read_excel(uploaded_file, sheet_name='Upload Balance')
+
+    id_numbers = df['Id Number'].map(lambda value: None if pd.isna(value) else _import_id_number(value))
+    leave_type_names = df['Leave Type'].map(lambda value: None if pd.isna(value) else str(value).strip())
+    valid_froms = pd.to_datetime(df['Valid From'], errors='coerce')
+    valid_tos = pd.to_datetime(df['Valid To'], errors='coerce')
+    entitlements = pd.to_numeric(df['Entitled'], errors='coerce')
+
+    employees = dict(
+        EmployeeLogin.objects.filter(idnumber__in=set(id_numbers.dropna())).values_list('idnumber', 'id')
+    )
+    leave_types = dict(
+        LeaveType.objects.filter(name__in=set(leave_type_names.dropna())).order_by().values_list('name', 'id')
+    )
+
+    errors = []
+    skipped_count = 0
+    rows = {}
+    for index in range(len(df)):
+        row_number = index + 2
+        employee_id = employees.get(id_numbers.iat[index])
+        leave_type_id = leave_types.get(leave_type_names.iat[index])
+        if employee_id is None:
+            errors.append(f"Row {row_number}: Employee with ID {df['Id Number'].iat[index]} not found")
+            continue
+        if leave_type_id is None:
+            errors.append(f"Row {row_number}: Leave type '{df['Leave Type'].iat[index]}' not found")
+            continue
+        if pd.isna(valid_froms.iat[index]) or pd.isna(valid_tos.iat[index]):
+            errors.append(f"Row {row_number}: Invalid Valid From / Valid To date")
+            continue
+        if pd.isna(entitlements.iat[index]) or entitlements.iat[index] < 0:
+            errors.append(f"Row {row_number}: Invalid entitled value '{df['Entitled'].iat[index]}'")
+            continue
+
+        key = (employee_id, leave_type_id, valid_froms.iat[index].date(), valid_tos.iat[index].date())
+        if key in rows:
+            # The first row for a balance wins, as before
+            skipped_count += 1
+            continue
+        rows[key] = Decimal(str(entitlements.iat[index])).quantize(Decimal('0.01'))
+
+    with transaction.atomic():
+        if delete_all:
+            LeaveBalance.objects.all().delete()
+            existing = {}
+        else:
+            existing = {
+                (employee_id, leave_type_id, valid_from, valid_to): used
+                for employee_id, leave_type_id, valid_from, valid_to, used in LeaveBalance.objects.filter(
+                    employee_id__in={key[0] for key in rows},
+                    leave_type_id__in={key[1] for key in rows},
+                ).order_by().values_list('employee_id', 'leave_type_id', 'valid_from', 'valid_to', 'used')
+                if (employee_id, leave_type_id, valid_from, valid_to) in rows
+            }
+
+        # bulk_create skips save(), so remaining and validity_status are filled in here
+        today = timezone.now().date()
+        balances = []
+        for (employee_id, leave_type_id, valid_from, valid_to), entitled in rows.items():
+            used = existing.get((employee_id, leave_type_id, valid_from, valid_to), Decimal('0'))
+            balances.append(LeaveBalance(
+                employee_id=employee_id,
+                leave_type_id=leave_type_id,
+                entitled=entitled,
+                used=used,
+                remaining=entitled - used,
+                valid_from=valid_from,
+                valid_to=valid_to,
+                validity_status=LeaveBalance.get_validity_status(valid_from, valid_to, today),
+            ))
+        LeaveBalance.objects.bulk_create(
+            balances,
+            batch_size=BALANCE_IMPORT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=BALANCE_UNIQUE_FIELDS,
+            update_fields=['entitled', 'remaining', 'validity_status', 'updated_at'],
+        )
+
+    updated_count = len(existing)
+    created_count = len(balances) - updated_count
+    return {
+        'success': True,
+        'message': (
+            f'Import completed. {created_count} records created, {updated_count} updated, '
+            f'{skipped_count} skipped.'
+        ),
+        'errors': errors if errors else None
+    }
@@ -1,4 +1,17 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationInbox, OutgoingEmail
 
 admin.site.register(Notification)
+
+@admin.register(NotificationInbox)
+class NotificationInboxAdmin(admin.ModelAdmin):
+    list_display = ['user', 'unread_count', 'unread_badge_count', 'updated_at']
+    search_fields = ['user__idnumber', 'user__firstname', 'user__lastname']
+    readonly_fields = ['updated_at']
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'source', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'source']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['created_at', 'last_attempt_at', 'sent_at']
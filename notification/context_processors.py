@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+from .inbox import get_recent_notifications, get_unread_counts
+
+def notification_inbox(request):
+    """
+    Navbar notifications and unread counters. Both are lazy so pages that do
+    not render the navbar (AJAX partials, logged-out pages) pay no queries.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'notification_inbox': SimpleLazyObject(lambda: get_unread_counts(user)),
+        'navbar_notifications': SimpleLazyObject(lambda: get_recent_notifications(user)),
+    }
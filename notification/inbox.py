@@ -0,0 +1,202 @@
+import base64
+from datetime import datetime
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+from .models import Notification, NotificationInbox, NotificationReadReceipt
+import logging
+
+logger = logging.getLogger(__name__)
+
+NAVBAR_NOTIFICATION_LIMIT = 10
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+
+def refresh_inbox(user_id):
+    """Recount a user's unread personal notifications (served by the recipient/is_read index)"""
+    counts = Notification.objects.filter(recipient_id=user_id, is_read=False).aggregate(
+        unread_count=Count('id'),
+        unread_badge_count=Count('id', filter=Q(notification_type__in=Notification.BADGE_NOTIFICATION_TYPES)),
+    )
+    inbox, _ = NotificationInbox.objects.update_or_create(user_id=user_id, defaults=counts)
+    return inbox
+
+
+def schedule_inbox_refresh(user_id):
+    """Refresh a user's counters once the current transaction commits"""
+    def refresh():
+        try:
+            refresh_inbox(user_id)
+        except Exception as e:
+            logger.error(f"Failed to refresh notification inbox for user {user_id}: {str(e)}")
+    transaction.on_commit(refresh)
+
+
+def get_inbox(user):
+    try:
+        return NotificationInbox.objects.get(user=user)
+    except NotificationInbox.DoesNotExist:
+        return refresh_inbox(user.pk)
+
+
+def create_broadcast(title, message, sender, module='overview', notification_type='general'):
+    """
+    Notify every employee with a single row. Read state lives in sparse
+    NotificationReadReceipt rows, so the broadcast costs O(1) writes regardless
+    of headcount.
+    """
+    return Notification.objects.create(
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        sender=sender,
+        recipient=None,
+        module=module,
+        for_all=True
+    )
+
+
+def _broadcasts_for(user):
+    # Employees only see broadcasts sent after their account was created
+    return Q(recipient__isnull=True, for_all=True, created_at__gte=user.created_at)
+
+
+def _unread_broadcasts_for(user, inbox):
+    unread = _broadcasts_for(user) & ~Q(Exists(
+        NotificationReadReceipt.objects.filter(notification=OuterRef('pk'), user=user)
+    ))
+    if inbox.broadcasts_read_through:
+        unread &= Q(created_at__gt=inbox.broadcasts_read_through)
+    return unread
+
+
+def visible_notifications(user):
+    """
+    Personal and broadcast notifications for a user in one queryset. Broadcast
+    rows carry ``has_receipt``; pass the results through apply_read_state
+    before reading ``is_read``.
+    """
+    return Notification.objects.filter(Q(recipient=user) | _broadcasts_for(user)).annotate(
+        has_receipt=Exists(NotificationReadReceipt.objects.filter(notification=OuterRef('pk'), user=user))
+    ).select_related('sender')
+
+
+def apply_read_state(notifications, inbox):
+    """Resolve ``is_read`` of broadcast rows from receipts and the mark-all watermark"""
+    read_through = inbox.broadcasts_read_through
+    for notification in notifications:
+        if notification.recipient_id is None:
+            notification.is_read = notification.has_receipt or bool(read_through and notification.created_at <= read_through)
+    return notifications
+
+
+def get_unread_counts(user, inbox=None):
+    """
+    Personal counters come from the denormalized inbox row; unread broadcasts
+    are counted with one aggregate over the (small) broadcast set.
+    """
+    inbox = inbox or get_inbox(user)
+    broadcasts = Notification.objects.filter(_unread_broadcasts_for(user, inbox)).aggregate(
+        unread_count=Count('id'),
+        unread_badge_count=Count('id', filter=Q(notification_type__in=Notification.BADGE_NOTIFICATION_TYPES)),
+    )
+    return {
+        'unread_count': inbox.unread_count + broadcasts['unread_count'],
+        'unread_badge_count': inbox.unread_badge_count + broadcasts['unread_badge_count'],
+    }
+
+
+def get_recent_notifications(user, limit=NAVBAR_NOTIFICATION_LIMIT):
+    notifications = list(visible_notifications(user).order_by('-created_at', '-id')[:limit])
+    return apply_read_state(notifications, get_inbox(user))
+
+
+def mark_notifications_read(user, notification_ids=None):
+    """
+    Mark the given notifications (or every unread one when ids is None) as read.
+
+    Personal rows are flipped with a single UPDATE. Selected broadcasts get a
+    read receipt each; "mark all" moves the user's broadcast watermark instead
+    and drops the receipts it makes redundant.
+
+    Returns:
+        tuple: (number of notifications marked, unread counts dict)
+    """
+    inbox = get_inbox(user)
+    personal = Notification.objects.filter(recipient=user, is_read=False)
+    broadcasts = Notification.objects.filter(_unread_broadcasts_for(user, inbox))
+
+    with transaction.atomic():
+        if notification_ids is not None:
+            personal = personal.filter(id__in=notification_ids)
+            broadcast_ids = list(broadcasts.filter(id__in=notification_ids).values_list('id', flat=True))
+            NotificationReadReceipt.objects.bulk_create(
+                [NotificationReadReceipt(notification_id=notification_id, user=user) for notification_id in broadcast_ids],
+                ignore_conflicts=True
+            )
+            broadcast_marked = len(broadcast_ids)
+        else:
+            broadcast_marked = broadcasts.count()
+            inbox.broadcasts_read_through = timezone.now()
+            inbox.save(update_fields=['broadcasts_read_through', 'updated_at'])
+            NotificationReadReceipt.objects.filter(user=user).delete()
+
+        updated = personal.update(is_read=True)
+
+    # queryset.update() does not send post_save, so recount here
+    inbox = refresh_inbox(user.pk)
+    return updated + broadcast_marked, get_unread_counts(user, inbox)
+
+
+def encode_cursor(notification):
+    raw = f"{notification.created_at.isoformat()}|{notification.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        created_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def get_feed_page(user, after=None, limit=FEED_PAGE_SIZE):
+    """
+    Keyset page of a user's personal and broadcast notifications, newest
+    first. ``after`` is the cursor of the last item of the previous page.
+
+    Returns:
+        tuple: (list of Notification, next cursor or None)
+    """
+    notifications = visible_notifications(user)
+    if after:
+        created_at, notification_id = decode_cursor(after)
+        notifications = notifications.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id)
+        )
+    page = list(notifications.order_by('-created_at', '-id')[:limit + 1])
+    has_more = len(page) > limit
+    page = apply_read_state(page[:limit], get_inbox(user))
+    return page, encode_cursor(page[-1]) if has_more else None
+
+
+def serialize_notification(notification):
+    sender = notification.sender
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'module': notification.module,
+        'is_read': notification.is_read,
+        'is_broadcast': notification.recipient_id is None,
+        'created_at': notification.created_at.isoformat(),
+        'sender': {
+            'name': sender.full_name,
+            'initials': f"{(sender.firstname or '')[:1]}{(sender.lastname or '')[:1]}",
+            'avatar': sender.avatar.url if sender.avatar else None,
+        },
+    }
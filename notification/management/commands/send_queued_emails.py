@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from notification.outbox import send_queued_emails
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails, one SMTP connection per batch, retrying transient failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when nothing is due',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send the messages that are due and exit instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Email outbox worker started'))
+        try:
+            while True:
+                totals = send_queued_emails()
+                if any(totals.values()):
+                    self.stdout.write(
+                        f"Sent {totals['sent']}, retrying {totals['retrying']}, failed {totals['failed']}"
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker...')
+
+        self.stdout.write(self.style.SUCCESS('Email outbox worker stopped'))
@@ -0,0 +1,66 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+# New-ticket notices were flagged for_all but are addressed to MIS; they stay personal
+PERSONAL_FOR_ALL_MODULES = ['ticketing/admin']
+BADGE_NOTIFICATION_TYPES = ['approved', 'disapproved', 'approval']
+
+
+def fold_for_all_notifications(apps, schema_editor):
+    """
+    Turn the for_all rows addressed to a recipient into recipient-less
+    broadcasts. Copies of one event (same content, sender and second) become a
+    single row, a recipient who had read it gets a read receipt, and the
+    personal unread counters of those recipients are recounted.
+    """
+    Notification = apps.get_model('notification', 'Notification')
+    NotificationInbox = apps.get_model('notification', 'NotificationInbox')
+    NotificationReadReceipt = apps.get_model('notification', 'NotificationReadReceipt')
+
+    Notification.objects.filter(for_all=True, module__in=PERSONAL_FOR_ALL_MODULES).update(for_all=False)
+    rows = Notification.objects.filter(for_all=True, recipient__isnull=False).order_by('created_at', 'pk')
+
+    kept = {}
+    receipts = set()
+    duplicates = []
+    recipients = set()
+    for row in rows.iterator():
+        key = (row.title, row.message, row.notification_type, row.sender_id, row.module, row.created_at.replace(microsecond=0))
+        broadcast_id = kept.setdefault(key, row.pk)
+        if broadcast_id != row.pk:
+            duplicates.append(row.pk)
+        if row.is_read:
+            receipts.add((broadcast_id, row.recipient_id))
+        recipients.add(row.recipient_id)
+
+    NotificationReadReceipt.objects.bulk_create(
+        [NotificationReadReceipt(notification_id=notification_id, user_id=user_id) for notification_id, user_id in receipts],
+        ignore_conflicts=True
+    )
+    Notification.objects.filter(pk__in=duplicates).delete()
+    Notification.objects.filter(pk__in=kept.values()).update(recipient=None, is_read=False)
+
+    counts = {
+        row['recipient_id']: row
+        for row in Notification.objects.filter(recipient_id__in=recipients, is_read=False).values('recipient_id').annotate(
+            unread_count=Count('id'),
+            unread_badge_count=Count('id', filter=Q(notification_type__in=BADGE_NOTIFICATION_TYPES)),
+        )
+    }
+    inboxes = list(NotificationInbox.objects.filter(user_id__in=recipients))
+    for inbox in inboxes:
+        row = counts.get(inbox.user_id, {})
+        inbox.unread_count = row.get('unread_count', 0)
+        inbox.unread_badge_count = row.get('unread_badge_count', 0)
+    NotificationInbox.objects.bulk_update(inboxes, ['unread_count', 'unread_badge_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0005_email_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_for_all_notifications, migrations.RunPython.noop),
+    ]
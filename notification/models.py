@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from userlogin.models import EmployeeLogin
 
 class Notification(models.Model):
@@ -10,11 +11,15 @@ class Notification(models.Model):
         ('approval', 'For Approval')
     ]
     
+    # Types counted on the navbar bell badge
+    BADGE_NOTIFICATION_TYPES = ['approved', 'disapproved', 'approval']
+    
     title = models.CharField(max_length=200)
     message = models.TextField()
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, default='general')
     sender = models.ForeignKey(EmployeeLogin, on_delete=models.CASCADE, related_name='sent_notifications')
-    recipient = models.ForeignKey(EmployeeLogin, on_delete=models.CASCADE, related_name='received_notifications')
+    # Broadcasts (for_all) have no recipient: one row serves every employee
+    recipient = models.ForeignKey(EmployeeLogin, on_delete=models.CASCADE, related_name='received_notifications', null=True, blank=True)
     is_read = models.BooleanField(default=False)
     module = models.CharField(max_length=20, default='overview')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -22,6 +27,83 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read', '-created_at'], name='notif_recipient_read_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_recipient_feed_idx'),
+        ]
         
     def __str__(self):
-        return f"{self.title} - {self.recipient.username}"
+        return f"{self.title} - {self.recipient.username if self.recipient else 'All employees'}"
+
+
+class NotificationInbox(models.Model):
+    """Denormalized unread counters per user, kept current by notification.signals"""
+    user = models.OneToOneField(EmployeeLogin, on_delete=models.CASCADE, related_name='notification_inbox')
+    unread_count = models.PositiveIntegerField(default=0)
+    unread_badge_count = models.PositiveIntegerField(default=0)
+    # Broadcasts created up to this moment count as read ("mark all as read")
+    broadcasts_read_through = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.unread_count} unread"
+
+
+class NotificationReadReceipt(models.Model):
+    """Sparse read state of a broadcast: a row exists only once a user has read it"""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='read_receipts')
+    user = models.ForeignKey(EmployeeLogin, on_delete=models.CASCADE, related_name='notification_receipts')
+    read_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('notification', 'user')
+    
+    def __str__(self):
+        return f"{self.notification.title} - read by {self.user.username}"
+
+
+class OutgoingEmail(models.Model):
+    """An email waiting in (or delivered from) the outbox; see notification.outbox"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default='plain')
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    # The module that queued the message (leave, certificate, finance, ...)
+    source = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outgoing_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class OutgoingEmailAttachment(models.Model):
+    """Attachment content is kept in the row so a rolled-back enqueue leaves nothing behind"""
+    email = models.ForeignKey(OutgoingEmail, on_delete=models.CASCADE, related_name='attachments')
+    filename = models.CharField(max_length=255)
+    mimetype = models.CharField(max_length=100)
+    content = models.BinaryField()
+
+    def __str__(self):
+        return self.filename
@@ -0,0 +1,261 @@
+"""
+Email outbox.
+
+Modules queue mail with enqueue_email instead of talking to SMTP inside the
+request: the message and its attachments are stored as an OutgoingEmail row
+and delivered once the transaction commits, by a thread in the web process
+(EMAIL_OUTBOX_RUN_IN_PROCESS) or by the send_queued_emails worker. In the web
+process, each flush sets a timer for the next retry that falls due, and the
+WSGI/ASGI entry points flush once at start-up for messages a previous process
+left queued.
+
+Delivery claims due messages in batches of EMAIL_OUTBOX_BATCH_SIZE and sends
+each batch over one SMTP connection, throttled to EMAIL_OUTBOX_RATE_PER_MINUTE
+(the provider's send rate). Transient failures are retried with
+exponential backoff (EMAIL_OUTBOX_RETRY_DELAY seconds, doubled per attempt)
+until EMAIL_OUTBOX_MAX_ATTEMPTS; each row keeps its attempt count and last
+error. Attachment content is dropped once a message is sent.
+"""
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from .models import OutgoingEmail, OutgoingEmailAttachment
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A message left in 'sending' for this long (its worker died) is claimed again
+SENDING_LEASE = timedelta(minutes=10)
+
+_executor = None
+_executor_lock = threading.Lock()
+# The pending delayed flush and when it fires
+_timer = None
+_timer_due = None
+_timer_lock = threading.Lock()
+
+
+class SendRateLimiter:
+    """Spaces out sends so at most ``per_minute`` leave per minute (0 disables throttling)"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self._next_send = 0.0
+
+    def wait(self):
+        now = time.monotonic()
+        if now < self._next_send:
+            time.sleep(self._next_send - now)
+            now = self._next_send
+        self._next_send = now + self.interval
+
+
+def is_transient_email_error(error):
+    """Connection drops, timeouts and 4xx SMTP replies are worth retrying; anything else is not"""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError, socket.timeout)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return False
+
+
+def enqueue_email(message, source=''):
+    """Queue an EmailMessage for delivery after the current transaction commits; returns the OutgoingEmail"""
+    with transaction.atomic():
+        email = OutgoingEmail.objects.create(
+            subject=message.subject,
+            body=message.body,
+            content_subtype=message.content_subtype,
+            from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            source=source,
+        )
+        OutgoingEmailAttachment.objects.bulk_create([
+            OutgoingEmailAttachment(
+                email=email,
+                filename=filename or 'attachment',
+                mimetype=mimetype or 'application/octet-stream',
+                content=content.encode() if isinstance(content, str) else content,
+            )
+            for filename, content, mimetype in message.attachments
+        ])
+        transaction.on_commit(_dispatch)
+    return email
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # One sender thread: concurrent flushes would only compete for the same rows
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+        return _executor
+
+
+def _dispatch():
+    if getattr(settings, 'EMAIL_OUTBOX_RUN_IN_PROCESS', True):
+        _get_executor().submit(_send_in_thread)
+    # Otherwise the send_queued_emails worker picks them up
+
+
+def start_in_process_delivery():
+    """Flush once when a web process starts, for messages a previous process left queued or retrying"""
+    _dispatch()
+
+
+def _send_in_thread():
+    try:
+        send_queued_emails()
+        _schedule_flush(next_due_at())
+    except Exception:
+        logger.exception('Email outbox flush failed')
+        # Try again later rather than waiting for the next message to be queued
+        _schedule_flush(timezone.now() + timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)))
+    finally:
+        connections.close_all()
+
+
+def next_due_at():
+    """When the next queued message (or a 'sending' one whose lease runs out) is due; None when none is waiting"""
+    pending = OutgoingEmail.objects.aggregate(
+        queued=Min('next_attempt_at', filter=Q(status='queued')),
+        sending=Min('last_attempt_at', filter=Q(status='sending')),
+    )
+    due = [pending['queued']] + ([pending['sending'] + SENDING_LEASE] if pending['sending'] else [])
+    due = [moment for moment in due if moment is not None]
+    return min(due) if due else None
+
+
+def _schedule_flush(due):
+    """Flush on the executor at ``due``, unless a flush is already set for that time or earlier"""
+    global _timer, _timer_due
+    if due is None:
+        return
+    with _timer_lock:
+        if _timer is not None and _timer.is_alive() and _timer_due <= due:
+            return
+        if _timer is not None:
+            _timer.cancel()
+        # At least a second out, so messages that fell due during a flush do not spin the thread
+        delay = max((due - timezone.now()).total_seconds(), 1)
+        _timer = threading.Timer(delay, _dispatch)
+        _timer.daemon = True
+        _timer_due = due
+        _timer.start()
+
+
+def _due(now):
+    return Q(status='queued', next_attempt_at__lte=now) | Q(status='sending', last_attempt_at__lt=now - SENDING_LEASE)
+
+
+def claim_due_emails(limit):
+    """Move up to ``limit`` due messages to 'sending'; a message can only be claimed by one worker"""
+    now = timezone.now()
+    claimed = []
+    candidates = OutgoingEmail.objects.filter(_due(now)).order_by('next_attempt_at', 'pk').values_list('pk', flat=True)
+    for pk in candidates[:limit]:
+        if OutgoingEmail.objects.filter(_due(now), pk=pk).update(
+            status='sending', attempts=F('attempts') + 1, last_attempt_at=now
+        ):
+            claimed.append(pk)
+    return list(OutgoingEmail.objects.filter(pk__in=claimed).prefetch_related('attachments').order_by('next_attempt_at', 'pk'))
+
+
+def build_message(email, connection=None):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        connection=connection,
+    )
+    message.content_subtype = email.content_subtype
+    for attachment in email.attachments.all():
+        message.attach(attachment.filename, bytes(attachment.content), attachment.mimetype)
+    return message
+
+
+def _record(email, error):
+    now = timezone.now()
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    retry_delay = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+
+    if error is None:
+        email.status, email.sent_at, email.last_error = 'sent', now, ''
+    elif is_transient_email_error(error) and email.attempts < max_attempts:
+        email.status, email.last_error = 'queued', str(error)
+        email.next_attempt_at = now + timedelta(seconds=retry_delay * 2 ** (email.attempts - 1))
+        logger.warning(f"Email {email.pk} to {email.to} failed (attempt {email.attempts}), retrying: {str(error)}")
+    else:
+        email.status, email.last_error = 'failed', str(error)
+        logger.error(f"Email {email.pk} to {email.to} failed after {email.attempts} attempt(s): {str(error)}")
+    email.save(update_fields=['status', 'sent_at', 'last_error', 'next_attempt_at'])
+
+    if email.status == 'sent':
+        email.attachments.all().delete()
+    return 'sent' if email.status == 'sent' else 'retrying' if email.status == 'queued' else 'failed'
+
+
+def _send_batch(batch, limiter):
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # The first send opens the connection again and records the failure
+        logger.warning(f"Could not open email connection: {str(e)}")
+
+    outcomes = []
+    try:
+        for email in batch:
+            limiter.wait()
+            try:
+                build_message(email, connection).send(fail_silently=False)
+                error = None
+            except Exception as e:
+                error = e
+            outcomes.append(_record(email, error))
+
+            if error is not None and is_transient_email_error(error):
+                # The connection may be gone; carry on with the batch over a fresh one
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception as reconnect_error:
+                    logger.warning(f"Email reconnect failed: {str(reconnect_error)}")
+    finally:
+        connection.close()
+    return outcomes
+
+
+def send_queued_emails(limit=None):
+    """
+    Deliver due messages, one SMTP connection per batch.
+
+    Returns:
+        dict: {'sent': int, 'retrying': int, 'failed': int}
+    """
+    batch_size = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    limiter = SendRateLimiter(getattr(settings, 'EMAIL_OUTBOX_RATE_PER_MINUTE', 60))
+    totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+    while True:
+        handled = sum(totals.values())
+        if limit is not None and handled >= limit:
+            break
+        batch = claim_due_emails(batch_size if limit is None else min(batch_size, limit - handled))
+        if not batch:
+            break
+        for outcome in _send_batch(batch, limiter):
+            totals[outcome] += 1
+    return totals
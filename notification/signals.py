@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .inbox import schedule_inbox_refresh
+from .models import Notification
+
+@receiver([post_save, post_delete], sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    # Broadcasts are counted at read time, so they never touch per-user counters
+    if instance.recipient_id is not None:
+        schedule_inbox_refresh(instance.recipient_id)
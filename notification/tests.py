@@ -1,3 +1,220 @@
-from django.test import TestCase
+import json
+import smtplib
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
+from django.apps import apps as django_apps
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from userlogin.models import EmployeeLogin
+from .inbox import create_broadcast, get_unread_counts
+from .models import Notification, NotificationInbox, NotificationReadReceipt, OutgoingEmail, OutgoingEmailAttachment
+from . import outbox
+from .outbox import enqueue_email, next_due_at, send_queued_emails
+
+class NotificationInboxTest(TestCase):
+    def setUp(self):
+        self.sender = EmployeeLogin.objects.create_user(idnumber='10000', username='sender', password='secret')
+        self.user = EmployeeLogin.objects.create_user(idnumber='10001', username='recipient', password='secret')
+        self.client.force_login(self.user)
+
+    def _notify(self, count, notification_type='approval'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [
+                Notification.objects.create(
+                    title=f'Notice {index}', message='Body', sender=self.sender,
+                    recipient=self.user, notification_type=notification_type
+                )
+                for index in range(count)
+            ]
+
+    def test_unread_counters_and_bulk_mark_read(self):
+        approvals = self._notify(3)
+        self._notify(2, notification_type='general')
+        inbox = NotificationInbox.objects.get(user=self.user)
+        self.assertEqual((inbox.unread_count, inbox.unread_badge_count), (5, 3))
+
+        response = self.client.post(
+            reverse('api_mark_notifications_read'),
+            data=json.dumps({'ids': [approvals[0].id, approvals[1].id]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(response.json()['unread_badge_count'], 1)
+
+        response = self.client.post(
+            reverse('api_mark_notifications_read'), data=json.dumps({'all': True}), content_type='application/json'
+        )
+        self.assertEqual(response.json()['unread_count'], 0)
+        self.assertFalse(Notification.objects.filter(recipient=self.user, is_read=False).exists())
+
+    def test_feed_pages_with_cursor(self):
+        created = self._notify(5)
+        seen = []
+        after = ''
+        while True:
+            data = self.client.get(reverse('api_notification_feed'), {'after': after, 'limit': 2}).json()
+            seen.extend(item['id'] for item in data['notifications'])
+            if not data['has_more']:
+                break
+            after = data['next_cursor']
+
+        self.assertEqual(seen, [notification.id for notification in reversed(created)])
+        response = self.client.get(reverse('api_notification_feed'), {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_broadcast_is_one_row_with_sparse_receipts(self):
+        other = EmployeeLogin.objects.create_user(idnumber='10002', username='other', password='secret')
+        self._notify(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_broadcast('Payslip', 'Uploaded', self.sender, notification_type='approved')
+            create_broadcast('Survey', 'New survey', self.sender)
+        self.assertEqual(Notification.objects.filter(recipient__isnull=True).count(), 2)
+        self.assertEqual(get_unread_counts(other), {'unread_count': 2, 'unread_badge_count': 1})
+        self.assertEqual(get_unread_counts(self.user), {'unread_count': 3, 'unread_badge_count': 2})
+
+        response = self.client.post(reverse('api_mark_notification_read', args=[first.id]))
+        self.assertEqual(response.json()['unread_badge_count'], 1)
+        self.assertEqual(NotificationReadReceipt.objects.count(), 1)
+        self.assertEqual(get_unread_counts(other)['unread_count'], 2)
+
+        feed = self.client.get(reverse('api_notification_feed')).json()['notifications']
+        self.assertEqual([item['is_read'] for item in feed], [False, True, False])
+
+        self.client.post(reverse('api_mark_notifications_read'), data=json.dumps({'all': True}), content_type='application/json')
+        self.assertEqual(get_unread_counts(self.user)['unread_count'], 0)
+        self.assertFalse(NotificationReadReceipt.objects.exists())
+        late_joiner = EmployeeLogin.objects.create_user(idnumber='10003', username='late', password='secret')
+        self.assertEqual(get_unread_counts(late_joiner)['unread_count'], 0)
+
+    def test_migration_folds_addressed_for_all_rows_into_broadcasts(self):
+        fold = import_module('notification.migrations.0006_fold_for_all_notifications').fold_for_all_notifications
+        with self.captureOnCommitCallbacks(execute=True):
+            legacy = [
+                Notification.objects.create(
+                    title='Payslip', message='Uploaded', sender=self.sender, recipient=recipient,
+                    module='finance', for_all=True, is_read=recipient == self.user
+                )
+                for recipient in (self.user, self.sender)
+            ]
+            ticket = Notification.objects.create(
+                title='New Ticket Created', message='Body', notification_type='approval', sender=self.sender,
+                recipient=self.user, module='ticketing/admin', for_all=True
+            )
+        # The same second, so both rows are copies of one event
+        Notification.objects.filter(pk__in=[row.pk for row in legacy]).update(created_at=legacy[0].created_at)
+        self.assertEqual(NotificationInbox.objects.get(user=self.sender).unread_count, 1)
+
+        fold(django_apps, None)
+        broadcast = Notification.objects.get(title='Payslip')
+        self.assertEqual((broadcast.pk, broadcast.recipient_id), (legacy[0].pk, None))
+        self.assertEqual(list(NotificationReadReceipt.objects.values_list('notification', 'user')), [(broadcast.pk, self.user.pk)])
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.recipient, ticket.for_all), (self.user, False))
+        self.assertEqual(get_unread_counts(self.sender), {'unread_count': 1, 'unread_badge_count': 0})
+        self.assertEqual(get_unread_counts(self.user), {'unread_count': 1, 'unread_badge_count': 1})
+
+
+@override_settings(
+    EMAIL_OUTBOX_RUN_IN_PROCESS=False, EMAIL_OUTBOX_BATCH_SIZE=2, EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=60,
+    EMAIL_OUTBOX_RATE_PER_MINUTE=0,
+)
+class EmailOutboxTest(TestCase):
+    def _message(self, to='a@example.com'):
+        message = EmailMessage(subject='Payslip', body='<p>Hi</p>', from_email='hr@example.com', to=[to])
+        message.content_subtype = 'html'
+        message.attach('payslip.pdf', b'%PDF-1.4', 'application/pdf')
+        return message
+
+    def test_queued_mail_is_sent_after_commit_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for index in range(3):
+                enqueue_email(self._message(f'{index}@example.com'), source='finance.payslip')
+        self.assertEqual(len(callbacks), 3)
+        # Nothing reaches SMTP inside the request
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(send_queued_emails(), {'sent': 3, 'retrying': 0, 'failed': 0})
+
+        self.assertEqual([message.to for message in mail.outbox], [['0@example.com'], ['1@example.com'], ['2@example.com']])
+        self.assertEqual(mail.outbox[0].content_subtype, 'html')
+        self.assertEqual(mail.outbox[0].attachments[0][:2], ('payslip.pdf', b'%PDF-1.4'))
+        self.assertEqual(set(OutgoingEmail.objects.values_list('status', 'attempts')), {('sent', 1)})
+        self.assertFalse(OutgoingEmailAttachment.objects.exists())
+
+        with mock.patch('notification.outbox.get_connection', wraps=locmem.EmailBackend) as get_connection:
+            enqueue_email(self._message())
+            enqueue_email(self._message())
+            enqueue_email(self._message())
+            send_queued_emails()
+        # Two messages per connection
+        self.assertEqual(get_connection.call_count, 2)
+
+    @override_settings(EMAIL_OUTBOX_RATE_PER_MINUTE=30)
+    def test_sends_are_throttled_to_the_provider_rate(self):
+        for index in range(3):
+            enqueue_email(self._message(f'{index}@example.com'))
+        with mock.patch('notification.outbox.time.sleep') as sleep:
+            send_queued_emails()
+        # Two seconds apart; the first message goes out at once
+        self.assertEqual(sleep.call_count, 2)
+        self.assertAlmostEqual(sleep.call_args_list[0].args[0], 2, places=1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_transient_failures_back_off_and_permanent_ones_fail(self):
+        flaky = enqueue_email(self._message('flaky@example.com'))
+        refused = enqueue_email(self._message('refused@example.com'))
+        original_send = locmem.EmailBackend.send_messages
+
+        def send(backend, messages):
+            if messages[0].to == ['refused@example.com']:
+                raise smtplib.SMTPRecipientsRefused({'refused@example.com': (550, b'No such user')})
+            if not getattr(send, 'failed', False):
+                send.failed = True
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            return original_send(backend, messages)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', send):
+            self.assertEqual(send_queued_emails(), {'sent': 0, 'retrying': 1, 'failed': 1})
+            flaky.refresh_from_db()
+            self.assertEqual((flaky.status, flaky.attempts), ('queued', 1))
+            self.assertIn('unexpectedly closed', flaky.last_error)
+            self.assertGreater(flaky.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+            # Not due yet
+            self.assertEqual(send_queued_emails(), {'sent': 0, 'retrying': 0, 'failed': 0})
+            OutgoingEmail.objects.filter(pk=flaky.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(send_queued_emails(), {'sent': 1, 'retrying': 0, 'failed': 0})
+
+        flaky.refresh_from_db()
+        refused.refresh_from_db()
+        self.assertEqual((flaky.status, flaky.attempts, flaky.last_error), ('sent', 2, ''))
+        self.assertEqual((refused.status, refused.attempts), ('failed', 1))
+        self.assertEqual([message.to for message in mail.outbox], [['flaky@example.com']])
+
+    def test_a_flush_is_scheduled_for_the_next_retry(self):
+        self.assertIsNone(next_due_at())
+        retry_at = timezone.now() + timedelta(minutes=2)
+        later = enqueue_email(self._message())
+        soon = enqueue_email(self._message())
+        OutgoingEmail.objects.filter(pk=later.pk).update(next_attempt_at=retry_at + timedelta(minutes=5))
+        OutgoingEmail.objects.filter(pk=soon.pk).update(next_attempt_at=retry_at)
+        self.assertEqual(next_due_at(), retry_at)
+
+        with mock.patch('notification.outbox.threading.Timer') as timer, \
+                mock.patch.multiple(outbox, _timer=None, _timer_due=None):
+            timer.return_value.is_alive.return_value = True
+            outbox._schedule_flush(next_due_at())
+            outbox._schedule_flush(retry_at + timedelta(minutes=5))  # A later flush does not replace it
+            outbox._schedule_flush(retry_at - timedelta(minutes=1))  # An earlier one does
+            outbox._schedule_flush(None)
+        self.assertEqual(timer.call_count, 2)
+        self.assertAlmostEqual(timer.call_args_list[0].args[0], 120, delta=5)
+        self.assertAlmostEqual(timer.call_args_list[1].args[0], 60, delta=5)
+        timer.return_value.cancel.assert_called_once()
+        self.assertTrue(timer.return_value.daemon)
 
-# Create your tests here.
@@ -4,5 +4,7 @@ from . import views
 urlpatterns = [
     path('', views.notification_list, name='notification_view'),
     path('api/mark-read/<int:notification_id>/', views.api_mark_notification_read, name='api_mark_notification_read'),
+    path('api/mark-read/', views.api_mark_notifications_read, name='api_mark_notifications_read'),
+    path('api/feed', views.api_notification_feed, name='api_notification_feed'),
 
 ]
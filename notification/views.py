@@ -5,14 +5,20 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from .models import Notification
+from .inbox import (
+    FEED_PAGE_SIZE, FEED_MAX_PAGE_SIZE, apply_read_state, get_feed_page, get_inbox,
+    mark_notifications_read, serialize_notification, visible_notifications,
+)
+import json
 
 @login_required
 def notification_list(request):
-    notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
+    notifications = visible_notifications(request.user).order_by('-created_at', '-id')
     
     paginator = Paginator(notifications, 20)  # Show 20 notifications per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = apply_read_state(list(page_obj.object_list), get_inbox(request.user))
     
     context = {
         'active_page': 'notifications',
@@ -26,13 +32,13 @@ def notification_list(request):
 def api_mark_notification_read(request, notification_id):
     """API endpoint to mark a notification as read"""
     try:
-        notification = Notification.objects.get(id=notification_id, recipient=request.user)
-        notification.is_read = True
-        notification.save()
+        notification = visible_notifications(request.user).get(id=notification_id)
+        _, counts = mark_notifications_read(request.user, [notification.id])
         
         return JsonResponse({
             'success': True,
-            'message': 'Notification marked as read'
+            'message': 'Notification marked as read',
+            **counts
         })
     except Notification.DoesNotExist:
         return JsonResponse({
@@ -45,4 +51,69 @@ def api_mark_notification_read(request, notification_id):
             'error': str(e)
         }, status=500)
 
+@login_required
+@require_http_methods(["POST"])
+def api_mark_notifications_read(request):
+    """API endpoint to mark selected notifications (``ids``) or all of them (``all``) as read"""
+    try:
+        data = json.loads(request.body or '{}')
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON payload'
+        }, status=400)
+
+    if data.get('all'):
+        notification_ids = None
+    else:
+        notification_ids = data.get('ids')
+        if not isinstance(notification_ids, list) or not notification_ids:
+            return JsonResponse({
+                'success': False,
+                'error': 'Provide a list of notification ids or set "all" to true'
+            }, status=400)
+        try:
+            notification_ids = [int(notification_id) for notification_id in notification_ids]
+        except (TypeError, ValueError):
+            return JsonResponse({
+                'success': False,
+                'error': 'Notification ids must be integers'
+            }, status=400)
+
+    try:
+        updated, counts = mark_notifications_read(request.user, notification_ids)
+        return JsonResponse({
+            'success': True,
+            'message': f'{updated} notification(s) marked as read',
+            'updated': updated,
+            **counts
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+@login_required
+@require_http_methods(["GET"])
+def api_notification_feed(request):
+    """Cursor-paginated JSON feed of the user's notifications, newest first"""
+    try:
+        limit = min(max(int(request.GET.get('limit', FEED_PAGE_SIZE)), 1), FEED_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = FEED_PAGE_SIZE
+
+    try:
+        notifications, next_cursor = get_feed_page(request.user, after=request.GET.get('after'), limit=limit)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
 
+    return JsonResponse({
+        'success': True,
+        'notifications': [serialize_notification(notification) for notification in notifications],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import Max
 from django.utils import timezone
 from userlogin.models import EmployeeLogin
+from generalsettings.sequences import max_numeric, next_value
 import datetime
 
 class PRFRequest(models.Model):
@@ -62,20 +64,10 @@ class PRFRequest(models.Model):
     @classmethod
     def generate_prf_control_number(cls):
         """Generate PRF control number starting from 1000"""
-        latest_prf = cls.objects.filter(
-            prf_control_number__isnull=False
-        ).exclude(prf_control_number='').order_by('-prf_control_number').first()
-        
-        if latest_prf and latest_prf.prf_control_number:
-            try:
-                last_number = int(latest_prf.prf_control_number)
-                next_number = last_number + 1
-            except (ValueError, TypeError):
-                next_number = 1000
-        else:
-            next_number = 1000
-        
-        return str(next_number)
+        return str(next_value(
+            'prf_request',
+            seed=lambda: max_numeric(cls.objects.all(), 'prf_control_number') or 999
+        ))
     
     def save(self, *args, **kwargs):
         # Auto-generate PRF control number if not set
@@ -148,24 +140,18 @@ class EmergencyLoan(models.Model):
         """Generate Emergency Loan control number in format EL[Year][Incremental Number]"""
         current_year = timezone.now().year
         year_prefix = f"EL{current_year}"
-        
-        # Find the latest Emergency Loan for the current year
-        latest_loan = cls.objects.filter(
-            prf_request__control_number__startswith=year_prefix
-        ).order_by('-prf_request__control_number').first()
-        
-        if latest_loan:
-            # Extract the incremental number from the control number
-            control_number = latest_loan.prf_request.control_number
+
+        def seed():
+            # Continue after the latest Emergency Loan already numbered this year
+            latest = PRFRequest.objects.filter(control_number__startswith=year_prefix).aggregate(
+                latest=Max('control_number')
+            )['latest']
             try:
-                last_number = int(control_number[6:])  # Extract last 4 digits
-                next_number = last_number + 1
-            except (ValueError, IndexError):
-                next_number = 1
-        else:
-            next_number = 1
-        
-        return f"{year_prefix}{next_number:04d}"
+                return int(latest[6:])
+            except (TypeError, ValueError):
+                return 0
+
+        return f"{year_prefix}{next_value(f'emergency_loan:{year_prefix}', seed=seed):04d}"
     
     @classmethod
     def get_cutoff_choices(cls, amount):
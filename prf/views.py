@@ -1,14 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse, Http404
+from django.http import JsonResponse, Http404
 from django.db.models import Q, Count
 from django.core.paginator import Paginator
 from django.utils import timezone
 from datetime import timedelta, datetime
 import calendar
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.styles import Font, Alignment
 from openpyxl.chart import BarChart, PieChart, Reference
 from openpyxl.chart.series import DataPoint
 import json
@@ -19,6 +18,7 @@ from .models import PRFRequest, EmergencyLoan
 from .forms import PRFRequestForm, PRFFilterForm, PRFActionForm, EmergencyLoanForm
 from notification.models import Notification
 from finance.models import Loan, LoanType
+from empconnect.exports import ExportWorkbook, CENTER, THIN_BORDER, iterate, solid_fill
 
 def get_chart_data(request, period):
     """Generate chart data based on period and filters"""
@@ -587,6 +587,31 @@ def get_admin_prf_detail(request, prf_id):
     
     return JsonResponse(data)
 
+PRF_EXPORT_STYLES = {
+    'prf_header': {
+        'font': Font(bold=True, color='FFFFFF'), 'fill': solid_fill('366092'),
+        'alignment': CENTER, 'border': THIN_BORDER,
+    },
+    'prf_pending': {'fill': solid_fill('FFFFE0'), 'border': THIN_BORDER},
+    'prf_cancelled': {'fill': solid_fill('FFA500'), 'border': THIN_BORDER},
+    'prf_report_title': {'font': Font(bold=True, size=16)},
+    'prf_company_title': {'font': Font(bold=True, size=16), 'alignment': Alignment(horizontal='left', vertical='center')},
+    'prf_company_subtitle': {'font': Font(italic=True, size=12), 'alignment': Alignment(horizontal='left', vertical='center')},
+    'prf_loan_header': {
+        'font': Font(bold=True), 'fill': solid_fill('FFFF00'),
+        'alignment': Alignment(horizontal='center', vertical='center', wrap_text=True), 'border': THIN_BORDER,
+    },
+    'prf_loan_cell': {'border': THIN_BORDER, 'alignment': Alignment(wrap_text=True)},
+}
+
+# Status cell styles on the PRF Requests sheet
+PRF_STATUS_STYLES = {
+    'approved': 'status_approved',
+    'disapproved': 'status_disapproved',
+    'pending': 'prf_pending',
+    'cancelled': 'prf_cancelled',
+}
+
 @login_required
 def export_prfs(request):
     if not request.user.hr_admin and not request.user.accounting_admin:
@@ -605,316 +630,186 @@ def export_prfs(request):
     if end_date:
         prfs = prfs.filter(created_at__date__lte=end_date)
     
-    wb = Workbook()
+    workbook = ExportWorkbook(styles=PRF_EXPORT_STYLES)
     
     # Sheet 1: PRF Requests
-    ws1 = wb.active
-    ws1.title = "PRF Requests"
+    ws1 = workbook.create_sheet("PRF Requests", widths=[16, 16, 14, 28, 20, 28, 18, 50, 14, 40])
     
-    # Define colors for status
-    green_fill = PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid')
-    red_fill = PatternFill(start_color='FFB6C1', end_color='FFB6C1', fill_type='solid')
-    yellow_fill = PatternFill(start_color='FFFFE0', end_color='FFFFE0', fill_type='solid')
-    orange_fill = PatternFill(start_color='FFA500', end_color='FFA500', fill_type='solid')
-    
-    # Headers for Sheet 1
     headers = [
         'Date Requested', 'PRF Number', 'ID Number', 'Employee Name', 'PRF Category', 
         'PRF Type', 'Control Number', 'Purpose of Request', 'Status', 'Remarks'
     ]
+    ws1.append(headers, style='prf_header')
     
-    for col, header in enumerate(headers, 1):
-        cell = ws1.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True, color='FFFFFF')
-        cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-    
-    # Data for Sheet 1
-    for row, prf in enumerate(prfs, 2):
-        ws1.cell(row=row, column=1, value=prf.created_at.strftime('%Y-%m-%d'))
-        ws1.cell(row=row, column=2, value=prf.prf_control_number or 'N/A')
-        ws1.cell(row=row, column=3, value=prf.employee.idnumber or 'N/A')
-        ws1.cell(row=row, column=4, value=f"{prf.employee.firstname} {prf.employee.lastname}")
-        ws1.cell(row=row, column=5, value=prf.get_prf_category_display())
-        ws1.cell(row=row, column=6, value=prf.get_prf_type_display())
-        ws1.cell(row=row, column=7, value=prf.control_number or 'N/A')
-        ws1.cell(row=row, column=8, value=prf.purpose)
-        
-        # Status cell with color coding
-        status_cell = ws1.cell(row=row, column=9, value=prf.get_status_display())
-        if prf.status == 'approved':
-            status_cell.fill = green_fill
-        elif prf.status == 'disapproved':
-            status_cell.fill = red_fill
-        elif prf.status == 'pending':
-            status_cell.fill = yellow_fill
-        elif prf.status == 'cancelled':
-            status_cell.fill = orange_fill
-        
-        ws1.cell(row=row, column=10, value=prf.admin_remarks or 'No remarks')
-        
-        # Add borders to all cells
-        for col in range(1, 11):
-            ws1.cell(row=row, column=col).border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-    
-    # Auto-adjust column widths
-    for column in ws1.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws1.column_dimensions[column_letter].width = adjusted_width
+    for prf in iterate(prfs):
+        ws1.append([
+            prf.created_at.strftime('%Y-%m-%d'),
+            prf.prf_control_number or 'N/A',
+            prf.employee.idnumber or 'N/A',
+            f"{prf.employee.firstname} {prf.employee.lastname}",
+            prf.get_prf_category_display(),
+            prf.get_prf_type_display(),
+            prf.control_number or 'N/A',
+            prf.purpose,
+            prf.get_status_display(),
+            prf.admin_remarks or 'No remarks',
+        ], style='cell', styles={8: PRF_STATUS_STYLES.get(prf.status)})
     
     # Sheet 2: PRF Overview
-    ws2 = wb.create_sheet("PRF Overview")
+    ws2 = workbook.create_sheet("PRF Overview", widths=[40, 20])
     
     # Summary statistics
-    total_requests = prfs.count()
-    approved_count = prfs.filter(status='approved').count()
-    disapproved_count = prfs.filter(status='disapproved').count()
-    pending_count = prfs.filter(status='pending').count()
-    cancelled_count = prfs.filter(status='cancelled').count()
+    status_counts = prfs.aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(status='approved')),
+        disapproved=Count('id', filter=Q(status='disapproved')),
+        pending=Count('id', filter=Q(status='pending')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+    )
+    total_requests = status_counts['total']
     
     # PRF Type summary
-    prf_type_summary = prfs.values('prf_type').annotate(count=Count('id')).order_by('-count')
+    prf_type_summary = list(prfs.values('prf_type').annotate(count=Count('id')).order_by('-count'))
     
     # PRF Category summary
-    prf_category_summary = prfs.values('prf_category').annotate(count=Count('id')).order_by('-count')
+    prf_category_summary = list(prfs.values('prf_category').annotate(count=Count('id')).order_by('-count'))
     
-    # Write summary data
-    ws2.cell(row=1, column=1, value="PRF Requests Summary Report").font = Font(bold=True, size=16)
-    ws2.cell(row=2, column=1, value=f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    prf_type_names = dict(PRFRequest.PRF_TYPES)
+    prf_category_names = dict(PRFRequest.PRF_CATEGORIES)
+    
+    ws2.append(["PRF Requests Summary Report"], style='prf_report_title')
+    ws2.append([f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"])
+    ws2.blank()
     
     # Overall statistics
-    ws2.cell(row=4, column=1, value="Overall Statistics").font = Font(bold=True, size=14)
-    ws2.cell(row=5, column=1, value="Total Requests:").font = Font(bold=True)
-    ws2.cell(row=5, column=2, value=total_requests)
-    ws2.cell(row=6, column=1, value="Approved:").font = Font(bold=True)
-    ws2.cell(row=6, column=2, value=approved_count)
-    ws2.cell(row=7, column=1, value="Disapproved:").font = Font(bold=True)
-    ws2.cell(row=7, column=2, value=disapproved_count)
-    ws2.cell(row=8, column=1, value="Pending:").font = Font(bold=True)
-    ws2.cell(row=8, column=2, value=pending_count)
-    ws2.cell(row=9, column=1, value="Cancelled:").font = Font(bold=True)
-    ws2.cell(row=9, column=2, value=cancelled_count)
+    ws2.append(["Overall Statistics"], style='title')
+    for label, key in [("Total Requests:", 'total'), ("Approved:", 'approved'), ("Disapproved:", 'disapproved'),
+                       ("Pending:", 'pending'), ("Cancelled:", 'cancelled')]:
+        ws2.append([label, status_counts[key]], styles={0: 'heading'})
+    ws2.blank()
     
     # PRF Type breakdown
-    ws2.cell(row=11, column=1, value="PRF Type Breakdown").font = Font(bold=True, size=14)
-    ws2.cell(row=12, column=1, value="PRF Type").font = Font(bold=True)
-    ws2.cell(row=12, column=2, value="Count").font = Font(bold=True)
-    
-    for i, item in enumerate(prf_type_summary, 13):
-        ws2.cell(row=i, column=1, value=dict(PRFRequest.PRF_TYPES)[item['prf_type']])
-        ws2.cell(row=i, column=2, value=item['count'])
+    ws2.append(["PRF Type Breakdown"], style='title')
+    ws2.append(["PRF Type", "Count"], style='heading')
+    for item in prf_type_summary:
+        ws2.append([prf_type_names[item['prf_type']], item['count']])
     
     # PRF Category breakdown
-    start_row = 13 + len(prf_type_summary)
-    ws2.cell(row=start_row, column=1, value="PRF Category Breakdown").font = Font(bold=True, size=14)
-    ws2.cell(row=start_row + 1, column=1, value="Category").font = Font(bold=True)
-    ws2.cell(row=start_row + 1, column=2, value="Count").font = Font(bold=True)
+    ws2.append(["PRF Category Breakdown"], style='title')
+    ws2.append(["Category", "Count"], style='heading')
+    for item in prf_category_summary:
+        ws2.append([prf_category_names[item['prf_category']], item['count']])
     
-    for i, item in enumerate(prf_category_summary, start_row + 2):
-        ws2.cell(row=i, column=1, value=dict(PRFRequest.PRF_CATEGORIES)[item['prf_category']])
-        ws2.cell(row=i, column=2, value=item['count'])
-    
-    # Create charts
-    chart_start_row = start_row + 2 + len(prf_category_summary) + 3
+    ws2.blank(3)
     
     # Status Distribution Pie Chart
     if total_requests > 0:
-        ws2.cell(row=chart_start_row, column=1, value="Status Distribution").font = Font(bold=True, size=14)
-        
-        # Create data for pie chart
-        chart_data_start = chart_start_row + 2
-        ws2.cell(row=chart_data_start, column=1, value="Status")
-        ws2.cell(row=chart_data_start, column=2, value="Count")
+        section_row = ws2.append(["Status Distribution"], style='title')
+        ws2.blank()
         
         status_data = [
-            ("Approved", approved_count),
-            ("Disapproved", disapproved_count),
-            ("Pending", pending_count),
-            ("Cancelled", cancelled_count)
+            ("Approved", status_counts['approved']),
+            ("Disapproved", status_counts['disapproved']),
+            ("Pending", status_counts['pending']),
+            ("Cancelled", status_counts['cancelled'])
         ]
         
-        for i, (status, count) in enumerate(status_data, chart_data_start + 1):
-            ws2.cell(row=i, column=1, value=status)
-            ws2.cell(row=i, column=2, value=count)
+        chart_data_start = ws2.append(["Status", "Count"])
+        for status, count in status_data:
+            ws2.append([status, count])
         
-        # Create pie chart
         pie = PieChart()
         pie.title = "PRF Status Distribution"
-        data = Reference(ws2, min_col=2, min_row=chart_data_start, max_row=chart_data_start + len(status_data))
-        titles = Reference(ws2, min_col=1, min_row=chart_data_start + 1, max_row=chart_data_start + len(status_data))
+        data = Reference(ws2.worksheet, min_col=2, min_row=chart_data_start, max_row=chart_data_start + len(status_data))
+        titles = Reference(ws2.worksheet, min_col=1, min_row=chart_data_start + 1, max_row=chart_data_start + len(status_data))
         pie.add_data(data, titles_from_data=True)
         pie.set_categories(titles)
         pie.height = 15
         pie.width = 20
         
-        ws2.add_chart(pie, f"D{chart_start_row + 2}")
+        ws2.add_chart(pie, f"D{section_row + 2}")
+        
+        # Leave room for the pie chart before the next section
+        ws2.blank(section_row + 20 - ws2.row_count - 1)
     
     # PRF Type Bar Chart
-    if len(prf_type_summary) > 0:
-        chart_start_row += 20
-        ws2.cell(row=chart_start_row, column=1, value="PRF Type Distribution").font = Font(bold=True, size=14)
-        
-        # Create data for bar chart
-        chart_data_start = chart_start_row + 2
-        ws2.cell(row=chart_data_start, column=1, value="PRF Type")
-        ws2.cell(row=chart_data_start, column=2, value="Count")
+    if prf_type_summary:
+        section_row = ws2.append(["PRF Type Distribution"], style='title')
+        ws2.blank()
         
-        for i, item in enumerate(prf_type_summary, chart_data_start + 1):
-            ws2.cell(row=i, column=1, value=dict(PRFRequest.PRF_TYPES)[item['prf_type']])
-            ws2.cell(row=i, column=2, value=item['count'])
+        chart_data_start = ws2.append(["PRF Type", "Count"])
+        for item in prf_type_summary:
+            ws2.append([prf_type_names[item['prf_type']], item['count']])
         
-        # Create bar chart
         bar = BarChart()
         bar.title = "PRF Type Distribution"
         bar.style = 10
         bar.x_axis.title = "PRF Type"
         bar.y_axis.title = "Count"
         
-        data = Reference(ws2, min_col=2, min_row=chart_data_start, max_row=chart_data_start + len(prf_type_summary))
-        cats = Reference(ws2, min_col=1, min_row=chart_data_start + 1, max_row=chart_data_start + len(prf_type_summary))
+        data = Reference(ws2.worksheet, min_col=2, min_row=chart_data_start, max_row=chart_data_start + len(prf_type_summary))
+        cats = Reference(ws2.worksheet, min_col=1, min_row=chart_data_start + 1, max_row=chart_data_start + len(prf_type_summary))
         bar.add_data(data, titles_from_data=True)
         bar.set_categories(cats)
         bar.height = 15
         bar.width = 25
         
-        ws2.add_chart(bar, f"D{chart_start_row + 2}")
-    
-    # Auto-adjust column widths for sheet 2
-    for column in ws2.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws2.column_dimensions[column_letter].width = adjusted_width
+        ws2.add_chart(bar, f"D{section_row + 2}")
 
     # Sheet 3: Emergency Loan (if Emergency Loan PRF type is selected)
     if prf_type == 'emergency_loan':
         emergency_prfs = prfs.filter(prf_type='emergency_loan')
-        emergency_loans = EmergencyLoan.objects.filter(prf_request__in=emergency_prfs).select_related('prf_request__employee')
+        emergency_loans = EmergencyLoan.objects.filter(prf_request__in=emergency_prfs).select_related(
+            'prf_request__employee__employment_info__position',
+            'prf_request__employee__employment_info__department',
+        )
         
         if emergency_loans.exists():
-            ws3 = wb.create_sheet("Emergency Loan")
-            
-            # Header
-            ws3.merge_cells('A1:L1')
-            header_cell = ws3.cell(row=1, column=1, value="RYONAN ELECTRIC PHILIPPINES")
-            header_cell.font = Font(bold=True, size=16)
-            header_cell.alignment = Alignment(horizontal='left', vertical='center')
+            ws3 = workbook.create_sheet("Emergency Loan", widths=[18, 20, 14, 28, 20, 20, 30, 14, 20, 22, 20, 16, 22, 20])
             
-            # Subheader
-            ws3.merge_cells('A2:L2')
+            ws3.title("RYONAN ELECTRIC PHILIPPINES", style='prf_company_title', span=12)
             date_range = f"Emergency Loan Summary for ({start_date if start_date else 'Start'} to {end_date if end_date else 'End'})"
-            subheader_cell = ws3.cell(row=2, column=1, value=date_range)
-            subheader_cell.font = Font(italic=True, size=12)
-            subheader_cell.alignment = Alignment(horizontal='left', vertical='center')
+            ws3.title(date_range, style='prf_company_subtitle', span=12)
+            ws3.blank()
             
-            # Headers for Emergency Loan sheet
             emergency_headers = [
                 'PRF Number', 'Date', 'Id Number', 'Employee Name', 'Position', 
                 'Department', 'Purpose', 'Status', 'EL Control Number', 
                 'Emergency Loan Amount', 'Terms of Deduction', 'Start Deduction', 
                 'Deduction Per Cut-Off', 'Account Number'
             ]
+            ws3.append(emergency_headers, style='prf_loan_header')
             
-            # Yellow highlight fill for headers
-            yellow_fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-            
-            # Create headers with bold and yellow highlight
-            for col, header in enumerate(emergency_headers, 1):
-                cell = ws3.cell(row=4, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.fill = yellow_fill
-                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                cell.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-            
-            # Data for Emergency Loan sheet
-            for row, loan in enumerate(emergency_loans, 5):
+            for loan in iterate(emergency_loans):
                 prf = loan.prf_request
                 employee = prf.employee
                 
-                ws3.cell(row=row, column=1, value=prf.prf_control_number or 'N/A')
-                ws3.cell(row=row, column=2, value=timezone.localtime(prf.created_at).strftime('%Y-%m-%d %I:%M %p'))
-                ws3.cell(row=row, column=3, value=employee.idnumber or 'N/A')
-                ws3.cell(row=row, column=4, value=f"{employee.firstname} {employee.lastname}")
-                ws3.cell(row=row, column=5, value=employee.employment_info.position.position or 'N/A')
-                ws3.cell(row=row, column=6, value=employee.employment_info.department.department_name or 'N/A')
-                ws3.cell(row=row, column=7, value=prf.purpose)
-                ws3.cell(row=row, column=8, value=prf.get_status_display())
-                ws3.cell(row=row, column=9, value=prf.control_number or 'N/A')
-                
                 # Show ₱0 for cancelled or disapproved emergency loans
                 if prf.status in ['cancelled', 'disapproved']:
-                    ws3.cell(row=row, column=10, value="₱0")
-                    ws3.cell(row=row, column=13, value="₱0.00")
+                    amount = "₱0"
+                    deduction = "₱0.00"
                 else:
-                    ws3.cell(row=row, column=10, value=f"₱{loan.amount:,}")
-                    ws3.cell(row=row, column=13, value=f"₱{loan.deduction_per_cutoff:,.2f}")
+                    amount = f"₱{loan.amount:,}"
+                    deduction = f"₱{loan.deduction_per_cutoff:,.2f}"
                 
-                ws3.cell(row=row, column=11, value=f"{loan.number_of_cutoff} Cut-offs")
-                ws3.cell(row=row, column=12, value=loan.starting_date.strftime('%Y-%m-%d') if loan.starting_date else 'N/A')
-                ws3.cell(row=row, column=14, value=employee.employment_info.bank_account or 'N/A')
-
-                # Add borders and wrap text to all cells
-                for col in range(1, 15):
-                    cell = ws3.cell(row=row, column=col)
-                    cell.border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        top=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-                    cell.alignment = Alignment(wrap_text=True)
-            
-            # Auto-adjust column widths for emergency loan sheet
-            for col_num in range(1, 15):
-                column_letter = chr(64 + col_num)  # A, B, C, etc.
-                max_length = 0
-                for row in ws3.iter_rows(min_col=col_num, max_col=col_num):
-                    for cell in row:
-                        try:
-                            if cell.value and len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                adjusted_width = min(max_length + 2, 30)  # Smaller max width for better fit
-                ws3.column_dimensions[column_letter].width = adjusted_width
-    
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename=prf_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+                ws3.append([
+                    prf.prf_control_number or 'N/A',
+                    timezone.localtime(prf.created_at).strftime('%Y-%m-%d %I:%M %p'),
+                    employee.idnumber or 'N/A',
+                    f"{employee.firstname} {employee.lastname}",
+                    employee.employment_info.position.position or 'N/A',
+                    employee.employment_info.department.department_name or 'N/A',
+                    prf.purpose,
+                    prf.get_status_display(),
+                    prf.control_number or 'N/A',
+                    amount,
+                    f"{loan.number_of_cutoff} Cut-offs",
+                    loan.starting_date.strftime('%Y-%m-%d') if loan.starting_date else 'N/A',
+                    deduction,
+                    employee.employment_info.bank_account or 'N/A',
+                ], style='prf_loan_cell')
     
-    wb.save(response)
-    return response
+    return workbook.response(f'prf_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
 
 @require_POST
 @login_required
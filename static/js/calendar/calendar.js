@@ -320,7 +320,7 @@ class CalendarManager {
         }
         
         this.updateTimelogsTabDot();
-        this.updateSingleTimelogIndicator(normalizedDate, timelogs);
+        this.updateSingleTimelogIndicator(normalizedDate);
     }
 
     updateTimelogsTabDot() {
@@ -338,22 +338,15 @@ class CalendarManager {
         }
     }
 
-    updateSingleTimelogIndicator(date, timelogs) {
+    updateSingleTimelogIndicator(date) {
         const dayElement = document.querySelector(`.calendar-day[data-date="${date}"]`);
         if (!dayElement) return;
 
         const indicator = dayElement.querySelector('.timelog-indicator');
         if (!indicator) return;
 
-        const hasTimeIn = timelogs.some(log => log.entry === 'timein' && log.time && log.time.trim() !== '');
-        const hasTimeOut = timelogs.some(log => log.entry === 'timeout' && log.time && log.time.trim() !== '');
-        let status = 'none';
-        
-        if ((hasTimeIn || hasTimeOut) && !(hasTimeIn && hasTimeOut)) {
-            status = 'incomplete';
-        }
-        if (!window.CALENDAR_TIMELOG_STATUS) window.CALENDAR_TIMELOG_STATUS = {};
-        window.CALENDAR_TIMELOG_STATUS[date] = status;
+        // Status is computed server-side (night shifts included)
+        const status = (window.CALENDAR_TIMELOG_STATUS || {})[date];
 
         indicator.innerHTML = '';
         if (status === 'incomplete') {
@@ -392,126 +385,21 @@ class CalendarManager {
     }
 
     async refreshTimelogIndicators() {
-        const visibleDates = Array.from(document.querySelectorAll('.calendar-day:not(.empty)'))
-            .map(day => day.dataset.date)
-            .filter(date => date);
-        if (!window.CALENDAR_TIMELOG_STATUS) {
-            window.CALENDAR_TIMELOG_STATUS = {};
+        // One request returns the status and time logs of every day in the month
+        try {
+            const resp = await fetch(`/calendar/api/timelogs/month/?year=${this.currentYear}&month=${this.currentMonth}`);
+            if (!resp.ok) return;
+            const data = await resp.json();
+            if (!window.CALENDAR_TIMELOG_STATUS) window.CALENDAR_TIMELOG_STATUS = {};
+            if (!window.CALENDAR_TIMELOGS) window.CALENDAR_TIMELOGS = {};
+            Object.entries(data.days || {}).forEach(([date, day]) => {
+                window.CALENDAR_TIMELOG_STATUS[date] = day.status === 'incomplete' ? 'incomplete' : 'none';
+                window.CALENDAR_TIMELOGS[date] = day.timelogs;
+            });
+            this.renderTimelogIndicators();
+            this.updateTimelogsTabDot();
+        } catch (e) {
         }
-        const fetchPromises = visibleDates.map(async (date) => {
-            try {
-                const resp = await fetch(`/calendar/api/timelogs/?date=${date}`);
-                if (resp.ok) {
-                    const data = await resp.json();
-                    const prevDayLogs = data.prev_day_timelogs || [];
-                    const logs = data.timelogs || [];
-                    const nextDayLogs = data.next_day_timelogs || [];
-                    
-                    // Helper function to check if time is night shift (>= 4:00 PM)
-                    const isNightShiftTime = (isoTime) => {
-                        if (!isoTime) return false;
-                        const timeObj = new Date(isoTime);
-                        return timeObj.getHours() >= 16; // 4:00 PM or later
-                    };
-                    
-                    // Find time-ins and time-outs
-                    const prevDayTimeIns = prevDayLogs.filter(log => log.entry === 'timein' && log.time && log.time.trim() !== '');
-                    const prevDayTimeOuts = prevDayLogs.filter(log => log.entry === 'timeout' && log.time && log.time.trim() !== '');
-                    const currentTimeIns = logs.filter(log => log.entry === 'timein' && log.time && log.time.trim() !== '');
-                    const currentTimeOuts = logs.filter(log => log.entry === 'timeout' && log.time && log.time.trim() !== '');
-                    const nextDayTimeOuts = nextDayLogs.filter(log => log.entry === 'timeout' && log.time && log.time.trim() !== '');
-                    
-                    // Check if current day has early morning timeout that belongs to previous night shift
-                    let earlyMorningTimeoutClaimed = false;
-                    for (const timeout of currentTimeOuts) {
-                        const timeoutDate = new Date(timeout.time);
-                        if (timeoutDate.getHours() < 8) { // Before 8 AM
-                            // Check if there's a night shift time-in on previous day
-                            for (const prevTimeIn of prevDayTimeIns) {
-                                if (isNightShiftTime(prevTimeIn.time)) {
-                                    // Check if previous day's night shift doesn't already have same-day timeout
-                                    let hasSameDayTimeout = false;
-                                    const prevTimeInDate = new Date(prevTimeIn.time);
-                                    for (const prevTimeOut of prevDayTimeOuts) {
-                                        const prevTimeOutDate = new Date(prevTimeOut.time);
-                                        if (prevTimeOutDate > prevTimeInDate) {
-                                            hasSameDayTimeout = true;
-                                            break;
-                                        }
-                                    }
-                                    
-                                    // Only claim this timeout if previous night shift doesn't have same-day timeout
-                                    if (!hasSameDayTimeout) {
-                                        earlyMorningTimeoutClaimed = true;
-                                        break;
-                                    }
-                                }
-                            }
-                            if (earlyMorningTimeoutClaimed) break;
-                        }
-                    }
-                    
-                    // Filter out early morning timeouts that belong to previous night shift
-                    let filteredCurrentTimeOuts = currentTimeOuts;
-                    if (earlyMorningTimeoutClaimed) {
-                        filteredCurrentTimeOuts = currentTimeOuts.filter(log => {
-                            const timeoutDate = new Date(log.time);
-                            return timeoutDate.getHours() >= 8;
-                        });
-                    }
-                    
-                    // Check if there's a night shift time-in (>= 4:00 PM)
-                    const nightShiftTimeIn = currentTimeIns.find(log => isNightShiftTime(log.time));
-                    
-                    let status = 'none';
-                    
-                    if (nightShiftTimeIn) {
-                        // Night shift: Check for timeout on current day (after time-in) or next day (before 8:00 AM)
-                        let hasTimeout = false;
-                        
-                        // Check current day timeouts (after the night shift time-in)
-                        const nightShiftTimeInDate = new Date(nightShiftTimeIn.time);
-                        for (const timeout of filteredCurrentTimeOuts) {
-                            const timeoutDate = new Date(timeout.time);
-                            if (timeoutDate > nightShiftTimeInDate) {
-                                hasTimeout = true;
-                                break;
-                            }
-                        }
-                        
-                        // If no timeout on current day, check next day (before 8:00 AM)
-                        if (!hasTimeout) {
-                            for (const timeout of nextDayTimeOuts) {
-                                const timeoutDate = new Date(timeout.time);
-                                if (timeoutDate.getHours() < 8) { // Before 8:00 AM
-                                    hasTimeout = true;
-                                    break;
-                                }
-                            }
-                        }
-                        
-                        status = hasTimeout ? 'none' : 'incomplete';
-                    } else {
-                        // Day shift: Both time-in and time-out should be on same day (after filtering)
-                        const hasTimeIn = currentTimeIns.length > 0;
-                        const hasTimeOut = filteredCurrentTimeOuts.length > 0;
-                        
-                        if ((hasTimeIn || hasTimeOut) && !(hasTimeIn && hasTimeOut)) {
-                            status = 'incomplete';
-                        }
-                    }
-                    
-                    window.CALENDAR_TIMELOG_STATUS[date] = status;
-                    return { date, logs, status };
-                }
-            } catch (e) {
-            }
-            return { date, logs: [], status: 'none' };
-        });
-        const results = await Promise.all(fetchPromises);
-        results.forEach(({ date, logs, status }) => {
-            this.updateSingleTimelogIndicator(date, logs);
-        });
     }
 
     updateSelectedDateDisplay(dateString) {
@@ -563,22 +451,9 @@ class CalendarManager {
                 if (resp.ok) {
                     const data = await resp.json();
                     const logs = data.timelogs || [];
-                    let hasTimeIn = false, hasTimeOut = false;
-                    logs.forEach(log => {
-                        if (log.entry === 'timein' && log.time && log.time.trim() !== '') {
-                            hasTimeIn = true;
-                        }
-                        if (log.entry === 'timeout' && log.time && log.time.trim() !== '') {
-                            hasTimeOut = true;
-                        }
-                    });
 
                     if (!window.CALENDAR_TIMELOG_STATUS) window.CALENDAR_TIMELOG_STATUS = {};
-                    if ((hasTimeIn || hasTimeOut) && !(hasTimeIn && hasTimeOut)) {
-                        window.CALENDAR_TIMELOG_STATUS[normalizedDate] = 'incomplete';
-                    } else {
-                        window.CALENDAR_TIMELOG_STATUS[normalizedDate] = 'none';
-                    }
+                    window.CALENDAR_TIMELOG_STATUS[normalizedDate] = data.status === 'incomplete' ? 'incomplete' : 'none';
 
                     return logs;
                 }
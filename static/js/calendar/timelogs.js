@@ -139,12 +139,22 @@ class TimeLogsManager {
                     }
                 });
 
-                const result = await response.json();
+                const queued = await response.json();
+                if (!response.ok) {
+                    throw new Error(queued.message || 'Upload failed');
+                }
+
+                // The import runs as a background job; wait for its result
+                const result = await waitForBackgroundJob(queued, (job) => {
+                    const progress = ((i + job.percentage / 100) / this.selectedFiles.length) * 100;
+                    progressFill.style.width = `${progress}%`;
+                    progressText.textContent = `${Math.round(progress)}%`;
+                });
                 const progress = ((i + 1) / this.selectedFiles.length) * 100;
                 progressFill.style.width = `${progress}%`;
                 progressText.textContent = `${Math.round(progress)}%`;
 
-                if (!response.ok) {
+                if (!result.success) {
                     throw new Error(result.message || 'Upload failed');
                 }
 
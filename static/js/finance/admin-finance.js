@@ -128,22 +128,43 @@ function uploadFilesWithProgress(options) {
         }
     };
     
-    xhr.onload = () => {
+    const finish = (data) => {
         updateUploadProgress(100, 'Processing complete!');
         setTimeout(() => {
             hideUploadProgressModal();
-            if (xhr.status >= 200 && xhr.status < 300) {
-                try {
-                    const data = JSON.parse(xhr.responseText);
-                    if (onSuccess) onSuccess(data);
-                } catch (e) {
-                    if (onError) onError('Invalid response format');
-                }
-            } else {
-                if (onError) onError('Server error occurred');
-            }
+            if (onSuccess) onSuccess(data);
         }, 500);
     };
+
+    xhr.onload = () => {
+        if (xhr.status < 200 || xhr.status >= 300) {
+            hideUploadProgressModal();
+            if (onError) onError('Server error occurred');
+            return;
+        }
+        let data;
+        try {
+            data = JSON.parse(xhr.responseText);
+        } catch (e) {
+            hideUploadProgressModal();
+            if (onError) onError('Invalid response format');
+            return;
+        }
+        if (!data.job_id) {
+            finish(data);
+            return;
+        }
+        // The upload is processed by a background job; follow it until it finishes
+        updateUploadProgress(0, 'Processing files...');
+        waitForBackgroundJob(data, (job) => {
+            updateUploadProgress(job.percentage, 'Processing files...');
+        })
+        .then(finish)
+        .catch(() => {
+            hideUploadProgressModal();
+            if (onError) onError('Failed to get processing status');
+        });
+    };
     
     xhr.onerror = () => {
         hideUploadProgressModal();
@@ -1915,7 +1936,7 @@ class AdminFinanceModule {
                 period: this.currentChartPeriod
             });
 
-            const response = await fetch(`/finance/chart-data/?${params}`);
+            const response = await fetch(`/finance/metrics/?${params}`);
             const data = await response.json();
 
             if (data.success && this.chart) {
@@ -1738,6 +1738,7 @@ class LeaveAdminInterface {
             body: formData
         })
         .then(response => response.json())
+        .then(data => waitForBackgroundJob(data))
         .then(data => {
             if (data.success) {
                 this.showMessage(data.message, 'success');
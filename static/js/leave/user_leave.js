@@ -642,7 +642,7 @@ class LeaveUserInterface {
             
             searchTimeout = setTimeout(() => {
                 const searchTerm = e.target.value.trim();
-                this.performAjaxSearch(searchTerm, 1); // Always start from page 1 when searching
+                this.performAjaxSearch(searchTerm); // Always start from the first page when searching
             }, 500); // 500ms delay for debouncing
         });
 
@@ -660,15 +660,17 @@ class LeaveUserInterface {
                 e.preventDefault();
                 const link = e.target.closest('a.pagination-btn');
                 const url = new URL(link.href);
-                const page = url.searchParams.get('approvals_page') || 1;
                 const search = url.searchParams.get('search') || '';
                 
-                this.performAjaxSearch(search, page);
+                this.performAjaxSearch(search, {
+                    after: url.searchParams.get('approvals_after'),
+                    before: url.searchParams.get('approvals_before')
+                });
             }
         });
     }
 
-    async performAjaxSearch(searchTerm, page = 1) {
+    async performAjaxSearch(searchTerm, cursor = {}) {
         try {
             // Show loading state
             this.showTableLoading();
@@ -683,7 +685,8 @@ class LeaveUserInterface {
             // Make AJAX request
             const params = new URLSearchParams();
             if (searchTerm) params.append('search', searchTerm);
-            params.append('page', page);
+            if (cursor.after) params.append('after', cursor.after);
+            if (cursor.before) params.append('before', cursor.before);
             
             const response = await fetch(`/leave/ajax/search-approvals/?${params.toString()}`);
             const data = await response.json();
@@ -754,7 +757,7 @@ class LeaveUserInterface {
         const searchInput = document.getElementById('searchInput');
         if (searchInput) {
             searchInput.value = '';
-            this.performAjaxSearch('', 1);
+            this.performAjaxSearch('');
         }
     }
 
@@ -820,13 +823,11 @@ class LeaveUserInterface {
         // Update pagination info
         const startRecord = document.getElementById('approvalsStartRecord');
         const endRecord = document.getElementById('approvalsEndRecord');
-        const totalRecords = document.getElementById('approvalsTotalRecords');
         
         if (startRecord) startRecord.textContent = pagination.start_index || 0;
         if (endRecord) endRecord.textContent = pagination.end_index || 0;
-        if (totalRecords) totalRecords.textContent = pagination.count || 0;
         
-        // Update pagination controls
+        // Update pagination controls; pages are addressed by cursor, not by number
         const paginationControls = document.getElementById('approvalsPaginationControls');
         if (!paginationControls) return;
         
@@ -836,7 +837,7 @@ class LeaveUserInterface {
         
         // Previous button
         if (pagination.has_previous) {
-            paginationHtml += `<a class="pagination-btn" href="?approvals_page=${pagination.previous_page_number}${searchParam}#approvals">
+            paginationHtml += `<a class="pagination-btn" href="?approvals_before=${pagination.previous_cursor}${searchParam}#approvals">
                 <i class="fas fa-chevron-left"></i>
             </a>`;
         } else {
@@ -845,27 +846,9 @@ class LeaveUserInterface {
             </span>`;
         }
         
-        // Page numbers container
-        paginationHtml += '<div id="approvalsPageNumbers">';
-        
-        if (pagination.page_range && pagination.page_range.length > 0) {
-            const currentPage = pagination.number;
-            for (const num of pagination.page_range) {
-                if (num === currentPage) {
-                    paginationHtml += `<span class="pagination-btn active">${num}</span>`;
-                } else if (num > currentPage - 3 && num < currentPage + 3) {
-                    paginationHtml += `<a class="pagination-btn" href="?approvals_page=${num}${searchParam}#approvals">${num}</a>`;
-                }
-            }
-        } else {
-            paginationHtml += '<span class="pagination-btn active">1</span>';
-        }
-        
-        paginationHtml += '</div>';
-        
         // Next button
         if (pagination.has_next) {
-            paginationHtml += `<a class="pagination-btn" href="?approvals_page=${pagination.next_page_number}${searchParam}#approvals">
+            paginationHtml += `<a class="pagination-btn" href="?approvals_after=${pagination.next_cursor}${searchParam}#approvals">
                 <i class="fas fa-chevron-right"></i>
             </a>`;
         } else {
@@ -2852,7 +2835,8 @@ function clearSearch() {
             // Get current URL and remove search parameter
             const url = new URL(window.location);
             url.searchParams.delete('search');
-            url.searchParams.delete('approvals_page');
+            url.searchParams.delete('approvals_after');
+            url.searchParams.delete('approvals_before');
             url.hash = 'approvals';
             
             // Reload page without search
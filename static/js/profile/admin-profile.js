@@ -702,7 +702,7 @@ document.addEventListener('DOMContentLoaded', function() {
                         console.log('Showing progress modal for', data.total_rows, 'rows');
                         showImportProgressModal(data.total_rows);
                         // Start import process
-                        startImportProcess(data.import_id);
+                        startImportProcess(data.progress_url);
                     }, 300);
                 } else {
                     console.error('Upload failed:', data.message);
@@ -764,12 +764,12 @@ document.addEventListener('DOMContentLoaded', function() {
         showModal(modal);
     }
 
-    function startImportProcess(importId) {
-        console.log('Starting import process polling for ID:', importId);
+    function startImportProcess(progressUrl) {
+        console.log('Starting import process polling at:', progressUrl);
 
         // Poll for import progress
         const pollInterval = setInterval(() => {
-            fetch(`/profile/import-progress/${importId}/`)
+            fetch(progressUrl)
                 .then(response => {
                     console.log('Progress poll response status:', response.status);
                     return response.json();
@@ -802,7 +802,8 @@ document.addEventListener('DOMContentLoaded', function() {
         const errorCount = document.getElementById('errorCount');
         const importDetails = document.getElementById('importDetails');
 
-        const percentage = Math.round((data.processed / data.total) * 100);
+        // total is 0 while the job is still queued
+        const percentage = data.total ? Math.round((data.processed / data.total) * 100) : 0;
 
         if (progressFill) progressFill.style.width = percentage + '%';
         if (progressText) progressText.textContent = percentage + '%';
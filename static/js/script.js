@@ -682,16 +682,20 @@ class EmployeePortalUI {
         // Setup notification item click handlers
         this.setupNotificationItemHandlers();
         
-        // Initialize notification count
-        this.updateNotificationCount();
-        
-        // Set initial count and visibility
-        const notificationCount = document.getElementById('notificationCount');
-        if (notificationCount) {
-            const count = this.getNotificationCount();
-            notificationCount.textContent = count;
-            notificationCount.style.display = count > 0 ? 'flex' : 'none';
+        const markAllBtn = document.getElementById('markAllNotificationsRead');
+        if (markAllBtn) {
+            markAllBtn.addEventListener('click', async (e) => {
+                e.stopPropagation();
+                try {
+                    await this.markNotificationsRead();
+                } catch (error) {
+                    console.error('Error marking notifications as read:', error);
+                }
+            });
         }
+        
+        // Initialize notification count from the server-side unread counter
+        this.updateNotificationCount(this.getNotificationCount());
     }
 
     setupNotificationItemHandlers() {
@@ -734,7 +738,7 @@ class EmployeePortalUI {
                     item.classList.add('read');
                     
                     // Update notification count
-                    this.updateNotificationCount();
+                    this.updateNotificationCount(responseData.unread_badge_count);
                 } else {
                     console.error('Failed to mark notification as read:', responseData);
                 }
@@ -755,21 +759,13 @@ class EmployeePortalUI {
 
 
 
-    updateNotificationCount() {
+    updateNotificationCount(count) {
         const notificationCount = document.getElementById('notificationCount');
         if (!notificationCount) return;
         
-        // Count unread notifications with specific types (approved, disapproved, approval)
-        const unreadItems = document.querySelectorAll('.notification-item.unread');
-        let unreadCount = 0;
-        
-        unreadItems.forEach(item => {
-            const notificationType = item.dataset.notificationType;
-            if (notificationType && ['approved', 'disapproved', 'approval'].includes(notificationType)) {
-                unreadCount++;
-            }
-        });
-        
+        // The unread badge counter (approved, disapproved, approval) is kept on the server
+        const unreadCount = Number.isInteger(count) ? count : this.getNotificationCount();
+        notificationCount.dataset.unreadCount = unreadCount;
         notificationCount.textContent = unreadCount;
         
         // Hide badge if no unread notifications of the specified types
@@ -781,25 +777,33 @@ class EmployeePortalUI {
     }
 
     getNotificationCount() {
-        // Count unread notifications with specific types (approved, disapproved, approval)
-        const unreadItems = document.querySelectorAll('.notification-item.unread');
-        let unreadCount = 0;
-        
-        unreadItems.forEach(item => {
-            const notificationType = item.dataset.notificationType;
-            if (notificationType && ['approved', 'disapproved', 'approval'].includes(notificationType)) {
-                unreadCount++;
-            }
-        });
-        
-        return unreadCount;
+        const notificationCount = document.getElementById('notificationCount');
+        return parseInt(notificationCount?.dataset.unreadCount, 10) || 0;
     }
 
-
-
-
-
-
+    async markNotificationsRead(ids = null) {
+        // Bulk endpoint: mark the given notification ids, or every unread one when ids is null
+        const response = await fetch('/notification/api/mark-read/', {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': this.getCsrfToken(),
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(ids ? { ids } : { all: true })
+        });
+        const data = await response.json();
+        if (response.ok && data.success) {
+            const selector = ids
+                ? ids.map(id => `.notification-item.unread[data-notification-id="${id}"]`).join(',')
+                : '.notification-item.unread';
+            document.querySelectorAll(selector).forEach(item => {
+                item.classList.remove('unread');
+                item.classList.add('read');
+            });
+            this.updateNotificationCount(data.unread_badge_count);
+        }
+        return data;
+    }
 
     formatTimeAgo(dateString) {
         const date = new Date(dateString);
@@ -1745,6 +1749,34 @@ function closeModal(modalId) {
     }
 }
 
+// Poll a queued background job (upload/import endpoints return job_id + progress_url)
+// and resolve with the job's result, which has the same shape the endpoint used to return inline.
+function waitForBackgroundJob(job, onProgress, interval = 1000) {
+    if (!job || !job.progress_url) {
+        return Promise.resolve(job);
+    }
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch(job.progress_url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+                .then(response => response.json())
+                .then(data => {
+                    if (!data.success) {
+                        reject(new Error(data.message || 'Background job not found'));
+                        return;
+                    }
+                    if (onProgress) onProgress(data);
+                    if (data.status === 'completed' || data.status === 'failed') {
+                        resolve(data.result || { success: false, message: data.error_message || 'Processing failed' });
+                    } else {
+                        setTimeout(poll, interval);
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
 function filterProjectTable() {
     if (window.portalUI) {
         window.portalUI.filterProjectTable();
@@ -13,7 +13,7 @@ from django.core.exceptions import ValidationError
 import json
 import csv
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import Font, PatternFill, Alignment
 from datetime import datetime, timedelta
 from userlogin.models import EmployeeLogin
 import logging
@@ -26,6 +26,8 @@ from .forms import SurveyForm, QuestionForm, SurveyTemplateForm, SurveyCategoryF
 from django.template.loader import render_to_string
 from collections import Counter
 from notification.models import Notification
+from notification.inbox import create_broadcast
+from empconnect.exports import ExportWorkbook, iterate
 
 @login_required
 def survey_dashboard(request):
@@ -366,15 +368,13 @@ def create_survey(request):
 
             # Create notifications based on survey visibility
             if survey.visibility == 'all':
-                # Create a general notification for all users
-                Notification.objects.create(
+                # One broadcast row reaches every employee
+                create_broadcast(
                     title=f"New Survey: {survey.title}",
                     message=f"A new survey '{survey.title}' has been created and is available for you to complete.",
                     notification_type='general',
                     sender=request.user,
-                    recipient=request.user,  # For general notifications, recipient can be the creator
-                    module='survey_dashboard',
-                    for_all=True
+                    module='survey_dashboard'
                 )
             elif survey.visibility == 'selected':
                 # Create individual notifications for each selected user
@@ -1154,6 +1154,10 @@ def export_survey_responses(request, survey_id):
     wb.save(response)
     return response
 
+SURVEY_EXPORT_STYLES = {
+    'survey_title': {'font': Font(bold=True, size=16)},
+}
+
 @login_required
 def export_survey_excel_detailed(request, survey_id):
     survey = get_object_or_404(Survey, id=survey_id)
@@ -1162,75 +1166,48 @@ def export_survey_excel_detailed(request, survey_id):
         messages.error(request, 'You do not have permission to export this survey.')
         return redirect('survey_list')
     
-    # Create workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Response Data"
-    
-    # Styling
-    header_font = Font(bold=True, color="000000")
-    header_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    bold_font = Font(bold=True)
+    # Get all questions for the detailed table
+    questions = list(survey.questions.order_by('order'))
     
-    # Row counter
-    current_row = 1
+    workbook = ExportWorkbook(styles=SURVEY_EXPORT_STYLES)
+    # Column A carries both the question text of the summary and the ID numbers of the detail table
+    ws = workbook.create_sheet("Response Data", widths=[40, 30, 30, 20] + [30] * len(questions))
     
     # 1. Header: Ryonan Electric Philippines Corporation
-    ws.cell(row=current_row, column=1, value="Ryonan Electric Philippines Corporation")
-    ws.cell(row=current_row, column=1).font = Font(bold=True, size=16)
-    current_row += 1
+    ws.append(["Ryonan Electric Philippines Corporation"], style='survey_title')
     
     # 2. Subheader: Response data for (survey name)
-    ws.cell(row=current_row, column=1, value=f"Response data for {survey.title}")
-    ws.cell(row=current_row, column=1).font = Font(bold=True, size=14)
-    current_row += 2
+    ws.append([f"Response data for {survey.title}"], style='title')
+    ws.blank()
     
     # 3. Statistics Summary Table
-    ws.cell(row=current_row, column=1, value="Question Analysis Summary")
-    ws.cell(row=current_row, column=1).font = bold_font
-    current_row += 1
-    
-    # Summary table headers
-    summary_headers = ["Question", "Least Chosen", "Highest Chosen"]
-    for col, header in enumerate(summary_headers, 1):
-        cell = ws.cell(row=current_row, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-    current_row += 1
+    ws.append(["Question Analysis Summary"], style='heading')
+    ws.append(["Question", "Least Chosen", "Highest Chosen"], style='header')
     
     # Get questions that support statistics (single_choice, multiple_choice, dropdown, rating_scale, yes_no)
-    statistical_questions = survey.questions.filter(
-        question_type__in=['single_choice', 'multiple_choice', 'dropdown', 'rating_scale', 'yes_no']
-    ).order_by('order')
-    
-    from collections import Counter
+    statistical_questions = [
+        question for question in questions
+        if question.question_type in ['single_choice', 'multiple_choice', 'dropdown', 'rating_scale', 'yes_no']
+    ]
     
     for question in statistical_questions:
-        answers = Answer.objects.filter(question=question, response__is_complete=True)
+        answers = iterate(Answer.objects.filter(question=question, response__is_complete=True))
+        options_count = Counter()
         
         if question.question_type in ['single_choice', 'dropdown']:
             # Single choice and dropdown store their values in text_answer
-            options_count = Counter()
             for answer in answers:
                 if answer.text_answer:
                     options_count[answer.text_answer] += 1
         
         elif question.question_type == 'multiple_choice':
             # Multiple choice stores in selected_options array
-            options_count = Counter()
             for answer in answers:
                 if answer.selected_options:
                     options_count.update(answer.selected_options)
         
         elif question.question_type == 'rating_scale':
             # Count rating values
-            options_count = Counter()
             for answer in answers:
                 if answer.selected_options and isinstance(answer.selected_options, dict):
                     # Per-item ratings: count each item's ratings
@@ -1242,7 +1219,6 @@ def export_survey_excel_detailed(request, survey_id):
         
         elif question.question_type == 'yes_no':
             # Count yes/no responses
-            options_count = Counter()
             for answer in answers:
                 if answer.boolean_answer is not None:
                     options_count['Yes' if answer.boolean_answer else 'No'] += 1
@@ -1263,52 +1239,26 @@ def export_survey_excel_detailed(request, survey_id):
             highest_text = "No responses"
             least_text = "No responses"
         
-        # Add row to summary table
-        row_data = [question.question_text, least_text, highest_text]
-        for col, value in enumerate(row_data, 1):
-            cell = ws.cell(row=current_row, column=col, value=value)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-        current_row += 1
+        ws.append([question.question_text, least_text, highest_text], style='cell')
     
-    current_row += 2  # Add spacing
+    ws.blank(2)  # Add spacing
     
     # 4. Detailed Response Data Table
-    ws.cell(row=current_row, column=1, value="Detailed Response Data")
-    ws.cell(row=current_row, column=1).font = bold_font
-    current_row += 1
-    
-    # Get all questions for the detailed table
-    questions = survey.questions.order_by('order')
+    ws.append(["Detailed Response Data"], style='heading')
     
-    # Create detailed table headers
     detailed_headers = ['ID Number', 'Name', 'Department', 'Line']
     for question in questions:
         detailed_headers.append(question.question_text)
-    
-    # Write detailed headers
-    for col, header in enumerate(detailed_headers, 1):
-        cell = ws.cell(row=current_row, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-    current_row += 1
+    ws.append(detailed_headers, style='header')
     
     # Get all users who have responded
     responses = SurveyResponse.objects.filter(
         survey=survey, is_complete=True
-    ).select_related('user').order_by('user__idnumber')
+    ).select_related(
+        'user__employment_info__department', 'user__employment_info__line'
+    ).prefetch_related('answers').order_by('user__idnumber')
     
-    for response in responses:
+    for response in iterate(responses):
         user = response.user
         
         # Get employment info
@@ -1370,34 +1320,9 @@ def export_survey_excel_detailed(request, survey_id):
             
             row_data.append(value)
         
-        # Write row data
-        for col, value in enumerate(row_data, 1):
-            cell = ws.cell(row=current_row, column=col, value=value)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-        current_row += 1
+        ws.append(row_data, style='cell')
     
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
-    
-    # Create HTTP response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="survey-response-data.xlsx"'
-    
-    wb.save(response)
-    return response
+    return workbook.response("survey-response-data.xlsx")
 
 @login_required
 @require_POST
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from userlogin.models import EmployeeLogin
 from django.db.models import Max
+from generalsettings.sequences import next_value
 
 class DeviceType(models.Model):
     name = models.CharField(max_length=100)
@@ -88,16 +89,14 @@ class Ticket(models.Model):
     def generate_ticket_number(self):
         prefix = 'TKT'
         date_str = timezone.now().strftime('%Y%m%d')
-        
-        last_ticket = Ticket.objects.filter(ticket_number__startswith=f"{prefix}{date_str}") \
-                                    .aggregate(max_seq=Max('ticket_number'))
-        
-        if last_ticket['max_seq']:
-            last_seq = int(last_ticket['max_seq'][-4:])
-            new_seq = last_seq + 1
-        else:
-            new_seq = 1
 
+        def seed():
+            # Continue after tickets numbered today before the sequence existed
+            last_ticket = Ticket.objects.filter(ticket_number__startswith=f"{prefix}{date_str}") \
+                                        .aggregate(max_seq=Max('ticket_number'))
+            return int(last_ticket['max_seq'][-4:]) if last_ticket['max_seq'] else 0
+
+        new_seq = next_value(f"ticket:{prefix}{date_str}", seed=seed)
         return f"{prefix}{date_str}{new_seq:04d}"
 
     def __str__(self):
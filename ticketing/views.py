@@ -22,6 +22,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.units import inch
 from io import BytesIO
+from empconnect.exports import ExportWorkbook, CENTER, THIN_BORDER, iterate, solid_fill
 
 
 @login_required
@@ -377,7 +378,6 @@ def create_ticket(request):
             notification_type="approval",
             sender=request.user,
             recipient=mis_personnel,
-            for_all=True,
             module="ticketing/admin"
         )
         return JsonResponse({
@@ -597,6 +597,13 @@ def get_form_options(request):
     })
 
 
+TICKET_EXPORT_STYLES = {
+    'ticket_title': {'font': Font(bold=True, color="FFFFFF", size=14), 'fill': solid_fill("FFD700"), 'alignment': CENTER, 'border': THIN_BORDER},
+    'ticket_subtitle': {'font': Font(bold=True, size=12), 'alignment': CENTER, 'border': THIN_BORDER},
+    'ticket_header': {'font': Font(bold=True, size=11), 'fill': solid_fill("FFD700"), 'alignment': CENTER, 'border': THIN_BORDER},
+    'ticket_cell_center': {'alignment': CENTER, 'border': THIN_BORDER},
+}
+
 @login_required
 def export_tickets_report(request):
     """Export tickets report based on filters"""
@@ -634,32 +641,11 @@ def export_tickets_report(request):
     
     tickets_qs = tickets_qs.order_by('-created_at')
     
-    # Create Excel workbook
-    workbook = openpyxl.Workbook()
-    worksheet = workbook.active
-    worksheet.title = "Ticket Report"
-    
-    # Styles
-    header_font = Font(bold=True, color="FFFFFF", size=14)
-    header_fill = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")
-    subheader_font = Font(bold=True, size=12)
-    table_header_font = Font(bold=True, size=11)
-    table_header_fill = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_alignment = Alignment(horizontal='center', vertical='center')
+    workbook = ExportWorkbook(styles=TICKET_EXPORT_STYLES)
+    sheet = workbook.create_sheet("Ticket Report", widths=[18, 15, 15, 15, 15, 15, 15, 30, 15, 25, 25, 25, 25])
     
     # Company header
-    worksheet.merge_cells('A1:M1')  # Updated to M1 for 13 columns
-    worksheet['A1'] = "RYONAN ELECTRIC PHILIPPINES"
-    worksheet['A1'].font = header_font
-    worksheet['A1'].fill = header_fill
-    worksheet['A1'].alignment = center_alignment
-    worksheet['A1'].border = border
+    sheet.title("RYONAN ELECTRIC PHILIPPINES", style='ticket_title', span=13)
     
     # Subheader
     date_range = ""
@@ -670,26 +656,17 @@ def export_tickets_report(request):
     elif date_to:
         date_range = f" up to {date_to.strftime('%B %d, %Y')}"
     
-    worksheet.merge_cells('A2:M2')  # Updated to M2 for 13 columns
-    worksheet['A2'] = f"Ticket Output Report{date_range}"
-    worksheet['A2'].font = subheader_font
-    worksheet['A2'].alignment = center_alignment
-    worksheet['A2'].border = border
+    sheet.title(f"Ticket Output Report{date_range}", style='ticket_subtitle', span=13)
+    sheet.blank()
     
     # Table headers
     headers = ['Submitted At', 'Ticket #', 'Requestor', 'Device', 'Category', 'Priority', 'Status', 'Problem Details', 'Technician', 'Diagnosis', 'Action Taken', 'Possible Reason', 'Recommendation']
-    row = 4
-    for col, header in enumerate(headers, 1):
-        cell = worksheet.cell(row=row, column=col, value=header)
-        cell.font = table_header_font
-        cell.fill = table_header_fill
-        cell.alignment = center_alignment
-        cell.border = border
-    
-    # Data rows
-    row = 5
-    for ticket in tickets_qs:
-        data = [
+    sheet.append(headers, style='ticket_header')
+    
+    # Data rows; Priority and Status are centered
+    centered = {5: 'ticket_cell_center', 6: 'ticket_cell_center'}
+    for ticket in iterate(tickets_qs.select_related('device', 'category')):
+        sheet.append([
             ticket.created_at.strftime('%m/%d/%Y %H:%M'),
             ticket.ticket_number,
             ticket.requestor_name,
@@ -703,35 +680,9 @@ def export_tickets_report(request):
             ticket.action_taken or '-',
             ticket.possible_reason or '-',
             ticket.recommendation or '-'
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = worksheet.cell(row=row, column=col, value=value)
-            cell.border = border
-            if col in [6, 7]:  # Priority and Status columns
-                cell.alignment = center_alignment
-        row += 1
-    
-    # Adjust column widths
-    for col in range(1, 14):  # Updated to 13 columns
-        if col == 1:  # Submitted At
-            worksheet.column_dimensions[get_column_letter(col)].width = 18
-        elif col == 8:  # Problem Details
-            worksheet.column_dimensions[get_column_letter(col)].width = 30
-        elif col in [10, 11, 12, 13]:  # Diagnosis, Action Taken, Possible Reason, Recommendation
-            worksheet.column_dimensions[get_column_letter(col)].width = 25
-        else:
-            worksheet.column_dimensions[get_column_letter(col)].width = 15
+        ], style='cell', styles=centered)
     
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f"ticket_report_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    workbook.save(response)
-    return response
+    return workbook.response(f"ticket_report_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
 
 
 @login_required
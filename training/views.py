@@ -18,6 +18,7 @@ from .forms import (
 )
 from userlogin.models import EmployeeLogin
 from userprofile.models import EmploymentInformation
+from userprofile.approval_routing import get_supervisor
 from django.db import transaction
 from notification.models import Notification
 
@@ -193,8 +194,8 @@ def submit_training_evaluation(request, evaluation_id):
             
             # Create notification for the approver/supervisor
             try:
-                if hasattr(request.user, 'employment_info') and request.user.employment_info.approver:
-                    approver = request.user.employment_info.approver
+                approver = get_supervisor(request.user)
+                if approver:
                     
                     # Create notification
                     Notification.objects.create(
@@ -361,11 +362,7 @@ def submit_supervisor_assessment(request, assessment_id):
                 module='training'
             )
             
-            supervisor_manager = None
-            if (hasattr(request.user, 'employment_info') and 
-                request.user.employment_info and 
-                request.user.employment_info.approver):
-                supervisor_manager = request.user.employment_info.approver
+            supervisor_manager = get_supervisor(request.user)
             
             if supervisor_manager:
                 routing_step, created = EvaluationRouting.objects.get_or_create(
@@ -1344,8 +1341,8 @@ def confirm_evaluation(request, training_id):
                 sequence=1
             ).first()
             
-            if supervisor_routing and hasattr(supervisor_routing.approver, 'employment_info'):
-                manager = supervisor_routing.approver.employment_info.approver
+            if supervisor_routing:
+                manager = get_supervisor(supervisor_routing.approver_id)
                 if manager:
                     # Avoid duplicate routing records: create if not exists
                     routing, created = EvaluationRouting.objects.get_or_create(
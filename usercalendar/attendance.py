@@ -0,0 +1,103 @@
+"""
+Attendance (timelog completeness) for whole date ranges.
+
+An employee's punches for the range are loaded with one query over the
+(employee, time) index and walked once in time order. Each local day is
+classified as 'complete', 'incomplete' or 'none':
+
+- A time-in at or after NIGHT_SHIFT_START_HOUR starts a night shift. It is
+  closed by a later time-out the same day or, failing that, by the first
+  time-out before EARLY_MORNING_END_HOUR the next morning. That time-out is
+  counted (and listed) under the night shift's day, not the morning's.
+- Any other day is a day shift and needs both a time-in and a time-out.
+
+The walk reads one day before and one day after the range, so shifts that
+cross its edges are paired like any other.
+"""
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, time, timedelta
+import calendar
+from django.utils import timezone
+from .models import Timelogs
+
+NIGHT_SHIFT_START_HOUR = 16
+EARLY_MORNING_END_HOUR = 8
+
+# status is 'complete', 'incomplete' or 'none'; punches are the day's Timelogs in time order
+DayAttendance = namedtuple('DayAttendance', ['status', 'punches'])
+
+
+def is_night_shift_timein(time_obj):
+    """A time-in at or after 4:00 PM local time"""
+    return bool(time_obj) and timezone.localtime(time_obj).hour >= NIGHT_SHIFT_START_HOUR
+
+
+def is_early_morning_timeout(time_obj):
+    """A time-out before 8:00 AM local time"""
+    return bool(time_obj) and timezone.localtime(time_obj).hour < EARLY_MORNING_END_HOUR
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_punches(employee, start, end):
+    """The employee's punches from local midnight of ``start`` up to (not including) ``end``, in time order"""
+    return Timelogs.objects.filter(
+        employee=employee, time__gte=_local_midnight(start), time__lt=_local_midnight(end)
+    ).order_by('time', 'pk')
+
+
+def build_attendance(punches, start, end):
+    """
+    Classify each day from ``start`` to ``end`` (inclusive) from time-ordered
+    punches that also cover the day before and the day after.
+    """
+    punches_by_day = defaultdict(list)
+    for punch in punches:
+        punches_by_day[timezone.localdate(punch.time)].append(punch)
+
+    attendance = {}
+    # The previous day's night-shift time-in that has no time-out yet
+    open_night_shift = None
+    day = start - timedelta(days=1)
+    while day <= end + timedelta(days=1):
+        punches = list(punches_by_day.get(day, []))
+
+        if open_night_shift:
+            closing = next((punch for punch in punches if punch.entry == 'OUT' and is_early_morning_timeout(punch.time)), None)
+            if closing:
+                punches.remove(closing)
+                attendance[open_night_shift] = DayAttendance('complete', attendance[open_night_shift].punches + [closing])
+            open_night_shift = None
+
+        timeins = [punch for punch in punches if punch.entry == 'IN']
+        timeouts = [punch for punch in punches if punch.entry == 'OUT']
+        night_timein = next((punch for punch in timeins if is_night_shift_timein(punch.time)), None)
+
+        if not punches:
+            status = 'none'
+        elif night_timein:
+            if any(timeout.time > night_timein.time for timeout in timeouts):
+                status = 'complete'
+            else:
+                status = 'incomplete'
+                open_night_shift = day
+        else:
+            status = 'complete' if timeins and timeouts else 'incomplete'
+
+        attendance[day] = DayAttendance(status, punches)
+        day += timedelta(days=1)
+
+    return {day: attendance[day] for day in sorted(attendance) if start <= day <= end}
+
+
+def get_attendance(employee, start, end):
+    """{date: DayAttendance} for every day from ``start`` to ``end`` (inclusive), with one query"""
+    punches = get_punches(employee, start - timedelta(days=1), end + timedelta(days=2))
+    return build_attendance(punches, start, end)
+
+
+def get_month_attendance(employee, year, month):
+    """{date: DayAttendance} for every day of a calendar month"""
+    return get_attendance(employee, date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1]))
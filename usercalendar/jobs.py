@@ -0,0 +1,42 @@
+import pandas as pd
+from backgroundjob.runner import register_job
+from .utils import import_timelogs_from_dataframe, TIMELOG_IMPORT_COLUMNS
+
+@register_job('usercalendar.import_timelogs')
+def import_timelogs_job(job):
+    """Import an uploaded biometric export; the result mirrors the old import_timelogs response"""
+    excel_file = next(job.open_files())
+
+    try:
+        df = pd.read_excel(excel_file)
+    except Exception as e:
+        return {'success': False, 'message': f'Error reading Excel file: {str(e)}'}
+    finally:
+        excel_file.close()
+
+    missing_columns = [col for col in TIMELOG_IMPORT_COLUMNS if col not in df.columns]
+    if missing_columns:
+        return {'success': False, 'message': f'Missing required columns: {", ".join(missing_columns)}'}
+
+    job.update_progress(0, total=len(df))
+    result = import_timelogs_from_dataframe(
+        df,
+        progress_callback=lambda processed, total: job.update_progress(processed, total=total),
+    )
+    errors = result['errors']
+
+    response_data = {
+        'success': True,
+        'message': f"Import completed. {result['success_count']} records processed successfully.",
+        'success_count': result['success_count'],
+        'error_count': result['error_count'],
+    }
+
+    if errors:
+        # Limit the number of error rows returned to avoid huge payloads
+        limit = 100
+        response_data['errors'] = errors[:limit]
+        if len(errors) > limit:
+            response_data['more_errors'] = len(errors) - limit
+
+    return response_data
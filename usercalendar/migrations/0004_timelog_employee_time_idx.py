@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-18 01:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usercalendar', '0003_alter_timelogs_entry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timelogs',
+            index=models.Index(fields=['employee', 'time'], name='timelog_employee_time_idx'),
+        ),
+    ]
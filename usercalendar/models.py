@@ -45,6 +45,9 @@ class Timelogs(models.Model):
 
     class Meta:
         ordering = ['-time']
+        indexes = [
+            models.Index(fields=['employee', 'time'], name='timelog_employee_time_idx'),
+        ]
 
     def __str__(self):
         return f"Timelog for {self.employee} for {self.time} - {self.entry}"
@@ -0,0 +1,8 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .working_calendar import schedule_working_calendar_invalidation
+
+@receiver([post_save, post_delete], sender='usercalendar.Holiday')
+@receiver([post_save, post_delete], sender='leaverequest.SundayException')
+def working_calendar_changed(sender, instance, **kwargs):
+    schedule_working_calendar_invalidation()
@@ -1,3 +1,148 @@
+from datetime import date, datetime
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+import pandas as pd
+
+from leaverequest.models import SundayException
+from .attendance import get_attendance, get_month_attendance
+from .models import Holiday, Timelogs
+from .utils import import_timelogs_from_dataframe
+from .working_calendar import is_working_day, working_days_between
+from userlogin.models import EmployeeLogin
+
+class TimelogImportTest(TestCase):
+    def setUp(self):
+        self.employee = EmployeeLogin.objects.create(
+            username='testuser',
+            firstname='Test',
+            lastname='User',
+            email='test@example.com',
+            idnumber='12345'
+        )
+
+    def _frame(self, rows):
+        return pd.DataFrame(rows, columns=['ID Number', 'Name', 'Date and Time', 'Entry'])
+
+    def test_import_creates_and_reports_errors_in_row_order(self):
+        df = self._frame([
+            ['12345', 'Test User', '08/15/2025 8:00am', 'Time In'],
+            ['', 'No Id', '08/15/2025 8:00am', 'IN'],
+            ['99999', 'Ghost', '08/15/2025 8:00am', 'IN'],
+            ['12345', 'Test User', 'not a date', 'IN'],
+            ['12345', 'Test User', '2025-08-15 17:30', 'sideways'],
+            ['12345', 'Test User', '2025-08-15 17:30', 'out'],
+        ])
+
+        result = import_timelogs_from_dataframe(df)
+
+        self.assertEqual(result['success_count'], 2)
+        self.assertEqual(result['error_count'], 4)
+        self.assertEqual(
+            [error['error'] for error in result['errors']],
+            [
+                'Missing ID Number',
+                'Employee with ID 99999 not found',
+                'Invalid datetime format: not a date',
+                'Invalid entry type: sideways',
+            ]
+        )
+        self.assertEqual(
+            sorted(Timelogs.objects.filter(employee=self.employee).values_list('entry', flat=True)),
+            ['IN', 'OUT']
+        )
+
+    def test_reimport_updates_entry_instead_of_duplicating(self):
+        import_timelogs_from_dataframe(self._frame([['12345', 'Test User', '08/15/2025 8:00am', 'IN']]))
+        result = import_timelogs_from_dataframe(self._frame([['12345', 'Test User', '08/15/2025 8:00 AM', 'OUT']]))
+
+        self.assertEqual(result['success_count'], 1)
+        self.assertEqual(Timelogs.objects.filter(employee=self.employee).count(), 1)
+        self.assertEqual(Timelogs.objects.get(employee=self.employee).entry, 'OUT')
+
+
+class WorkingCalendarTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeLogin.objects.create(username='hr', idnumber='10000')
+
+    def test_counts_skip_holidays_and_unexempted_sundays(self):
+        # Mon 2024-12-30 .. Sun 2025-01-05 spans two years; Dec 31 is a holiday
+        Holiday.objects.create(name='New Year Eve', date=date(2024, 12, 31), holiday_type='special', created_by=self.employee)
+        self.assertEqual(working_days_between(date(2024, 12, 30), date(2025, 1, 5)), 5)
+        self.assertFalse(is_working_day(date(2025, 1, 5)))
+
+        SundayException.objects.create(date=date(2025, 1, 5))
+        self.assertEqual(working_days_between(date(2024, 12, 30), date(2025, 1, 5)), 6)
+        self.assertTrue(is_working_day(date(2025, 1, 5)))
+        self.assertEqual(working_days_between(date(2025, 1, 5), date(2025, 1, 4)), 0)
+
+    def test_cached_years_are_reused_until_a_holiday_changes(self):
+        working_days_between(date(2025, 3, 1), date(2025, 3, 31))
+        with self.assertNumQueries(0):
+            self.assertEqual(working_days_between(date(2025, 3, 1), date(2025, 3, 31)), 26)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            holiday = Holiday.objects.create(name='Company Day', date=date(2025, 3, 3), holiday_type='company', created_by=self.employee)
+        self.assertEqual(working_days_between(date(2025, 3, 1), date(2025, 3, 31)), 25)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            holiday.delete()
+        self.assertEqual(working_days_between(date(2025, 3, 1), date(2025, 3, 31)), 26)
+
+
+class AttendanceTest(TestCase):
+    def setUp(self):
+        self.employee = EmployeeLogin.objects.create_user(idnumber='40000', username='puncher', password='secret')
+
+    def _punch(self, entry, year, month, day, hour, minute=0):
+        return Timelogs.objects.create(
+            employee=self.employee, entry=entry,
+            time=timezone.make_aware(datetime(year, month, day, hour, minute))
+        )
+
+    def test_month_pairs_day_and_night_shifts_in_one_query(self):
+        # Night shift crossing into March: belongs to Feb 28
+        self._punch('IN', 2026, 2, 28, 22)
+        self._punch('OUT', 2026, 3, 1, 5)
+        # Day shift
+        self._punch('IN', 2026, 3, 2, 8)
+        self._punch('OUT', 2026, 3, 2, 17)
+        # Night shift closed the next morning, then a day shift that morning
+        night_in = self._punch('IN', 2026, 3, 3, 18)
+        night_out = self._punch('OUT', 2026, 3, 4, 6)
+        self._punch('IN', 2026, 3, 4, 8, 30)
+        self._punch('OUT', 2026, 3, 4, 17, 30)
+        # Missing time-outs
+        self._punch('IN', 2026, 3, 5, 8)
+        self._punch('IN', 2026, 3, 31, 20)
+
+        with self.assertNumQueries(1):
+            march = get_month_attendance(self.employee, 2026, 3)
+
+        self.assertEqual(len(march), 31)
+        self.assertEqual(
+            {day.day: attendance.status for day, attendance in march.items() if attendance.status != 'none'},
+            {2: 'complete', 3: 'complete', 4: 'complete', 5: 'incomplete', 31: 'incomplete'}
+        )
+        self.assertEqual(march[date(2026, 3, 3)].punches, [night_in, night_out])
+        self.assertEqual(len(march[date(2026, 3, 4)].punches), 2)
+        self.assertEqual(march[date(2026, 3, 1)], ('none', []))
+        self.assertEqual(get_attendance(self.employee, date(2026, 2, 28), date(2026, 2, 28))[date(2026, 2, 28)].status, 'complete')
+
+    def test_month_api(self):
+        self._punch('IN', 2026, 3, 3, 18)
+        self._punch('OUT', 2026, 3, 4, 6)
+        self.client.force_login(self.employee)
+
+        data = self.client.get(reverse('get_month_timelogs_api'), {'year': 2026, 'month': 3}).json()
+        self.assertEqual(len(data['days']), 31)
+        self.assertEqual(data['days']['2026-03-03']['status'], 'complete')
+        self.assertEqual([log['entry'] for log in data['days']['2026-03-03']['timelogs']], ['timein', 'timeout'])
+        self.assertEqual(data['days']['2026-03-04'], {'status': 'none', 'timelogs': []})
+
+        day = self.client.get(reverse('get_timelogs_api'), {'date': '2026-03-04'}).json()
+        self.assertEqual((day['timelogs'], len(day['prev_day_timelogs'])), ([], 2))
+        self.assertEqual(self.client.get(reverse('get_month_timelogs_api'), {'year': 2026, 'month': 13}).status_code, 400)
 
-# Create your tests here.
@@ -11,6 +11,7 @@ urlpatterns = [
     path('api/todos/add/', views.add_todo_api, name='add_todo_api'),
     path('api/todos/toggle/', views.toggle_todo_api, name='toggle_todo_api'),
     path('api/timelogs/', views.get_timelogs_api, name='get_timelogs_api'),
+    path('api/timelogs/month/', views.get_month_timelogs_api, name='get_month_timelogs_api'),
 
     # TIME LOGS
     path('timelogs/', views.timelogs_page, name='timelogs_page'),
@@ -0,0 +1,171 @@
+from datetime import datetime
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+from userlogin.models import EmployeeLogin
+from .models import Timelogs
+import logging
+
+logger = logging.getLogger(__name__)
+
+TIMELOG_IMPORT_COLUMNS = ['ID Number', 'Name', 'Date and Time', 'Entry']
+
+# Formats accepted in the 'Date and Time' column when the cell is text.
+# Order matters: each format is only tried on the rows the previous ones failed to parse.
+TIMELOG_DATETIME_FORMATS = [
+    '%m/%d/%Y %I:%M:%S%p',    # 08/15/2025 5:30:00pm
+    '%m/%d/%Y %I:%M:%S %p',   # 08/15/2025 5:30:00 pm
+    '%m/%d/%Y %I:%M%p',       # 08/15/2025 5:30pm
+    '%m/%d/%Y %I:%M %p',      # 08/15/2025 5:30 pm
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+]
+
+TIMELOG_ENTRY_ALIASES = {
+    **{alias: 'IN' for alias in ['timein', 'time in', 'in', 'i', 'time-in', 'time_in', 'tin']},
+    **{alias: 'OUT' for alias in ['timeout', 'time out', 'out', 'o', 'time-out', 'time_out', 'tout']},
+}
+
+TIMELOG_IMPORT_BATCH_SIZE = 2000
+
+
+def _cell_to_str(series):
+    """Stringify a column the same way the row-by-row importer did ('' for blanks)"""
+    return series.map(lambda value: '' if pd.isna(value) else str(value).strip())
+
+
+def parse_timelog_datetimes(series):
+    """
+    Parse the 'Date and Time' column into naive Timestamps (NaT where unparseable).
+
+    Cells Excel already typed as dates are taken as-is. Text cells are parsed
+    vectorized, one format at a time, and only rows still unparsed are handed
+    to the next format.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        parsed = series
+        if getattr(series.dt, 'tz', None) is not None:
+            parsed = series.dt.tz_convert(timezone.get_current_timezone()).dt.tz_localize(None)
+        return parsed
+
+    parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    is_typed = series.map(lambda value: isinstance(value, (pd.Timestamp, datetime)))
+    if is_typed.any():
+        parsed[is_typed] = pd.to_datetime(series[is_typed], errors='coerce')
+
+    text = _cell_to_str(series)
+    remaining = ~is_typed & (text != '')
+    for fmt in TIMELOG_DATETIME_FORMATS:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(text[remaining], format=fmt, errors='coerce')
+        matched = attempt.notna()
+        if matched.any():
+            parsed[attempt.index[matched]] = attempt[matched]
+            remaining[attempt.index[matched]] = False
+    return parsed
+
+
+def import_timelogs_from_dataframe(df, batch_size=TIMELOG_IMPORT_BATCH_SIZE, progress_callback=None):
+    """
+    Set-based import of biometric punches.
+
+    Resolves every ID number with one query, de-duplicates against existing
+    punches with one range query, then writes new rows with chunked bulk_create
+    and entry corrections with bulk_update. Rows that repeat an existing
+    (employee, time) punch update its entry, matching the old get_or_create flow.
+
+    Returns:
+        dict: {'success_count': int, 'error_count': int, 'errors': list}
+    """
+    row_count = len(df)
+    id_numbers = _cell_to_str(df['ID Number'])
+    names = _cell_to_str(df['Name']) if 'Name' in df.columns else pd.Series('', index=df.index)
+    datetime_raw = df['Date and Time']
+    datetime_text = _cell_to_str(datetime_raw)
+    entry_text = _cell_to_str(df['Entry'])
+
+    employee_ids = dict(
+        EmployeeLogin.objects.filter(idnumber__in=set(id_numbers[id_numbers != '']))
+        .values_list('idnumber', 'id')
+    )
+    resolved_ids = id_numbers.map(employee_ids)
+    parsed_times = parse_timelog_datetimes(datetime_raw)
+    entries = entry_text.str.lower().map(TIMELOG_ENTRY_ALIASES)
+
+    errors = []
+    pending = {}
+    current_tz = timezone.get_current_timezone()
+
+    for position, index in enumerate(df.index):
+        id_number = id_numbers[index]
+        error_row = {
+            'id_number': id_number,
+            'name': names[index],
+            'datetime': datetime_text[index],
+            'entry': entry_text[index],
+        }
+        if not id_number:
+            errors.append({**error_row, 'error': 'Missing ID Number'})
+            continue
+        if pd.isna(resolved_ids[index]):
+            errors.append({**error_row, 'error': f'Employee with ID {id_number} not found'})
+            continue
+        if pd.isna(parsed_times[index]):
+            errors.append({**error_row, 'error': f'Invalid datetime format: {datetime_text[index]}'})
+            continue
+        if pd.isna(entries[index]):
+            errors.append({**error_row, 'error': f'Invalid entry type: {entry_text[index]}'})
+            continue
+
+        log_time = timezone.make_aware(parsed_times[index].to_pydatetime(), current_tz)
+        # Later rows for the same punch win, as they did with get_or_create + save
+        pending[(int(resolved_ids[index]), log_time)] = entries[index]
+
+        if progress_callback and (position + 1) % batch_size == 0:
+            progress_callback(position + 1, row_count)
+
+    success_count = row_count - len(errors)
+    if pending:
+        _write_timelogs(pending, batch_size)
+
+    if progress_callback:
+        progress_callback(row_count, row_count)
+
+    logger.info(f"Timelog import: {success_count} rows processed, {len(errors)} errors")
+    return {
+        'success_count': success_count,
+        'error_count': len(errors),
+        'errors': errors,
+    }
+
+
+def _write_timelogs(pending, batch_size):
+    """Insert new punches and fix the entry of existing ones in chunks"""
+    times = [log_time for _, log_time in pending]
+    existing = {
+        (employee_id, log_time): (pk, entry)
+        for pk, employee_id, log_time, entry in Timelogs.objects.filter(
+            employee_id__in={employee_id for employee_id, _ in pending},
+            time__range=(min(times), max(times)),
+        ).values_list('id', 'employee_id', 'time', 'entry')
+    }
+
+    to_create = []
+    to_update = []
+    now = timezone.now()
+    for (employee_id, log_time), entry in pending.items():
+        match = existing.get((employee_id, log_time))
+        if match is None:
+            to_create.append(Timelogs(employee_id=employee_id, time=log_time, entry=entry))
+        elif match[1] != entry:
+            to_update.append(Timelogs(id=match[0], entry=entry, updated_at=now))
+
+    for start in range(0, len(to_create), batch_size):
+        with transaction.atomic():
+            Timelogs.objects.bulk_create(to_create[start:start + batch_size])
+    for start in range(0, len(to_update), batch_size):
+        with transaction.atomic():
+            Timelogs.objects.bulk_update(to_update[start:start + batch_size], ['entry', 'updated_at'])
@@ -7,17 +7,18 @@ from django.views.decorators.http import require_http_methods
 from datetime import datetime, date, timedelta
 import calendar
 import json
-import pandas as pd
 import openpyxl
 from io import BytesIO
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from .models import Holiday, Timelogs, TodoItem
+from .attendance import get_attendance, get_month_attendance
 from .forms import HolidayForm
 from django.utils import timezone
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from userlogin.models import EmployeeLogin
 from .forms import TimelogForm, TimelogImportForm
+from backgroundjob.runner import enqueue_job, job_queued_response
 
 # Helper function to format datetime in MM/DD/YYYY h:mmam/pm format
 def format_timelog_datetime(dt):
@@ -25,7 +26,6 @@ def format_timelog_datetime(dt):
     if not dt:
         return ''
     return dt.strftime('%m/%d/%Y %I:%M%p').lower()
-import pytz
 
 # Helpers to map between UI entry values and model choices
 def ui_to_model_entry(entry):
@@ -49,152 +49,6 @@ def model_to_ui_entry(entry):
     # fallback to lowercase original
     return str(entry).lower()
 
-def is_night_shift_timein(time_obj):
-    """Check if a time-in is for night shift (4:00 PM or later in local timezone)"""
-    if not time_obj:
-        return False
-    # Convert to Manila timezone if timezone-aware
-    if timezone.is_aware(time_obj):
-        manila_tz = pytz.timezone('Asia/Manila')
-        local_time = time_obj.astimezone(manila_tz)
-        return local_time.hour >= 16  # 4:00 PM = 16:00
-    return time_obj.hour >= 16  # 4:00 PM = 16:00
-
-def is_early_morning_timeout(time_obj):
-    """Check if a timeout is in early morning (before 8:00 AM in local timezone)"""
-    if not time_obj:
-        return False
-    # Convert to Manila timezone if timezone-aware
-    if timezone.is_aware(time_obj):
-        manila_tz = pytz.timezone('Asia/Manila')
-        local_time = time_obj.astimezone(manila_tz)
-        return local_time.hour < 8  # Before 8:00 AM
-    return time_obj.hour < 8  # Before 8:00 AM
-
-def get_local_date(time_obj):
-    """Get the date in local timezone (Manila)"""
-    if not time_obj:
-        return None
-    if timezone.is_aware(time_obj):
-        manila_tz = pytz.timezone('Asia/Manila')
-        local_time = time_obj.astimezone(manila_tz)
-        return local_time.date()
-    return time_obj.date()
-
-def check_timelog_completeness(user, target_date, all_logs_dict):
-    """
-    Check if timelogs are complete for a given date, accounting for both day and night shifts.
-    
-    Args:
-        user: Employee user object
-        target_date: date object to check
-        all_logs_dict: Dictionary with date strings as keys and lists of log objects as values
-    
-    Returns:
-        'complete', 'incomplete', or 'none'
-    """
-    date_str = target_date.strftime('%Y-%m-%d')
-    next_date = target_date + timedelta(days=1)
-    next_date_str = next_date.strftime('%Y-%m-%d')
-    prev_date = target_date - timedelta(days=1)
-    prev_date_str = prev_date.strftime('%Y-%m-%d')
-    
-    # Get logs for previous date, current date and next date
-    prev_logs = all_logs_dict.get(prev_date_str, [])
-    current_logs = all_logs_dict.get(date_str, [])
-    next_logs = all_logs_dict.get(next_date_str, [])
-    
-    # Extract time-ins and time-outs for current date
-    current_timeins = [log for log in current_logs if log.entry == 'IN']
-    current_timeouts = [log for log in current_logs if log.entry == 'OUT']
-    
-    # Extract time-ins and time-outs for previous date
-    prev_timeins = [log for log in prev_logs if log.entry == 'IN']
-    prev_timeouts = [log for log in prev_logs if log.entry == 'OUT']
-    
-    # Extract time-outs for next date (for current day night shift)
-    next_timeouts = [log for log in next_logs if log.entry == 'OUT']
-    
-    # Check if current day has an early morning timeout (before 8 AM) that belongs to previous night shift
-    early_morning_timeout_claimed = False
-    for timeout in current_timeouts:
-        if is_early_morning_timeout(timeout.time):  # Before 8 AM in local timezone
-            # Check if there's a night shift time-in on previous day
-            for prev_timein in prev_timeins:
-                if is_night_shift_timein(prev_timein.time):
-                    # Check if previous day's night shift doesn't already have a timeout on same day
-                    has_same_day_timeout = False
-                    for prev_timeout in prev_timeouts:
-                        if prev_timeout.time > prev_timein.time:
-                            has_same_day_timeout = True
-                            break
-                    
-                    # Only claim this timeout if previous night shift doesn't have same-day timeout
-                    if not has_same_day_timeout:
-                        early_morning_timeout_claimed = True
-                        break
-            if early_morning_timeout_claimed:
-                break
-    
-    # Filter out early morning timeouts that belong to previous night shift
-    filtered_current_timeouts = current_timeouts
-    if early_morning_timeout_claimed:
-        filtered_current_timeouts = [log for log in current_timeouts if not is_early_morning_timeout(log.time)]
-    
-    # If no logs at all on current date (after filtering), return 'none'
-    if not current_timeins and not filtered_current_timeouts:
-        return 'none'
-    
-    # Check for night shift pattern (time-in at or after 4:00 PM on current date)
-    night_shift_timein = None
-    for timein in current_timeins:
-        if is_night_shift_timein(timein.time):
-            night_shift_timein = timein
-            break
-    
-    if night_shift_timein:
-        # Night shift: Look for timeout on next day (before 8:00 AM in local time) or same day (after time-in)
-        has_timeout = False
-        
-        timein_local_date = get_local_date(night_shift_timein.time)
-        
-        # Check for timeout on current date (same local date, after time-in)
-        for timeout in filtered_current_timeouts:
-            timeout_local_date = get_local_date(timeout.time)
-            # Must be same local date and after time-in
-            if timeout_local_date == timein_local_date and timeout.time > night_shift_timein.time:
-                has_timeout = True
-                break
-        
-        # If no same-day timeout, check next day (early morning in local timezone)
-        if not has_timeout:
-            # Check timeouts in current_logs that are next day in local time
-            for timeout in filtered_current_timeouts:
-                timeout_local_date = get_local_date(timeout.time)
-                if timeout_local_date == timein_local_date + timedelta(days=1) and is_early_morning_timeout(timeout.time):
-                    has_timeout = True
-                    break
-            
-            # Also check next_logs
-            if not has_timeout:
-                for timeout in next_timeouts:
-                    if is_early_morning_timeout(timeout.time):  # Before 8:00 AM in local timezone
-                        has_timeout = True
-                        break
-        
-        return 'complete' if has_timeout else 'incomplete'
-    else:
-        # Day shift: Both time-in and time-out should be on the same date
-        has_timein = len(current_timeins) > 0
-        has_timeout = len(filtered_current_timeouts) > 0
-        
-        if has_timein and has_timeout:
-            return 'complete'
-        elif has_timein or has_timeout:
-            return 'incomplete'
-        else:
-            return 'none'
-
 @login_required
 def calendar_view(request):
     current_date = timezone.localdate()
@@ -243,55 +97,15 @@ def calendar_view(request):
                         'description': holiday.description or '',
                         'repetition': getattr(holiday, 'repetition', 'none')
                     })
-    user = request.user
+    # Completeness of every day of the month from one range query over the punches
+    attendance = get_month_attendance(request.user, year, month)
     timelog_status = {}
-    days_in_month = [date(year, month, day) for week in month_days for day in week if day != 0]
-    
-    # Fetch timelogs for previous month, current month and next month (for night shift checking)
-    # Previous month needed to check if early morning timeouts belong to previous day's night shift
-    first_of_month = date(year, month, 1)
-    prev_month_date = first_of_month - timedelta(days=1)
-    next_month_date = first_of_month + timedelta(days=32)
-    next_month_date = next_month_date.replace(day=1)
-    
-    user_timelogs = Timelogs.objects.filter(
-        employee=user,
-        time__gte=date(prev_month_date.year, prev_month_date.month, 1),
-        time__lt=date(next_month_date.year, next_month_date.month, 1) + timedelta(days=31)
-    )
-    
-    # Organize logs by date
-    logs_by_date = {}
-    for log in user_timelogs:
-        # Only count entries that have valid time values
-        if log.time and str(log.time).strip():
-            d = log.time.date()
-            d_str = d.strftime('%Y-%m-%d')
-            if d_str not in logs_by_date:
-                logs_by_date[d_str] = []
-            logs_by_date[d_str].append(log)
-    
-    # Check completeness for each day in the month
-    for d in days_in_month:
-        status = check_timelog_completeness(user, d, logs_by_date)
-        if status == 'incomplete':
-            timelog_status[d.strftime('%Y-%m-%d')] = 'incomplete'
-        else:
-            timelog_status[d.strftime('%Y-%m-%d')] = 'none'
-    
-    # Build calendar_timelogs for the month only
     calendar_timelogs = {}
-    for d_str, logs in logs_by_date.items():
-        # Only include logs from the current month
-        log_date = datetime.strptime(d_str, '%Y-%m-%d').date()
-        if log_date.year == year and log_date.month == month:
-            calendar_timelogs[d_str] = []
-            for log in logs:
-                if log.time and str(log.time).strip():
-                    calendar_timelogs[d_str].append({
-                        'entry': model_to_ui_entry(log.entry),
-                        'time': log.time.isoformat(),
-                    })
+    for d, day in attendance.items():
+        d_str = d.strftime('%Y-%m-%d')
+        timelog_status[d_str] = 'incomplete' if day.status == 'incomplete' else 'none'
+        if day.punches:
+            calendar_timelogs[d_str] = serialize_punches(day.punches)
 
     today_date = timezone.localdate()
     context = {
@@ -487,6 +301,9 @@ def toggle_todo_api(request):
     todo.save()
     return JsonResponse({'success': True, 'completed': todo.completed})
 
+def serialize_punches(punches):
+    return [{'entry': model_to_ui_entry(punch.entry), 'time': punch.time.isoformat()} for punch in punches]
+
 @login_required
 def get_timelogs_api(request):
     user = request.user
@@ -498,128 +315,34 @@ def get_timelogs_api(request):
     except ValueError:
         return JsonResponse({'error': 'Invalid date'}, status=400)
     
-    # Get logs for previous date, current date and next date (for night shift checking)
-    prev_date = date_obj - timedelta(days=1)
-    next_date = date_obj + timedelta(days=1)
-    
-    prev_logs = Timelogs.objects.filter(employee=user, time__date=prev_date).order_by('time')
-    current_logs = Timelogs.objects.filter(employee=user, time__date=date_obj).order_by('time')
-    next_logs = Timelogs.objects.filter(employee=user, time__date=next_date).order_by('time')
-    
-    # Build timelogs for current date
-    data = []
-    claimed_by_previous_night_shift = None
-    
-    # First, check if PREVIOUS date has a night shift that should claim current date's early morning timeout
-    prev_night_shift_timein = None
-    for log in prev_logs:
-        if log.time and str(log.time).strip() and log.entry == 'IN':
-            if is_night_shift_timein(log.time):
-                prev_night_shift_timein = log
-                break
-    
-    # If previous date has night shift, check if it should claim current date's early morning timeout
-    if prev_night_shift_timein:
-        # Check if previous date already has a timeout (on same day as the night shift time-in)
-        prev_has_same_day_timeout = False
-        for log in prev_logs:
-            if log.entry == 'OUT' and log.time > prev_night_shift_timein.time:
-                prev_has_same_day_timeout = True
-                break
-        
-        # If previous night shift doesn't have same-day timeout, check current date's early morning timeout
-        if not prev_has_same_day_timeout:
-            for log in current_logs:
-                if log.time and str(log.time).strip() and log.entry == 'OUT':
-                    if is_early_morning_timeout(log.time):  # Before 8 AM in local timezone
-                        # This timeout belongs to previous date's night shift
-                        claimed_by_previous_night_shift = log.time.isoformat()
-                        break
-    
-    # Add current date logs (excluding those claimed by previous night shift)
-    for log in current_logs:
-        if log.time and str(log.time).strip():
-            # Skip if this timeout was claimed by previous night shift
-            if claimed_by_previous_night_shift and log.time.isoformat() == claimed_by_previous_night_shift:
-                continue
-            data.append({
-                'entry': model_to_ui_entry(log.entry),
-                'time': log.time.isoformat(),
-            })
-    
-    # Now check if CURRENT date has night shift that needs NEXT day's timeout
-    current_night_shift_timein = None
-    for log in current_logs:
-        if log.time and str(log.time).strip() and log.entry == 'IN':
-            if is_night_shift_timein(log.time):
-                current_night_shift_timein = log
-                break
-    
-    # If current date has night shift time-in, check for next day timeout (before 8 AM)
-    if current_night_shift_timein:
-        # Check if there's already a timeout on current date (after time-in)
-        has_same_day_timeout = False
-        for log in current_logs:
-            if log.entry == 'OUT' and log.time > current_night_shift_timein.time:
-                has_same_day_timeout = True
-                break
-        
-        # If no same-day timeout, look for next day early morning timeout
-        if not has_same_day_timeout:
-            for log in next_logs:
-                if log.time and str(log.time).strip() and log.entry == 'OUT':
-                    if is_early_morning_timeout(log.time):  # Before 8 AM in local timezone
-                        # Add this next-day timeout to current date's display
-                        data.append({
-                            'entry': model_to_ui_entry(log.entry),
-                            'time': log.time.isoformat(),
-                        })
-                        break
-    
-    # Build previous and next day data for reference
-    prev_day_data = []
-    next_day_data = []
-    
-    # Check if previous day has night shift that needs current day's early timeout
-    prev_night_shift_needs_timeout = False
-    if prev_night_shift_timein:
-        prev_has_timeout = False
-        for log in prev_logs:
-            if log.entry == 'OUT' and log.time > prev_night_shift_timein.time:
-                prev_has_timeout = True
-                break
-        if not prev_has_timeout:
-            prev_night_shift_needs_timeout = True
-    
-    # Build prev_day_data - include the claimed timeout from current date
-    for log in prev_logs:
-        if log.time and str(log.time).strip():
-            prev_day_data.append({
-                'entry': model_to_ui_entry(log.entry),
-                'time': log.time.isoformat(),
-            })
-    
-    # If previous night shift claimed current day's early timeout, add it to prev_day_data
-    if prev_night_shift_needs_timeout and claimed_by_previous_night_shift:
-        for log in current_logs:
-            if log.time.isoformat() == claimed_by_previous_night_shift:
-                prev_day_data.append({
-                    'entry': model_to_ui_entry(log.entry),
-                    'time': log.time.isoformat(),
-                })
-                break
-    
-    for log in next_logs:
-        if log.time and str(log.time).strip():
-            next_day_data.append({
-                'entry': model_to_ui_entry(log.entry),
-                'time': log.time.isoformat(),
-            })
+    # The day and its neighbours; a night shift's next-morning time-out is listed under the night shift's day
+    attendance = get_attendance(user, date_obj - timedelta(days=1), date_obj + timedelta(days=1))
+    day = attendance[date_obj]
     
     return JsonResponse({
-        'prev_day_timelogs': prev_day_data,
-        'timelogs': data,
-        'next_day_timelogs': next_day_data
+        'prev_day_timelogs': serialize_punches(attendance[date_obj - timedelta(days=1)].punches),
+        'timelogs': serialize_punches(day.punches),
+        'next_day_timelogs': serialize_punches(attendance[date_obj + timedelta(days=1)].punches),
+        'status': day.status,
+    })
+
+@login_required
+def get_month_timelogs_api(request):
+    try:
+        year = int(request.GET.get('year', ''))
+        month = int(request.GET.get('month', ''))
+        date(year, month, 1)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid year or month'}, status=400)
+
+    attendance = get_month_attendance(request.user, year, month)
+    return JsonResponse({
+        'year': year,
+        'month': month,
+        'days': {
+            d.strftime('%Y-%m-%d'): {'status': day.status, 'timelogs': serialize_punches(day.punches)}
+            for d, day in attendance.items()
+        },
     })
 
 # TIME LOGS
@@ -750,165 +473,9 @@ def import_timelogs(request):
                 'message': 'Invalid file format. Please upload an Excel file (.xlsx or .xls)'
             }, status=400)
         
-        # Read Excel file
-        try:
-            df = pd.read_excel(excel_file)
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'message': f'Error reading Excel file: {str(e)}'
-            }, status=400)
-        
-        # Validate required columns
-        required_columns = ['ID Number', 'Name', 'Date and Time', 'Entry']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            return JsonResponse({
-                'success': False,
-                'message': f'Missing required columns: {", ".join(missing_columns)}'
-            }, status=400)
-        
-        # Process each row
-        success_count = 0
-        error_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                # Read fields with safe checks
-                id_number = ''
-                name_val = ''
-                datetime_raw = row.get('Date and Time') if 'Date and Time' in df.columns else ''
-                entry_raw = row.get('Entry') if 'Entry' in df.columns else ''
-
-                if not pd.isna(row.get('ID Number')):
-                    id_number = str(row.get('ID Number')).strip()
-                if 'Name' in df.columns and not pd.isna(row.get('Name')):
-                    name_val = str(row.get('Name')).strip()
-
-                # Validate employee
-                if not id_number:
-                    errors.append({
-                        'id_number': id_number,
-                        'name': name_val,
-                        'datetime': str(datetime_raw) if not pd.isna(datetime_raw) else '',
-                        'entry': str(entry_raw) if not pd.isna(entry_raw) else '',
-                        'error': 'Missing ID Number'
-                    })
-                    error_count += 1
-                    continue
-
-                employee = EmployeeLogin.objects.filter(idnumber=id_number).first()
-                if not employee:
-                    errors.append({
-                        'id_number': id_number,
-                        'name': name_val,
-                        'datetime': str(datetime_raw) if not pd.isna(datetime_raw) else '',
-                        'entry': str(entry_raw) if not pd.isna(entry_raw) else '',
-                        'error': f'Employee with ID {id_number} not found'
-                    })
-                    error_count += 1
-                    continue
-
-                # Parse datetime
-                datetime_str = str(datetime_raw).strip() if not pd.isna(datetime_raw) else ''
-                try:
-                    if pd.isna(datetime_raw) or datetime_str == '':
-                        raise ValueError('Empty datetime')
-
-                    if isinstance(datetime_raw, pd.Timestamp):
-                        log_datetime = datetime_raw.to_pydatetime()
-                        if log_datetime.tzinfo is None:
-                            log_datetime = timezone.make_aware(log_datetime, timezone.get_current_timezone())
-                    else:
-                        datetime_formats = [
-                            '%m/%d/%Y %I:%M:%S%p',    # 08/15/2025 5:30:00pm
-                            '%m/%d/%Y %I:%M:%S %p',   # 08/15/2025 5:30:00 pm
-                            '%m/%d/%Y %I:%M%p',       # 08/15/2025 5:30pm
-                            '%m/%d/%Y %I:%M %p',      # 08/15/2025 5:30 pm
-                            '%Y-%m-%d %H:%M:%S',
-                            '%Y-%m-%d %H:%M',
-                            '%m/%d/%Y %H:%M:%S',
-                            '%m/%d/%Y %H:%M',
-                        ]
-                        datetime_str_clean = datetime_str.strip()
-                        for fmt in datetime_formats:
-                            try:
-                                log_datetime = datetime.strptime(datetime_str_clean, fmt)
-                                log_datetime = timezone.make_aware(log_datetime, timezone.get_current_timezone())
-                                break
-                            except ValueError:
-                                continue
-                        else:
-                            raise ValueError(f'Unable to parse datetime: {datetime_str}')
-                except (ValueError, AttributeError) as e:
-                    errors.append({
-                        'id_number': id_number,
-                        'name': name_val,
-                        'datetime': datetime_str,
-                        'entry': str(entry_raw) if not pd.isna(entry_raw) else '',
-                        'error': f'Invalid datetime format: {datetime_str}'
-                    })
-                    error_count += 1
-                    continue
-
-                # Normalize entry type to model choices (IN/OUT)
-                entry_val = str(entry_raw).strip() if not pd.isna(entry_raw) else ''
-                entry_lower = entry_val.lower()
-                if entry_lower in ['timein', 'time in', 'in', 'i', 'time-in', 'time_in', 'tin']:
-                    entry_norm = 'IN'
-                elif entry_lower in ['timeout', 'time out', 'out', 'o', 'time-out', 'time_out', 'tout']:
-                    entry_norm = 'OUT'
-                else:
-                    errors.append({
-                        'id_number': id_number,
-                        'name': name_val,
-                        'datetime': datetime_str,
-                        'entry': entry_val,
-                        'error': f'Invalid entry type: {entry_val}'
-                    })
-                    error_count += 1
-                    continue
-
-                # Create or update time log
-                timelog, created = Timelogs.objects.get_or_create(
-                    employee=employee,
-                    time=log_datetime,
-                    defaults={'entry': entry_norm}
-                )
-                if not created:
-                    if timelog.entry != entry_norm:
-                        timelog.entry = entry_norm
-                        timelog.save()
-
-                success_count += 1
-
-            except Exception as e:
-                errors.append({
-                    'id_number': id_number if 'id_number' in locals() else '',
-                    'name': name_val if 'name_val' in locals() else '',
-                    'datetime': datetime_str if 'datetime_str' in locals() else '',
-                    'entry': entry_val if 'entry_val' in locals() else '',
-                    'error': str(e)
-                })
-                error_count += 1
-        
-        response_data = {
-            'success': True,
-            'message': f'Import completed. {success_count} records processed successfully.',
-            'success_count': success_count,
-            'error_count': error_count
-        }
-        
-        if errors:
-            # Limit the number of error rows returned to avoid huge payloads
-            limit = 100
-            response_data['errors'] = errors[:limit]
-            if len(errors) > limit:
-                response_data['more_errors'] = len(errors) - limit
-        
-        return JsonResponse(response_data)
+        # Parsing and writing happen in a background job; the client polls progress_url
+        job = enqueue_job('usercalendar.import_timelogs', request.user, files=[excel_file])
+        return job_queued_response(job)
         
     except Exception as e:
         return JsonResponse({
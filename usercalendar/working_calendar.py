@@ -0,0 +1,113 @@
+"""
+Working-day calendar shared by leave, timelog and payroll code.
+
+A day is a working day unless it is a Holiday, or a Sunday that has no
+SundayException. Each year is precomputed once into a cumulative count
+(``year[i]`` = working days before day-of-year ``i``), so counting the working
+days between two dates is a subtraction per year touched instead of a
+day-by-day walk with two queries per call.
+
+Years are kept in the Django cache under a version key that the Holiday and
+SundayException signals bump. With the default per-process cache other worker
+processes pick up a change after WORKING_CALENDAR_CACHE_TIMEOUT; configure a
+shared cache backend to have them see it immediately.
+"""
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from empconnect.cache import bump_cache_version, get_cache_version, invalidate_on_commit
+from .models import Holiday
+
+WORKING_CALENDAR_VERSION_KEY = 'working_calendar:version'
+HOLIDAYS_PAYLOAD_KEY = 'working_calendar:{version}:holidays'
+YEAR_KEY = 'working_calendar:{version}:year:{year}'
+
+
+def get_cache_timeout():
+    return getattr(settings, 'WORKING_CALENDAR_CACHE_TIMEOUT', 600)
+
+
+def invalidate_working_calendar():
+    """Drop every cached year and the holiday payload (they are keyed by version)"""
+    bump_cache_version(WORKING_CALENDAR_VERSION_KEY)
+
+
+def schedule_working_calendar_invalidation():
+    invalidate_on_commit(invalidate_working_calendar)
+
+
+def _build_years(years):
+    """Cumulative working-day counts for the given years, with one query per source table"""
+    from leaverequest.models import SundayException
+
+    first, last = date(min(years), 1, 1), date(max(years), 12, 31)
+    holidays = set(Holiday.objects.filter(date__range=[first, last]).values_list('date', flat=True))
+    sunday_exceptions = set(SundayException.objects.filter(date__range=[first, last]).values_list('date', flat=True))
+
+    built = {}
+    for year in years:
+        current = date(year, 1, 1)
+        counts = [0]
+        while current.year == year:
+            is_working = current not in holidays and (current.weekday() != 6 or current in sunday_exceptions)
+            counts.append(counts[-1] + is_working)
+            current += timedelta(days=1)
+        built[year] = tuple(counts)
+    return built
+
+
+def get_years(years):
+    """Return {year: cumulative counts}, building and caching the years that are missing"""
+    years = sorted(set(years))
+    version = get_cache_version(WORKING_CALENDAR_VERSION_KEY)
+    keys = {YEAR_KEY.format(version=version, year=year): year for year in years}
+    cached = cache.get_many(keys)
+    result = {keys[key]: counts for key, counts in cached.items()}
+
+    missing = [year for year in years if year not in result]
+    if missing:
+        built = _build_years(missing)
+        cache.set_many(
+            {YEAR_KEY.format(version=version, year=year): counts for year, counts in built.items()},
+            get_cache_timeout()
+        )
+        result.update(built)
+    return result
+
+
+def working_days_between(start_date, end_date):
+    """Number of working days from start_date to end_date, both inclusive (0 if the range is empty)"""
+    if end_date < start_date:
+        return 0
+    years = get_years(range(start_date.year, end_date.year + 1))
+    total = 0
+    for year, counts in years.items():
+        first = start_date.timetuple().tm_yday - 1 if year == start_date.year else 0
+        last = end_date.timetuple().tm_yday if year == end_date.year else len(counts) - 1
+        total += counts[last] - counts[first]
+    return total
+
+
+def is_working_day(day):
+    return working_days_between(day, day) == 1
+
+
+def get_holidays_payload():
+    """Holidays and Sunday exceptions as served to the leave calendar, cached with the years"""
+    from leaverequest.models import SundayException
+
+    key = HOLIDAYS_PAYLOAD_KEY.format(version=get_cache_version(WORKING_CALENDAR_VERSION_KEY))
+    payload = cache.get(key)
+    if payload is None:
+        payload = {
+            'holidays': [
+                {'date': holiday['date'].strftime('%Y-%m-%d'), 'name': holiday['name'], 'type': holiday['holiday_type']}
+                for holiday in Holiday.objects.values('date', 'name', 'holiday_type')
+            ],
+            'sunday_exceptions': [
+                {'date': exception['date'].strftime('%Y-%m-%d'), 'description': exception['description']}
+                for exception in SundayException.objects.values('date', 'description')
+            ],
+        }
+        cache.set(key, payload, get_cache_timeout())
+    return payload
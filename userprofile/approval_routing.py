@@ -0,0 +1,135 @@
+"""
+Approval routing shared by leave, training and evaluation.
+
+Every employee's supervisor chain (their approver, that approver's approver,
+and so on, from EmploymentInformation.approver) is precomputed together with
+their Position.level and the active clinic/IAD/HR role holders. The whole table
+is built with two queries and kept in the Django cache; the EmployeeLogin,
+EmploymentInformation and Position signals drop it, and writes that bypass
+signals (bulk_create, queryset.update) call schedule_routing_invalidation.
+
+Chains hold employee IDs; the helpers below load the one employee a caller
+actually routes to.
+"""
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from empconnect.cache import invalidate_on_commit
+from userlogin.models import EmployeeLogin
+from .models import EmploymentInformation
+
+ROUTING_TABLE_KEY = 'approval_routing:table'
+ROLE_FLAGS = ('clinic_admin', 'iad_admin', 'hr_manager', 'hr_admin')
+# EmployeeLogin fields that change routing; saves limited to other fields (last_login) are ignored
+ROUTING_USER_FIELDS = frozenset(ROLE_FLAGS) | {'active', 'locked', 'is_active'}
+
+# level is the Position.level as an int (None without a position); supervisors
+# starts with the direct approver and follows the approver links upwards
+ApprovalChain = namedtuple('ApprovalChain', ['level', 'supervisors', 'line_leader'])
+
+
+def get_cache_timeout():
+    return getattr(settings, 'APPROVAL_ROUTING_CACHE_TIMEOUT', 600)
+
+
+def invalidate_routing():
+    cache.delete(ROUTING_TABLE_KEY)
+
+
+def schedule_routing_invalidation():
+    invalidate_on_commit(invalidate_routing)
+
+
+def _build_table():
+    roles = dict.fromkeys(ROLE_FLAGS)
+    holders = EmployeeLogin.objects.filter(is_active=True).exclude(
+        clinic_admin=False, iad_admin=False, hr_manager=False, hr_admin=False
+    ).order_by('pk').values_list('pk', *ROLE_FLAGS)
+    for pk, *flags in holders:
+        for role, flag in zip(ROLE_FLAGS, flags):
+            if flag and roles[role] is None:
+                roles[role] = pk
+
+    employment = {
+        user_id: (approver_id, int(level) if level else None, line_leader_id)
+        for user_id, approver_id, level, line_leader_id in EmploymentInformation.objects.values_list(
+            'user_id', 'approver_id', 'position__level', 'line_leader_id'
+        )
+    }
+
+    chains = {}
+    for user_id, (approver_id, level, line_leader_id) in employment.items():
+        supervisors = []
+        # Stop at the top of the hierarchy or where approver links loop back
+        while approver_id is not None and approver_id != user_id and approver_id not in supervisors:
+            supervisors.append(approver_id)
+            approver_id = employment.get(approver_id, (None,))[0]
+        chains[user_id] = ApprovalChain(level, tuple(supervisors), line_leader_id)
+
+    return {'roles': roles, 'chains': chains}
+
+
+def get_routing_table():
+    table = cache.get(ROUTING_TABLE_KEY)
+    if table is None:
+        table = _build_table()
+        cache.set(ROUTING_TABLE_KEY, table, get_cache_timeout())
+    return table
+
+
+def _employee_id(employee):
+    return getattr(employee, 'pk', employee)
+
+
+def _load(employee_id):
+    if employee_id is None:
+        return None
+    return EmployeeLogin.objects.filter(pk=employee_id).first()
+
+
+def get_approval_chain(employee):
+    """The employee's ApprovalChain, or None when they have no employment information"""
+    return get_routing_table()['chains'].get(_employee_id(employee))
+
+
+def get_role_holder(*roles):
+    """The first active holder of the given roles, tried in order (e.g. 'iad_admin', 'hr_manager', 'hr_admin')"""
+    holders = get_routing_table()['roles']
+    for role in roles:
+        if holders.get(role) is not None:
+            return _load(holders[role])
+    return None
+
+
+def get_supervisor(employee, depth=1):
+    """The employee's approver (depth=1), their approver's approver (depth=2), ... or None"""
+    chain = get_approval_chain(employee)
+    if chain is None or len(chain.supervisors) < depth:
+        return None
+    return _load(chain.supervisors[depth - 1])
+
+
+def get_next_approver(employee, current_approver):
+    """
+    Who a request filed by ``employee`` goes to after ``current_approver`` approves it.
+
+    Clinic admin is followed by the IAD admin, the IAD admin by the requestor's
+    approver, a level-3 approver by the HR admin, and anyone else by their own
+    approver. Returns None at the end of the route.
+    """
+    table = get_routing_table()
+    chain = table['chains'].get(_employee_id(employee))
+
+    if current_approver.clinic_admin:
+        return _load(table['roles']['iad_admin'])
+
+    if current_approver.iad_admin and chain and chain.supervisors:
+        return _load(chain.supervisors[0])
+
+    approver_chain = table['chains'].get(current_approver.pk)
+    if chain and chain.level and approver_chain and approver_chain.level == 3:
+        return _load(table['roles']['hr_admin'])
+
+    if approver_chain and approver_chain.supervisors:
+        return _load(approver_chain.supervisors[0])
+    return None
@@ -0,0 +1,4 @@
+from backgroundjob.runner import register_job
+from .views import process_employee_import
+
+register_job('userprofile.import_employees')(process_employee_import)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .approval_routing import ROUTING_USER_FIELDS, schedule_routing_invalidation
+
+@receiver(post_save, sender='userlogin.EmployeeLogin')
+def employee_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not ROUTING_USER_FIELDS.intersection(update_fields):
+        return
+    schedule_routing_invalidation()
+
+@receiver(post_delete, sender='userlogin.EmployeeLogin')
+@receiver([post_save, post_delete], sender='userprofile.EmploymentInformation')
+@receiver([post_save, post_delete], sender='generalsettings.Position')
+def routing_changed(sender, instance, **kwargs):
+    schedule_routing_invalidation()
@@ -1,3 +1,95 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .approval_routing import get_approval_chain, get_next_approver, get_role_holder, get_routing_table
+from .models import EmploymentInformation
+from .views import validate_employee_import_rows, create_employee_import_chunk
+from concurrent.futures import ThreadPoolExecutor
+from generalsettings.models import Department, Position
+from userlogin.models import EmployeeLogin
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EmployeeImportTest(TestCase):
+    def setUp(self):
+        Department.objects.create(department_name='Production')
+        EmployeeLogin.objects.create(
+            username='existing',
+            firstname='Existing',
+            lastname='User',
+            email='existing@example.com',
+            idnumber='10000'
+        )
+
+    def _row(self, idnumber, email, **extra):
+        return {'idnumber': idnumber, 'firstname': 'New', 'lastname': 'Hire', 'email': email, **extra}
+
+    def test_sheet_is_validated_against_database_and_itself(self):
+        records, errors = validate_employee_import_rows([
+            self._row('20000', 'new@example.com', department='production'),
+            self._row('10000', 'other@example.com'),
+            self._row('20001', 'EXISTING@example.com'),
+            self._row('20000', 'dup@example.com'),
+            self._row('20002', 'bad@example.com', department='Nowhere'),
+            self._row('20003', float('nan')),
+        ])
+
+        self.assertEqual([record['idnumber'] for record in records], ['20000'])
+        self.assertEqual(records[0]['department'].department_name, 'Production')
+        self.assertEqual([error['row'] for error in errors], [3, 4, 5, 6, 7])
+        self.assertEqual(errors[0]['errors'], 'Employee with ID number 10000 already exists')
+        self.assertEqual(errors[3]['errors'], 'Invalid department: Nowhere')
+        self.assertEqual(errors[4]['errors'], 'Missing required fields: email')
+
+    def test_chunk_creates_users_with_employment_info(self):
+        records, errors = validate_employee_import_rows([
+            self._row('20000', 'a@example.com'),
+            self._row('20001', 'b@example.com', employment_type='ojt'),
+        ])
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            failures = create_employee_import_chunk(records, pool)
+
+        self.assertEqual(failures, [])
+        employee = EmployeeLogin.objects.get(idnumber='20001')
+        self.assertTrue(employee.check_password('Repco20001'))
+        self.assertTrue(employee.is_active)
+        self.assertEqual(EmploymentInformation.objects.get(user=employee).employment_type, 'OJT')
+
+
+class ApprovalRoutingTest(TestCase):
+    def setUp(self):
+        levels = {level: Position.objects.create(position=f'Level {level}', level=level) for level in '123'}
+        self.boss = self._employee('40000', levels['3'])
+        self.manager = self._employee('40001', levels['2'], approver=self.boss)
+        self.staff = self._employee('40002', levels['1'], approver=self.manager)
+        self.clinic = EmployeeLogin.objects.create(idnumber='40003', username='clinic', clinic_admin=True)
+        self.iad = EmployeeLogin.objects.create(idnumber='40004', username='iad', iad_admin=True)
+        self.hr = EmployeeLogin.objects.create(idnumber='40005', username='hr', hr_admin=True)
+        EmployeeLogin.objects.create(idnumber='40006', username='locked', hr_manager=True, locked=True)
+
+    def _employee(self, idnumber, position, approver=None):
+        employee = EmployeeLogin.objects.create(idnumber=idnumber, username=idnumber)
+        EmploymentInformation.objects.create(user=employee, position=position, approver=approver, employment_type='Regular')
+        return employee
+
+    def test_chain_and_next_approvers(self):
+        self.assertEqual(get_approval_chain(self.staff).supervisors, (self.manager.pk, self.boss.pk))
+        self.assertIsNone(get_approval_chain(self.clinic))
+        self.assertEqual(get_role_holder('hr_manager', 'hr_admin'), self.hr)
+
+        route = [self.clinic, self.iad, self.manager, self.boss]
+        expected = [self.iad, self.manager, self.boss, self.hr]
+        get_routing_table()
+        for current, following in zip(route, expected):
+            # The table is cached, so only the next approver is loaded
+            with self.assertNumQueries(1):
+                self.assertEqual(get_next_approver(self.staff, current), following)
+
+    def test_employment_changes_invalidate_the_table(self):
+        self.assertEqual(get_approval_chain(self.staff).supervisors, (self.manager.pk, self.boss.pk))
+
+        self.manager.employment_info.approver = None
+        self.manager.employment_info.save()
+        self.assertEqual(get_approval_chain(self.staff).supervisors, (self.manager.pk,))
+
+        self.hr.hr_admin = False
+        self.hr.save()
+        self.assertIsNone(get_role_holder('hr_admin'))
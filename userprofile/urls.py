@@ -26,7 +26,6 @@ urlpatterns = [
     path('api/line-leaders/', views.api_line_leaders, name='api_line_leaders'),
     path('download-employee-template/', views.download_employee_template, name='download_employee_template'),
     path('import-employees/', views.import_employees, name='import_employees'),
-    path('import-progress/<str:import_id>/', views.import_progress, name='import_progress'),
     path('admin/employee/<int:employee_id>/approve/', views.admin_approve_employee, name='admin_approve_employee'),
     path('admin/employee/<int:employee_id>/disapprove/', views.admin_disapprove_employee, name='admin_disapprove_employee'),
     path('change-password', views.change_password, name='change_password'),
@@ -9,6 +9,7 @@ from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 import json
 from .models import PersonalInformation, ContactPerson, EducationalBackground, FamilyBackground, EmploymentInformation
 from .forms import PersonalInformationForm, ContactPersonForm, EducationalBackgroundForm, FamilyBackgroundForm, EmploymentInformationForm, CreateEmployeeForm
+from .approval_routing import schedule_routing_invalidation
 from userlogin.models import EmployeeLogin
 from certificate.models import Certificate
 from notification.models import Notification
@@ -963,17 +964,64 @@ def api_line_leaders(request):
     except Department.DoesNotExist:
         return JsonResponse({'line_leaders': []})
 
-import uuid
 import pandas as pd
-from django.core.cache import cache
 from django.utils import timezone
 from datetime import datetime
-import threading
-import time
+from backgroundjob.runner import enqueue_job, job_queued_response
+from dashboard.counters import refresh_counter
+from empconnect.exports import ExportWorkbook, iterate
+from concurrent.futures import ThreadPoolExecutor
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+EMPLOYEE_IMPORT_COLUMN_MAPPING = {
+    'id number': 'idnumber',
+    'first name': 'firstname', 
+    'last name': 'lastname',
+    'email address': 'email',
+    'department': 'department',
+    'line': 'line',
+    'position': 'position',
+    'employment type': 'employment_type',
+    'date hired': 'date_hired',
+    'tin number': 'tin_number',
+    'sss number': 'sss_number',
+    'hdmf number': 'hdmf_number',
+    'philhealth number': 'philhealth_number',
+    'bank account': 'bank_account'
+}
+
+EMPLOYEE_IMPORT_REQUIRED_COLUMNS = ['idnumber', 'firstname', 'lastname', 'email']
+
+def read_employee_import_sheet(uploaded_file):
+    """Read the onboarding sheet and normalize its headers; raises ValueError with a user-facing message"""
+    try:
+        df = pd.read_excel(uploaded_file)
+        logger.info(f"Excel file read successfully. Shape: {df.shape}")
+        logger.info(f"Columns: {list(df.columns)}")
+    except Exception as e:
+        logger.error(f"Error reading Excel file: {str(e)}")
+        raise ValueError(f'Error reading Excel file: {str(e)}')
+
+    df.columns = df.columns.str.strip().str.lower()
+    
+    # Map column names to expected format
+    df.columns = df.columns.map(lambda x: EMPLOYEE_IMPORT_COLUMN_MAPPING.get(x, x))
+    
+    logger.info(f"Column mapping completed. Final columns: {list(df.columns)}")
+
+    missing_columns = [col for col in EMPLOYEE_IMPORT_REQUIRED_COLUMNS if col not in df.columns]
+
+    if missing_columns:
+        logger.error(f"Missing required columns: {missing_columns}. Available columns: {list(df.columns)}")
+        raise ValueError(f'Missing required columns: {", ".join(missing_columns)}. Found columns: {", ".join(df.columns)}')
+
+    df = df.dropna(subset=EMPLOYEE_IMPORT_REQUIRED_COLUMNS, how='all')
+    logger.info(f"After removing empty rows: {len(df)} rows remaining")
+    return df
+
 @login_required(login_url="user-login")
 def import_employees(request):
     if not request.user.hr_admin:
@@ -992,83 +1040,19 @@ def import_employees(request):
             return JsonResponse({'success': False, 'message': 'Invalid file format. Please upload Excel files only.'})
 
         try:
-            df = pd.read_excel(uploaded_file)
-            logger.info(f"Excel file read successfully. Shape: {df.shape}")
-            logger.info(f"Columns: {list(df.columns)}")
-        except Exception as e:
-            logger.error(f"Error reading Excel file: {str(e)}")
-            return JsonResponse({'success': False, 'message': f'Error reading Excel file: {str(e)}'})
-
-        df.columns = df.columns.str.strip().str.lower()
-        
-        # Map column names to expected format
-        column_mapping = {
-            'id number': 'idnumber',
-            'first name': 'firstname', 
-            'last name': 'lastname',
-            'email address': 'email',
-            'department': 'department',
-            'line': 'line',
-            'position': 'position',
-            'employment type': 'employment_type',
-            'date hired': 'date_hired',
-            'tin number': 'tin_number',
-            'sss number': 'sss_number',
-            'hdmf number': 'hdmf_number',
-            'philhealth number': 'philhealth_number',
-            'bank account': 'bank_account'
-        }
-        
-        df.columns = df.columns.map(lambda x: column_mapping.get(x, x))
-        
-        logger.info(f"Column mapping completed. Final columns: {list(df.columns)}")
-
-        required_columns = ['idnumber', 'firstname', 'lastname', 'email']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-
-        if missing_columns:
-            logger.error(f"Missing required columns: {missing_columns}. Available columns: {list(df.columns)}")
-            return JsonResponse({
-                'success': False,
-                'message': f'Missing required columns: {", ".join(missing_columns)}. Found columns: {", ".join(df.columns)}'
-            })
-
-        df = df.dropna(subset=required_columns, how='all')
-        logger.info(f"After removing empty rows: {len(df)} rows remaining")
+            df = read_employee_import_sheet(uploaded_file)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)})
 
         if len(df) == 0:
             logger.error("No valid data rows found after removing empty rows")
             return JsonResponse({'success': False, 'message': 'No valid data rows found in the Excel file'})
 
-        import_id = str(uuid.uuid4())
-
-        import_data = {
-            'data': df.to_dict('records'),
-            'total_rows': len(df),
-            'processed': 0,
-            'success_count': 0,
-            'error_count': 0,
-            'errors': [],
-            'status': 'pending',
-            'created_at': timezone.now().isoformat(),
-            'user_id': request.user.id
-        }
-
-        logger.info(f"Storing import data in cache with ID: {import_id}")
-        cache.set(f'import_{import_id}', import_data, timeout=3600) 
-
-        logger.info(f"Starting background thread for import ID: {import_id}")
-        thread = threading.Thread(target=process_employee_import, args=(import_id,))
-        thread.daemon = True
-        thread.start()
-        logger.info(f"Background thread started successfully for import ID: {import_id}")
-
-        return JsonResponse({
-            'success': True,
-            'import_id': import_id,
-            'total_rows': len(df),
-            'message': 'File uploaded successfully. Processing started.'
-        })
+        uploaded_file.seek(0)
+        job = enqueue_job('userprofile.import_employees', request.user, files=[uploaded_file], total=len(df))
+        logger.info(f"Queued employee import job {job.pk} for {len(df)} rows")
+
+        return job_queued_response(job, import_id=str(job.pk), total_rows=len(df))
 
     except Exception as e:
         logger.error(f"Error processing file: {str(e)}")
@@ -1076,225 +1060,238 @@ def import_employees(request):
         logger.error(f"Full traceback: {traceback.format_exc()}")
         return JsonResponse({'success': False, 'message': f'Error processing file: {str(e)}'})
 
-@login_required(login_url="user-login")
-def import_progress(request, import_id):
-    """Get import progress status"""
-    if not request.user.hr_admin:
-        return JsonResponse({'success': False, 'message': 'Access denied'})
+EMPLOYEE_IMPORT_CHUNK_SIZE = 250
 
-    import_data = cache.get(f'import_{import_id}')
-    logger.info(f"Import progress request for ID: {import_id}, data found: {import_data is not None}")
+def _import_cell(row, key):
+    """Stripped string value of a sheet cell, or None when the cell is blank/NaN"""
+    value = row.get(key)
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    value = str(value).strip()
+    return value or None
 
-    if not import_data:
-        logger.error(f"Import session not found for ID: {import_id}")
-        return JsonResponse({'success': False, 'message': 'Import session not found'})
-
-    response_data = {
-        'success': True,
-        'status': import_data['status'],
-        'total': import_data['total_rows'],
-        'processed': import_data['processed'],
-        'success_count': import_data['success_count'],
-        'error_count': import_data['error_count'],
-        'errors': import_data['errors']
-    }
-    
-    if import_data.get('error_message'):
-        response_data['error_message'] = import_data['error_message']
-        logger.error(f"Import error message: {import_data['error_message']}")
-    
-    logger.info(f"Import progress response: {response_data}")
-    return JsonResponse(response_data)
-
-def process_employee_import(import_id):
+def _parse_import_date_hired(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return timezone.now().date()
     try:
-        logger.info(f"Starting background import process for ID: {import_id}")
-        import_data = cache.get(f'import_{import_id}')
-
-        if not import_data:
-            logger.error(f"Import data not found in cache for ID: {import_id}")
-            return
-
-        import_data['status'] = 'processing'
-        cache.set(f'import_{import_id}', import_data, timeout=3600)
-        logger.info(f"Import process started. Total rows to process: {import_data['total_rows']}")
-
-        data_rows = import_data['data']
-        total_rows = len(data_rows)
-
-        departments = {dept.department_name.lower(): dept for dept in Department.objects.all()}
-        positions = {pos.position.lower(): pos for pos in Position.objects.all()}
-        lines = {line.line_name.lower(): line for line in Line.objects.all()}
-
-        employment_type_choices = EmploymentInformation.EMPLOYMENT_TYPE_CHOICES
-        valid_employment_types = {choice[0].lower(): choice[0] for choice in employment_type_choices}
-
-        logger.info(f"Available departments: {list(departments.keys())}")
-        logger.info(f"Available positions: {list(positions.keys())}")
-        logger.info(f"Available lines: {list(lines.keys())}")
-        logger.info(f"Valid employment types: {list(valid_employment_types.keys())}")
-        
-        logger.info(f"Validation data loaded - Departments: {len(departments)}, Positions: {len(positions)}, Lines: {len(lines)}")
-        logger.info(f"Valid employment types: {valid_employment_types}")
+        if isinstance(value, str):
+            return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+        if hasattr(value, 'date'):
+            return value.date()
+        return value
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid date format for date_hired: {value}, using current date")
+        return timezone.now().date()
+
+def validate_employee_import_rows(data_rows):
+    """
+    Validate the whole sheet in memory before anything is written.
+
+    Existing active emails and ID numbers are loaded once into sets, and rows
+    accepted earlier in the sheet are added to them, so duplicates inside the
+    file are reported the same way as duplicates against the database.
+
+    Returns (records, errors): records are ready-to-create dicts keyed by their
+    Excel row number, errors use the shape the import progress modal expects.
+    """
+    departments = {dept.department_name.lower(): dept for dept in Department.objects.all()}
+    positions = {pos.position.lower(): pos for pos in Position.objects.all()}
+    lines = {line.line_name.lower(): line for line in Line.objects.all()}
+    valid_employment_types = {choice[0].lower(): choice[0] for choice in EmploymentInformation.EMPLOYMENT_TYPE_CHOICES}
+
+    active_emails = {
+        email.lower() for email in EmployeeLogin.objects.filter(active=True).exclude(email='').values_list('email', flat=True)
+    }
+    id_numbers = set(EmployeeLogin.objects.exclude(idnumber=None).values_list('idnumber', flat=True))
+    logger.info(f"Validation data loaded - Departments: {len(departments)}, Positions: {len(positions)}, Lines: {len(lines)}, Existing ID numbers: {len(id_numbers)}")
+
+    records = []
+    errors = []
+    for index, row in enumerate(data_rows):
+        excel_row = index + 2  # Excel row number (accounting for header)
+        values = {field: _import_cell(row, field) for field in EMPLOYEE_IMPORT_REQUIRED_COLUMNS}
+
+        def reject(message):
+            errors.append({
+                'row': excel_row,
+                'name': f"{values['firstname'] or ''} {values['lastname'] or ''}".strip(),
+                'email': values['email'] or '',
+                'errors': message
+            })
 
-        for index, row in enumerate(data_rows):
-            try:
-                time.sleep(0.1)
+        missing_fields = [field for field in EMPLOYEE_IMPORT_REQUIRED_COLUMNS if not values[field]]
+        if missing_fields:
+            reject(f"Missing required fields: {', '.join(missing_fields)}")
+            continue
+
+        email = values['email'].lower()
+        if email in active_emails:
+            reject(f"Employee with email {values['email']} already exists in an active account")
+            continue
+
+        if values['idnumber'] in id_numbers:
+            reject(f"Employee with ID number {values['idnumber']} already exists")
+            continue
+
+        row_errors = []
+        lookups = {}
+        for field, options, label in (
+            ('department', departments, 'department'),
+            ('position', positions, 'position'),
+            ('line', lines, 'line'),
+        ):
+            raw_value = _import_cell(row, field)
+            lookups[field] = None
+            if raw_value:
+                if raw_value.lower() not in options:
+                    row_errors.append(f"Invalid {label}: {raw_value}")
+                else:
+                    lookups[field] = options[raw_value.lower()]
+
+        employment_type = 'Regular'  # Default to Regular
+        raw_employment_type = _import_cell(row, 'employment_type')
+        if raw_employment_type:
+            if raw_employment_type.lower() in valid_employment_types:
+                employment_type = valid_employment_types[raw_employment_type.lower()]
+            else:
+                row_errors.append(f"Invalid employment type: {raw_employment_type}. Valid options: {', '.join([choice[1] for choice in EmploymentInformation.EMPLOYMENT_TYPE_CHOICES])}")
+
+        if row_errors:
+            reject("; ".join(row_errors))
+            continue
+
+        active_emails.add(email)
+        id_numbers.add(values['idnumber'])
+        records.append({
+            'row': excel_row,
+            'idnumber': values['idnumber'],
+            'firstname': values['firstname'],
+            'lastname': values['lastname'],
+            'email': email,
+            'department': lookups['department'],
+            'position': lookups['position'],
+            'line': lookups['line'],
+            'employment_type': employment_type,
+            'date_hired': _parse_import_date_hired(row.get('date_hired')),
+            'tin_number': _import_cell(row, 'tin_number'),
+            'sss_number': _import_cell(row, 'sss_number'),
+            'hdmf_number': _import_cell(row, 'hdmf_number'),
+            'philhealth_number': _import_cell(row, 'philhealth_number'),
+            'bank_account': _import_cell(row, 'bank_account'),
+        })
 
-                logger.info(f"Processing row {index + 1}/{total_rows}: {row.get('firstname', 'N/A')} {row.get('lastname', 'N/A')}")
+    return records, errors
+
+def _build_import_employee(record, password_hash):
+    # bulk_create skips EmployeeLogin.save(), so apply its defaults here
+    return EmployeeLogin(
+        idnumber=record['idnumber'],
+        username=record['lastname'].lower(),
+        firstname=record['firstname'],
+        lastname=record['lastname'],
+        email=record['email'],
+        status='approved',
+        password=password_hash,
+        avatar='profile/avatar.svg',
+        is_active=True,
+    )
 
-                required_fields = ['idnumber', 'firstname', 'lastname', 'email']
-                missing_fields = [field for field in required_fields if not row.get(field)]
-                if missing_fields:
-                    logger.error(f"Row {index + 1}: Missing required fields: {missing_fields}")
-                    raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+def _build_import_employment_info(record, employee):
+    return EmploymentInformation(
+        user=employee,
+        department=record['department'],
+        position=record['position'],
+        line=record['line'],
+        employment_type=record['employment_type'],
+        date_hired=record['date_hired'],
+        tin_number=record['tin_number'],
+        sss_number=record['sss_number'],
+        hdmf_number=record['hdmf_number'],
+        philhealth_number=record['philhealth_number'],
+        bank_account=record['bank_account'],
+    )
 
-                if EmployeeLogin.objects.filter(email=row['email'], active=True).exists():
-                    logger.error(f"Row {index + 1}: Employee with email {row['email']} already exists in an active account")
-                    raise ValueError(f"Employee with email {row['email']} already exists in an active account")
+def create_employee_import_chunk(records, password_pool):
+    """
+    Create one chunk of employees and their employment info with bulk inserts.
 
-                if EmployeeLogin.objects.filter(idnumber=row['idnumber']).exists():
-                    logger.error(f"Row {index + 1}: Employee with ID number {row['idnumber']} already exists")
-                    raise ValueError(f"Employee with ID number {row['idnumber']} already exists")
+    Password hashing dominates the cost of onboarding; PBKDF2 releases the GIL,
+    so the hashes for a chunk are computed on a thread pool. If the bulk insert
+    fails (e.g. a concurrent signup took an ID number), the chunk is retried row
+    by row so only the offending rows are reported.
 
-                errors = []
+    Returns a list of (record, error message) for the rows that failed.
+    """
+    password_hashes = list(password_pool.map(lambda record: make_password(f"Repco{record['idnumber']}"), records))
+    employees = [_build_import_employee(record, password_hash) for record, password_hash in zip(records, password_hashes)]
 
-                department_obj = None
-                if row.get('department'):
-                    dept_key = str(row['department']).lower().strip()
-                    if dept_key not in departments:
-                        errors.append(f"Invalid department: {row['department']}")
-                    else:
-                        department_obj = departments[dept_key]
+    try:
+        with transaction.atomic():
+            EmployeeLogin.objects.bulk_create(employees)
+            EmploymentInformation.objects.bulk_create([
+                _build_import_employment_info(record, employee) for record, employee in zip(records, employees)
+            ])
+        return []
+    except Exception as bulk_error:
+        logger.warning(f"Bulk insert failed for rows {records[0]['row']}-{records[-1]['row']}, retrying row by row: {str(bulk_error)}")
 
-                position_obj = None
-                if row.get('position'):
-                    pos_key = str(row['position']).lower().strip()
-                    if pos_key not in positions:
-                        errors.append(f"Invalid position: {row['position']}")
-                    else:
-                        position_obj = positions[pos_key]
+    failures = []
+    for record, password_hash in zip(records, password_hashes):
+        try:
+            with transaction.atomic():
+                employee = _build_import_employee(record, password_hash)
+                employee.save()
+                _build_import_employment_info(record, employee).save()
+        except Exception as db_error:
+            logger.error(f"Database error for row {record['row']}: {str(db_error)}")
+            failures.append((record, f"Database error: {str(db_error)}"))
+    return failures
 
-                line_obj = None
-                if row.get('line'):
-                    line_key = str(row['line']).lower().strip()
-                    if line_key not in lines:
-                        errors.append(f"Invalid line: {row['line']}")
-                    else:
-                        line_obj = lines[line_key]
+def process_employee_import(job):
+    logger.info(f"Starting background import process for job: {job.pk}")
 
-                employment_type = None
-                if row.get('employment_type'):
-                    emp_type_key = str(row['employment_type']).lower().strip()
-                    if emp_type_key in valid_employment_types:
-                        employment_type = valid_employment_types[emp_type_key]
-                    else:
-                        errors.append(f"Invalid employment type: {row['employment_type']}. Valid options: {', '.join([choice[1] for choice in EmploymentInformation.EMPLOYMENT_TYPE_CHOICES])}")
-
-                if not employment_type:
-                    employment_type = 'Regular'  # Default to Regular
-
-                if errors:
-                    logger.error(f"Row {index + 1}: Validation errors: {errors}")
-                    raise ValueError("; ".join(errors))
-
-                with transaction.atomic():
-                    try:
-                        # Create EmployeeLogin
-                        idnumber_val = str(row['idnumber']).strip()
-                        default_password = f"Repco{idnumber_val}"
-                        employee = EmployeeLogin.objects.create(
-                            idnumber=idnumber_val,
-                            username=str(row['lastname']).strip().lower(), 
-                            firstname=str(row['firstname']).strip(),
-                            lastname=str(row['lastname']).strip(),
-                            email=str(row['email']).strip().lower(),
-                            status='approved',
-                            password=make_password(default_password)
-                        )
-
-                        logger.info(f"Created EmployeeLogin for {employee.firstname} {employee.lastname}")
-
-                        date_hired = timezone.now().date()
-                        if row.get('date_hired'):
-                            try:
-                                if isinstance(row['date_hired'], str):
-                                    date_hired = datetime.strptime(row['date_hired'], '%Y-%m-%d').date()
-                                else:
-                                    date_hired = row['date_hired']
-                            except (ValueError, TypeError) as e:
-                                logger.warning(f"Invalid date format for date_hired: {row.get('date_hired')}, using current date")
-
-                        tin_number = str(row.get('tin_number', '')).strip() if row.get('tin_number') else None
-                        sss_number = str(row.get('sss_number', '')).strip() if row.get('sss_number') else None
-                        hdmf_number = str(row.get('hdmf_number', '')).strip() if row.get('hdmf_number') else None
-                        philhealth_number = str(row.get('philhealth_number', '')).strip() if row.get('philhealth_number') else None
-                        bank_account = str(row.get('bank_account', '')).strip() if row.get('bank_account') else None
-
-                        logger.info(f"Additional fields for {employee.firstname} {employee.lastname}: TIN={tin_number}, SSS={sss_number}, HDMF={hdmf_number}, PhilHealth={philhealth_number}, Bank={bank_account}")
-
-                        employment_info = EmploymentInformation.objects.create(
-                            user=employee,
-                            department=department_obj,
-                            position=position_obj,
-                            line=line_obj,
-                            employment_type=employment_type,
-                            date_hired=date_hired,
-                            tin_number=tin_number,
-                            sss_number=sss_number,
-                            hdmf_number=hdmf_number,
-                            philhealth_number=philhealth_number,
-                            bank_account=bank_account
-                        )
-                        logger.info(f"Created EmploymentInformation for {employee.firstname} {employee.lastname}")
-
-                    except Exception as db_error:
-                        logger.error(f"Database error for row {index + 1}: {str(db_error)}")
-                        import traceback
-                        logger.error(f"Database error traceback: {traceback.format_exc()}")
-                        logger.error(f"Row data: {row}")
-                        raise ValueError(f"Database error: {str(db_error)}")
-
-                import_data['success_count'] += 1
-                logger.info(f"Successfully imported employee {index + 1}/{total_rows}")
-
-            except Exception as e:
-                logger.error(f"Error processing row {index + 1}: {str(e)}")
-                import traceback
-                logger.error(f"Row {index + 1} error traceback: {traceback.format_exc()}")
-                import_data['error_count'] += 1
-                import_data['errors'].append({
-                    'row': index + 2,  # Excel row number (accounting for header)
-                    'name': f"{row.get('firstname', '')} {row.get('lastname', '')}".strip(),
-                    'email': row.get('email', ''),
-                    'errors': str(e)
+    uploaded_file = next(job.open_files())
+    try:
+        data_rows = read_employee_import_sheet(uploaded_file).to_dict('records')
+    finally:
+        uploaded_file.close()
+
+    total_rows = len(data_rows)
+    records, import_errors = validate_employee_import_rows(data_rows)
+    success_count = 0
+    processed = len(import_errors)
+    job.update_progress(processed, total=total_rows, error_count=len(import_errors), errors=import_errors)
+    logger.info(f"Import validated. {len(records)} of {total_rows} rows will be created")
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 2) as password_pool:
+        for start in range(0, len(records), EMPLOYEE_IMPORT_CHUNK_SIZE):
+            chunk = records[start:start + EMPLOYEE_IMPORT_CHUNK_SIZE]
+            failures = create_employee_import_chunk(chunk, password_pool)
+            for record, message in failures:
+                import_errors.append({
+                    'row': record['row'],
+                    'name': f"{record['firstname']} {record['lastname']}",
+                    'email': record['email'],
+                    'errors': message
                 })
 
-            # Update progress
-            import_data['processed'] = index + 1
-            cache.set(f'import_{import_id}', import_data, timeout=3600)
-
-        # Mark as completed
-        import_data['status'] = 'completed'
-        cache.set(f'import_{import_id}', import_data, timeout=3600)
+            success_count += len(chunk) - len(failures)
+            processed += len(chunk)
+            import_errors.sort(key=lambda error: error['row'])
+            job.update_progress(processed, success_count=success_count, error_count=len(import_errors), errors=import_errors)
 
-        logger.info(f"Import completed. Success: {import_data['success_count']}, Errors: {import_data['error_count']}")
+    # bulk_create bypasses the post_save signals that keep this counter and the routing table current
+    if success_count:
+        refresh_counter('total_employees')
+        schedule_routing_invalidation()
 
-    except Exception as e:
-        logger.error(f"Import process failed: {str(e)}")
-        import traceback
-        logger.error(f"Import process failed traceback: {traceback.format_exc()}")
-        
-        # Try to update the import data with error status
-        try:
-            import_data = cache.get(f'import_{import_id}')
-            if import_data:
-                import_data['status'] = 'failed'
-                import_data['error_message'] = str(e)
-                cache.set(f'import_{import_id}', import_data, timeout=3600)
-                logger.info(f"Updated import status to failed for ID: {import_id}")
-        except Exception as cache_error:
-            logger.error(f"Failed to update cache with error status: {str(cache_error)}")
+    logger.info(f"Import completed. Success: {success_count}, Errors: {len(import_errors)}")
+    return {
+        'success': True,
+        'success_count': success_count,
+        'error_count': len(import_errors),
+        'errors': import_errors
+    }
 
 @login_required(login_url="user-login")
 def api_export_filters(request):
@@ -1330,16 +1327,11 @@ def export_employees(request):
         else:
             filters &= Q(status=status)
 
-    employees = EmployeeLogin.objects.filter(filters).order_by('idnumber')
+    employees = EmployeeLogin.objects.filter(filters).select_related(
+        'personal_info', 'family_background', 'contact_person',
+        'employment_info__department', 'employment_info__line', 'employment_info__position',
+    ).prefetch_related('education').order_by('idnumber')
 
-    wb = openpyxl.Workbook()
-    ws1 = wb.active
-    ws1.title = 'Personal Information'
-    ws2 = wb.create_sheet('Employment Information')
-    ws3 = wb.create_sheet('Contact Person')
-    ws4 = wb.create_sheet('Educational Background')
-
-    # Sheet 1: Personal Information (with Family Background)
     personal_headers = [
         'ID Number', 'First Name', 'Last Name', 'Middle Name', 'Nickname', 'Work Email', 'Gender', 'Birth Date', 'Birth Place',
         'Contact Country Code', 'Contact Number',
@@ -1347,10 +1339,35 @@ def export_employees(request):
         'Provincial Block/Lot', 'Provincial Street', 'Provincial Barangay', 'Provincial City', 'Provincial Province', 'Provincial Country',
         'Mother Name', 'Father Name', 'Spouse Name', 'Children Names'
     ]
-    ws1.append(personal_headers)
-    for emp in employees:
+    employment_headers = [
+        'ID Number', 'Name', 'Department', 'Line', 'Position', 'Employment Type', 'Status', 'Date Hired',
+        'TIN Number', 'SSS Number', 'HDMF Number', 'PhilHealth Number', 'Bank Account'
+    ]
+    contact_headers = [
+        'ID Number', 'Name', 'Relationship', 'Contact Country Code', 'Contact Number', 'Address'
+    ]
+    education_headers = [
+        'ID Number', 'Level', 'School Name', 'Degree/Course', 'Year Graduated', 'Honors/Awards'
+    ]
+
+    workbook = ExportWorkbook()
+    ws1 = workbook.create_sheet('Personal Information', widths=[18] * len(personal_headers))
+    ws2 = workbook.create_sheet('Employment Information', widths=[18] * len(employment_headers))
+    ws3 = workbook.create_sheet('Contact Person', widths=[18] * len(contact_headers))
+    ws4 = workbook.create_sheet('Educational Background', widths=[18] * len(education_headers))
+    ws1.append(personal_headers, style='heading')
+    ws2.append(employment_headers, style='heading')
+    ws3.append(contact_headers, style='heading')
+    ws4.append(education_headers, style='heading')
+
+    # One pass over the employees fills all four sheets
+    for emp in iterate(employees):
         pi = getattr(emp, 'personal_info', None)
         fb = getattr(emp, 'family_background', None)
+        info = getattr(emp, 'employment_info', None)
+        cp = getattr(emp, 'contact_person', None)
+
+        # Sheet 1: Personal Information (with Family Background)
         ws1.append([
             emp.idnumber,
             emp.firstname,
@@ -1380,22 +1397,11 @@ def export_employees(request):
             fb.spouse_name if fb else '',
             fb.children_names if fb else '',
         ])
-    for col in range(1, len(personal_headers)+1):
-        ws1.column_dimensions[get_column_letter(col)].width = 18
-    for cell in ws1[1]:
-        cell.font = Font(bold=True)
 
-    # Sheet 2: Employment Information
-    employment_headers = [
-        'ID Number', 'Name', 'Department', 'Line', 'Position', 'Employment Type', 'Status', 'Date Hired',
-        'TIN Number', 'SSS Number', 'HDMF Number', 'PhilHealth Number', 'Bank Account'
-    ]
-    ws2.append(employment_headers)
-    for emp in employees:
-        info = getattr(emp, 'employment_info', None)
+        # Sheet 2: Employment Information
         name = f"{emp.lastname}, {emp.firstname}"
-        if getattr(emp, 'personal_info', None) and emp.personal_info.middle_name:
-            name += f" {emp.personal_info.middle_name}"
+        if pi and pi.middle_name:
+            name += f" {pi.middle_name}"
         ws2.append([
             emp.idnumber,
             name,
@@ -1411,18 +1417,8 @@ def export_employees(request):
             info.philhealth_number if info else '',
             info.bank_account if info else '',
         ])
-    for col in range(1, len(employment_headers)+1):
-        ws2.column_dimensions[get_column_letter(col)].width = 18
-    for cell in ws2[1]:
-        cell.font = Font(bold=True)
 
-    # Sheet 3: Contact Person
-    contact_headers = [
-        'ID Number', 'Name', 'Relationship', 'Contact Country Code', 'Contact Number', 'Address'
-    ]
-    ws3.append(contact_headers)
-    for emp in employees:
-        cp = getattr(emp, 'contact_person', None)
+        # Sheet 3: Contact Person
         ws3.append([
             emp.idnumber,
             cp.name if cp else '',
@@ -1431,19 +1427,9 @@ def export_employees(request):
             cp.contact_number if cp else '',
             cp.address if cp else '',
         ])
-    for col in range(1, len(contact_headers)+1):
-        ws3.column_dimensions[get_column_letter(col)].width = 18
-    for cell in ws3[1]:
-        cell.font = Font(bold=True)
 
-    # Sheet 4: Educational Background (one row per education record)
-    education_headers = [
-        'ID Number', 'Level', 'School Name', 'Degree/Course', 'Year Graduated', 'Honors/Awards'
-    ]
-    ws4.append(education_headers)
-    for emp in employees:
-        educations = emp.education.all()
-        for edu in educations:
+        # Sheet 4: Educational Background (one row per education record)
+        for edu in emp.education.all():
             ws4.append([
                 emp.idnumber,
                 edu.level,
@@ -1452,15 +1438,8 @@ def export_employees(request):
                 edu.year_graduated if edu.year_graduated else '',
                 edu.honors_awards if edu.honors_awards else '',
             ])
-    for col in range(1, len(education_headers)+1):
-        ws4.column_dimensions[get_column_letter(col)].width = 18
-    for cell in ws4[1]:
-        cell.font = Font(bold=True)
 
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=employees_export.xlsx'
-    wb.save(response)
-    return response
+    return workbook.response('employees_export.xlsx')
 
 @login_required(login_url="user-login")
 @require_GET